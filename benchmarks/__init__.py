@@ -0,0 +1,4 @@
+"""
+Benchmarks, which run against the in-memory PocketBase stand-in (see
+src/utils/pb/standin.py), so they don't need a live PocketBase.
+"""
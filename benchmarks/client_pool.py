@@ -0,0 +1,96 @@
+"""
+Stress tests the (thread-safe) sync PocketBase client: the request throughput of
+worker pools of growing size sharing SingletonPocketBase, and how many connections
+they opened.
+
+Usage:
+    python -m benchmarks.client_pool --requests 500 --latency 0.01
+"""
+import time
+import argparse
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import Config
+from src.utils.pb.standin import PocketBaseStandIn
+
+WORKERS: tuple[int, ...] = (1, 2, 4, 8, 16, 32)
+
+
+def run(
+    requests: int, latency: float, workers: tuple[int, ...] = WORKERS
+) -> list[dict]:
+    """
+    Runs the benchmark against a new stand-in.
+
+    Args:
+        requests (int): How many requests each worker pool sends.
+        latency (float): Seconds of latency injected per request.
+        workers (tuple[int, ...], optional): The worker pool sizes. Defaults to
+            WORKERS.
+
+    Returns:
+        list[dict]: The measurements of each worker pool.
+    """
+    directory = TemporaryDirectory()
+    server = PocketBaseStandIn(latency=latency).start()
+
+    # The clients are created when the pb modules are imported
+    Config.PocketBase.URL = server.url
+    Config.PocketBase.AdminUsername = server.admin_email
+    Config.PocketBase.AdminPassword = server.admin_password
+    Config.PocketBase.TokenCache = Path(directory.name).joinpath("token.json")
+
+    from src.utils.pb.classes import SingletonPocketBase
+
+    pb = SingletonPocketBase()
+    results: list[dict] = []
+    try:
+        pb.count("tiktok")  # Authenticates
+        for size in workers:
+            connections: int = server.connections
+            start: float = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=size) as executor:
+                for _ in executor.map(lambda _: pb.count("tiktok"), range(requests)):
+                    pass
+            seconds: float = time.perf_counter() - start
+            results.append(
+                {
+                    "workers": size,
+                    "requests": requests,
+                    "seconds": seconds,
+                    "requests_per_second": requests / seconds,
+                    "connections": server.connections - connections,
+                }
+            )
+    finally:
+        pb.instance.close()
+        server.stop()
+        directory.cleanup()
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument(
+        "--latency", type=float, default=0.01, help="Seconds of latency per request"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"Connection pool size: {Config.PocketBase.ConnectionPoolSize}\n"
+        f"{'workers':>8}{'requests':>10}{'seconds':>10}{'req/s':>10}"
+        f"{'new connections':>17}"
+    )
+    for result in run(args.requests, args.latency):
+        print(
+            f"{result['workers']:>8}{result['requests']:>10}{result['seconds']:>10.2f}"
+            f"{result['requests_per_second']:>10.1f}{result['connections']:>17}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Micro-benchmarks the JSON codecs (see src/utils/codec.py) on the payloads the
+project decodes: the SIGI_STATE of a video page, /api/creator/item_list/ pages and
+PocketBase list responses of metadata records.
+
+The payloads are generated with the shape (and about the size) of real ones, unless
+a directory of recorded ones is passed. Its files are named after the payload
+(sigi_state*.html or .json, item_list*.json, pb_list*.json).
+
+Usage:
+    python -m benchmarks.codec --repeat 20
+    python -m benchmarks.codec --payloads recorded_payloads/
+"""
+import gc
+import re
+import json
+import time
+import argparse
+from pathlib import Path
+from importlib.util import find_spec
+from typing import Any, Callable, Optional
+
+from src.apis.tiktok.typehints import ItemListPage, VideoStatsState
+from src.utils import codec
+
+# The type each payload is decoded to (besides decoding it whole)
+PAYLOAD_TYPES: dict[str, Optional[Any]] = {
+    "sigi_state": VideoStatsState,
+    "item_list": ItemListPage,
+    "pb_list": None,
+}
+
+_SIGI_STATE = re.compile(
+    r'<script id="SIGI_STATE" type="application/json">(.*?)</script>', re.DOTALL
+)
+
+
+def fake_item(index: int) -> dict:
+    """
+    Returns a raw video item, like the ones the TikTok API returns.
+    """
+    return {
+        "id": str(7_000_000_000_000_000_000 + index),
+        "desc": f"A video description #hashtag #fyp {index} " * 3,
+        "createTime": 1_689_000_000 + index,
+        "video": {
+            "id": str(index),
+            "height": 1024,
+            "width": 576,
+            "duration": 30,
+            "cover": f"https://p16-sign.tiktokcdn.com/obj/cover/{index}?x-expires=1",
+            "playAddr": f"https://v16-webapp.tiktok.com/video/{index}/?a=1988&br=2",
+            "bitrateInfo": [
+                {"Bitrate": 500_000 + step, "QualityType": step, "GearName": "a"}
+                for step in range(4)
+            ],
+        },
+        "author": {
+            "id": "6700000000000000000",
+            "uniqueId": "channel",
+            "nickname": "Channel",
+            "avatarThumb": "https://p16-sign.tiktokcdn.com/avatar/thumb",
+            "signature": "The channel's bio",
+            "verified": False,
+        },
+        "music": {"id": str(index), "title": "original sound", "duration": 30},
+        "challenges": [
+            {"id": str(step), "title": f"hashtag{step}", "desc": ""}
+            for step in range(3)
+        ],
+        "stats": {
+            "collectCount": index,
+            "commentCount": index * 2,
+            "diggCount": index * 3,
+            "playCount": index * 10,
+            "shareCount": index,
+        },
+        "textExtra": [{"hashtagName": "fyp", "start": 0, "end": 4}],
+    }
+
+
+def fake_payloads() -> dict[str, str]:
+    """
+    Returns (the JSON of) each payload.
+    """
+    items: list[dict] = [fake_item(index) for index in range(1000)]
+    sigi_state: dict = {
+        "AppContext": {"appContext": {"language": "en", "region": "GB"}},
+        "ItemModule": {items[0]["id"]: items[0]},
+        # The page also holds the related videos, their authors and comments
+        "ItemList": {"video": {"list": [item["id"] for item in items]}},
+        "RelatedItems": {item["id"]: item for item in items},
+        "UserModule": {
+            "users": {str(index): items[0]["author"] for index in range(200)}
+        },
+        "CommentItem": {
+            str(index): {"cid": str(index), "text": "A comment " * 10}
+            for index in range(500)
+        },
+    }
+    pb_list: dict = {
+        "page": 1,
+        "perPage": 500,
+        "totalItems": 500,
+        "totalPages": 1,
+        "items": [
+            {
+                "id": f"{index:015d}",
+                "collectionId": "metadata_collection",
+                "collectionName": "metadata",
+                "created": "2024-01-01 00:00:00.000Z",
+                "updated": "2024-01-01 00:00:00.000Z",
+                "tiktok": f"{index:015d}",
+                "views": item["stats"]["playCount"],
+                "likes": item["stats"]["diggCount"],
+                "everything": item,
+            }
+            for index, item in enumerate(items[:500])
+        ],
+    }
+    return {
+        "sigi_state": json.dumps(sigi_state),
+        "item_list": json.dumps(
+            {"itemList": items[:15], "hasMorePrevious": True, "extra": {"now": 1}}
+        ),
+        "pb_list": json.dumps(pb_list),
+    }
+
+
+def recorded_payloads(directory: Path) -> dict[str, str]:
+    """
+    Returns (the JSON of) each recorded payload.
+    """
+    payloads: dict[str, str] = {}
+    for path in sorted(directory.iterdir()):
+        kind: Optional[str] = next(
+            (kind for kind in PAYLOAD_TYPES if path.name.startswith(kind)), None
+        )
+        if kind is None:
+            continue
+        text: str = path.read_text()
+        if path.suffix == ".html":
+            match: Optional[re.Match] = _SIGI_STATE.search(text)
+            if match is None:
+                continue
+            text = match.group(1)
+        payloads[f"{kind}:{path.name}"] = text
+    return payloads
+
+
+def timed(function: Callable[[], Any], repeat: int) -> float:
+    """
+    Returns the fastest of repeated calls of a function, in ms. Like timeit, the
+    garbage collector is off while they run.
+    """
+    fastest: float = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start: float = time.perf_counter()
+            function()
+            fastest = min(fastest, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return fastest * 1000
+
+
+def run(payloads: dict[str, str], repeat: int) -> list[dict]:
+    """
+    Times decoding each payload (whole and, if it has one, to its type) and encoding
+    it back with each installed codec.
+
+    Args:
+        payloads (dict[str, str]): The JSON of each payload.
+        repeat (int): How many times each is timed (the fastest counts).
+
+    Returns:
+        list[dict]: The measurements of each payload and codec.
+    """
+    results: list[dict] = []
+    for name in codec.CODECS:
+        if name != "json" and find_spec(name) is None:
+            continue
+        json_codec: codec.JSONCodec = codec.use_codec(name)
+        for payload, text in payloads.items():
+            data: bytes = text.encode()
+            target: Optional[Any] = PAYLOAD_TYPES[payload.split(":")[0]]
+            value: Any = json_codec.loads(data)
+            results.append(
+                {
+                    "payload": payload,
+                    "codec": name,
+                    "kb": len(data) / 1024,
+                    "loads_ms": timed(lambda: json_codec.loads(data), repeat),
+                    "decode_ms": (
+                        timed(lambda: json_codec.decode(data, target), repeat)
+                        if target is not None
+                        else None
+                    ),
+                    "dumps_ms": timed(lambda: json_codec.dumps(value), repeat),
+                }
+            )
+    codec.use_codec()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--payloads", type=Path, help="A directory of recorded payloads"
+    )
+    args = parser.parse_args()
+
+    payloads: dict[str, str] = (
+        recorded_payloads(args.payloads) if args.payloads else fake_payloads()
+    )
+    print(
+        f"{'payload':<24}{'codec':<10}{'KB':>8}{'loads ms':>10}{'decode ms':>11}"
+        f"{'dumps ms':>10}"
+    )
+    for result in run(payloads, args.repeat):
+        decode_ms: str = (
+            f"{result['decode_ms']:.2f}" if result["decode_ms"] is not None else "-"
+        )
+        print(
+            f"{result['payload']:<24}{result['codec']:<10}{result['kb']:>8.0f}"
+            f"{result['loads_ms']:>10.2f}{decode_ms:>11}{result['dumps_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
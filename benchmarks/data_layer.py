@@ -0,0 +1,211 @@
+"""
+Benchmarks the data layer: how many PocketBase requests (and how long) it takes to
+ingest (and re-ingest) a video, download a video and create a compilation, and how long a search by
+a field takes with and without the replica.
+
+Usage:
+    python -m benchmarks.data_layer --videos 100 --latency 0.002
+"""
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Callable, Optional
+from unittest import mock
+from tempfile import TemporaryDirectory
+
+from src.config import Config
+from src.utils.pb.metrics import request_metrics, stage as metrics_stage
+from src.utils.pb.standin import PocketBaseStandIn
+
+# Videos per benchmarked compilation
+COMPILATION_SIZE: int = 10
+
+
+def fake_tiktok_items(count: int, offset: int = 0) -> list[dict]:
+    """
+    Returns raw video items, like the ones the TikTok API returns.
+
+    Args:
+        count (int)
+        offset (int, optional): The first video id. Defaults to 0.
+
+    Returns:
+        list[dict]
+    """
+    return [
+        {
+            "id": str(7_000_000_000 + offset + index),
+            "stats": {"diggCount": index, "playCount": index * 10},
+        }
+        for index in range(count)
+    ]
+
+
+def measure(
+    server: PocketBaseStandIn, name: str, units: int, stage: Callable[[], None]
+) -> dict:
+    """
+    Runs a stage of the benchmark and measures the requests it sent. They're also
+    attributed to the stage in the request metrics.
+
+    Args:
+        server (PocketBaseStandIn)
+        name (str): The name of the stage.
+        units (int): How many videos (or compilations) the stage handles.
+        stage (Callable[[], None])
+
+    Returns:
+        dict: The measurements.
+    """
+    server.reset_counters()
+    start: float = time.perf_counter()
+    with metrics_stage(name):
+        stage()
+    seconds: float = time.perf_counter() - start
+    return {
+        "stage": name,
+        "units": units,
+        "requests": server.request_count,
+        "requests_per_unit": server.request_count / units,
+        "seconds": seconds,
+        "ms_per_unit": seconds / units * 1000,
+    }
+
+
+def run(videos: int, latency: float, metrics: Optional[Path] = None) -> list[dict]:
+    """
+    Runs the benchmark against a new stand-in.
+
+    Args:
+        videos (int): How many videos to ingest, download and compile.
+        latency (float): Seconds of latency injected per request.
+        metrics (Optional[Path], optional): Dump the request metrics (per stage,
+            collection and operation) here. Defaults to None.
+
+    Returns:
+        list[dict]: The measurements of each stage.
+    """
+    directory = TemporaryDirectory()
+    server = PocketBaseStandIn(latency=latency).start()
+
+    # The clients are created when the pb modules are imported
+    Config.PocketBase.URL = server.url
+    Config.PocketBase.AdminUsername = server.admin_email
+    Config.PocketBase.AdminPassword = server.admin_password
+    Config.PocketBase.TokenCache = Path(directory.name).joinpath("token.json")
+
+    from src.compilation.models import VideoCompilation
+    from src.download import actions as download_actions
+    from src.utils.pb.actions import (
+        insert_tiktok_channel_videos,
+        queue_tiktok_channel_videos,
+    )
+    from src.utils.pb.classes import SingletonPocketBase, AsyncSingletonPocketBase
+    from src.utils.pb.collections import Compilation
+    from src.utils.pb.writebehind import WriteBehindQueue
+
+    pb = SingletonPocketBase()
+    results: list[dict] = []
+    items: list[dict] = fake_tiktok_items(videos)
+    downloaded: list[Path] = []
+
+    async def ingest() -> None:
+        await insert_tiktok_channel_videos("benchmark", items)
+        await AsyncSingletonPocketBase().close()
+
+    def ingest_queued() -> None:
+        with WriteBehindQueue(Path(directory.name).joinpath("journal.sqlite3")) as queue:
+            queue_tiktok_channel_videos(
+                "benchmark_queued", fake_tiktok_items(videos, videos), queue
+            )
+            queue.flush()
+
+    def download() -> None:
+        def fake_download_video(link: str, video: Path) -> None:
+            video.touch()
+            downloaded.append(video)
+
+        with mock.patch.object(
+            download_actions, "get_tiktok_video_download_link", lambda url: url
+        ), mock.patch.object(download_actions, "download_video", fake_download_video):
+            download_actions.download_tiktok_videos_from_same_channel_and_update_pb(
+                tiktok_records, Path(directory.name)
+            )
+
+    def compile_videos() -> None:
+        for start in range(0, len(downloaded), COMPILATION_SIZE):
+            paths: list[Path] = downloaded[start : start + COMPILATION_SIZE]
+            compilation_video: Path = Path(directory.name).joinpath(
+                f"compilation_{start}.mp4"
+            )
+            compilation_video.touch()
+            Compilation.create_record(
+                VideoCompilation(
+                    f"Benchmark compilation {start}",
+                    paths,
+                    [path.stem for path in paths],
+                    compilation_video,
+                    {},
+                )
+            )
+
+    def read() -> None:
+        for item in items:
+            pb.search_single_record("tiktok", "video_id", item["id"])
+
+    try:
+        pb.count("tiktok")  # Authenticates
+
+        results.append(measure(server, "ingest", videos, lambda: asyncio.run(ingest())))
+        # Re-discovering the channel only looks the (unchanged) videos up
+        results.append(
+            measure(server, "re-ingest", videos, lambda: asyncio.run(ingest()))
+        )
+        results.append(measure(server, "ingest (write-behind)", videos, ingest_queued))
+
+        tiktok_records = pb.search("tiktok", {"filter": "query = 'benchmark'"})
+        results.append(measure(server, "download", videos, download))
+
+        compilations: int = max(-(-len(downloaded) // COMPILATION_SIZE), 1)
+        results.append(measure(server, "compilation", compilations, compile_videos))
+
+        results.append(measure(server, "read", videos, read))
+        pb.start_replica()
+        results.append(measure(server, "read (replica)", videos, read))
+        if metrics is not None:
+            request_metrics.dump(metrics)
+    finally:
+        pb.stop_replica()
+        pb.instance.close()
+        server.stop()
+        directory.cleanup()
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--videos", type=int, default=100)
+    parser.add_argument(
+        "--latency", type=float, default=0.002, help="Seconds of latency per request"
+    )
+    parser.add_argument(
+        "--metrics", type=Path, help="Dump the request metrics (as JSON) here"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'stage':<24}{'units':>8}{'requests':>10}{'req/unit':>10}"
+        f"{'seconds':>10}{'ms/unit':>10}"
+    )
+    for result in run(args.videos, args.latency, args.metrics):
+        print(
+            f"{result['stage']:<24}{result['units']:>8}{result['requests']:>10}"
+            f"{result['requests_per_unit']:>10.2f}{result['seconds']:>10.2f}"
+            f"{result['ms_per_unit']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmarks the local SQLite mirror: how long its first and incremental syncs take,
+and how long the channel queries take on it and over HTTP.
+
+Usage:
+    python -m benchmarks.mirror --tiktoks 20000 --channels 100 --latency 0.002
+"""
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Callable
+from tempfile import TemporaryDirectory
+
+from src.config import Config
+from src.utils.pb.standin import PocketBaseStandIn
+
+
+def seed(server: PocketBaseStandIn, tiktoks: int, channels: int) -> list[str]:
+    """
+    Inserts tiktok, metadata and video records spread over channels into the
+    stand-in. A third of the videos are used.
+
+    Args:
+        server (PocketBaseStandIn)
+        tiktoks (int)
+        channels (int)
+
+    Returns:
+        list[str]: The channels.
+    """
+    names: list[str] = [f"channel{index}" for index in range(channels)]
+    tiktok_records: list[dict] = server.seed(
+        "tiktok",
+        [
+            {
+                "url": f"https://www.tiktok.com/@{names[index % channels]}/video/{index}",
+                "origin": "benchmark",
+                "query": names[index % channels],
+                "video_id": str(7_000_000_000 + index),
+            }
+            for index in range(tiktoks)
+        ],
+    )
+    server.seed(
+        "metadata",
+        [
+            {
+                "tiktok": record["id"],
+                "views": (index * 7919) % 1_000_003,
+                "likes": index,
+                "everything": {"stats": {"playCount": index}},
+            }
+            for index, record in enumerate(tiktok_records)
+        ],
+    )
+    server.seed(
+        "videos",
+        [
+            {
+                "tiktok": record["id"],
+                "path": f"/videos/{record['video_id']}.mp4",
+                "used": index % 3 == 0,
+                "deleted": False,
+            }
+            for index, record in enumerate(tiktok_records)
+        ],
+    )
+    return names
+
+
+def timed(function: Callable[[], Any]) -> tuple[Any, float]:
+    """
+    Calls a function.
+
+    Returns:
+        tuple[Any, float]: What it returned and how many seconds it took.
+    """
+    start: float = time.perf_counter()
+    result: Any = function()
+    return result, time.perf_counter() - start
+
+
+def run(tiktoks: int, channels: int, latency: float) -> dict[str, list[dict]]:
+    """
+    Runs the benchmark against a new stand-in.
+
+    Args:
+        tiktoks (int): How many tiktok records (each with its metadata and video
+            record) are seeded.
+        channels (int): Over how many channels they are spread.
+        latency (float): Seconds of latency injected per request.
+
+    Returns:
+        dict[str, list[dict]]: The measurements of the syncs and of the queries.
+    """
+    directory = TemporaryDirectory()
+    server = PocketBaseStandIn(latency=latency).start()
+
+    # The clients are created when the pb modules are imported
+    Config.PocketBase.URL = server.url
+    Config.PocketBase.AdminUsername = server.admin_email
+    Config.PocketBase.AdminPassword = server.admin_password
+    Config.PocketBase.TokenCache = Path(directory.name).joinpath("token.json")
+
+    from src.utils.pb import queries
+    from src.utils.pb.classes import SingletonPocketBase
+    from src.utils.pb.collections import VideoCollection
+    from src.utils.pb.mirror import Mirror
+
+    pb = SingletonPocketBase()
+    mirror = Mirror(Path(directory.name).joinpath("mirror.sqlite3"))
+    results: dict[str, list[dict]] = {"syncs": [], "queries": []}
+    try:
+        channel: str = seed(server, tiktoks, channels)[0]
+        pb.count("tiktok")  # Authenticates
+
+        for name in ("first", "incremental"):
+            server.requests = []
+            fetched, seconds = timed(mirror.sync)
+            results["syncs"].append(
+                {
+                    "sync": name,
+                    "records": sum(fetched.values()),
+                    "requests": len(server.requests),
+                    "seconds": seconds,
+                }
+            )
+
+        benchmarked: dict[str, tuple[Callable, Callable]] = {
+            "most viewed": (
+                lambda: queries.most_viewed_tiktoks_from_channel(channel),
+                lambda: mirror.most_viewed_tiktoks_from_channel(channel),
+            ),
+            "unused videos": (
+                lambda: VideoCollection.find_unsed_videos_by_query(channel),
+                lambda: mirror.find_unused_videos_by_query(channel),
+            ),
+            "channel records": (
+                lambda: queries.all_pb_records_of_channel(channel),
+                lambda: mirror.all_records_of_channel(channel),
+            ),
+        }
+        for name, (over_http, on_mirror) in benchmarked.items():
+            server.requests = []
+            _, http_seconds = timed(over_http)
+            requests: int = len(server.requests)
+            _, mirror_seconds = timed(on_mirror)
+            results["queries"].append(
+                {
+                    "query": name,
+                    "requests": requests,
+                    "http_ms": http_seconds * 1000,
+                    "mirror_ms": mirror_seconds * 1000,
+                }
+            )
+    finally:
+        mirror.close()
+        pb.instance.close()
+        server.stop()
+        directory.cleanup()
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tiktoks", type=int, default=20_000)
+    parser.add_argument("--channels", type=int, default=100)
+    parser.add_argument(
+        "--latency", type=float, default=0.002, help="Seconds of latency per request"
+    )
+    args = parser.parse_args()
+
+    results: dict[str, list[dict]] = run(args.tiktoks, args.channels, args.latency)
+    print(f"{'sync':<16}{'records':>10}{'requests':>10}{'seconds':>10}")
+    for result in results["syncs"]:
+        print(
+            f"{result['sync']:<16}{result['records']:>10}{result['requests']:>10}"
+            f"{result['seconds']:>10.2f}"
+        )
+    print(f"\n{'query':<16}{'requests':>10}{'http ms':>10}{'mirror ms':>11}")
+    for result in results["queries"]:
+        print(
+            f"{result['query']:<16}{result['requests']:>10}{result['http_ms']:>10.1f}"
+            f"{result['mirror_ms']:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmarks the memory (and decode time) of holding many metadata records as
+pocketbase Records and as MetadataRows.
+
+Usage:
+    python -m benchmarks.rows --records 100000
+"""
+import time
+import argparse
+import tracemalloc
+from typing import Callable
+
+from pocketbase.models import Record
+
+from src.utils.pb.rows import MetadataRow
+
+
+def fake_metadata_items(count: int) -> list[dict]:
+    """
+    Returns raw metadata records, like the ones PocketBase returns.
+
+    Args:
+        count (int)
+
+    Returns:
+        list[dict]
+    """
+    return [
+        {
+            "id": f"{index:015d}",
+            "collectionId": "metadata_collection",
+            "collectionName": "metadata",
+            "created": "2024-01-01 00:00:00.000Z",
+            "updated": "2024-01-01 00:00:00.000Z",
+            "tiktok": f"{index:015d}",
+            "views": index * 10,
+            "likes": index,
+            "everything": {
+                "id": str(7_000_000_000 + index),
+                "desc": "A video description #hashtag",
+                "stats": {"diggCount": index, "playCount": index * 10},
+                "author": {"uniqueId": "channel", "nickname": "Channel"},
+                "music": {"title": "original sound", "duration": 30},
+            },
+        }
+        for index in range(count)
+    ]
+
+
+def measure(name: str, build: Callable[[], list]) -> dict:
+    """
+    Builds the objects and measures the memory they hold.
+
+    Args:
+        name (str)
+        build (Callable[[], list])
+
+    Returns:
+        dict: The measurements.
+    """
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    objects: list = build()
+    seconds: float = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "name": name,
+        "records": len(objects),
+        "mb": size / 1024 / 1024,
+        "seconds": seconds,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'objects':<16}{'records':>10}{'MB':>10}{'seconds':>10}")
+    builders: dict[str, Callable[[list[dict]], list]] = {
+        "Record": lambda items: [Record(item) for item in items],
+        "MetadataRow": MetadataRow.from_items,
+    }
+    for name, build in builders.items():
+        result: dict = measure(
+            name, lambda: build(fake_metadata_items(args.records))
+        )
+        print(
+            f"{result['name']:<16}{result['records']:>10}{result['mb']:>10.1f}"
+            f"{result['seconds']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmarks the snapshots: how many rows per second are exported from, and imported
+into, the stand-in, and how big the snapshot is.
+
+Usage:
+    python -m benchmarks.snapshot --tiktoks 1000 --latency 0.002
+"""
+import argparse
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from src.config import Config
+from src.utils.pb.standin import PocketBaseStandIn
+
+from .mirror import seed
+
+
+def run(tiktoks: int, latency: float) -> list[dict]:
+    """
+    Runs the benchmark against a new stand-in: a snapshot of the seeded records is
+    exported, the records are dropped and the snapshot is imported.
+
+    Args:
+        tiktoks (int): How many tiktok records (each with its metadata and video
+            record) are seeded.
+        latency (float): Seconds of latency injected per request.
+
+    Returns:
+        list[dict]: The measurements of the export and of the import.
+    """
+    directory = TemporaryDirectory()
+    server = PocketBaseStandIn(latency=latency).start()
+
+    # The clients are created when the pb modules are imported
+    Config.PocketBase.URL = server.url
+    Config.PocketBase.AdminUsername = server.admin_email
+    Config.PocketBase.AdminPassword = server.admin_password
+    Config.PocketBase.TokenCache = Path(directory.name).joinpath("token.json")
+
+    from src.utils.pb.classes import SingletonPocketBase
+    from src.utils.pb.snapshot import SnapshotReport, export_snapshot, import_snapshot
+
+    pb = SingletonPocketBase()
+    path: Path = Path(directory.name).joinpath("snapshot.jsonl.gz")
+    results: list[dict] = []
+    try:
+        seed(server, tiktoks, channels=100)
+        pb.count("tiktok")  # Authenticates
+
+        server.requests = []
+        report: SnapshotReport = export_snapshot(path)
+        results.append({"direction": "export", "requests": len(server.requests)})
+        results[-1].update(vars(report), rows_per_second=report.rows_per_second)
+
+        with server.database.lock:
+            for records in server.database.records.values():
+                records.clear()
+        server.requests = []
+        report = import_snapshot(path)
+        results.append({"direction": "import", "requests": len(server.requests)})
+        results[-1].update(vars(report), rows_per_second=report.rows_per_second)
+
+        for result in results:
+            result["mb"] = path.stat().st_size / 1024 / 1024
+    finally:
+        pb.instance.close()
+        server.stop()
+        directory.cleanup()
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tiktoks", type=int, default=1000)
+    parser.add_argument(
+        "--latency", type=float, default=0.002, help="Seconds of latency per request"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'direction':<12}{'records':>10}{'failed':>8}{'requests':>10}"
+        f"{'seconds':>10}{'rows/s':>10}{'MB':>8}"
+    )
+    for result in run(args.tiktoks, args.latency):
+        print(
+            f"{result['direction']:<12}{sum(result['records'].values()):>10}"
+            f"{len(result['failed']):>8}{result['requests']:>10}"
+            f"{result['seconds']:>10.2f}{result['rows_per_second']:>10.0f}"
+            f"{result['mb']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
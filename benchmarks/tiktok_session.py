@@ -0,0 +1,203 @@
+"""
+Compares TiktokAPI's requests with a session per request (as they used to be sent)
+and with its shared keep-alive session, against a local TikTok stand-in: fetching
+video pages one after another and concurrently, and discovering a channel's videos.
+
+The stand-in's handshake latency is what each new connection costs (DNS, TCP and,
+with TikTok, TLS handshakes), its latency what each request does.
+
+Usage:
+    python -m benchmarks.tiktok_session --videos 200 --handshake-latency 0.05
+"""
+import time
+import asyncio
+import argparse
+from typing import AsyncGenerator, Awaitable, Callable
+
+import aiohttp
+
+from src.config import Config
+from src.apis.tiktok.api import ChannelDetailsAPI, TiktokAPI
+from src.apis.tiktok.standin import CHANNEL, SEC_UID, TiktokStandIn
+from src.utils.codec import loads
+
+
+def channel_details() -> ChannelDetailsAPI:
+    """
+    Returns the details of the stand-in's channel (without fetching them).
+    """
+    details = ChannelDetailsAPI(CHANNEL, "")
+    details.response = {"userInfo": {"user": {"secUid": SEC_UID}}}
+    return details
+
+
+async def fetch_video_per_session(url: str) -> None | dict:
+    """
+    Fetches the stats of a video with a session of its own.
+    """
+    async with TiktokAPI() as api:
+        return await api.fetch_video_metadata_stats(url)
+
+
+async def discover_per_session(server: TiktokStandIn) -> AsyncGenerator:
+    """
+    Discovers the channel's videos with a session per page.
+    """
+    cursor: int = 99_999_999_999_999_999_999_999
+    while True:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(
+                f"{server.url}/api/creator/item_list/?aid=1998&type=1&count=15"
+                f"&cursor={cursor}&secUid={SEC_UID}&verifyF=verify_",
+                timeout=15,
+            ) as response:
+                response.raise_for_status()
+                data: dict = loads(await response.read())
+        if not data["itemList"]:
+            break
+        for item in data["itemList"]:
+            yield item
+        if not data["hasMorePrevious"]:
+            break
+        cursor = data["itemList"][-1]["createTime"] * 1000
+
+
+async def gather_limited(
+    fetch: Callable[[str], Awaitable], urls: list[str], concurrency: int
+) -> list:
+    """
+    Fetches urls concurrently, at most concurrency at a time.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(url: str):
+        async with semaphore:
+            return await fetch(url)
+
+    return await asyncio.gather(*(limited(url) for url in urls))
+
+
+async def stages(
+    server: TiktokStandIn, concurrency: int
+) -> AsyncGenerator[tuple[str, str, Callable[[], Awaitable]], None]:
+    """
+    Yields the name, mode and coroutine function of each stage.
+    """
+    urls: list[str] = [server.video_url(item) for item in server.items]
+
+    async def sequential_per_session() -> None:
+        for url in urls:
+            assert await fetch_video_per_session(url) is not None
+
+    async def concurrent_per_session() -> None:
+        results: list = await gather_limited(fetch_video_per_session, urls, concurrency)
+        assert None not in results
+
+    async def discovery_per_session() -> None:
+        items: list = [item async for item in discover_per_session(server)]
+        assert len(items) == len(server.items)
+
+    yield "video pages", "per request", sequential_per_session
+    yield f"video pages x{concurrency}", "per request", concurrent_per_session
+    yield "channel pages", "per request", discovery_per_session
+
+    async with TiktokAPI() as api:
+
+        async def sequential_shared() -> None:
+            for url in urls:
+                assert await api.fetch_video_metadata_stats(url) is not None
+
+        async def concurrent_shared() -> None:
+            results: list = await gather_limited(
+                api.fetch_video_metadata_stats, urls, concurrency
+            )
+            assert None not in results
+
+        async def discovery_shared() -> None:
+            items: list = [
+                item async for item in api.get_all_video_from_channel(channel_details())
+            ]
+            assert len(items) == len(server.items)
+
+        yield "video pages", "shared", sequential_shared
+        yield f"video pages x{concurrency}", "shared", concurrent_shared
+        yield "channel pages", "shared", discovery_shared
+
+
+async def measure(server: TiktokStandIn, concurrency: int) -> list[dict]:
+    results: list[dict] = []
+    async for name, mode, stage in stages(server, concurrency):
+        server.reset_counters()
+        start: float = time.perf_counter()
+        await stage()
+        seconds: float = time.perf_counter() - start
+        results.append(
+            {
+                "stage": name,
+                "session": mode,
+                "requests": server.request_count,
+                "connections": server.connections,
+                "seconds": seconds,
+                "requests_per_second": server.request_count / seconds,
+            }
+        )
+    return results
+
+
+def run(
+    videos: int, handshake_latency: float, latency: float, concurrency: int = 10
+) -> list[dict]:
+    """
+    Runs the benchmark against a new stand-in.
+
+    Args:
+        videos (int): How many videos the stand-in's channel has.
+        handshake_latency (float): Seconds of latency injected per new connection.
+        latency (float): Seconds of latency injected per request.
+        concurrency (int, optional): How many video pages are fetched at a time in
+            the concurrent stages. Defaults to 10.
+
+    Returns:
+        list[dict]: The measurements of each stage, with each kind of session.
+    """
+    server = TiktokStandIn(
+        videos=videos, latency=latency, handshake_latency=handshake_latency
+    ).start()
+    Config.Apis.Tiktok.URL = server.url
+    try:
+        return asyncio.run(measure(server, concurrency))
+    finally:
+        server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--videos", type=int, default=200)
+    parser.add_argument(
+        "--handshake-latency",
+        type=float,
+        default=0.05,
+        help="Seconds of latency per new connection",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.005, help="Seconds of latency per request"
+    )
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    print(
+        f"{'stage':<20}{'session':<14}{'requests':>10}{'connections':>13}"
+        f"{'seconds':>10}{'req/s':>10}"
+    )
+    for result in run(
+        args.videos, args.handshake_latency, args.latency, args.concurrency
+    ):
+        print(
+            f"{result['stage']:<20}{result['session']:<14}{result['requests']:>10}"
+            f"{result['connections']:>13}{result['seconds']:>10.2f}"
+            f"{result['requests_per_second']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
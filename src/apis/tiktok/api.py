@@ -1,6 +1,5 @@
 from turtle import Turtle
 import requests
-import json
 import base64
 import time
 import re, traceback
@@ -10,15 +9,26 @@ from urllib.parse import urlencode, quote
 from .browser import Browser
 from .ultis import set_url, get_param_url
 from .encryption import get_tt_param
-
+from .typehints import (
+    ChallengeState,
+    ItemListPage,
+    MusicState,
+    SigiState,
+    VideoStatsState,
+)
+
+import asyncio
 from functools import lru_cache
-from typing import Generator
+from typing import Generator, Optional
 
 from typeguard import typechecked
 
 import aiohttp
 
+from ...config import Config
 from ...logger import SingletonLogger
+from ...utils.codec import decode, loads
+from ...utils.helpers import close_session, release_session
 from ...utils.vpn.nordvpn import establish_nordvpn_connection
 from ...utils.pb.helpers import get_video_id_from_url
 
@@ -58,7 +68,7 @@ class ChannelDetailsAPI:
         )
         response.raise_for_status()
 
-        self.response = response.json()
+        self.response = loads(response.content)
         return self.response
 
     def get_secuid(self) -> str:
@@ -73,11 +83,74 @@ class ChannelDetailsAPI:
 
 
 class TiktokAPI:
+    """
+    The async methods share a session, so their requests reuse keep-alive
+    connections (see Config.Apis.Tiktok) rather than each paying for DNS, TCP and
+    TLS handshakes. Use it as an async context manager, or close() it:
+
+        async with TiktokAPI() as api:
+            info = await api.get_video_info(url)
+    """
+
     def __init__(self):
         self.BASE_URL = "https://www.tiktok.com/node/"
 
         self.user_info = None
 
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self) -> "TiktokAPI":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    async def __get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the shared session. Sessions are bound to an event loop, so a new
+        one is created (and the old one closed, see release_session) if we're now
+        running in a different loop (i.e. another asyncio.run call).
+
+        Returns:
+            aiohttp.ClientSession
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self.http_session is None
+            or self.http_session.closed
+            or self.__loop is not loop
+        ):
+            old_session, old_loop = self.http_session, self.__loop
+            logger.info("Creating the shared TikTok session")
+            self.http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=Config.Apis.Tiktok.ConnectionLimit,
+                    limit_per_host=Config.Apis.Tiktok.ConnectionLimitPerHost,
+                    ttl_dns_cache=Config.Apis.Tiktok.DnsCacheTTL,
+                    keepalive_timeout=Config.Apis.Tiktok.KeepAliveTimeout,
+                )
+            )
+            self.__loop = loop
+            # Replaced first, so concurrent requests don't replace it again
+            if old_session is not None and old_loop is not loop:
+                await release_session(old_session, old_loop)
+        return self.http_session
+
+    async def close(self) -> None:
+        """
+        Closes the shared session (and its connections). Call it from the event loop
+        which used the session last, as a session can't be closed once its loop is
+        (see release_session).
+        """
+        if self.http_session is not None and not self.http_session.closed:
+            logger.info("Closing the shared TikTok session")
+            if self.__loop is asyncio.get_running_loop():
+                await close_session(self.http_session)
+            else:
+                await release_session(self.http_session, self.__loop)
+        self.http_session = None
+
     def openBrowser(self, url="https://tiktok.com/", show_br=False):
         self.browser = Browser(url, show_br)
         self.browser.launch_borwser()
@@ -179,7 +252,7 @@ class TiktokAPI:
                     "User-Agent": "Mozilla/5.0  (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) coc_coc_browser/86.0.170 Chrome/80.0.3987.170 Safari/537.36",
                 },
             )
-            resp = res.json()
+            resp = loads(res.content)
             return resp["body"], res.cookies.get_dict()
         except Exception:
             print(traceback.format_exc())
@@ -190,7 +263,7 @@ class TiktokAPI:
             return "Challenge is required"
         try:
             res = requests.get(
-                "https://www.tiktok.com/tag/{}".format(quote(challenge)),
+                "{}/tag/{}".format(Config.Apis.Tiktok.URL, quote(challenge)),
                 headers={
                     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
                     "authority": "www.tiktok.com",
@@ -202,7 +275,7 @@ class TiktokAPI:
                 },
             )
             resp = self.__get_data_from_html_text(res.text)
-            return json.loads(resp)["ChallengePage"]
+            return decode(resp, ChallengeState)["ChallengePage"]
         except Exception:
             print(traceback.format_exc())
             return False
@@ -223,7 +296,7 @@ class TiktokAPI:
                 },
             )
             resp = self.__get_data_from_html_text(res.text)
-            return json.loads(resp)["props"]["pageProps"]
+            return decode(resp, MusicState)["props"]["pageProps"]
         except Exception:
             print(traceback.format_exc())
             return False
@@ -239,21 +312,37 @@ class TiktokAPI:
         Returns:
             None | dict: None if nothing returned else the response.
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                url,
-                headers=self.__get_common_request_headers(),
-            ) as response:
-                if response.status != 200:
-                    return None
+        return await self.__fetch_video_items(url, SigiState)
 
-                video_info_key: str = "ItemModule"
-                data = json.loads(self.__get_data_from_html_text(await response.text()))
-                if video_info_key not in data:
-                    return None
+    async def __fetch_video_items(self, url: str, state_type: type) -> None | dict:
+        """
+        Fetches the items of a video page, decoding the fields of state_type of its
+        SIGI_STATE.
 
-                logger.info(f"Successfully returning data for {url}")
-                return data[video_info_key]
+        Args:
+            url (str): URL to the video.
+            state_type (type): I.e. SigiState, or VideoStatsState for the stats.
+
+        Returns:
+            None | dict: The "ItemModule" of the SIGI_STATE, None if there's none.
+        """
+        session: aiohttp.ClientSession = await self.__get_session()
+        async with session.get(
+            url,
+            headers=self.__get_common_request_headers(),
+        ) as response:
+            if response.status != 200:
+                return None
+
+            video_info_key: str = "ItemModule"
+            data = decode(
+                self.__get_data_from_html_text(await response.text()), state_type
+            )
+            if video_info_key not in data:
+                return None
+
+            logger.info(f"Successfully returning data for {url}")
+            return data[video_info_key]
 
     @typechecked
     async def get_all_video_from_channel(
@@ -275,7 +364,10 @@ class TiktokAPI:
         # We use this as the initial value just to kick things off...
         cursor: int = 99_999_999_999_999_999_999_999
         sec_uid = channel_details.get_secuid()
-        url_template: str = "https://www.tiktok.com/api/creator/item_list/?aid=1998&type=1&count=15&cursor={cursor}&secUid={sec_uid}&verifyF=verify_"
+        url_template: str = (
+            Config.Apis.Tiktok.URL
+            + "/api/creator/item_list/?aid=1998&type=1&count=15&cursor={cursor}&secUid={sec_uid}&verifyF=verify_"
+        )
 
         attempts = 3
 
@@ -286,15 +378,17 @@ class TiktokAPI:
             )
 
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=15) as response:
-                        response.raise_for_status()
-                        data: dict = await response.json()
+                session: aiohttp.ClientSession = await self.__get_session()
+                async with session.get(url, timeout=15) as response:
+                    response.raise_for_status()
+                    data: dict = decode(await response.read(), ItemListPage)
             except Exception:
                 if attempts == 0:
                     break
 
                 attempts -= 1
+                # The kept alive connections won't survive the VPN switching server
+                await self.close()
                 # TODO: Change this in the future as some peeps may not live here
                 await establish_nordvpn_connection("United Kingdom")
                 continue
@@ -320,7 +414,7 @@ class TiktokAPI:
         Returns:
             tuple[str, Optional[dict]]: _description_
         """
-        response: dict | None = await TiktokAPI().get_video_info(url)
+        response: dict | None = await self.__fetch_video_items(url, VideoStatsState)
         video_id: str = str(get_video_id_from_url(url))
 
         if response is None:
@@ -0,0 +1,221 @@
+"""
+A local stand-in for the TikTok pages and endpoints TiktokAPI reads: the video
+pages (with their SIGI_STATE) and the /api/creator/item_list/ pages of a channel.
+
+It exists so TiktokAPI can be tested and benchmarked without TikTok. Each new
+connection can be made to cost what connecting to TikTok does (DNS, TCP and TLS
+handshakes), to measure connection reuse.
+
+Example:
+    with TiktokStandIn(videos=100, handshake_latency=0.05) as server:
+        Config.Apis.Tiktok.URL = server.url
+        ...
+        print(server.connections)
+"""
+import json
+import time
+import threading
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from ...logger import SingletonLogger
+
+logger = SingletonLogger()
+
+# The channel whose videos are served
+CHANNEL: str = "standin"
+SEC_UID: str = "MS4wLjABAAAAstandin"
+
+
+def fake_video_item(index: int, create_time: int) -> dict:
+    """
+    Returns a raw video item, like the ones TikTok returns.
+
+    Args:
+        index (int)
+        create_time (int): When the video was posted (seconds since the epoch).
+
+    Returns:
+        dict
+    """
+    return {
+        "id": str(7_000_000_000_000_000_000 + index),
+        "desc": f"A video description #hashtag #fyp {index}",
+        "createTime": create_time,
+        "video": {"id": str(index), "height": 1024, "width": 576, "duration": 30},
+        "author": {"uniqueId": CHANNEL, "nickname": "Stand-in", "secUid": SEC_UID},
+        "music": {"id": str(index), "title": "original sound", "duration": 30},
+        "stats": {
+            "collectCount": index,
+            "commentCount": index * 2,
+            "diggCount": index * 3,
+            "playCount": index * 10,
+            "shareCount": index,
+        },
+    }
+
+
+class TiktokStandIn:
+    """
+    A local HTTP server which behaves like (the parts we use of) TikTok.
+
+    Args:
+        videos (int, optional): How many videos the channel has. Defaults to 100.
+        page_size (int, optional): Videos per item_list page. Defaults to 15.
+        latency (float, optional): Seconds of latency injected per request.
+            Defaults to 0.
+        handshake_latency (float, optional): Seconds of latency injected per new
+            connection. Defaults to 0.
+        host (str, optional): Defaults to "127.0.0.1".
+        port (int, optional): Defaults to 0 (a free port).
+    """
+
+    def __init__(
+        self,
+        videos: int = 100,
+        page_size: int = 15,
+        latency: float = 0.0,
+        handshake_latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.page_size: int = page_size
+        self.latency: float = latency
+        self.handshake_latency: float = handshake_latency
+        # Newest first, like the item_list pages
+        now: int = int(time.time())
+        self.items: list[dict] = [
+            fake_video_item(index, now - index * 3600) for index in range(videos)
+        ]
+        self.__items_by_id: dict[str, dict] = {item["id"]: item for item in self.items}
+
+        self.lock = threading.Lock()
+        self.request_count: int = 0
+        self.connections: int = 0
+
+        self.__server = ThreadingHTTPServer((host, port), self.__make_handler())
+        self.__server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def video_url(self, item: dict) -> str:
+        """
+        Returns the URL of the page of a video.
+        """
+        return f"{self.url}/@{CHANNEL}/video/{item['id']}"
+
+    def start(self) -> "TiktokStandIn":
+        """
+        Starts serving in a background thread.
+        """
+        logger.info("Starting the TikTok stand-in")
+        threading.Thread(
+            target=self.__server.serve_forever, name="tiktok-stand-in", daemon=True
+        ).start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the server.
+        """
+        logger.info("Stopping the TikTok stand-in")
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self) -> "TiktokStandIn":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def reset_counters(self) -> None:
+        """
+        Resets the request and connection counters (i.e between benchmark stages).
+        """
+        with self.lock:
+            self.request_count = 0
+            self.connections = 0
+
+    def _handle(self, path: str, params: dict) -> tuple[int, str, bytes]:
+        """
+        Returns the status, content type and content of a GET request.
+        """
+        with self.lock:
+            self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if path.rstrip("/") == "/api/creator/item_list":
+            content: bytes = json.dumps(self.__item_list(params)).encode()
+            return 200, "application/json", content
+
+        parts: list[str] = path.strip("/").split("/")
+        if len(parts) == 3 and parts[1] == "video":
+            item: Optional[dict] = self.__items_by_id.get(parts[2])
+            if item is not None:
+                return 200, "text/html", self.__video_page(item).encode()
+        return 404, "text/html", b"<html><body>Not found</body></html>"
+
+    def __item_list(self, params: dict) -> dict:
+        # The videos posted before the cursor (in ms)
+        cursor: int = int(params.get("cursor") or 0)
+        older: list[dict] = [
+            item for item in self.items if item["createTime"] * 1000 < cursor
+        ]
+        return {
+            "itemList": older[: self.page_size],
+            "hasMorePrevious": len(older) > self.page_size,
+            "extra": {"now": int(time.time() * 1000)},
+        }
+
+    def __video_page(self, item: dict) -> str:
+        state: dict = {
+            "AppContext": {"appContext": {"language": "en", "region": "GB"}},
+            "ItemModule": {item["id"]: item},
+            "UserModule": {"users": {CHANNEL: item["author"]}},
+            # Video pages also hold related videos
+            "ItemList": {
+                "related": {"list": [related["id"] for related in self.items[:30]]}
+            },
+            "RelatedItems": {related["id"]: related for related in self.items[:30]},
+        }
+        return (
+            "<html><head><title>TikTok</title></head><body>"
+            '<script id="SIGI_STATE" type="application/json">'
+            f"{json.dumps(state)}</script></body></html>"
+        )
+
+    def __make_handler(self) -> type:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                with stand_in.lock:
+                    stand_in.connections += 1
+                if stand_in.handshake_latency:
+                    time.sleep(stand_in.handshake_latency)
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                params: dict = {
+                    key: values[-1] for key, values in parse_qs(url.query).items()
+                }
+                status, content_type, content = stand_in._handle(url.path, params)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
@@ -0,0 +1,49 @@
+"""
+The fields of the TikTok payloads which are used, to decode them with (see
+src/utils/codec.py). The rest of a payload is skipped. Items which are stored
+whole (as metadata "everything") are typed as dicts. Fields TikTok sends as null
+at times are Optional, as msgspec checks the types.
+"""
+from typing import Optional, TypedDict
+
+
+class VideoStats(TypedDict, total=False):
+    collectCount: Optional[int]
+    commentCount: Optional[int]
+    diggCount: Optional[int]
+    playCount: Optional[int]
+    shareCount: Optional[int]
+
+
+class VideoStatsItem(TypedDict, total=False):
+    stats: VideoStats
+
+
+# The /api/creator/item_list/ pages
+class ItemListPage(TypedDict, total=False):
+    itemList: Optional[list[dict]]
+    hasMorePrevious: Optional[bool]
+
+
+# The SIGI_STATE of a video page
+class SigiState(TypedDict, total=False):
+    ItemModule: dict[str, dict]
+
+
+# The SIGI_STATE of a video page, of which only the stats are used
+class VideoStatsState(TypedDict, total=False):
+    ItemModule: dict[str, VideoStatsItem]
+
+
+# The SIGI_STATE of a tag page
+class ChallengeState(TypedDict, total=False):
+    ChallengePage: dict
+
+
+class MusicPageProps(TypedDict, total=False):
+    pageProps: dict
+
+
+# The SIGI_STATE of a music page
+class MusicState(TypedDict, total=False):
+    props: MusicPageProps
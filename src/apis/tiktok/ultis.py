@@ -1,6 +1,7 @@
-import json
 from urllib.parse import urlparse, parse_qs, urlencode
 
+from ...utils.codec import loads
+
 
 def parse_query(url):
     result = urlparse(url)
@@ -11,7 +12,7 @@ def parse_query(url):
 
 
 def process_browser_log_entry(entry):
-    response = json.loads(entry["message"])["message"]
+    response = loads(entry["message"])["message"]
     return response
 
 
@@ -15,6 +15,7 @@ from .models import CompilationVideo
 from ..config import Config
 from ..logger import SingletonLogger
 from ..utils.pb.collections import Compilation
+from ..utils.pb.metrics import stage
 
 
 logger = SingletonLogger()
@@ -46,7 +47,8 @@ def create_compilation(
         CompilationVideo
     """
     logger.info(f"Creating compilation {title} using videos {str(videos)}")
-    Compilation.validate_record(title, False)
+    with stage("compilation"):
+        Compilation.validate_record(title, False)
 
     compilation_directory: Path = Path(Config.Compilation.Directory).joinpath(title)
     if compilation_directory.exists():
@@ -22,6 +22,15 @@ class Config:
     class Apis:
         class Tiktok:
             Cookie = TiktokCookie
+            URL = "https://www.tiktok.com"
+
+            # The session shared by the requests of a TiktokAPI, see
+            # src/apis/tiktok/api.py
+            ConnectionLimit = 20
+            ConnectionLimitPerHost = 10
+            # Seconds resolved hosts are cached for
+            DnsCacheTTL = 300
+            KeepAliveTimeout = 30
 
     class Concurrency:
         """
@@ -30,6 +39,14 @@ class Config:
 
         NumberOfWorkers = 4
 
+    class Json:
+        """
+        Config for the JSON codec, see src/utils/codec.py
+        """
+
+        # "msgspec", "orjson" or "json". Defaults to the fastest installed one
+        Codec = environ.get("JSON_CODEC")
+
     class Download:
         """
         Default config for anything related to 'downloads'
@@ -69,6 +86,52 @@ class Config:
         AdminUsername = environ.get("POCKETBASE_ADMIN_USERNAME")
         AdminPassword = environ.get("POCKETBASE_ADMIN_PASSWORD")
 
+        # The admin token is cached here (until it expires), so processes don't have
+        # to log in. See src/utils/pb/auth.py
+        TokenCache: Path = BASE_PATH.parent.joinpath(".pb_admin_token.json")
+        # Seconds before it expires that the admin token is refreshed
+        TokenRefreshMargin = 600
+
+        # The request metrics are dumped here (as JSON) when the process exits. See
+        # src/utils/pb/metrics.py
+        MetricsFile = environ.get("POCKETBASE_METRICS_FILE")
+
+        # How many pages of a search are fetched at the same time
+        SearchConcurrency = 4
+        # The longest (URL encoded) filter of a batched search. Searches for many
+        # values are split into filters of up to this length, keeping URLs short.
+        MaxFilterLength = 4000
+        # Warn (once the admin authenticated) if PocketBase is missing the indexes of
+        # the schema. See src/utils/pb/migrations.py
+        CheckIndexes = True
+
+        # How many records are created at the same time by bulk inserts
+        BulkConcurrency = 8
+        # How many discovered tiktoks are inserted together
+        BulkCreateBatchSize = 50
+
+        # The connection pool shared by the requests (of all threads) of each client
+        ConnectionPoolSize = 10
+        KeepAliveTimeout = 30
+
+        # The (opt-in) realtime replica, see src/utils/pb/replica.py
+        ReplicaCollections = ("tiktok", "videos", "compilations")
+        # Seconds reads are still served by the replica after its realtime connection
+        # is lost, before they go to PocketBase again
+        ReplicaMaxStaleness = 5
+        # Seconds to wait for the replica's first load
+        ReplicaStartTimeout = 60
+
+        # The local SQLite mirror (for analytics queries), see src/utils/pb/mirror.py
+        MirrorDatabase: Path = BASE_PATH.parent.joinpath("pb_mirror.sqlite3")
+
+        # The write-behind queue, see src/utils/pb/writebehind.py
+        WriteBehindJournal: Path = BASE_PATH.parent.joinpath("pb_journal.sqlite3")
+        # How many queued writes are flushed at a time
+        WriteBehindBatchSize = 100
+        # Seconds between flushes
+        WriteBehindFlushInterval = 1
+
 
 class TestConfig:
     """
@@ -13,6 +13,7 @@ from .video import download_video
 from ..utils.helpers import validate_path_exists
 from ..utils.pb.classes import SingletonPocketBase
 from ..utils.pb.collections import VideoCollection
+from ..utils.pb.metrics import stage
 from ..utils.pb.helpers import (
     VideosCollectionInfo,
     TiktokCollectionInfo,
@@ -58,29 +59,35 @@ def download_tiktok_videos_from_same_channel_and_update_pb(
         f".{TiktokCollectionInfo.Fields.VideoId}"
     )
 
-    for url in [
-        getattr(record, TiktokCollectionInfo.Fields.URL) for record in tiktok_pb_records
-    ]:
-        tiktok_video_id: int = get_video_id_from_url(url)
-        try:
-            # Check the video doesn't already exist in Pocketbase
-            VideoCollection.validate_record(
-                tiktok_id_pb_query,
-                tiktok_video_id,
-                False,
-            )
-        except ValueError as error:
-            failed_downloads.append((url, str(error)))
-            continue
-
-        tiktok_video_download_link: str = get_tiktok_video_download_link(url)
-        video: Path = directory.joinpath(f"{tiktok_video_id}.mp4")
-
-        try:
-            download_video(tiktok_video_download_link, video)
-            videos.append(VideoCollection.create_record(url, video))
-        except (HTTPError, ClientResponseError) as error:
-            failed_downloads.append((url, error))
-            continue
+    # Records looked up/created by this job are only requested once. The passed
+    # records are only remembered if they're whole (see IdentityMap.add).
+    with stage("download"), pb.session() as identity_map:
+        for tiktok_record in tiktok_pb_records:
+            identity_map.add(TiktokCollectionInfo.CollectionName, tiktok_record)
+
+        # Check which videos already exist in Pocketbase, all at once
+        tiktok_video_ids: list[int] = [
+            get_video_id_from_url(getattr(record, TiktokCollectionInfo.Fields.URL))
+            for record in tiktok_pb_records
+        ]
+        existing_videos: dict = VideoCollection.validate_records_many(
+            tiktok_id_pb_query, tiktok_video_ids
+        )
+
+        for tiktok_record, tiktok_video_id in zip(tiktok_pb_records, tiktok_video_ids):
+            url: str = getattr(tiktok_record, TiktokCollectionInfo.Fields.URL)
+            if tiktok_video_id in existing_videos:
+                failed_downloads.append((url, "Video already exists in Pocketbase"))
+                continue
+
+            tiktok_video_download_link: str = get_tiktok_video_download_link(url)
+            video: Path = directory.joinpath(f"{tiktok_video_id}.mp4")
+
+            try:
+                download_video(tiktok_video_download_link, video)
+                videos.append(VideoCollection.create_record(url, video, tiktok_record))
+            except (HTTPError, ClientResponseError) as error:
+                failed_downloads.append((url, error))
+                continue
 
     return videos, failed_downloads
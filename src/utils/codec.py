@@ -0,0 +1,307 @@
+"""
+The JSON codec of the TikTok API and PocketBase payloads.
+
+The fastest installed codec is used: msgspec, then orjson, then the standard library
+json (Config.Json.Codec picks one). They encode to compact UTF-8 bytes, and decode
+the JSON TikTok and PocketBase send to the same values, with these differences:
+
+- orjson and msgspec only handle 64 bit integers (bigger ones would be decoded as
+  floats), so JSON with an integer of 19 digits or more is decoded, and values
+  they can't encode are encoded, with json instead.
+- orjson and msgspec raise DecodeError for NaN, Infinity and lone surrogates
+  (i.e. "\\ud800"), which json accepts. orjson encodes NaN as null.
+
+decode() only keeps the fields of a type (TypedDicts, and lists and dicts of them),
+so the (multi-megabyte) payloads of which a few fields are used aren't turned into
+objects whole. msgspec skips the other fields while parsing, and checks the types of
+the kept ones (coercing i.e. "1" to 1, and raising DecodeError for a mismatch, so
+fields which can be null are Optional). The other codecs parse everything, and keep
+the fields afterwards.
+
+Example:
+    from src.utils.codec import decode, dumps, loads
+
+    page: dict = loads(response.content)
+    state: SigiState = decode(html_json, SigiState)
+"""
+import json
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Optional,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+    is_typeddict,
+)
+
+from ..config import Config
+from ..logger import SingletonLogger
+
+logger = SingletonLogger()
+
+# The codecs, fastest first
+CODECS: tuple[str, ...] = ("msgspec", "orjson", "json")
+
+# Maps digits to 0, quotes to themselves and everything else to spaces. Then an
+# integer which may not fit in 64 bits (19 digits or more) is 19 0s after a space,
+# while one in a string (i.e. an id) is after a quote. bytes.translate and in are
+# much faster than a regex on multi-megabyte payloads.
+_DIGITS_TABLE: bytes = bytes(
+    byte if byte == ord('"') else ord("0") if chr(byte) in "0123456789" else ord(" ")
+    for byte in range(256)
+)
+_LARGE_INTEGER: bytes = b"0" * 19
+
+
+def _has_large_integer(data: Union[str, bytes]) -> bool:
+    """
+    Returns if JSON may have an integer which doesn't fit in 64 bits. Some strings
+    match too (i.e. "a 1234567890123456789"), which are then just decoded by json.
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    digits: bytes = data.translate(_DIGITS_TABLE)
+    return digits.startswith(_LARGE_INTEGER) or b" " + _LARGE_INTEGER in digits
+
+
+class DecodeError(ValueError):
+    """
+    Raised when JSON can't be decoded (or doesn't match the type it's decoded to).
+    """
+
+
+class JSONCodec:
+    """
+    The standard library json. See the module docstring.
+    """
+
+    name: str = "json"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """
+        Decodes JSON.
+
+        Args:
+            data (Union[str, bytes])
+
+        Raises:
+            DecodeError: If data isn't JSON.
+
+        Returns:
+            Any
+        """
+        try:
+            return json.loads(data)
+        except ValueError as error:
+            raise DecodeError(str(error)) from error
+
+    def decode(self, data: Union[str, bytes], target: Any) -> Any:
+        """
+        Decodes JSON, keeping the fields of a type.
+
+        Args:
+            data (Union[str, bytes])
+            target (Any): The type, i.e. a TypedDict, or list[...] or dict[str, ...]
+                of one.
+
+        Raises:
+            DecodeError: If data isn't JSON (or, with msgspec, isn't of the type).
+
+        Returns:
+            Any
+        """
+        return project(self.loads(data), target)
+
+    def dumps(self, value: Any, default: Optional[Callable] = None) -> bytes:
+        """
+        Encodes a value to compact JSON.
+
+        Args:
+            value (Any)
+            default (Optional[Callable], optional): Returns a serializable version of
+                what can't be encoded. Defaults to None (TypeError).
+
+        Returns:
+            bytes
+        """
+        return json.dumps(
+            value, separators=(",", ":"), ensure_ascii=False, default=default
+        ).encode()
+
+
+class OrjsonCodec(JSONCodec):
+    name: str = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        self.__orjson = orjson
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        if _has_large_integer(data):
+            return super().loads(data)
+        try:
+            return self.__orjson.loads(data)
+        except self.__orjson.JSONDecodeError as error:
+            raise DecodeError(str(error)) from error
+
+    def dumps(self, value: Any, default: Optional[Callable] = None) -> bytes:
+        try:
+            return self.__orjson.dumps(
+                value, default=default, option=self.__orjson.OPT_NON_STR_KEYS
+            )
+        except self.__orjson.JSONEncodeError:
+            # I.e. an integer which doesn't fit in 64 bits
+            return super().dumps(value, default)
+
+
+class MsgspecCodec(JSONCodec):
+    name: str = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+
+        self.__msgspec = msgspec
+        self.__decoder = msgspec.json.Decoder()
+        self.__encoder = msgspec.json.Encoder()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        if _has_large_integer(data):
+            return super().loads(data)
+        try:
+            return self.__decoder.decode(data)
+        except self.__msgspec.DecodeError as error:
+            raise DecodeError(str(error)) from error
+
+    def decode(self, data: Union[str, bytes], target: Any) -> Any:
+        if _has_large_integer(data):
+            return super().decode(data, target)
+        try:
+            return self.__typed_decoder(target).decode(data)
+        except self.__msgspec.DecodeError as error:
+            raise DecodeError(str(error)) from error
+
+    def dumps(self, value: Any, default: Optional[Callable] = None) -> bytes:
+        try:
+            if default is None:
+                return self.__encoder.encode(value)
+            return self.__msgspec.json.encode(value, enc_hook=default)
+        except (self.__msgspec.EncodeError, OverflowError, TypeError):
+            # I.e. an integer which doesn't fit in 64 bits
+            return super().dumps(value, default)
+
+    @lru_cache(maxsize=None)
+    def __typed_decoder(self, target: Any) -> Any:
+        return self.__msgspec.json.Decoder(target, strict=False)
+
+
+_CODEC_CLASSES: dict[str, type[JSONCodec]] = {
+    "msgspec": MsgspecCodec,
+    "orjson": OrjsonCodec,
+    "json": JSONCodec,
+}
+
+_codec: Optional[JSONCodec] = None
+
+
+def use_codec(name: Optional[str] = None) -> JSONCodec:
+    """
+    Switches the codec.
+
+    Args:
+        name (Optional[str], optional): One of CODECS. Defaults to None (the fastest
+            installed one).
+
+    Raises:
+        ValueError: If there's no such codec.
+        ImportError: If the codec isn't installed.
+
+    Returns:
+        JSONCodec: The codec now used.
+    """
+    global _codec
+    if name is not None and name not in _CODEC_CLASSES:
+        raise ValueError(f"Unknown JSON codec {name}. Choose one of {CODECS}")
+
+    for candidate in [name] if name else CODECS:
+        try:
+            _codec = _CODEC_CLASSES[candidate]()
+            break
+        except ImportError:
+            if name:
+                raise
+    logger.info(f"Using the {_codec.name} JSON codec")
+    return _codec
+
+
+def current_codec() -> JSONCodec:
+    """
+    Returns the codec used (picking it the first time, see Config.Json.Codec).
+    """
+    return _codec or use_codec(Config.Json.Codec)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Decodes JSON with the current codec. See JSONCodec.loads.
+    """
+    return current_codec().loads(data)
+
+
+def decode(data: Union[str, bytes], target: Any) -> Any:
+    """
+    Decodes JSON with the current codec, keeping the fields of a type (target). See
+    JSONCodec.decode.
+    """
+    return current_codec().decode(data, target)
+
+
+def dumps(value: Any, default: Optional[Callable] = None) -> bytes:
+    """
+    Encodes a value to compact JSON with the current codec. See JSONCodec.dumps.
+    """
+    return current_codec().dumps(value, default)
+
+
+@lru_cache(maxsize=None)
+def _typeddict_fields(target: Any) -> dict[str, Any]:
+    return get_type_hints(target)
+
+
+def project(value: Any, target: Any) -> Any:
+    """
+    Keeps the fields of a type of a decoded value (without checking their types).
+
+    Args:
+        value (Any)
+        target (Any): The type, i.e. a TypedDict, or list[...] or dict[str, ...] of
+            one.
+
+    Returns:
+        Any
+    """
+    if is_typeddict(target):
+        if not isinstance(value, dict):
+            return value
+        fields: dict[str, Any] = _typeddict_fields(target)
+        return {
+            key: project(field, fields[key])
+            for key, field in value.items()
+            if key in fields
+        }
+
+    origin: Any = get_origin(target)
+    if origin is list and isinstance(value, list):
+        (item_type,) = get_args(target)
+        return [project(item, item_type) for item in value]
+    if origin is dict and isinstance(value, dict):
+        _, item_type = get_args(target)
+        return {key: project(item, item_type) for key, item in value.items()}
+    if origin is Union:
+        typeddicts: list = [arg for arg in get_args(target) if is_typeddict(arg)]
+        if len(typeddicts) == 1:
+            return project(value, typeddicts[0])
+    return value
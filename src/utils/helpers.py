@@ -1,8 +1,10 @@
 """
 Helper functions to be used throughout the codebase.
 """
+import asyncio
 from pathlib import Path
 
+import aiohttp
 from typeguard import typechecked
 
 from ..logger import SingletonLogger
@@ -34,3 +36,67 @@ def validate_path_exists(path: Path) -> None:
         logger.error(message)
         raise FileNotFoundError(message)
     logger.info(f"File {path__str} exists")
+
+
+#
+# aiohttp stuff
+#
+async def close_session(session: aiohttp.ClientSession) -> None:
+    """
+    Closes a session, and lets its loop close the transports of its connections
+    (which is scheduled, not awaited, by aiohttp).
+
+    Args:
+        session (aiohttp.ClientSession)
+    """
+    await session.close()
+    await asyncio.sleep(0)
+
+
+async def release_session(
+    session: aiohttp.ClientSession,
+    loop: asyncio.AbstractEventLoop,
+    timeout: float = 10.0,
+) -> None:
+    """
+    Closes a session of another event loop (i.e. of a previous asyncio.run call). A
+    session can only be closed from its own loop: if that loop runs in another
+    thread the session is closed there, if it isn't running it's run (in a thread of
+    its own) until the session is closed. The running loop doesn't wait on either.
+    Once its loop is closed a session can't be closed anymore, so close sessions
+    before their loop ends (i.e. with the close() of their owner).
+
+    Failures are logged, not raised: the caller replaces the session regardless.
+
+    Args:
+        session (aiohttp.ClientSession)
+        loop (asyncio.AbstractEventLoop): The loop the session was created in.
+        timeout (float, optional): How many seconds to wait for the session to
+            close. Defaults to 10.
+    """
+    if session.closed:
+        return
+
+    if loop.is_closed():
+        logger.warning(
+            "A session of a closed event loop can't be closed, it's left to the "
+            "garbage collector. Close it before its loop ends."
+        )
+        return
+
+    logger.info("Closing a session of another event loop")
+    try:
+        if loop.is_running():
+            await asyncio.wait_for(
+                asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(close_session(session), loop)
+                ),
+                timeout,
+            )
+        else:
+            await asyncio.wait_for(
+                asyncio.to_thread(loop.run_until_complete, close_session(session)),
+                timeout,
+            )
+    except Exception as error:
+        logger.warning(f"Failed to close a session of another event loop: {error!r}")
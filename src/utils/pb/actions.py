@@ -4,7 +4,7 @@ Functions to aid the development or process of this project that are concerned a
 from pathlib import Path
 from typing import AsyncGenerator, Optional
 
-from typeguard import typechecked
+from typeguard import typechecked, TypeCheckError
 
 from .classes import SingletonPocketBase
 from .typehints import *
@@ -15,6 +15,8 @@ from .helpers import (
     transform_raw_tiktok_video_metadata_to_pocketbase_metadata_schema,
 )
 from .collections import VideoCollection, TiktokCollection, MetadataCollection
+from .metrics import stage
+from .writebehind import WriteBehindQueue, generate_record_id
 
 from ...apis.tiktok.api import TiktokAPI, ChannelDetailsAPI
 from ...config import Config
@@ -26,7 +28,9 @@ logger = SingletonLogger()
 
 @typechecked
 async def fetch_and_insert_videos_from_tiktok_channel(
-    channel: str, user_details: Optional[ChannelDetailsAPI] = None
+    channel: str,
+    user_details: Optional[ChannelDetailsAPI] = None,
+    queue: Optional[WriteBehindQueue] = None,
 ) -> None:
     """
     Fetches and inserts videos from a TikTok channel into the database.
@@ -35,6 +39,8 @@ async def fetch_and_insert_videos_from_tiktok_channel(
         channel (str): The name of the TikTok channel.
         user_details (Optional[ChannelDetailsAPI]): Optional user details object.
             If not provided, it will be created with default settings.
+        queue (Optional[WriteBehindQueue]): Queue the inserts, rather than waiting
+            on the database. Defaults to None.
 
     Returns:
         None
@@ -49,34 +55,162 @@ async def fetch_and_insert_videos_from_tiktok_channel(
             channel, Config.Apis.Tiktok.Cookie
         )
 
-    tiktok_api = TiktokAPI()
-    channel_results: AsyncGenerator = tiktok_api.get_all_video_from_channel(
-        user_details
+    async with TiktokAPI() as tiktok_api:
+        channel_results: AsyncGenerator = tiktok_api.get_all_video_from_channel(
+            user_details
+        )
+
+        with stage("discovery"):
+            batch: list[dict] = []
+            async for result in channel_results:
+                batch.append(result)
+                if len(batch) >= Config.PocketBase.BulkCreateBatchSize:
+                    await insert_or_queue_tiktok_channel_videos(channel, batch, queue)
+                    batch = []
+
+            if batch:
+                await insert_or_queue_tiktok_channel_videos(channel, batch, queue)
+
+
+@typechecked
+async def insert_or_queue_tiktok_channel_videos(
+    channel: str, results: list[dict], queue: Optional[WriteBehindQueue]
+) -> None:
+    """
+    Queues a batch of videos discovered from a TikTok channel (see
+    queue_tiktok_channel_videos) if there's a queue, otherwise inserts them.
+
+    Args:
+        channel (str): The name of the TikTok channel.
+        results (list[dict]): The raw video items from the TikTok API.
+        queue (Optional[WriteBehindQueue])
+    """
+    if queue is None:
+        await insert_tiktok_channel_videos(channel, results)
+    else:
+        queue_tiktok_channel_videos(channel, results, queue)
+
+
+@typechecked
+def tiktok_channel_video_url(channel: str, result: dict) -> str:
+    """
+    Args:
+        channel (str): The name of the TikTok channel.
+        result (dict): A raw video item from the TikTok API.
+
+    Returns:
+        str: The URL of the video.
+    """
+    return "https://www.tiktok.com/@{username}/video/{video_id}".format(
+        username=channel, video_id=result["id"]
     )
 
-    async for result in channel_results:
-        url: str = "https://www.tiktok.com/@{username}/video/{video_id}".format(
-            username=channel, video_id=result["id"]
-        )
 
-        tiktok_record_inserted = True
+@typechecked
+def queue_tiktok_channel_videos(
+    channel: str, results: list[dict], queue: WriteBehindQueue
+) -> None:
+    """
+    Queues the upserts of a batch of videos discovered from a TikTok channel (and
+    their metadata), as insert_tiktok_channel_videos does them. Returns once they're
+    in the queue's journal. Rows which can't be upserted are logged and skipped, as
+    are upserts that fail once flushed.
+
+    Args:
+        channel (str): The name of the TikTok channel.
+        results (list[dict]): The raw video items from the TikTok API.
+        queue (WriteBehindQueue)
+    """
+    tiktok_rows: list[dict] = []
+    metadata_rows: list[dict] = []
+    for result in results:
+        url: str = tiktok_channel_video_url(channel, result)
+        # The id is ours, so the metadata can relate to the (queued) tiktok record
+        tiktok_record_id: str = generate_record_id()
         try:
-            TiktokCollection.create_record(
+            tiktok_row: dict = TiktokCollection.record_data(
                 url, TiktokCollectionInfo.OriginOoptions.Channel, channel
             )
-        except Exception as e:
-            logger.warning(
-                f"Failed to insert URL '{url}' into the database. Error: {str(e)}"
+            metadata_row: dict = MetadataCollection.record_data(
+                tiktok_record_id,
+                **transform_raw_tiktok_video_metadata_to_pocketbase_metadata_schema(
+                    result
+                ),
             )
-            tiktok_record_inserted = False
-
-        if not tiktok_record_inserted:
+        except (ValueError, TypeError, KeyError, TypeCheckError) as error:
+            logger.warning(f"Failed to queue URL '{url}'. Error: {error}")
             continue
 
-        metadata: dict = (
-            transform_raw_tiktok_video_metadata_to_pocketbase_metadata_schema(result)
+        tiktok_rows.append(
+            {TiktokCollectionInfo.Fields.Id: tiktok_record_id, **tiktok_row}
+        )
+        metadata_rows.append(metadata_row)
+
+    # Upserted like insert_tiktok_channel_videos does, so rediscovered videos (and
+    # their metadata) are updated rather than failing on their unique indexes
+    queue.upsert_many(
+        TiktokCollectionInfo.CollectionName,
+        TiktokCollectionInfo.Fields.VideoId,
+        tiktok_rows,
+        TiktokCollection.UpsertFields,
+        TiktokCollection.UpsertFields,
+    )
+    queue.upsert_many(
+        MetadataCollectionInfo.CollectionName,
+        MetadataCollectionInfo.Fields.TiktokForeignKey,
+        metadata_rows,
+        MetadataCollection.UpsertCompareFields,
+    )
+
+
+@typechecked
+async def insert_tiktok_channel_videos(channel: str, results: list[dict]) -> None:
+    """
+    Upserts a batch of videos discovered from a TikTok channel (and their metadata)
+    into the database: new videos are inserted, and known ones are updated if they
+    (or their stats) changed. Failed writes are logged and skipped.
+
+    Args:
+        channel (str): The name of the TikTok channel.
+        results (list[dict]): The raw video items from the TikTok API.
+    """
+    urls: list[str] = [tiktok_channel_video_url(channel, result) for result in results]
+
+    created, updated, unchanged, failed = await TiktokCollection.async_upsert_records(
+        [
+            {
+                "url": url,
+                "origin": TiktokCollectionInfo.OriginOoptions.Channel,
+                "query": channel,
+            }
+            for url in urls
+        ]
+    )
+    for row, error in failed:
+        logger.warning(
+            f"Failed to insert URL '{row['url']}' into the database. Error: {error}"
+        )
+
+    tiktok_record_ids: dict[str, str] = {
+        getattr(record, TiktokCollectionInfo.Fields.URL): getattr(
+            record, TiktokCollectionInfo.Fields.Id
+        )
+        for record in created + updated + unchanged
+    }
+
+    *_, failed = await MetadataCollection.async_upsert_records(
+        [
+            {
+                "tiktok_record_id": tiktok_record_ids[url],
+                **transform_raw_tiktok_video_metadata_to_pocketbase_metadata_schema(
+                    result
+                ),
+            }
+            for url, result in zip(urls, results)
+            if url in tiktok_record_ids
+        ]
+    )
+    for row, error in failed:
+        logger.warning(
+            f"Failed to insert metadata for tiktok record {row['tiktok_record_id']}. Error: {error}"
         )
-        try:
-            MetadataCollection.create_record(url, **metadata)
-        except Exception as e:
-            logger.warning(f"Failed to insert metadata with {url}. Error: {str(e)}")
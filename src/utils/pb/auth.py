@@ -0,0 +1,386 @@
+"""
+Admin authentication of the PocketBase clients.
+
+Clients authenticate on their first request, not when they're created, so importing
+a module which creates one doesn't need PocketBase. Their requests share a bounded
+pool of keep-alive connections (Config.PocketBase.ConnectionPoolSize), so a client
+can be used by many threads at once. The admin token is cached on
+disk (Config.PocketBase.TokenCache) until it expires, so short-lived processes
+reuse it instead of logging in. Long-lived processes refresh it in the background
+before it expires.
+"""
+import os
+import json
+import time
+import base64
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import httpx
+from typeguard import typechecked
+from pocketbase import PocketBase
+from pocketbase.client import FileUpload
+from pocketbase.utils import ClientResponseError
+
+from .metrics import request_metrics
+from ...config import Config
+from ...utils.codec import dumps, loads
+from ...logger import SingletonLogger
+
+logger = SingletonLogger()
+
+# The paths of the admin auth requests, which are sent without (our) token
+AUTH_PATH: str = "/api/admins/auth-"
+
+# Responses meaning our token wasn't accepted (we're always an admin)
+REJECTED_TOKEN_STATUSES: tuple[int, ...] = (401, 403)
+
+_cache_lock = threading.Lock()
+
+
+def _has_files(body: Any) -> bool:
+    return isinstance(body, dict) and any(
+        isinstance(value, FileUpload) for value in body.values()
+    )
+
+
+@typechecked
+def token_expiry(token: str) -> Optional[float]:
+    """
+    Returns when a (JWT) token expires.
+
+    Args:
+        token (str)
+
+    Returns:
+        Optional[float]: The expiry (as a unix timestamp). None if the token can't be
+            decoded.
+    """
+    try:
+        payload: str = token.split(".")[1]
+        claims: dict = json.loads(
+            base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        )
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _cache_key(url: str, identity: str) -> str:
+    return f"{url.rstrip('/')} {identity}"
+
+
+def _read_cache(token_cache: Path) -> dict:
+    try:
+        return json.loads(token_cache.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+@typechecked
+def read_cached_token(
+    url: str, identity: str, margin: float = 0, token_cache: Optional[Path] = None
+) -> Optional[str]:
+    """
+    Returns the cached admin token of a PocketBase, unless it expires within margin
+    seconds.
+
+    Args:
+        url (str): The URL of the PocketBase.
+        identity (str): The admin's email.
+        margin (float, optional): Seconds the token must still be valid for.
+            Defaults to 0.
+        token_cache (Optional[Path], optional): Defaults to Config.PocketBase.TokenCache.
+
+    Returns:
+        Optional[str]
+    """
+    token: Any = _read_cache(token_cache or Config.PocketBase.TokenCache).get(
+        _cache_key(url, identity)
+    )
+    if not isinstance(token, str):
+        return None
+
+    expiry: Optional[float] = token_expiry(token)
+    if expiry is None or expiry - time.time() <= margin:
+        return None
+    return token
+
+
+@typechecked
+def cache_token(
+    url: str, identity: str, token: Optional[str], token_cache: Optional[Path] = None
+) -> None:
+    """
+    Caches (or with None, forgets) the admin token of a PocketBase. The cache is only
+    readable by the current user.
+
+    Args:
+        url (str): The URL of the PocketBase.
+        identity (str): The admin's email.
+        token (Optional[str])
+        token_cache (Optional[Path], optional): Defaults to Config.PocketBase.TokenCache.
+    """
+    token_cache = Path(token_cache or Config.PocketBase.TokenCache)
+    with _cache_lock:
+        tokens: dict = _read_cache(token_cache)
+        if token is None:
+            tokens.pop(_cache_key(url, identity), None)
+        else:
+            tokens[_cache_key(url, identity)] = token
+
+        temporary: Path = token_cache.with_name(f"{token_cache.name}.{os.getpid()}")
+        try:
+            descriptor: int = os.open(
+                temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+            )
+            with os.fdopen(descriptor, "w") as file:
+                json.dump(tokens, file)
+            os.replace(temporary, token_cache)
+        except OSError as error:
+            logger.warning(f"Failed to cache the admin token: {error}")
+
+
+class AdminPocketBase(PocketBase):
+    """
+    The pocketbase SDK client, authenticated as the admin on its first request (see
+    the module docstring). A request whose token is rejected is sent again once,
+    after logging in. Safe to share between threads: requests are sent through a
+    pool of keep-alive connections, rather than a connection per request like the
+    SDK.
+
+    Args:
+        url (str): The URL of the PocketBase.
+        email (str): The admin's email.
+        password (str): The admin's password.
+        token_cache (Optional[Path], optional): Defaults to Config.PocketBase.TokenCache.
+        on_authenticated (Optional[Callable[[PocketBase], Any]], optional): Called
+            with the client once it first authenticated (i.e. to check the schema).
+            Defaults to None.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        email: str,
+        password: str,
+        token_cache: Optional[Path] = None,
+        on_authenticated: Optional[Callable[[PocketBase], Any]] = None,
+    ) -> None:
+        super().__init__(url)
+        self.email: str = email
+        self.password: str = password
+        self.token_cache: Path = Path(token_cache or Config.PocketBase.TokenCache)
+        self.on_authenticated: Optional[Callable[[PocketBase], Any]] = on_authenticated
+
+        self.__lock = threading.RLock()
+        self.__refresh_timer: Optional[threading.Timer] = None
+        self.__http_client: Optional[httpx.Client] = None
+        # A request holds a connection of the pool until it's read. Threads wait here
+        # for a free one, as httpx's own wait for a pooled connection isn't
+        # thread-safe (connections are closed under the threads waiting for them).
+        self.__connections = threading.BoundedSemaphore(
+            Config.PocketBase.ConnectionPoolSize
+        )
+
+    def send(self, path: str, req_config: dict) -> Any:
+        if path.startswith(AUTH_PATH):
+            return self.__send_measured(path, req_config)
+
+        if not self.auth_store.token:
+            with self.__lock:
+                if not self.auth_store.token:
+                    self.authenticate()
+                    if self.on_authenticated is not None:
+                        on_authenticated, self.on_authenticated = (
+                            self.on_authenticated,
+                            None,
+                        )
+                        on_authenticated(self)
+
+        token: Optional[str] = self.auth_store.token
+        try:
+            return self.__send_measured(path, req_config)
+        except ClientResponseError as error:
+            if error.status not in REJECTED_TOKEN_STATUSES:
+                raise
+            with self.__lock:
+                # Unless another request already did
+                if self.auth_store.token == token:
+                    logger.warning(
+                        f"The admin token was rejected ({error.status}), "
+                        "authenticating again"
+                    )
+                    self.authenticate(use_cache=False)
+            return self.__send_measured(path, req_config)
+
+    def __send_measured(self, path: str, req_config: dict) -> Any:
+        """
+        Sends a request, recording it in the request metrics (see metrics.py).
+        """
+        body: Any = req_config.get("body")
+        # Encoded once, to be sent and measured (bodies with files are multipart)
+        content: Optional[bytes] = None
+        if body is not None and not _has_files(body):
+            content = dumps(body)
+        with request_metrics.measure(
+            req_config.get("method", "GET"),
+            path,
+            len(content or (dumps(body, default=str) if body else b"")),
+        ) as measured:
+            response: httpx.Response = self.__request(path, req_config, content)
+            measured["bytes_received"] = len(response.content)
+            measured["error"] = response.status_code >= 400
+
+        try:
+            data: Any = loads(response.content)
+        except ValueError:
+            data = None
+        if response.status_code >= 400:
+            raise ClientResponseError(
+                f"Response error. Status code:{response.status_code}",
+                url=response.url,
+                status=response.status_code,
+                data=data,
+            )
+        return data
+
+    def __request(
+        self, path: str, req_config: dict, content: Optional[bytes] = None
+    ) -> httpx.Response:
+        """
+        Sends a request through the connection pool, the way the SDK's send does.
+        content is the encoded JSON body (if it has no files).
+
+        Raises:
+            ClientResponseError: If the request couldn't be sent (same as the SDK).
+        """
+        method: str = req_config.get("method", "GET")
+        headers: dict = dict(req_config.get("headers") or {})
+        if self.auth_store.token and "Authorization" not in headers:
+            headers["Authorization"] = self.auth_store.token
+        if content is not None:
+            headers["Content-Type"] = "application/json"
+
+        # Files are sent as multipart, with the rest of the body as form data
+        body: Any = req_config.get("body")
+        data: dict = {}
+        files: tuple = ()
+        for key, value in (body if isinstance(body, dict) else {}).items():
+            if isinstance(value, FileUpload):
+                files += value.get(key)
+            else:
+                data[key] = value
+
+        try:
+            with self.__connections:
+                return self.__get_http_client().request(
+                    method,
+                    self.build_url(path),
+                    params=req_config.get("params"),
+                    headers=headers,
+                    content=content,
+                    data=data if files else None,
+                    files=files or None,
+                )
+        except httpx.HTTPError as error:
+            raise ClientResponseError(
+                f"General request error. Original error: {error}",
+                original_error=error,
+            )
+
+    def __get_http_client(self) -> httpx.Client:
+        """
+        Returns the connection pool, opening it if it isn't open.
+        """
+        http_client: Optional[httpx.Client] = self.__http_client
+        if http_client is None:
+            with self.__lock:
+                if self.__http_client is None:
+                    logger.info("Opening the PocketBase connection pool")
+                    self.__http_client = httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=Config.PocketBase.ConnectionPoolSize,
+                            max_keepalive_connections=(
+                                Config.PocketBase.ConnectionPoolSize
+                            ),
+                            keepalive_expiry=Config.PocketBase.KeepAliveTimeout,
+                        ),
+                        timeout=120,
+                    )
+                http_client = self.__http_client
+        return http_client
+
+    def authenticate(self, use_cache: bool = True) -> None:
+        """
+        Authenticates as the admin, with the cached token if there's one (and
+        use_cache), otherwise by logging in. The token is refreshed in the background
+        Config.PocketBase.TokenRefreshMargin seconds before it expires.
+
+        Args:
+            use_cache (bool, optional): Defaults to True.
+        """
+        with self.__lock:
+            token: Optional[str] = (
+                read_cached_token(self.base_url, self.email, 0, self.token_cache)
+                if use_cache
+                else None
+            )
+            if token is not None:
+                self.auth_store.save(token, None)
+                logger.info("Using the cached PocketBase admin token")
+            else:
+                self.admins.auth_with_password(self.email, self.password)
+                cache_token(
+                    self.base_url, self.email, self.auth_store.token, self.token_cache
+                )
+                logger.info("Admin authenticated with PocketBase")
+
+            self.__schedule_refresh()
+
+    def close(self) -> None:
+        """
+        Stops refreshing the token and closes the connection pool (the next request
+        opens it again).
+        """
+        with self.__lock:
+            self.__cancel_refresh()
+            if self.__http_client is not None:
+                self.__http_client.close()
+                self.__http_client = None
+
+    def __cancel_refresh(self) -> None:
+        if self.__refresh_timer is not None:
+            self.__refresh_timer.cancel()
+            self.__refresh_timer = None
+
+    def __schedule_refresh(self) -> None:
+        self.__cancel_refresh()
+        expiry: Optional[float] = token_expiry(self.auth_store.token or "")
+        if expiry is None:
+            return
+
+        delay: float = max(
+            expiry - Config.PocketBase.TokenRefreshMargin - time.time(), 0
+        )
+        self.__refresh_timer = threading.Timer(delay, self.__refresh)
+        self.__refresh_timer.name = "pocketbase-token-refresh"
+        self.__refresh_timer.daemon = True
+        self.__refresh_timer.start()
+
+    def __refresh(self) -> None:
+        try:
+            with self.__lock:
+                self.admins.authRefresh()
+                cache_token(
+                    self.base_url, self.email, self.auth_store.token, self.token_cache
+                )
+                logger.info("Refreshed the PocketBase admin token")
+                self.__schedule_refresh()
+        except ClientResponseError as error:
+            logger.warning(f"Failed to refresh the admin token: {error}")
+            try:
+                self.authenticate(use_cache=False)
+            except ClientResponseError as error:
+                logger.error(f"Failed to authenticate with PocketBase: {error}")
@@ -1,19 +1,51 @@
-from typing import Union, Optional
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Iterable, Union, Optional, Iterator
 from abc import ABC, abstractstaticmethod
+from collections import deque
+from itertools import chain
+from contextlib import AbstractContextManager
+from concurrent.futures import ThreadPoolExecutor, Future
+from urllib.parse import quote
 
+import aiohttp
 from pocketbase import PocketBase
 from pocketbase.models import Record
+from pocketbase.models.utils.list_result import ListResult
+from pocketbase.utils import ClientResponseError
 
 from typeguard import typechecked
 
 
 from .typehints import *
+from .rows import Row
+from .identity import IdentityMap, bind_session, current_identity_map, session
+from .replica import Replica, current_replica, set_current_replica
+from .metrics import bind_stage, request_metrics
+from .migrations import check_indexes
+from .auth import (
+    AdminPocketBase,
+    REJECTED_TOKEN_STATUSES,
+    cache_token,
+    read_cached_token,
+)
 from ...config import Config
 from ...logger import SingletonLogger
+from ...utils.codec import dumps, loads
+from ...utils.helpers import close_session, release_session
 
 logger = SingletonLogger()
 
 
+# The (timestamp) field keyset searches walk a collection by, then by id
+KEYSET_FIELD: str = "created"
+# The stable order keyset searches walk a collection in
+KEYSET_SORT: str = f"{KEYSET_FIELD},id"
+# How many records search_single_record fetches, two are enough to know if the
+# value isn't unique
+SINGLE_RECORD_PAGE: int = 2
+
+
 class CollectionBaseClass(ABC):
     @staticmethod
     @abstractstaticmethod
@@ -26,78 +58,491 @@ class CollectionBaseClass(ABC):
         pass
 
 
+def project_query(query: dict[str, str], fields: Optional[list[str]]) -> dict[str, str]:
+    """
+    Adds a fields projection to a search query.
+
+    Args:
+        query (dict[str, str]): The search query.
+        fields (Optional[list[str]]): The fields to return. None returns every field.
+
+    Returns:
+        dict[str, str]: The query (a copy, if fields were added).
+    """
+    if not fields:
+        return query
+    return {**query, "fields": ",".join(fields)}
+
+
+def remember_record(collection: str, record: Record) -> Record:
+    """
+    Adds a record to the identity map of the open session (if there is one).
+
+    Args:
+        collection (str): The collection of the record.
+        record (Record)
+
+    Returns:
+        Record: The passed record.
+    """
+    identity_map: Optional[IdentityMap] = current_identity_map()
+    if identity_map is not None:
+        identity_map.add(collection, record)
+    return record
+
+
+def forget_record(collection: str, record_id: str) -> None:
+    """
+    Removes a record from the identity map of the open session (if there is one).
+
+    Args:
+        collection (str): The collection of the record.
+        record_id (str): The id of the record.
+    """
+    identity_map: Optional[IdentityMap] = current_identity_map()
+    if identity_map is not None:
+        identity_map.discard(collection, record_id)
+
+
+def replicate_write(collection: str, action: str, record: Record) -> Record:
+    """
+    Applies one of our own writes to the started replica (if there is one), so it
+    can be read straight away rather than once its realtime change arrives.
+
+    Args:
+        collection (str): The collection of the record.
+        action (str): "create", "update" or "delete".
+        record (Record): The written record.
+
+    Returns:
+        Record: The passed record.
+    """
+    replica: Optional[Replica] = current_replica()
+    if replica is not None:
+        replica.apply(collection, action, record)
+    return record
+
+
+def project_record(record: Record, fields: Optional[list[str]]) -> Record:
+    """
+    Returns a copy of a record with only some of its fields, as PocketBase would.
+
+    Args:
+        record (Record)
+        fields (Optional[list[str]]): The fields to keep. None (or "*") keeps the
+            record as is.
+
+    Returns:
+        Record
+    """
+    if not fields or "*" in fields:
+        return record
+
+    projected = Record({})
+    for field in fields:
+        if hasattr(record, field):
+            setattr(projected, field, getattr(record, field))
+    return projected
+
+
+def replica_records(
+    collection: str,
+    field: str,
+    value: PocketBaseValueOptions,
+    fields: Optional[list[str]] = None,
+) -> Optional[list[Record]]:
+    """
+    Searches the started replica (if there is one) for the records whose field has
+    the value.
+
+    Args:
+        collection (str): The target collection.
+        field (str): The field to search against.
+        value (PocketBaseValueOptions): The value...
+        fields (Optional[list[str]], optional): Only return these fields of the
+            records. Fields of an expanded relation can't be served. Defaults to None
+            (every field).
+
+    Returns:
+        Optional[list[Record]]: None if the replica can't serve the search, it must
+            be sent to PocketBase.
+    """
+    replica: Optional[Replica] = current_replica()
+    if replica is None or any("." in name for name in fields or []):
+        return None
+
+    records: Optional[list[Record]] = replica.find(collection, field, value)
+    if records is None:
+        return None
+    return [project_record(record, fields) for record in records]
+
+
 class SingletonPocketBase:
     """
     This class is a Singleton implementation of PocketBase which provides
     access to all the PocketBase functionalities.
+
+    Nothing is sent to PocketBase until the first request, which authenticates as
+    the admin (with the cached token, if there's one). See auth.py.
     """
 
     _instance = None
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
         """
-        Where the singleton magic happens!
+        Where the singleton magic happens! Threads creating it at the same time get
+        the same instance (and client).
         """
         if cls._instance is None:
-            logger.info("Instantiating SingletonPocketBase")
+            with cls._instance_lock:
+                if cls._instance is None:
+                    logger.info("Instantiating SingletonPocketBase")
 
-            cls._instance = super().__new__(cls)  # TODO: Figure out if this is required
-            cls._instance.instance: PocketBase = PocketBase(Config.PocketBase.URL)
-            cls._instance.__authenticate_admin(
-                Config.PocketBase.AdminUsername,
-                Config.PocketBase.AdminPassword,
-            )
+                    instance = super().__new__(cls)
+                    instance.instance: PocketBase = AdminPocketBase(
+                        Config.PocketBase.URL,
+                        Config.PocketBase.AdminUsername,
+                        Config.PocketBase.AdminPassword,
+                        on_authenticated=(
+                            check_indexes if Config.PocketBase.CheckIndexes else None
+                        ),
+                    )
+                    # Published once it's complete
+                    cls._instance = instance
         return cls._instance
 
-    def __authenticate_admin(self, email: str, password: str) -> None:
+    @staticmethod
+    def session() -> AbstractContextManager[IdentityMap]:
+        """
+        Opens an identity map session (see identity.py). Within the session, records
+        which were already looked up, created or updated are returned by
+        search_single_record without a request.
+
+        Example:
+            with pb.session():
+                ...
+
+        Returns:
+            AbstractContextManager[IdentityMap]
+        """
+        return session()
+
+    @typechecked
+    def start_replica(
+        self,
+        collections: Optional[list[str]] = None,
+        max_staleness: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> Replica:
         """
-        Admin authenticate.
+        Starts an in-process replica of collections (see replica.py), replacing the
+        started one. Until it's stopped (and while it's fresh) searches by a field,
+        of both SingletonPocketBase and AsyncSingletonPocketBase, are served by it.
 
         Args:
-            email (str): The admin's email.
-            password (str): The admin's password.
+            collections (Optional[list[str]], optional): The collections to replicate.
+                Defaults to Config.PocketBase.ReplicaCollections.
+            max_staleness (Optional[float], optional): Seconds reads are still served
+                after losing the realtime connection. Defaults to
+                Config.PocketBase.ReplicaMaxStaleness.
+            timeout (Optional[float], optional): Seconds to wait for the collections
+                to be loaded. Defaults to Config.PocketBase.ReplicaStartTimeout.
+
+        Raises:
+            TimeoutError: If the collections weren't loaded in time.
+
+        Returns:
+            Replica
         """
-        self.instance.admins.auth_with_password(email, password)
-        logger.info("Admin authenticated with PocketBase")
+        SingletonPocketBase.stop_replica()
+
+        replica = Replica(
+            self.instance,
+            # Keyset, so records inserted (i.e by discovery) during the load don't
+            # shift the pages
+            lambda collection: self.iter_search(collection, {}, keyset=True),
+            collections,
+            max_staleness,
+        ).start(timeout)
+        set_current_replica(replica)
+        return replica
+
+    @staticmethod
+    def stop_replica() -> None:
+        """
+        Stops the started replica (if there is one).
+        """
+        replica: Optional[Replica] = current_replica()
+        if replica is not None:
+            set_current_replica(None)
+            replica.stop()
+
+    def __fetch_page(
+        self, collection: str, query: dict[str, str], page: int, per_page: int
+    ) -> ListResult:
+        """
+        Fetches a single page of a search query.
+
+        Args:
+            collection (str): The target collection.
+            query (dict[str, str]): What you're searching.
+            page (int): The page number.
+            per_page (int): How many items to return from the page.
+
+        Returns:
+            ListResult
+        """
+        logger.info(f"Searching {collection} for {query}. Page {page}")
+        # The pocketbase SDK adds the page details to the query it's given, so
+        # each page gets its own copy.
+        return self.instance.collection(collection).get_list(
+            page, per_page, dict(query)
+        )
+
+    @typechecked
+    def iter_keyset_pages(
+        self,
+        collection: str,
+        query: dict[str, str],
+        per_page: int = 500,
+        field: str = KEYSET_FIELD,
+        cursor: Optional[tuple[str, str]] = None,
+    ) -> Iterator[list[dict]]:
+        """
+        Yields the raw records of a search query a page at a time, walking the
+        collection by (field, id). See keyset_query.
+
+        Args:
+            collection (str): The target collection.
+            query (dict[str, str]): What you're searching (without a sort).
+            per_page (int, optional): How many items to return from a search. Defaults to 500 (max).
+            field (str, optional): The (timestamp) field to walk by, i.e. "updated".
+                Defaults to KEYSET_FIELD (created).
+            cursor (Optional[tuple[str, str]], optional): Start after the record with
+                this (field, id). Defaults to None (the first record).
+
+        Yields:
+            list[dict]: The raw records of each page.
+        """
+        path: str = records_path(collection)
+        while True:
+            logger.info(f"Searching {collection} for {query}. After {cursor}")
+            # Sent directly, as the SDK's records drop the milliseconds of created
+            response: dict = self.instance.send(
+                path,
+                {
+                    "method": "GET",
+                    "params": keyset_query(query, per_page, cursor, field),
+                },
+            )
+            items: list[dict] = response.get("items") or []
+            cursor = keyset_cursor(items, per_page, field)
+            yield items
+
+            if cursor is None:
+                return
+
+    def __iter_keyset(
+        self, collection: str, query: dict[str, str], per_page: int
+    ) -> Iterator[Record]:
+        """
+        Yields all the records from a search query, walking the collection by
+        (created, id). See keyset_query.
+        """
+        for items in self.iter_keyset_pages(collection, query, per_page):
+            for item in items:
+                yield Record(item)
+
+    @typechecked
+    def iter_rows(
+        self,
+        row_class: type[Row],
+        query: dict[str, str],
+        per_page: int = 500,
+        fields: Optional[list[str]] = None,
+    ) -> Iterator[Row]:
+        """
+        Yields the rows (see rows.py) of a search query of the row class's collection.
+        The raw records are turned straight into rows, and the collection is walked
+        by (created, id) like a keyset iter_search.
+
+        Args:
+            row_class (type[Row]): I.e. TiktokRow.
+            query (dict[str, str]): What you're searching (without a sort).
+            per_page (int, optional): How many items to return from a search. Defaults to 500 (max).
+            fields (Optional[list[str]], optional): Only return these fields (the rest
+                of the row's fields are None). Defaults to None (every field of the
+                row).
+
+        Raises:
+            ValueError: If the query has a sort.
+
+        Yields:
+            Row: Each discovered row from the query.
+        """
+        query = project_query(query, fields or row_class.fields())
+        for items in self.iter_keyset_pages(row_class.CollectionName, query, per_page):
+            yield from row_class.from_items(items)
+
+    @typechecked
+    def search_rows(
+        self,
+        row_class: type[Row],
+        query: dict[str, str],
+        per_page: int = 500,
+        fields: Optional[list[str]] = None,
+    ) -> list[Row]:
+        """
+        Returns all the rows from a search query, see iter_rows.
+
+        Args:
+            row_class (type[Row]): I.e. TiktokRow.
+            query (dict[str, str]): What you're searching (without a sort).
+            per_page (int, optional): How many items to return from a search. Defaults to 500 (max).
+            fields (Optional[list[str]], optional): Only return these fields. Defaults
+                to None (every field of the row).
+
+        Returns:
+            list[Row]
+        """
+        return list(self.iter_rows(row_class, query, per_page, fields))
+
+    @typechecked
+    def iter_search(
+        self,
+        collection: str,
+        query: dict[str, str],
+        per_page: int = 500,
+        prefetch: bool = False,
+        concurrency: Optional[int] = None,
+        fields: Optional[list[str]] = None,
+        keyset: bool = False,
+    ) -> Iterator[Record]:
+        """
+        Yields all the records from a search query, page by page. Only the current
+        page (plus any pages being fetched ahead) is held in memory.
+
+        Once the first page is fetched we know how many pages remain, so with
+        concurrency set, that many of the remaining pages are fetched at the same
+        time. Pages are always yielded in order.
+
+        With keyset, the collection is instead walked by (created, id): each page is
+        the records after the last one of the previous page, and the total isn't
+        counted. Pages cost the same however deep they are, and records inserted
+        during the search don't shift the pages (none are skipped or repeated). The
+        records are yielded in (created, id) order, so the query can't have a sort.
+
+        Args:
+            collection (str): The target collection.
+            query (dict[str, str]): What you're searching.
+            per_page (int, optional): How many items to return from a search. Defaults to 500 (max).
+            prefetch (bool, optional): Fetch page N+1 while page N is being consumed.
+                Defaults to False.
+            concurrency (Optional[int], optional): How many pages to fetch at the same
+                time. Takes precedence over prefetch. Defaults to None (sequential).
+            fields (Optional[list[str]], optional): Only return these fields of the
+                records (i.e. ["id", "views"]). Defaults to None (every field).
+            keyset (bool, optional): Walk the collection by (created, id). Can't be
+                combined with prefetch or concurrency. Defaults to False.
+
+        Raises:
+            ValueError: If concurrency is less than 1, or keyset is combined with
+                prefetch, concurrency or a sort.
+
+        Yields:
+            Record: Each discovered record from the query.
+        """
+        workers: int = search_workers(concurrency, keyset, prefetch)
+        query = project_query(query, fields)
+
+        if keyset:
+            yield from self.__iter_keyset(collection, query, per_page)
+            return
+
+        response: ListResult = self.__fetch_page(collection, query, 1, per_page)
+
+        if not workers:
+            page: int = 1
+            while True:
+                yield from response.items
+
+                if not response.items or page >= response.total_pages:
+                    return
+                page += 1
+                response = self.__fetch_page(collection, query, page, per_page)
+
+        total_pages: int = response.total_pages if response.items else 1
+        next_page: int = 2
+        pending: deque[Future] = deque()
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            while True:
+                # Keep the window of in-flight pages full
+                while next_page <= total_pages and len(pending) < workers:
+                    pending.append(
+                        executor.submit(
+                            bind_session(bind_stage(self.__fetch_page)),
+                            collection,
+                            query,
+                            next_page,
+                            per_page,
+                        )
+                    )
+                    next_page += 1
+
+                yield from response.items
+
+                if not pending:
+                    return
+                response = pending.popleft().result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
     @typechecked
     def search(
         self,
         collection: str,
         query: dict[str, str],
-        records: Optional[list[Record]] = None,
-        page: int = 1,
         per_page: int = 500,
+        prefetch: bool = False,
+        concurrency: Optional[int] = None,
+        fields: Optional[list[str]] = None,
+        keyset: bool = False,
     ) -> list[Record]:
         """
         Returns all the records from a search query.
 
         Args:
             collection (str): The target collection.
-            page (int): The page number.
             query (dict[str, str]): What you're searching.
-            records (list[Record]): The discovered records from the query.
             per_page (int, optional): How many items to return from a search. Defaults to 500 (max).
+            prefetch (bool, optional): Fetch page N+1 while page N is being consumed.
+                Defaults to False.
+            concurrency (Optional[int], optional): How many pages to fetch at the same
+                time. Defaults to None (sequential).
+            fields (Optional[list[str]], optional): Only return these fields of the
+                records (i.e. ["id", "views"]). Defaults to None (every field).
+            keyset (bool, optional): Walk the collection by (created, id), see
+                iter_search. Defaults to False.
 
         Returns:
             list[Record]: All discovered records from the query
         """
-        logger.info(f"Searching {collection} for {query}. Page {page}")
-        if not records:
-            records: list[Record] = []
-
-        response = self.instance.collection(collection).get_list(page, per_page, query)
-
-        accumulated_records = records + response.items
-
-        if len(accumulated_records) == response.total_items:
-            return accumulated_records
-
-        return self.search(collection, query, accumulated_records, page + 1, per_page)
+        return list(
+            self.iter_search(
+                collection, query, per_page, prefetch, concurrency, fields, keyset
+            )
+        )
 
     @typechecked
     def search_single_record(
-        self, collection: str, field: str, value: PocketBaseValueOptions
+        self,
+        collection: str,
+        field: str,
+        value: PocketBaseValueOptions,
+        fields: Optional[list[str]] = None,
     ) -> Optional[Record]:
         """
         Returns a single record from a query. The intent of this mention is to return
@@ -108,6 +553,9 @@ class SingletonPocketBase:
             collection (str): The target collection.
             field (str): The field to search against.
             value (PocketBaseValueOptions): The value...
+            fields (Optional[list[str]], optional): Only return these fields of the
+                record. Defaults to None (every field). A (complete) record from the
+                identity map is returned as is.
 
         Raises:
             ValueError: If we return more than 1 result.
@@ -115,33 +563,202 @@ class SingletonPocketBase:
         Returns:
             Optional[Record]
         """
-        query = {"filter": f"{field} = {SingletonPocketBase.serialize_value(value)}"}
-        results = self.search(collection, query)
+        records: Optional[list[Record]] = find_local_record(
+            collection, field, value, fields
+        )
+        if records is None:
+            records = self.__fetch_page(
+                collection, field_query(field, value, fields), 1, SINGLE_RECORD_PAGE
+            ).items
+
+        return single_record(collection, records, fields)
+
+    @typechecked
+    def iter_search_multiple_records(
+        self,
+        collection: str,
+        field: str,
+        value: PocketBaseValueOptions,
+        prefetch: bool = False,
+        concurrency: Optional[int] = None,
+        fields: Optional[list[str]] = None,
+    ) -> Iterator[Record]:
+        """
+        Yields the records that match the query, page by page.
+
+        Args:
+            collection (str): The target collection.
+            field (str): The field to search against.
+            value (PocketBaseValueOptions): The value...
+            prefetch (bool, optional): Fetch the next page while the current one is
+                being consumed. Defaults to False.
+            concurrency (Optional[int], optional): How many pages to fetch at the same
+                time. Defaults to None (sequential).
+            fields (Optional[list[str]], optional): Only return these fields of the
+                records (i.e. ["id", "views"]). Defaults to None (every field).
 
-        if len(results) == 0:
-            return None
-        if len(results) > 1:
-            raise ValueError("Returned too many results!")
+        Yields:
+            Record
+        """
+        records: Optional[list[Record]] = replica_records(
+            collection, field, value, fields
+        )
+        if records is not None:
+            yield from records
+            return
 
-        return results[0]
+        yield from self.iter_search(
+            collection,
+            field_query(field, value),
+            prefetch=prefetch,
+            concurrency=concurrency,
+            fields=fields,
+        )
 
     @typechecked
     def search_multiple_records(
-        self, collection: str, field: str, value: PocketBaseValueOptions
+        self,
+        collection: str,
+        field: str,
+        value: PocketBaseValueOptions,
+        prefetch: bool = False,
+        concurrency: Optional[int] = None,
+        fields: Optional[list[str]] = None,
     ) -> list[Record]:
         """
         Returns multiple records that match the query.
 
         Args:
-            collection (str): _description_
-            field (str): _description_
-            value (PocketBaseValueOptions): _description_
+            collection (str): The target collection.
+            field (str): The field to search against.
+            value (PocketBaseValueOptions): The value...
+            prefetch (bool, optional): Fetch the next page while the current one is
+                being consumed. Defaults to False.
+            concurrency (Optional[int], optional): How many pages to fetch at the same
+                time. Defaults to None (sequential).
+            fields (Optional[list[str]], optional): Only return these fields of the
+                records (i.e. ["id", "views"]). Defaults to None (every field).
 
         Returns:
             list[Record]
         """
-        query = {"filter": f"{field} = {SingletonPocketBase.serialize_value(value)}"}
-        return self.search(collection, query)
+        return list(
+            self.iter_search_multiple_records(
+                collection, field, value, prefetch, concurrency, fields
+            )
+        )
+
+    @typechecked
+    def search_records_by_values(
+        self,
+        collection: str,
+        field: str,
+        values: list[PocketBaseValueOptions],
+        concurrency: Optional[int] = None,
+        fields: Optional[list[str]] = None,
+    ) -> dict[PocketBaseValueOptions, Record]:
+        """
+        Returns the record of each value of a (unique) field, in a handful of requests.
+        The values are OR'd together into filters (see chunk_filters) which are
+        searched at the same time. Values found in the identity map (if a session is
+        open) or the replica (if one is started) aren't searched for.
+
+        Args:
+            collection (str): The target collection.
+            field (str): The field to search against. Can be a field of a relation,
+                i.e. "tiktok.video_id".
+            values (list[PocketBaseValueOptions]): The values to search for.
+            concurrency (Optional[int], optional): How many filters are searched at the
+                same time. Defaults to Config.PocketBase.SearchConcurrency.
+            fields (Optional[list[str]], optional): Only return these fields (plus the
+                searched field) of the records. Defaults to None (every field).
+
+        Raises:
+            ValueError: If a value has more than 1 record.
+
+        Returns:
+            dict[PocketBaseValueOptions, Record]: The record of each value that has one.
+                Values without a record are left out.
+        """
+        found, remaining = find_local_records(collection, field, values, fields)
+        if not remaining:
+            return found
+
+        query, filters = values_filters(collection, field, remaining, fields)
+        with ThreadPoolExecutor(
+            max_workers=concurrency or Config.PocketBase.SearchConcurrency
+        ) as executor:
+            results: Iterator[list[Record]] = executor.map(
+                bind_session(
+                    bind_stage(
+                        lambda filter: self.search(
+                            collection, {**query, "filter": filter}
+                        )
+                    )
+                ),
+                filters,
+            )
+            return match_records_to_values(
+                collection,
+                field,
+                remaining,
+                found,
+                chain.from_iterable(results),
+                remember=fields is None,
+            )
+
+    @typechecked
+    def count(self, collection: str, filter: Optional[str] = None) -> int:
+        """
+        Returns the number of records matching a filter. Only a single (id only) row
+        is transferred, the count comes from the page's total.
+
+        Args:
+            collection (str): The target collection.
+            filter (Optional[str], optional): A PocketBase filter. Defaults to None
+                (every record).
+
+        Returns:
+            int
+        """
+        return self.__fetch_page(
+            collection, count_query(collection, filter), 1, 1
+        ).total_items
+
+    @typechecked
+    def count_many(
+        self, counts: dict[str, CountQuery], concurrency: Optional[int] = None
+    ) -> dict[str, int]:
+        """
+        Runs several counts at the same time.
+
+        Args:
+            counts (dict[str, CountQuery]): Name of each count, and its collection and filter.
+            concurrency (Optional[int], optional): How many counts run at the same time.
+                Defaults to Config.PocketBase.SearchConcurrency.
+
+        Returns:
+            dict[str, int]: The count of each name.
+
+        Example:
+            pb.count_many({
+                "used": ("videos", "used = true"),
+                "deleted": ("videos", "deleted = true"),
+            })
+        """
+        if not counts:
+            return {}
+
+        with ThreadPoolExecutor(
+            max_workers=concurrency or Config.PocketBase.SearchConcurrency
+        ) as executor:
+            futures: dict[str, Future] = {
+                name: executor.submit(
+                    bind_session(bind_stage(self.count)), collection, filter
+                )
+                for name, (collection, filter) in counts.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
 
     @typechecked
     def create(self, collection: str, data: dict) -> Record:
@@ -153,56 +770,1723 @@ class SingletonPocketBase:
             data (Data[str, Any]): the record to insert.
 
         Returns:
-            dict: The result of the create query.
+            Record: The created record.
         """
         logger.info(f"Creating record {collection}. Data: {data}")
-        return self.instance.collection(collection).create(data)
+        return written_record(
+            collection, "create", self.instance.collection(collection).create(data)
+        )
+
+    @typechecked
+    def create_many(
+        self, collection: str, rows: list[dict], concurrency: Optional[int] = None
+    ) -> BulkCreateResult:
+        """
+        Inserts many records into a collection, with a bounded number of inserts
+        happening at the same time. A failed insert doesn't stop the others.
+
+        Args:
+            collection (str): The target collection.
+            rows (list[dict]): The records to insert.
+            concurrency (Optional[int], optional): How many inserts can happen at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+        Returns:
+            BulkCreateResult: The created records (in the order of the rows) and the
+                rows which failed (with their error).
+        """
+        logger.info(f"Creating {len(rows)} records in {collection}")
+        if not rows:
+            return [], []
+
+        with ThreadPoolExecutor(
+            max_workers=concurrency or Config.PocketBase.BulkConcurrency
+        ) as executor:
+            futures: list[Future] = [
+                executor.submit(bind_session(bind_stage(self.create)), collection, row)
+                for row in rows
+            ]
+        return split_bulk_results(collection, "create", rows, bulk_results(futures))
 
     @typechecked
-    def update(self, collection: str, record_id: str, data: dict):
+    def update(self, collection: str, record_id: str, data: dict) -> Record:
         """
         Update an existing record.
 
         Args:
             collection (str): The target collection.
+            record_id (str): The id of the record to update.
             data (dict): The field that we want to change and the new value.
 
+        Returns:
+            Record: The updated record.
         """
         logger.info(
             f"Updating record {record_id} from collection {collection}. Data: {data}"
         )
-        self.instance.collection(collection).update(record_id, data)
+        forget_record(collection, record_id)
+        return written_record(
+            collection,
+            "update",
+            self.instance.collection(collection).update(record_id, data),
+        )
 
     @typechecked
-    def delete(self, collection: str, record_id: str) -> None:
+    def update_many(
+        self,
+        collection: str,
+        updates: list[tuple[str, dict]],
+        concurrency: Optional[int] = None,
+    ) -> list[Record]:
         """
-        Deletes a record from a collection.
+        Updates many records, with a bounded number of updates happening at the same
+        time.
 
         Args:
             collection (str): The target collection.
-            record_id (str): The id of the record to delete.
+            updates (list[tuple[str, dict]]): The id of each record to update, and the
+                fields to change.
+            concurrency (Optional[int], optional): How many updates can happen at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+        Raises:
+            ClientResponseError: If an update failed (once every update has finished).
+
+        Returns:
+            list[Record]: The updated records, in the order of the updates.
         """
-        logger.warning(f"Deleting record {record_id} from {collection}.")
-        self.instance.collection(collection).delete(record_id)
+        logger.info(f"Updating {len(updates)} records in {collection}")
+        if not updates:
+            return []
+
+        with ThreadPoolExecutor(
+            max_workers=concurrency or Config.PocketBase.BulkConcurrency
+        ) as executor:
+            futures: list[Future] = [
+                executor.submit(
+                    bind_session(bind_stage(self.update)), collection, record_id, data
+                )
+                for record_id, data in updates
+            ]
+        return raise_bulk_error(bulk_results(futures))
 
     @typechecked
-    @staticmethod
-    def serialize_value(value: PocketBaseValueOptions) -> PocketBaseValueOptions:
+    def upsert(
+        self,
+        collection: str,
+        key_field: str,
+        data: dict,
+        compare_fields: Optional[list[str]] = None,
+        update_fields: Optional[list[str]] = None,
+    ) -> Record:
         """
-        Serializes a value.
+        Creates a record, or updates the record with the same key (if it changed).
 
         Args:
-            value (PocketBaseValueOptions)
+            collection (str): The target collection.
+            key_field (str): The (unique) field the record is found by, i.e. "url".
+            data (dict): The record data (with the key field).
+            compare_fields (Optional[list[str]], optional): The fields which, when
+                changed, update the record. Defaults to None (every field of data).
+            update_fields (Optional[list[str]], optional): The fields an update
+                writes. Defaults to None (every field of data).
 
         Returns:
-            PocketBaseValueOptions
+            Record: The created, updated or unchanged record (the unchanged record
+                only has the compared fields, if they were passed).
         """
-        logger.info(f"Serializing value {value}")
-        if isinstance(value, (int, float, bool)):
-            return value
+        action, record, write = plan_single_upsert(
+            key_field,
+            data,
+            self.search_single_record(
+                collection,
+                key_field,
+                data[key_field],
+                upsert_fields(key_field, compare_fields),
+            ),
+            compare_fields,
+            update_fields,
+        )
+        if action == "create":
+            return self.create(collection, write)
+        if action == "update":
+            return self.update(collection, record.id, write)
+        return record
 
-        # If a single quote is in the str, wrap it in double quotes
-        if "'" in value:
-            return f'"{value}"'
+    @typechecked
+    def upsert_many(
+        self,
+        collection: str,
+        key_field: str,
+        rows: list[dict],
+        compare_fields: Optional[list[str]] = None,
+        concurrency: Optional[int] = None,
+        update_fields: Optional[list[str]] = None,
+    ) -> BulkUpsertResult:
+        """
+        Creates the records of rows which don't have one yet, and updates the ones
+        which changed. The existing records are found in a handful of requests (see
+        search_records_by_values), so unchanged rows cost nothing more. A failed
+        write doesn't stop the others.
+
+        Args:
+            collection (str): The target collection.
+            key_field (str): The (unique) field rows are matched to records by.
+            rows (list[dict]): The record data (with the key field).
+            compare_fields (Optional[list[str]], optional): The fields which, when
+                changed, update a record. Defaults to None (every field of the row).
+            concurrency (Optional[int], optional): How many writes can happen at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+            update_fields (Optional[list[str]], optional): The fields an update
+                writes. Defaults to None (every field of the row).
+
+        Returns:
+            BulkUpsertResult: The created, updated and unchanged records (the
+                unchanged ones only have the compared fields, if they were passed),
+                and the rows which failed (with their error).
+        """
+        logger.info(f"Upserting {len(rows)} records in {collection} by {key_field}")
+        create, update, unchanged = plan_upsert(
+            key_field,
+            rows,
+            self.search_records_by_values(
+                collection,
+                key_field,
+                list(dict.fromkeys(row[key_field] for row in rows)),
+                fields=upsert_fields(key_field, compare_fields),
+            ),
+            compare_fields,
+        )
+        created, failed = self.create_many(collection, create, concurrency)
+
+        futures: list[Future] = []
+        if update:
+            with ThreadPoolExecutor(
+                max_workers=concurrency or Config.PocketBase.BulkConcurrency
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        bind_session(bind_stage(self.update)),
+                        collection,
+                        record.id,
+                        update_data(row, update_fields),
+                    )
+                    for record, row in update
+                ]
+        updated, failed_updates = split_bulk_results(
+            collection, "update", [row for _, row in update], bulk_results(futures)
+        )
+
+        return finish_upsert(
+            collection, created, updated, unchanged, failed + failed_updates
+        )
+
+    @typechecked
+    def delete(self, collection: str, record_id: str) -> None:
+        """
+        Deletes a record from a collection.
+
+        Args:
+            collection (str): The target collection.
+            record_id (str): The id of the record to delete.
+        """
+        logger.warning(f"Deleting record {record_id} from {collection}.")
+        forget_record(collection, record_id)
+        self.instance.collection(collection).delete(record_id)
+        written_record(collection, "delete", Record({"id": record_id}))
+
+    @typechecked
+    @staticmethod
+    def chunk_filters(
+        field: str,
+        values: list[PocketBaseValueOptions],
+        max_length: Optional[int] = None,
+    ) -> list[str]:
+        """
+        Builds "field = a || field = b || ..." filters for the values, starting a new
+        filter whenever the (URL encoded) filter would become longer than max_length.
+
+        Args:
+            field (str): The field to filter.
+            values (list[PocketBaseValueOptions]): The values of the field.
+            max_length (Optional[int], optional): The longest a filter can be (unless
+                a single value is longer). Defaults to Config.PocketBase.MaxFilterLength.
+
+        Returns:
+            list[str]: The filters.
+        """
+        max_length = max_length or Config.PocketBase.MaxFilterLength
+        separator: str = " || "
+
+        filters: list[str] = []
+        clauses: list[str] = []
+        length: int = 0
+        for value in values:
+            clause: str = f"{field} = {SingletonPocketBase.serialize_value(value)}"
+            clause_length: int = len(quote(clause)) + len(quote(separator))
+            if clauses and length + clause_length > max_length:
+                filters.append(separator.join(clauses))
+                clauses, length = [], 0
+            clauses.append(clause)
+            length += clause_length
+
+        if clauses:
+            filters.append(separator.join(clauses))
+        return filters
+
+    @typechecked
+    @staticmethod
+    def field_value(record: Record, field: str) -> Any:
+        """
+        Returns the value of a field of a record. Fields of a (expanded) relation are
+        written as "relation.field".
+
+        Args:
+            record (Record)
+            field (str): I.e. "url" or "tiktok.video_id".
+
+        Returns:
+            Any: None if the field (or relation) isn't there.
+        """
+        *relations, name = field.split(".")
+        current: Any = record
+        for relation in relations:
+            current = getattr(current, "expand", {}).get(relation)
+            if not isinstance(current, Record):
+                return None
+        return getattr(current, name, None)
+
+    @typechecked
+    @staticmethod
+    def serialize_value(value: PocketBaseValueOptions) -> PocketBaseValueOptions:
+        """
+        Serializes a value.
+
+        Args:
+            value (PocketBaseValueOptions)
+
+        Returns:
+            PocketBaseValueOptions
+        """
+        logger.info(f"Serializing value {value}")
+        if isinstance(value, (int, float, bool)):
+            return value
+
+        # If a single quote is in the str, wrap it in double quotes
+        if "'" in value:
+            return f'"{value}"'
 
         return f"'{value}'"
+
+
+def values_query(field: str, fields: Optional[list[str]]) -> dict[str, str]:
+    """
+    Builds the search query of search_records_by_values (without its filter). A field
+    of a relation is expanded, and the searched field is always part of a projection,
+    so the records can be matched to their value.
+
+    Args:
+        field (str): The searched field, i.e. "url" or "tiktok.video_id".
+        fields (Optional[list[str]]): The fields to return.
+
+    Returns:
+        dict[str, str]
+    """
+    query: dict[str, str] = {}
+    relation: str = field.rpartition(".")[0]
+    if relation:
+        query["expand"] = relation
+    if fields:
+        query["fields"] = ",".join(
+            [*fields, f"expand.{field}" if relation else field]
+        )
+
+    return query
+
+
+def upsert_fields(key_field: str, compare_fields: Optional[list[str]]) -> Optional[list[str]]:
+    """
+    Returns the fields an upsert reads of the existing records.
+
+    Args:
+        key_field (str): The (unique) field the rows are matched to records by.
+        compare_fields (Optional[list[str]]): The fields compared. None compares
+            (and reads) every field.
+
+    Returns:
+        Optional[list[str]]
+    """
+    if compare_fields is None:
+        return None
+    return list(dict.fromkeys(["id", key_field, *compare_fields]))
+
+
+def update_data(row: dict, update_fields: Optional[list[str]]) -> dict:
+    """
+    Returns the data an upsert updates a record with.
+
+    Args:
+        row (dict): The record data.
+        update_fields (Optional[list[str]]): The fields written. None writes every
+            field of the row.
+
+    Returns:
+        dict
+    """
+    if update_fields is None:
+        return row
+    return {field: row[field] for field in update_fields if field in row}
+
+
+def plan_upsert(
+    key_field: str,
+    rows: list[dict],
+    existing: dict[PocketBaseValueOptions, Record],
+    compare_fields: Optional[list[str]],
+) -> tuple[list[dict], list[tuple[Record, dict]], list[Record]]:
+    """
+    Splits upsert rows into the ones to create, to update and which are unchanged. If
+    rows share a key, the last one wins.
+
+    Args:
+        key_field (str): The (unique) field the rows are matched to records by.
+        rows (list[dict]): The record data.
+        existing (dict[PocketBaseValueOptions, Record]): The record of each key which
+            has one.
+        compare_fields (Optional[list[str]]): The fields which, when changed, make a
+            row an update. None compares every field of the row.
+
+    Returns:
+        tuple[list[dict], list[tuple[Record, dict]], list[Record]]: The rows to
+            create, the rows to update (with their record) and the unchanged records.
+    """
+    create: list[dict] = []
+    update: list[tuple[Record, dict]] = []
+    unchanged: list[Record] = []
+    for row in {row[key_field]: row for row in rows}.values():
+        record: Optional[Record] = existing.get(row[key_field])
+        if record is None:
+            create.append(row)
+        elif any(
+            SingletonPocketBase.field_value(record, field) != row.get(field)
+            for field in compare_fields or [field for field in row if field != "id"]
+        ):
+            update.append((record, row))
+        else:
+            unchanged.append(record)
+
+    return create, update, unchanged
+
+
+def keyset_query(
+    query: dict[str, str],
+    per_page: int,
+    cursor: Optional[tuple[str, str]],
+    field: str = KEYSET_FIELD,
+) -> dict:
+    """
+    Builds the query of a page of a keyset search: the records after the cursor (the
+    created, or field, and id of the last record of the previous page), in
+    (created, id) order, without counting the total.
+
+    Args:
+        query (dict[str, str]): What you're searching.
+        per_page (int): How many items to return from the page.
+        cursor (Optional[tuple[str, str]]): None for the first page.
+        field (str, optional): Walk by this field (i.e. "updated") rather than
+            created. Defaults to KEYSET_FIELD.
+
+    Raises:
+        ValueError: If the query has its own sort.
+
+    Returns:
+        dict: The query parameters.
+    """
+    if query.get("sort"):
+        message: str = f"Keyset searches are sorted by {field},id. Passed: {query}"
+        logger.error(message)
+        raise ValueError(message)
+
+    params: dict = {
+        **query,
+        "sort": f"{field},id",
+        "page": 1,
+        "perPage": per_page,
+        "skipTotal": 1,
+    }
+    if "fields" in query:
+        # The cursor is read from the records
+        params["fields"] = ",".join(
+            dict.fromkeys(["id", field, *query["fields"].split(",")])
+        )
+
+    filters: list[str] = [f"({query['filter']})"] if query.get("filter") else []
+    if cursor is not None:
+        value, record_id = cursor
+        filters.append(
+            f"({field} > '{value}' || ({field} = '{value}' && id > '{record_id}'))"
+        )
+    if filters:
+        params["filter"] = " && ".join(filters)
+    return params
+
+
+def keyset_cursor(
+    items: list[dict], per_page: int, field: str = KEYSET_FIELD
+) -> Optional[tuple[str, str]]:
+    """
+    Returns the cursor of the page after a keyset page.
+
+    Args:
+        items (list[dict]): The raw records of the page.
+        per_page (int)
+        field (str, optional): The field the search walks by. Defaults to
+            KEYSET_FIELD.
+
+    Returns:
+        Optional[tuple[str, str]]: None if it was the last page.
+    """
+    if len(items) < per_page:
+        return None
+    return items[-1][field], items[-1]["id"]
+
+
+def find_local_records(
+    collection: str,
+    field: str,
+    values: list[PocketBaseValueOptions],
+    fields: Optional[list[str]] = None,
+) -> tuple[dict[PocketBaseValueOptions, Record], list[PocketBaseValueOptions]]:
+    """
+    Splits (deduplicated) values into the ones answered locally, by the identity map
+    of the open session or the started replica, and the ones that must be searched
+    for.
+
+    Args:
+        collection (str): The collection of the records.
+        field (str): The field of the values.
+        values (list[PocketBaseValueOptions])
+        fields (Optional[list[str]], optional): The fields to return (of records from
+            the replica). Defaults to None (every field).
+
+    Raises:
+        ValueError: If a value has more than 1 record in the replica.
+
+    Returns:
+        tuple[dict[PocketBaseValueOptions, Record], list[PocketBaseValueOptions]]: The
+            record of each found value, and the remaining values. Values the replica
+            has no record of are in neither.
+    """
+    identity_map: Optional[IdentityMap] = current_identity_map()
+    found: dict[PocketBaseValueOptions, Record] = {}
+    remaining: list[PocketBaseValueOptions] = []
+    for value in dict.fromkeys(values):
+        record: Optional[Record] = (
+            identity_map.get(collection, field, value) if identity_map else None
+        )
+        if record is not None:
+            found[value] = record
+            continue
+
+        records: Optional[list[Record]] = replica_records(
+            collection, field, value, fields
+        )
+        if records is None:
+            remaining.append(value)
+        elif len(records) > 1:
+            raise ValueError(f"Returned too many results for {field} = {value}!")
+        elif records:
+            found[value] = records[0]
+
+    return found, remaining
+
+
+def match_records_to_values(
+    collection: str,
+    field: str,
+    values: list[PocketBaseValueOptions],
+    found: dict[PocketBaseValueOptions, Record],
+    records: Iterable[Record],
+    remember: bool = True,
+) -> dict[PocketBaseValueOptions, Record]:
+    """
+    Adds searched for records to found, by the value (of values) of their field.
+
+    Args:
+        collection (str): The collection of the records.
+        field (str): The searched field.
+        values (list[PocketBaseValueOptions]): The searched values.
+        found (dict[PocketBaseValueOptions, Record]): The already found records.
+        records (Iterable[Record]): The search results.
+        remember (bool, optional): Add the records to the identity map of the open
+            session. Only complete records should be. Defaults to True.
+
+    Raises:
+        ValueError: If a value has more than 1 record.
+
+    Returns:
+        dict[PocketBaseValueOptions, Record]: found.
+    """
+    # Values are compared as str, as PocketBase returns i.e. a video_id of 1 as "1"
+    values_by_key: dict[str, PocketBaseValueOptions] = {
+        str(value): value for value in values
+    }
+    for record in records:
+        value = values_by_key.get(
+            str(SingletonPocketBase.field_value(record, field))
+        )
+        if value is None:
+            continue
+        if value in found:
+            raise ValueError(f"Returned too many results for {field} = {value}!")
+        found[value] = remember_record(collection, record) if remember else record
+
+    return found
+
+
+def records_path(collection: str, record_id: Optional[str] = None) -> str:
+    """
+    Returns the API path of the records of a collection (or of one of its records).
+
+    Args:
+        collection (str)
+        record_id (Optional[str], optional): Defaults to None (every record).
+
+    Returns:
+        str
+    """
+    path: str = f"/api/collections/{quote(collection)}/records"
+    if record_id is None:
+        return path
+    return f"{path}/{quote(record_id)}"
+
+
+def search_workers(
+    concurrency: Optional[int], keyset: bool, prefetch: bool = False
+) -> int:
+    """
+    Returns how many pages of a search are fetched ahead, at the same time.
+
+    Args:
+        concurrency (Optional[int]): The passed concurrency.
+        keyset (bool): If it's a keyset search.
+        prefetch (bool, optional): Fetch the next page while one is being consumed.
+            Defaults to False.
+
+    Raises:
+        ValueError: If concurrency is less than 1, or keyset is combined with
+            prefetch or concurrency.
+
+    Returns:
+        int: 0 if the pages are fetched one after the other.
+    """
+    if concurrency is not None and concurrency < 1:
+        message: str = f"Concurrency must be at least 1. Passed: {concurrency}"
+        logger.error(message)
+        raise ValueError(message)
+
+    workers: int = concurrency or (1 if prefetch else 0)
+    if keyset and workers:
+        message = "Keyset searches fetch their pages one after the other"
+        logger.error(message)
+        raise ValueError(message)
+    return workers
+
+
+def field_query(
+    field: str, value: PocketBaseValueOptions, fields: Optional[list[str]] = None
+) -> dict[str, str]:
+    """
+    Builds the search query of the records whose field has the value.
+
+    Args:
+        field (str): The field to search against.
+        value (PocketBaseValueOptions): The value...
+        fields (Optional[list[str]], optional): The fields to return. Defaults to
+            None (every field).
+
+    Returns:
+        dict[str, str]
+    """
+    return project_query(
+        {"filter": f"{field} = {SingletonPocketBase.serialize_value(value)}"}, fields
+    )
+
+
+def count_query(collection: str, filter: Optional[str]) -> dict[str, str]:
+    """
+    Builds the query of a count: a single page of a single (id only) record, whose
+    total is the count.
+
+    Args:
+        collection (str): The counted collection.
+        filter (Optional[str]): A PocketBase filter. None counts every record.
+
+    Returns:
+        dict[str, str]
+    """
+    logger.info(f"Counting records of {collection}. Filter: {filter}")
+    query: dict[str, str] = {"fields": "id"}
+    if filter:
+        query["filter"] = filter
+    return query
+
+
+def find_local_record(
+    collection: str,
+    field: str,
+    value: PocketBaseValueOptions,
+    fields: Optional[list[str]] = None,
+) -> Optional[list[Record]]:
+    """
+    Searches the identity map of the open session, then the started replica, for
+    the record whose (unique) field has the value.
+
+    Args:
+        collection (str): The target collection.
+        field (str): The field to search against.
+        value (PocketBaseValueOptions): The value...
+        fields (Optional[list[str]], optional): The fields to return (of records from
+            the replica). Defaults to None (every field).
+
+    Returns:
+        Optional[list[Record]]: None if the value must be searched for.
+    """
+    identity_map: Optional[IdentityMap] = current_identity_map()
+    if identity_map is not None:
+        record: Optional[Record] = identity_map.get(collection, field, value)
+        if record is not None:
+            return [record]
+
+    return replica_records(collection, field, value, fields)
+
+
+def single_record(
+    collection: str, records: list[Record], fields: Optional[list[str]]
+) -> Optional[Record]:
+    """
+    Returns the only record of a search_single_record search.
+
+    Args:
+        collection (str): The searched collection.
+        records (list[Record]): The results (at most SINGLE_RECORD_PAGE).
+        fields (Optional[list[str]]): The returned fields. Only complete records are
+            added to the identity map of the open session.
+
+    Raises:
+        ValueError: If there's more than 1 result.
+
+    Returns:
+        Optional[Record]
+    """
+    if len(records) == 0:
+        return None
+    if len(records) > 1:
+        raise ValueError("Returned too many results!")
+
+    if fields is not None:
+        return records[0]
+    return remember_record(collection, records[0])
+
+
+def values_filters(
+    collection: str,
+    field: str,
+    values: list[PocketBaseValueOptions],
+    fields: Optional[list[str]],
+) -> tuple[dict[str, str], list[str]]:
+    """
+    Builds the searches of search_records_by_values: the query (see values_query) and
+    the filters the values are OR'd together into (see chunk_filters).
+
+    Args:
+        collection (str): The target collection.
+        field (str): The searched field.
+        values (list[PocketBaseValueOptions]): The values left to search for.
+        fields (Optional[list[str]]): The fields to return.
+
+    Returns:
+        tuple[dict[str, str], list[str]]: The query, and the filter of each search.
+    """
+    filters: list[str] = SingletonPocketBase.chunk_filters(field, values)
+    logger.info(
+        f"Searching {collection} for {len(values)} values of {field} "
+        f"using {len(filters)} filters"
+    )
+    return values_query(field, fields), filters
+
+
+def written_record(collection: str, action: str, record: Record) -> Record:
+    """
+    Applies one of our own writes to the started replica and (unless it's a delete)
+    the identity map of the open session.
+
+    Args:
+        collection (str): The collection of the record.
+        action (str): "create", "update" or "delete".
+        record (Record): The written record.
+
+    Returns:
+        Record: The passed record.
+    """
+    replicate_write(collection, action, record)
+    if action == "delete":
+        return record
+    return remember_record(collection, record)
+
+
+def plan_single_upsert(
+    key_field: str,
+    data: dict,
+    record: Optional[Record],
+    compare_fields: Optional[list[str]],
+    update_fields: Optional[list[str]],
+) -> tuple[str, Optional[Record], dict]:
+    """
+    Decides the write of upsert, see plan_upsert.
+
+    Args:
+        key_field (str): The (unique) field the record is found by.
+        data (dict): The record data.
+        record (Optional[Record]): The existing record of the key (if there's one).
+        compare_fields (Optional[list[str]]): The compared fields.
+        update_fields (Optional[list[str]]): The fields an update writes.
+
+    Returns:
+        tuple[str, Optional[Record], dict]: "create", "update" or "unchanged", the
+            existing record and the data to write.
+    """
+    create, update, unchanged = plan_upsert(
+        key_field,
+        [data],
+        {} if record is None else {data[key_field]: record},
+        compare_fields,
+    )
+    if create:
+        return "create", None, data
+    if update:
+        return "update", record, update_data(data, update_fields)
+    return "unchanged", unchanged[0], data
+
+
+def bulk_results(futures: list[Future]) -> list:
+    """
+    Waits for the futures of bulk writes, like asyncio.gather with
+    return_exceptions.
+
+    Args:
+        futures (list[Future])
+
+    Returns:
+        list: The result, or raised exception, of each future.
+    """
+    results: list = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as error:
+            results.append(error)
+    return results
+
+
+def split_bulk_results(
+    collection: str, action: str, rows: list[dict], results: list
+) -> tuple[list[Record], list[FailedRow]]:
+    """
+    Splits the results of bulk writes into the written records and the rows which
+    failed.
+
+    Args:
+        collection (str): The written collection.
+        action (str): "create" or "update".
+        rows (list[dict]): The row of each write.
+        results (list): The record, or raised exception, of each write.
+
+    Returns:
+        tuple[list[Record], list[FailedRow]]: The records (in the order of the rows)
+            and the failed rows (with their error).
+    """
+    written: list[Record] = []
+    failed: list[FailedRow] = []
+    for row, result in zip(rows, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to {action} record in {collection}: {result}")
+            failed.append((row, str(result)))
+        else:
+            written.append(result)
+    return written, failed
+
+
+def raise_bulk_error(results: list) -> list[Record]:
+    """
+    Raises the first error of bulk writes which must all succeed.
+
+    Args:
+        results (list): The record, or raised exception, of each write.
+
+    Raises:
+        Exception: The first raised exception.
+
+    Returns:
+        list[Record]: The records.
+    """
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return results
+
+
+def finish_upsert(
+    collection: str,
+    created: list[Record],
+    updated: list[Record],
+    unchanged: list[Record],
+    failed: list[FailedRow],
+) -> BulkUpsertResult:
+    """
+    Logs the outcome of upsert_many.
+
+    Returns:
+        BulkUpsertResult
+    """
+    logger.info(
+        f"Upserted {collection}. Created: {len(created)}. Updated: {len(updated)}. "
+        f"Unchanged: {len(unchanged)}. Failed: {len(failed)}"
+    )
+    return created, updated, unchanged, failed
+
+
+class AsyncSingletonPocketBase:
+    """
+    This class is a Singleton, asyncio native, implementation of the PocketBase
+    functionalities we use. It mirrors SingletonPocketBase, but every request is
+    awaitable and shares one aiohttp connection pool (with keep-alive).
+
+    Example:
+        pb = AsyncSingletonPocketBase()
+        record = await pb.search_single_record("tiktok", "url", url)
+        await pb.close()
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        """
+        Where the singleton magic happens!
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    logger.info("Instantiating AsyncSingletonPocketBase")
+
+                    instance = super().__new__(cls)
+                    instance.token: Optional[str] = None
+                    instance.http_session: Optional[aiohttp.ClientSession] = None
+                    instance.__loop: Optional[asyncio.AbstractEventLoop] = None
+                    instance.__auth_lock: Optional[asyncio.Lock] = None
+                    cls._instance = instance
+        return cls._instance
+
+    @staticmethod
+    def session() -> AbstractContextManager[IdentityMap]:
+        """
+        Opens an identity map session, shared with SingletonPocketBase. See
+        SingletonPocketBase.session.
+
+        Returns:
+            AbstractContextManager[IdentityMap]
+        """
+        return session()
+
+    async def __get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the shared session. Sessions are bound to an event loop, so a new
+        one is created (and the old one closed, see release_session) if we're now
+        running in a different loop (i.e. another asyncio.run call).
+
+        Returns:
+            aiohttp.ClientSession
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self.http_session is None
+            or self.http_session.closed
+            or self.__loop is not loop
+        ):
+            old_session, old_loop = self.http_session, self.__loop
+            logger.info("Creating the shared PocketBase session")
+            self.http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=Config.PocketBase.ConnectionPoolSize,
+                    keepalive_timeout=Config.PocketBase.KeepAliveTimeout,
+                ),
+                timeout=aiohttp.ClientTimeout(total=120),
+            )
+            self.__loop = loop
+            self.__auth_lock = asyncio.Lock()
+            # Replaced first, so concurrent requests don't replace it again
+            if old_session is not None and old_loop is not loop:
+                await release_session(old_session, old_loop)
+        return self.http_session
+
+    async def __authenticate_admin(self, email: str, password: str) -> None:
+        """
+        Admin authenticate. The token is cached (see auth.py).
+
+        Args:
+            email (str): The admin's email.
+            password (str): The admin's password.
+        """
+        response: dict = await self.__send(
+            "POST",
+            "/api/admins/auth-with-password",
+            body={"identity": email, "password": password},
+            authenticate=False,
+        )
+        self.token = response["token"]
+        cache_token(Config.PocketBase.URL, email, self.token)
+        logger.info("Admin authenticated with PocketBase")
+
+    async def __ensure_token(self, rejected: Optional[str] = None) -> str:
+        """
+        Returns the admin token. The cached token is used (unless it expires within
+        Config.PocketBase.TokenRefreshMargin seconds), otherwise we log in.
+
+        Args:
+            rejected (Optional[str], optional): A token PocketBase rejected, which is
+                replaced by logging in. Defaults to None.
+
+        Returns:
+            str
+        """
+        async with self.__auth_lock:
+            if rejected is not None and self.token == rejected:
+                logger.warning("The admin token was rejected, authenticating again")
+                self.token = None
+                await self.__authenticate_admin(
+                    Config.PocketBase.AdminUsername, Config.PocketBase.AdminPassword
+                )
+            if self.token is None:
+                self.token = read_cached_token(
+                    Config.PocketBase.URL,
+                    Config.PocketBase.AdminUsername,
+                    Config.PocketBase.TokenRefreshMargin,
+                )
+            if self.token is None:
+                await self.__authenticate_admin(
+                    Config.PocketBase.AdminUsername, Config.PocketBase.AdminPassword
+                )
+        return self.token
+
+    async def __send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[dict] = None,
+        body: Optional[dict] = None,
+        authenticate: bool = True,
+        rejected_token: Optional[str] = None,
+    ) -> Any:
+        """
+        Sends a request to PocketBase. A request whose token is rejected is sent again
+        once, after logging in.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The API path (i.e. /api/collections/tiktok/records).
+            params (Optional[dict], optional): Query parameters. Defaults to None.
+            body (Optional[dict], optional): JSON body. Defaults to None.
+            authenticate (bool, optional): Send (and if required, obtain) the admin
+                token. Defaults to True.
+            rejected_token (Optional[str], optional): The token this request was
+                rejected with (when it's sent again). Defaults to None.
+
+        Raises:
+            ClientResponseError: If the request failed (same as the pocketbase SDK).
+
+        Returns:
+            Any: The decoded JSON response (None if there's no content).
+        """
+        session: aiohttp.ClientSession = await self.__get_session()
+
+        headers: dict = {}
+        if authenticate:
+            headers["Authorization"] = await self.__ensure_token(rejected_token)
+
+        url: str = f"{Config.PocketBase.URL.rstrip('/')}{path}"
+        payload: Optional[bytes] = None
+        if body is not None:
+            payload = dumps(body)
+            headers["Content-Type"] = "application/json"
+        try:
+            with request_metrics.measure(method, path, len(payload or b"")) as measured:
+                async with session.request(
+                    method,
+                    url,
+                    params={key: str(value) for key, value in (params or {}).items()},
+                    data=payload,
+                    headers=headers,
+                ) as response:
+                    status: int = response.status
+                    content: bytes = await response.read()
+                measured["bytes_received"] = len(content)
+                measured["error"] = status >= 400
+        except aiohttp.ClientError as error:
+            raise ClientResponseError(
+                f"General request error. Original error: {error}",
+                original_error=error,
+            )
+
+        try:
+            data = loads(content) if content else None
+        except ValueError:
+            data = None
+
+        if (
+            authenticate
+            and rejected_token is None
+            and status in REJECTED_TOKEN_STATUSES
+        ):
+            return await self.__send(
+                method, path, params, body, rejected_token=headers["Authorization"]
+            )
+        if status >= 400:
+            raise ClientResponseError(
+                f"Response error. Status code:{status}",
+                url=url,
+                status=status,
+                data=data,
+            )
+        return data
+
+    async def close(self) -> None:
+        """
+        Closes the shared session (and its connection pool). Call it from the event loop
+        which used the session last, as a session can't be closed once its loop is
+        (see release_session).
+        """
+        if self.http_session is not None and not self.http_session.closed:
+            logger.info("Closing the shared PocketBase session")
+            if self.__loop is asyncio.get_running_loop():
+                await close_session(self.http_session)
+            else:
+                await release_session(self.http_session, self.__loop)
+        self.http_session = None
+
+    async def __fetch_page(
+        self, collection: str, query: dict[str, str], page: int, per_page: int
+    ) -> dict:
+        """
+        Fetches a single page of a search query.
+
+        Args:
+            collection (str): The target collection.
+            query (dict[str, str]): What you're searching.
+            page (int): The page number.
+            per_page (int): How many items to return from the page.
+
+        Returns:
+            dict: The raw list response.
+        """
+        logger.info(f"Searching {collection} for {query}. Page {page}")
+        return await self.__send(
+            "GET",
+            records_path(collection),
+            params={**query, "page": page, "perPage": per_page},
+        )
+
+    async def __iter_keyset_pages(
+        self, collection: str, query: dict[str, str], per_page: int
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Yields the raw records of a search query a page at a time, walking the
+        collection by (created, id). See keyset_query.
+        """
+        path: str = records_path(collection)
+        cursor: Optional[tuple[str, str]] = None
+        while True:
+            logger.info(f"Searching {collection} for {query}. After {cursor}")
+            response: dict = await self.__send(
+                "GET", path, params=keyset_query(query, per_page, cursor)
+            )
+            items: list[dict] = response.get("items") or []
+            cursor = keyset_cursor(items, per_page)
+            yield items
+
+            if cursor is None:
+                return
+
+    async def __iter_keyset(
+        self, collection: str, query: dict[str, str], per_page: int
+    ) -> AsyncIterator[Record]:
+        """
+        Yields all the records from a search query, walking the collection by
+        (created, id). See keyset_query.
+        """
+        async for items in self.__iter_keyset_pages(collection, query, per_page):
+            for item in items:
+                yield Record(item)
+
+    @typechecked
+    async def iter_rows(
+        self,
+        row_class: type[Row],
+        query: dict[str, str],
+        per_page: int = 500,
+        fields: Optional[list[str]] = None,
+    ) -> AsyncIterator[Row]:
+        """
+        Async variant of SingletonPocketBase.iter_rows.
+
+        Args:
+            row_class (type[Row]): I.e. TiktokRow.
+            query (dict[str, str]): What you're searching (without a sort).
+            per_page (int, optional): How many items to return from a search. Defaults to 500 (max).
+            fields (Optional[list[str]], optional): Only return these fields. Defaults
+                to None (every field of the row).
+
+        Yields:
+            Row: Each discovered row from the query.
+        """
+        query = project_query(query, fields or row_class.fields())
+        async for items in self.__iter_keyset_pages(
+            row_class.CollectionName, query, per_page
+        ):
+            for row in row_class.from_items(items):
+                yield row
+
+    @typechecked
+    async def search_rows(
+        self,
+        row_class: type[Row],
+        query: dict[str, str],
+        per_page: int = 500,
+        fields: Optional[list[str]] = None,
+    ) -> list[Row]:
+        """
+        Async variant of SingletonPocketBase.search_rows.
+
+        Args:
+            row_class (type[Row]): I.e. TiktokRow.
+            query (dict[str, str]): What you're searching (without a sort).
+            per_page (int, optional): How many items to return from a search. Defaults to 500 (max).
+            fields (Optional[list[str]], optional): Only return these fields. Defaults
+                to None (every field of the row).
+
+        Returns:
+            list[Row]
+        """
+        return [
+            row async for row in self.iter_rows(row_class, query, per_page, fields)
+        ]
+
+    @typechecked
+    async def iter_search(
+        self,
+        collection: str,
+        query: dict[str, str],
+        per_page: int = 500,
+        concurrency: Optional[int] = None,
+        fields: Optional[list[str]] = None,
+        keyset: bool = False,
+    ) -> AsyncIterator[Record]:
+        """
+        Yields all the records from a search query, page by page. With concurrency
+        set, that many of the remaining pages are fetched at the same time (still
+        yielded in order). With keyset, the collection is walked by (created, id)
+        instead (see SingletonPocketBase.iter_search).
+
+        Args:
+            collection (str): The target collection.
+            query (dict[str, str]): What you're searching.
+            per_page (int, optional): How many items to return from a search. Defaults to 500 (max).
+            concurrency (Optional[int], optional): How many pages to fetch at the same
+                time. Defaults to None (sequential).
+            fields (Optional[list[str]], optional): Only return these fields of the
+                records (i.e. ["id", "views"]). Defaults to None (every field).
+            keyset (bool, optional): Walk the collection by (created, id). Can't be
+                combined with concurrency. Defaults to False.
+
+        Raises:
+            ValueError: If concurrency is less than 1, or keyset is combined with
+                concurrency or a sort.
+
+        Yields:
+            Record: Each discovered record from the query.
+        """
+        workers: int = search_workers(concurrency, keyset)
+        query = project_query(query, fields)
+
+        if keyset:
+            async for record in self.__iter_keyset(collection, query, per_page):
+                yield record
+            return
+
+        response: dict = await self.__fetch_page(collection, query, 1, per_page)
+        items: list[dict] = response.get("items") or []
+        total_pages: int = response.get("totalPages", 1) if items else 1
+        next_page: int = 2
+        pending: deque[asyncio.Task] = deque()
+
+        try:
+            while True:
+                while next_page <= total_pages and len(pending) < (workers or 1):
+                    pending.append(
+                        asyncio.ensure_future(
+                            self.__fetch_page(collection, query, next_page, per_page)
+                        )
+                    )
+                    next_page += 1
+
+                for item in items:
+                    yield Record(item)
+
+                if not pending:
+                    return
+                response = await pending.popleft()
+                items = response.get("items") or []
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @typechecked
+    async def search(
+        self,
+        collection: str,
+        query: dict[str, str],
+        per_page: int = 500,
+        concurrency: Optional[int] = None,
+        fields: Optional[list[str]] = None,
+        keyset: bool = False,
+    ) -> list[Record]:
+        """
+        Returns all the records from a search query.
+
+        Args:
+            collection (str): The target collection.
+            query (dict[str, str]): What you're searching.
+            per_page (int, optional): How many items to return from a search. Defaults to 500 (max).
+            concurrency (Optional[int], optional): How many pages to fetch at the same
+                time. Defaults to None (sequential).
+            fields (Optional[list[str]], optional): Only return these fields of the
+                records (i.e. ["id", "views"]). Defaults to None (every field).
+            keyset (bool, optional): Walk the collection by (created, id), see
+                SingletonPocketBase.iter_search. Defaults to False.
+
+        Returns:
+            list[Record]: All discovered records from the query
+        """
+        return [
+            record
+            async for record in self.iter_search(
+                collection, query, per_page, concurrency, fields, keyset
+            )
+        ]
+
+    @typechecked
+    async def search_single_record(
+        self,
+        collection: str,
+        field: str,
+        value: PocketBaseValueOptions,
+        fields: Optional[list[str]] = None,
+    ) -> Optional[Record]:
+        """
+        Returns a single record from a query. The intent of this mention is to return
+        a value we expect to be unique (such as a Tiktok URL) or to check if the record
+        does exist.
+
+        Args:
+            collection (str): The target collection.
+            field (str): The field to search against.
+            value (PocketBaseValueOptions): The value...
+            fields (Optional[list[str]], optional): Only return these fields of the
+                record. Defaults to None (every field). A (complete) record from the
+                identity map is returned as is.
+
+        Raises:
+            ValueError: If we return more than 1 result.
+
+        Returns:
+            Optional[Record]
+        """
+        records: Optional[list[Record]] = find_local_record(
+            collection, field, value, fields
+        )
+        if records is None:
+            response: dict = await self.__fetch_page(
+                collection, field_query(field, value, fields), 1, SINGLE_RECORD_PAGE
+            )
+            records = [Record(item) for item in response.get("items") or []]
+
+        return single_record(collection, records, fields)
+
+    @typechecked
+    async def search_multiple_records(
+        self,
+        collection: str,
+        field: str,
+        value: PocketBaseValueOptions,
+        concurrency: Optional[int] = None,
+        fields: Optional[list[str]] = None,
+    ) -> list[Record]:
+        """
+        Returns multiple records that match the query.
+
+        Args:
+            collection (str): The target collection.
+            field (str): The field to search against.
+            value (PocketBaseValueOptions): The value...
+            concurrency (Optional[int], optional): How many pages to fetch at the same
+                time. Defaults to None (sequential).
+            fields (Optional[list[str]], optional): Only return these fields of the
+                records (i.e. ["id", "views"]). Defaults to None (every field).
+
+        Returns:
+            list[Record]
+        """
+        records: Optional[list[Record]] = replica_records(
+            collection, field, value, fields
+        )
+        if records is not None:
+            return records
+
+        return await self.search(
+            collection,
+            field_query(field, value),
+            concurrency=concurrency,
+            fields=fields,
+        )
+
+    @typechecked
+    async def search_records_by_values(
+        self,
+        collection: str,
+        field: str,
+        values: list[PocketBaseValueOptions],
+        concurrency: Optional[int] = None,
+        fields: Optional[list[str]] = None,
+    ) -> dict[PocketBaseValueOptions, Record]:
+        """
+        Returns the record of each value of a (unique) field. See
+        SingletonPocketBase.search_records_by_values.
+
+        Args:
+            collection (str): The target collection.
+            field (str): The field to search against. Can be a field of a relation,
+                i.e. "tiktok.video_id".
+            values (list[PocketBaseValueOptions]): The values to search for.
+            concurrency (Optional[int], optional): How many filters are searched at the
+                same time. Defaults to Config.PocketBase.SearchConcurrency.
+            fields (Optional[list[str]], optional): Only return these fields (plus the
+                searched field) of the records. Defaults to None (every field).
+
+        Raises:
+            ValueError: If a value has more than 1 record.
+
+        Returns:
+            dict[PocketBaseValueOptions, Record]: The record of each value that has one.
+        """
+        found, remaining = find_local_records(collection, field, values, fields)
+        if not remaining:
+            return found
+
+        query, filters = values_filters(collection, field, remaining, fields)
+        semaphore = asyncio.Semaphore(
+            concurrency or Config.PocketBase.SearchConcurrency
+        )
+
+        async def search(filter: str) -> list[Record]:
+            async with semaphore:
+                return await self.search(collection, {**query, "filter": filter})
+
+        results: list[list[Record]] = await asyncio.gather(
+            *[search(filter) for filter in filters]
+        )
+        return match_records_to_values(
+            collection,
+            field,
+            remaining,
+            found,
+            chain.from_iterable(results),
+            remember=fields is None,
+        )
+
+    @typechecked
+    async def count(self, collection: str, filter: Optional[str] = None) -> int:
+        """
+        Returns the number of records matching a filter. Only a single (id only) row
+        is transferred, the count comes from the page's total.
+
+        Args:
+            collection (str): The target collection.
+            filter (Optional[str], optional): A PocketBase filter. Defaults to None
+                (every record).
+
+        Returns:
+            int
+        """
+        response: dict = await self.__fetch_page(
+            collection, count_query(collection, filter), 1, 1
+        )
+        return response.get("totalItems", 0)
+
+    @typechecked
+    async def count_many(
+        self, counts: dict[str, CountQuery], concurrency: Optional[int] = None
+    ) -> dict[str, int]:
+        """
+        Runs several counts at the same time.
+
+        Args:
+            counts (dict[str, CountQuery]): Name of each count, and its collection and filter.
+            concurrency (Optional[int], optional): How many counts run at the same time.
+                Defaults to Config.PocketBase.SearchConcurrency.
+
+        Returns:
+            dict[str, int]: The count of each name.
+        """
+        semaphore = asyncio.Semaphore(
+            concurrency or Config.PocketBase.SearchConcurrency
+        )
+
+        async def count(collection: str, filter: Optional[str]) -> int:
+            async with semaphore:
+                return await self.count(collection, filter)
+
+        results: list[int] = await asyncio.gather(
+            *[count(collection, filter) for collection, filter in counts.values()]
+        )
+        return dict(zip(counts.keys(), results))
+
+    @typechecked
+    async def create(self, collection: str, data: dict) -> Record:
+        """
+        Inserts a record into a collection.
+
+        Args:
+            collection (str): The target collection.
+            data (dict): the record to insert.
+
+        Returns:
+            Record: The created record.
+        """
+        logger.info(f"Creating record {collection}. Data: {data}")
+        return written_record(
+            collection,
+            "create",
+            Record(await self.__send("POST", records_path(collection), body=data)),
+        )
+
+    @typechecked
+    async def create_many(
+        self, collection: str, rows: list[dict], concurrency: Optional[int] = None
+    ) -> BulkCreateResult:
+        """
+        Inserts many records into a collection, with a bounded number of inserts
+        happening at the same time. A failed insert doesn't stop the others.
+
+        Args:
+            collection (str): The target collection.
+            rows (list[dict]): The records to insert.
+            concurrency (Optional[int], optional): How many inserts can happen at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+        Returns:
+            BulkCreateResult: The created records (in the order of the rows) and the
+                rows which failed (with their error).
+        """
+        logger.info(f"Creating {len(rows)} records in {collection}")
+        semaphore = asyncio.Semaphore(concurrency or Config.PocketBase.BulkConcurrency)
+
+        async def create(row: dict) -> Record:
+            async with semaphore:
+                return await self.create(collection, row)
+
+        results: list = await asyncio.gather(
+            *[create(row) for row in rows], return_exceptions=True
+        )
+        return split_bulk_results(collection, "create", rows, results)
+
+    @typechecked
+    async def update(self, collection: str, record_id: str, data: dict) -> Record:
+        """
+        Update an existing record.
+
+        Args:
+            collection (str): The target collection.
+            record_id (str): The id of the record to update.
+            data (dict): The field that we want to change and the new value.
+
+        Returns:
+            Record: The updated record.
+        """
+        logger.info(
+            f"Updating record {record_id} from collection {collection}. Data: {data}"
+        )
+        forget_record(collection, record_id)
+        return written_record(
+            collection,
+            "update",
+            Record(
+                await self.__send(
+                    "PATCH", records_path(collection, record_id), body=data
+                )
+            ),
+        )
+
+    @typechecked
+    async def update_many(
+        self,
+        collection: str,
+        updates: list[tuple[str, dict]],
+        concurrency: Optional[int] = None,
+    ) -> list[Record]:
+        """
+        Updates many records, with a bounded number of updates happening at the same
+        time.
+
+        Args:
+            collection (str): The target collection.
+            updates (list[tuple[str, dict]]): The id of each record to update, and the
+                fields to change.
+            concurrency (Optional[int], optional): How many updates can happen at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+        Raises:
+            ClientResponseError: If an update failed (once every update has finished).
+
+        Returns:
+            list[Record]: The updated records, in the order of the updates.
+        """
+        logger.info(f"Updating {len(updates)} records in {collection}")
+        semaphore = asyncio.Semaphore(concurrency or Config.PocketBase.BulkConcurrency)
+
+        async def update(record_id: str, data: dict) -> Record:
+            async with semaphore:
+                return await self.update(collection, record_id, data)
+
+        results: list = await asyncio.gather(
+            *[update(record_id, data) for record_id, data in updates],
+            return_exceptions=True,
+        )
+        return raise_bulk_error(results)
+
+    @typechecked
+    async def upsert(
+        self,
+        collection: str,
+        key_field: str,
+        data: dict,
+        compare_fields: Optional[list[str]] = None,
+        update_fields: Optional[list[str]] = None,
+    ) -> Record:
+        """
+        Async variant of SingletonPocketBase.upsert.
+
+        Args:
+            collection (str): The target collection.
+            key_field (str): The (unique) field the record is found by, i.e. "url".
+            data (dict): The record data (with the key field).
+            compare_fields (Optional[list[str]], optional): The fields which, when
+                changed, update the record. Defaults to None (every field of data).
+            update_fields (Optional[list[str]], optional): The fields an update
+                writes. Defaults to None (every field of data).
+
+        Returns:
+            Record: The created, updated or unchanged record.
+        """
+        action, record, write = plan_single_upsert(
+            key_field,
+            data,
+            await self.search_single_record(
+                collection,
+                key_field,
+                data[key_field],
+                upsert_fields(key_field, compare_fields),
+            ),
+            compare_fields,
+            update_fields,
+        )
+        if action == "create":
+            return await self.create(collection, write)
+        if action == "update":
+            return await self.update(collection, record.id, write)
+        return record
+
+    @typechecked
+    async def upsert_many(
+        self,
+        collection: str,
+        key_field: str,
+        rows: list[dict],
+        compare_fields: Optional[list[str]] = None,
+        concurrency: Optional[int] = None,
+        update_fields: Optional[list[str]] = None,
+    ) -> BulkUpsertResult:
+        """
+        Async variant of SingletonPocketBase.upsert_many.
+
+        Args:
+            collection (str): The target collection.
+            key_field (str): The (unique) field rows are matched to records by.
+            rows (list[dict]): The record data (with the key field).
+            compare_fields (Optional[list[str]], optional): The fields which, when
+                changed, update a record. Defaults to None (every field of the row).
+            concurrency (Optional[int], optional): How many writes can happen at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+            update_fields (Optional[list[str]], optional): The fields an update
+                writes. Defaults to None (every field of the row).
+
+        Returns:
+            BulkUpsertResult: The created, updated and unchanged records, and the rows
+                which failed (with their error).
+        """
+        logger.info(f"Upserting {len(rows)} records in {collection} by {key_field}")
+        create, update, unchanged = plan_upsert(
+            key_field,
+            rows,
+            await self.search_records_by_values(
+                collection,
+                key_field,
+                list(dict.fromkeys(row[key_field] for row in rows)),
+                fields=upsert_fields(key_field, compare_fields),
+            ),
+            compare_fields,
+        )
+        created, failed = await self.create_many(collection, create, concurrency)
+
+        semaphore = asyncio.Semaphore(concurrency or Config.PocketBase.BulkConcurrency)
+
+        async def update_row(record_id: str, row: dict) -> Record:
+            async with semaphore:
+                return await self.update(
+                    collection, record_id, update_data(row, update_fields)
+                )
+
+        results: list = await asyncio.gather(
+            *[update_row(record.id, row) for record, row in update],
+            return_exceptions=True,
+        )
+        updated, failed_updates = split_bulk_results(
+            collection, "update", [row for _, row in update], results
+        )
+
+        return finish_upsert(
+            collection, created, updated, unchanged, failed + failed_updates
+        )
+
+    @typechecked
+    async def delete(self, collection: str, record_id: str) -> None:
+        """
+        Deletes a record from a collection.
+
+        Args:
+            collection (str): The target collection.
+            record_id (str): The id of the record to delete.
+        """
+        logger.warning(f"Deleting record {record_id} from {collection}.")
+        forget_record(collection, record_id)
+        await self.__send("DELETE", records_path(collection, record_id))
+        written_record(collection, "delete", Record({"id": record_id}))
@@ -1,26 +1,174 @@
-from typing import Optional, Union
+from typing import Callable, Optional, Union
 from pathlib import Path
 
-from typeguard import typechecked
+from typeguard import typechecked, TypeCheckError
 
 from pocketbase.models.record import Record
 
-from .classes import SingletonPocketBase, CollectionBaseClass
+from .classes import SingletonPocketBase, AsyncSingletonPocketBase, CollectionBaseClass
+from .metrics import stage
 from .typehints import *
 from .helpers import *
 from ...compilation.models import CompilationMeatadata, VideoCompilation
 from ...utils.helpers import validate_path_exists
+from ...config import Config
 from ...logger import SingletonLogger
 
 pb = SingletonPocketBase()
+async_pb = AsyncSingletonPocketBase()
 logger = SingletonLogger()
 
 
+@typechecked
+def check_record_exists(record: Optional[Record], exists: bool) -> Optional[Record]:
+    """
+    Checks a (searched for) record does or does not exist.
+
+    Args:
+        record (Optional[Record]): The result of the search.
+        exists (bool): If the record should exist or not.
+
+    Raises:
+        ValueError: Does not meet the expected exist value.
+
+    Returns:
+        Optional[Record]: The passed record.
+    """
+    record_exists = True if record is not None else False
+    if record_exists != exists:
+        message = f"Did not match expected exist value"
+        logger.error(message)
+        raise ValueError(message)
+    logger.info(f"Record validated! Exists: {exists}")
+
+    return record
+
+
+@typechecked
+def check_records_exist(
+    records: dict[PocketBaseValueOptions, Record],
+    values: list[PocketBaseValueOptions],
+    exists: Optional[bool],
+) -> dict[PocketBaseValueOptions, Record]:
+    """
+    Checks the (searched for) records of values do or do not exist.
+
+    Args:
+        records (dict[PocketBaseValueOptions, Record]): The record of each found value.
+        values (list[PocketBaseValueOptions]): The searched for values.
+        exists (Optional[bool]): If the records should exist or not. None skips the check.
+
+    Raises:
+        ValueError: A value does not meet the expected exist value.
+
+    Returns:
+        dict[PocketBaseValueOptions, Record]: The passed records.
+    """
+    if exists is None:
+        return records
+
+    mismatched: list[PocketBaseValueOptions] = [
+        value for value in values if (value in records) != exists
+    ]
+    if mismatched:
+        message = f"Did not match expected exist value for {mismatched}"
+        logger.error(message)
+        raise ValueError(message)
+    logger.info(f"{len(values)} records validated! Exists: {exists}")
+
+    return records
+
+
+@typechecked
+def prepare_bulk_rows(
+    rows: list[dict], record_data: Callable[..., dict]
+) -> tuple[list[dict], dict[int, dict], list[FailedRow]]:
+    """
+    Turns bulk create rows (the kwargs of a collection's record_data) into record data.
+    Rows which can't be turned into a record are reported as failed straight away.
+
+    Args:
+        rows (list[dict]): The rows to create.
+        record_data (Callable[..., dict]): The collection's record_data staticmethod.
+
+    Returns:
+        tuple[list[dict], dict[int, dict], list[FailedRow]]: The record data, a map of
+            each record data's id() to its row, and the rows which failed.
+    """
+    data: list[dict] = []
+    rows_by_data: dict[int, dict] = {}
+    failed: list[FailedRow] = []
+    for row in rows:
+        try:
+            row_data = record_data(**row)
+        except (ValueError, TypeError, TypeCheckError) as error:
+            failed.append((row, str(error)))
+            continue
+        data.append(row_data)
+        rows_by_data[id(row_data)] = row
+
+    return data, rows_by_data, failed
+
+
+@typechecked
+def finish_bulk_create(
+    result: BulkCreateResult,
+    rows_by_data: dict[int, dict],
+    failed: list[FailedRow],
+) -> BulkCreateResult:
+    """
+    Maps the failed record data of a bulk create back to the rows they came from.
+
+    Args:
+        result (BulkCreateResult): The result of create_many.
+        rows_by_data (dict[int, dict]): From prepare_bulk_rows.
+        failed (list[FailedRow]): The rows which already failed in prepare_bulk_rows.
+
+    Returns:
+        BulkCreateResult
+    """
+    created, failed_data = result
+    return created, failed + [
+        (rows_by_data[id(data)], error) for data, error in failed_data
+    ]
+
+
+@typechecked
+def finish_bulk_upsert(
+    result: BulkUpsertResult,
+    rows_by_data: dict[int, dict],
+    failed: list[FailedRow],
+) -> BulkUpsertResult:
+    """
+    Maps the failed record data of a bulk upsert back to the rows they came from.
+
+    Args:
+        result (BulkUpsertResult): The result of upsert_many.
+        rows_by_data (dict[int, dict]): From prepare_bulk_rows.
+        failed (list[FailedRow]): The rows which already failed in prepare_bulk_rows.
+
+    Returns:
+        BulkUpsertResult
+    """
+    created, updated, unchanged, failed_data = result
+    return (
+        created,
+        updated,
+        unchanged,
+        failed + [(rows_by_data[id(data)], error) for data, error in failed_data],
+    )
+
+
 class TiktokCollection(CollectionBaseClass):
     """
     Class representing the tiktok collection.
     """
 
+    # The fields an upsert compares and updates. A video keeps the origin and query
+    # it was first discovered by, so it stays in that channel's (or query's) records
+    # when it's discovered again by another.
+    UpsertFields: list[str] = [TiktokCollectionInfo.Fields.URL]
+
     @staticmethod
     @typechecked
     def create_record(url: str, origin: str, query: str) -> TiktokCollectionRecord:
@@ -36,6 +184,242 @@ class TiktokCollection(CollectionBaseClass):
             Record
         """
         logger.info(f"Attempting to insert {url} into TiktokCollection.")
+        record: TiktokCollectionRecord = pb.create(
+            TiktokCollectionInfo.CollectionName,
+            TiktokCollection.record_data(url, origin, query),
+        )
+        logger.info(f"Successfully inserted {url} into TiktokCollection.")
+
+        return record
+
+    @staticmethod
+    @typechecked
+    async def async_create_record(
+        url: str, origin: str, query: str
+    ) -> TiktokCollectionRecord:
+        """
+        Async variant of create_record.
+
+        Args:
+            url (str): The raw URL of the tiktok.
+            origin (str): Where the URL was discovered (channel, hashtag, etc).
+            query (str): The query used to obtain the URL.
+
+        Returns:
+            Record
+        """
+        logger.info(f"Attempting to insert {url} into TiktokCollection.")
+        record: TiktokCollectionRecord = await async_pb.create(
+            TiktokCollectionInfo.CollectionName,
+            TiktokCollection.record_data(url, origin, query),
+        )
+        logger.info(f"Successfully inserted {url} into TiktokCollection.")
+
+        return record
+
+    @staticmethod
+    @typechecked
+    def create_records(
+        rows: list[dict], concurrency: Optional[int] = None
+    ) -> BulkCreateResult:
+        """
+        Creates many records at once. Each row is the arguments of create_record. A failed
+        row doesn't stop the others from being created.
+
+        Args:
+            rows (list[dict]): I.e. [{"url": ..., "origin": ..., "query": ...}]
+            concurrency (Optional[int], optional): How many records are created at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+        Returns:
+            BulkCreateResult: The created records and the failed rows (with their error).
+
+        Example:
+            created, failed = TiktokCollection.create_records(
+                [{"url": url, "origin": "channel", "query": "mrbeast"} for url in urls]
+            )
+        """
+        logger.info(f"Attempting to insert {len(rows)} records into TiktokCollection.")
+        data, rows_by_data, failed = prepare_bulk_rows(
+            rows, TiktokCollection.record_data
+        )
+        created, failed = finish_bulk_create(
+            pb.create_many(TiktokCollectionInfo.CollectionName, data, concurrency),
+            rows_by_data,
+            failed,
+        )
+        return created, failed
+
+    @staticmethod
+    @typechecked
+    async def async_create_records(
+        rows: list[dict], concurrency: Optional[int] = None
+    ) -> BulkCreateResult:
+        """
+        Async variant of create_records.
+
+        Args:
+            rows (list[dict]): I.e. [{"url": ..., "origin": ..., "query": ...}]
+            concurrency (Optional[int], optional): How many records are created at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+        Returns:
+            BulkCreateResult: The created records and the failed rows (with their error).
+        """
+        logger.info(f"Attempting to insert {len(rows)} records into TiktokCollection.")
+        data, rows_by_data, failed = prepare_bulk_rows(
+            rows, TiktokCollection.record_data
+        )
+        created, failed = finish_bulk_create(
+            await async_pb.create_many(
+                TiktokCollectionInfo.CollectionName, data, concurrency
+            ),
+            rows_by_data,
+            failed,
+        )
+        return created, failed
+
+    @staticmethod
+    @typechecked
+    def upsert_record(url: str, origin: str, query: str) -> TiktokCollectionRecord:
+        """
+        Creates a record, or updates the URL of the record of the same video if it
+        changed. See UpsertFields.
+
+        Args:
+            url (str): The raw URL of the tiktok.
+            origin (str): Where the URL was discovered (channel, hashtag, etc).
+            query (str): The query used to obtain the URL.
+
+        Returns:
+            TiktokCollectionRecord: The created or updated record, or the unchanged
+                one (with only its id, video_id and url).
+        """
+        return pb.upsert(
+            TiktokCollectionInfo.CollectionName,
+            TiktokCollectionInfo.Fields.VideoId,
+            TiktokCollection.record_data(url, origin, query),
+            TiktokCollection.UpsertFields,
+            TiktokCollection.UpsertFields,
+        )
+
+    @staticmethod
+    @typechecked
+    async def async_upsert_record(
+        url: str, origin: str, query: str
+    ) -> TiktokCollectionRecord:
+        """
+        Async variant of upsert_record.
+
+        Args:
+            url (str): The raw URL of the tiktok.
+            origin (str): Where the URL was discovered (channel, hashtag, etc).
+            query (str): The query used to obtain the URL.
+
+        Returns:
+            TiktokCollectionRecord: The created or updated record, or the unchanged
+                one (with only its id, video_id and url).
+        """
+        return await async_pb.upsert(
+            TiktokCollectionInfo.CollectionName,
+            TiktokCollectionInfo.Fields.VideoId,
+            TiktokCollection.record_data(url, origin, query),
+            TiktokCollection.UpsertFields,
+            TiktokCollection.UpsertFields,
+        )
+
+    @staticmethod
+    @typechecked
+    def upsert_records(
+        rows: list[dict], concurrency: Optional[int] = None
+    ) -> BulkUpsertResult:
+        """
+        Creates the records of videos which don't have one, and updates the URL of the
+        ones whose URL changed (see UpsertFields). Each row is the arguments of
+        create_record. The existing records are
+        looked up in a few requests, so re-discovering a channel only costs a write
+        per new or changed video. A failed row doesn't stop the others.
+
+        Args:
+            rows (list[dict]): I.e. [{"url": ..., "origin": ..., "query": ...}]
+            concurrency (Optional[int], optional): How many records are written at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+        Returns:
+            BulkUpsertResult: The created, updated and unchanged records, and the
+                failed rows (with their error).
+        """
+        logger.info(f"Attempting to upsert {len(rows)} records into TiktokCollection.")
+        data, rows_by_data, failed = prepare_bulk_rows(
+            rows, TiktokCollection.record_data
+        )
+        result: BulkUpsertResult = finish_bulk_upsert(
+            pb.upsert_many(
+                TiktokCollectionInfo.CollectionName,
+                TiktokCollectionInfo.Fields.VideoId,
+                data,
+                TiktokCollection.UpsertFields,
+                concurrency,
+                TiktokCollection.UpsertFields,
+            ),
+            rows_by_data,
+            failed,
+        )
+        return result
+
+    @staticmethod
+    @typechecked
+    async def async_upsert_records(
+        rows: list[dict], concurrency: Optional[int] = None
+    ) -> BulkUpsertResult:
+        """
+        Async variant of upsert_records.
+
+        Args:
+            rows (list[dict]): I.e. [{"url": ..., "origin": ..., "query": ...}]
+            concurrency (Optional[int], optional): How many records are written at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+        Returns:
+            BulkUpsertResult: The created, updated and unchanged records, and the
+                failed rows (with their error).
+        """
+        logger.info(f"Attempting to upsert {len(rows)} records into TiktokCollection.")
+        data, rows_by_data, failed = prepare_bulk_rows(
+            rows, TiktokCollection.record_data
+        )
+        result: BulkUpsertResult = finish_bulk_upsert(
+            await async_pb.upsert_many(
+                TiktokCollectionInfo.CollectionName,
+                TiktokCollectionInfo.Fields.VideoId,
+                data,
+                TiktokCollection.UpsertFields,
+                concurrency,
+                TiktokCollection.UpsertFields,
+            ),
+            rows_by_data,
+            failed,
+        )
+        return result
+
+    @staticmethod
+    @typechecked
+    def record_data(url: str, origin: str, query: str) -> dict:
+        """
+        Builds the data of a record. The passed [raw] URL will be parsed to match the
+        schema of the collection.
+
+        Args:
+            url (str): The raw URL of the tiktok.
+            origin (str): Where the URL was discovered (channel, hashtag, etc).
+            query (str): The query used to obtain the URL.
+
+        Raises:
+            ValueError: If the origin is invalid.
+
+        Returns:
+            dict
+        """
         if origin not in [
             TiktokCollectionInfo.OriginOoptions.TopVideos,
             TiktokCollectionInfo.OriginOoptions.Channel,
@@ -45,21 +429,65 @@ class TiktokCollection(CollectionBaseClass):
             logger.error(message)
             raise ValueError(message)
 
-        pb.create(
-            TiktokCollectionInfo.CollectionName,
-            {
-                TiktokCollectionInfo.Fields.URL: url,
-                TiktokCollectionInfo.Fields.Origin: origin,
-                TiktokCollectionInfo.Fields.Query: query,
-                TiktokCollectionInfo.Fields.VideoId: str(get_video_id_from_url(url)),
-            },
+        return {
+            TiktokCollectionInfo.Fields.URL: url,
+            TiktokCollectionInfo.Fields.Origin: origin,
+            TiktokCollectionInfo.Fields.Query: query,
+            TiktokCollectionInfo.Fields.VideoId: str(get_video_id_from_url(url)),
+        }
+
+    @staticmethod
+    @typechecked
+    def resolve_record(
+        url: str, tiktok_record: Optional[TiktokCollectionRecord] = None
+    ) -> TiktokCollectionRecord:
+        """
+        Returns the record of a tiktok URL: the passed record, or the looked up one
+        (which, within a session, records created or read before are answered from
+        without a request, see identity.py).
+
+        Args:
+            url (str): The tiktok URL.
+            tiktok_record (Optional[TiktokCollectionRecord], optional): The record, if
+                the caller already has it. Defaults to None.
+
+        Raises:
+            ValueError: If the record doesn't exist.
+
+        Returns:
+            TiktokCollectionRecord
+        """
+        if tiktok_record is not None:
+            return tiktok_record
+
+        return TiktokCollection.validate_record(
+            TiktokCollectionInfo.Fields.URL, url, exists=True
         )
-        logger.info(f"Successfully inserted {url} into TiktokCollection.")
 
-        return pb.search_single_record(
-            TiktokCollectionInfo.CollectionName,
-            TiktokCollectionInfo.Fields.URL,
-            url,
+    @staticmethod
+    @typechecked
+    async def async_resolve_record(
+        url: str, tiktok_record: Optional[TiktokCollectionRecord] = None
+    ) -> TiktokCollectionRecord:
+        """
+        Async variant of resolve_record.
+
+        Args:
+            url (str): The tiktok URL.
+            tiktok_record (Optional[TiktokCollectionRecord], optional): The record, if
+                the caller already has it. Defaults to None.
+
+        Raises:
+            ValueError: If the record doesn't exist.
+
+        Returns:
+            TiktokCollectionRecord
+        """
+        if tiktok_record is not None:
+            return tiktok_record
+
+        return await TiktokCollection.async_validate_record(
+            TiktokCollectionInfo.Fields.URL, url, exists=True
         )
 
     @staticmethod
@@ -88,14 +516,102 @@ class TiktokCollection(CollectionBaseClass):
             TiktokCollectionInfo.CollectionName, field, value
         )
 
-        record_exists = True if record is not None else False
-        if record_exists != exists:
-            message = f"Did not match expected exist value"
-            logger.error(message)
-            raise ValueError(message)
-        logger.info(f"Record validated! Exists: {exists}")
+        return check_record_exists(record, exists)
 
-        return record
+    @staticmethod
+    @typechecked
+    async def async_validate_record(
+        field: str, value: PocketBaseValueOptions, exists: bool
+    ) -> Optional[TiktokCollectionRecord]:
+        """
+        Async variant of validate_record.
+
+        Args:
+            field (str): The field you want to test against.
+            value (PocketBaseValueOptions): The value to test against the field.
+            exists (bool): Check if the record exists or doesn't exist.
+
+        Raises:
+            ValueError: Does not meet the expected exist value.
+
+        Returns:
+            Optional[TiktokCollectionRecord]
+        """
+        logger.info(
+            f"Validating TiktokCollection record. Field: {field}. Value: {value}. Exists: {exists}"
+        )
+        record: Optional[Record] = await async_pb.search_single_record(
+            TiktokCollectionInfo.CollectionName, field, value
+        )
+
+        return check_record_exists(record, exists)
+
+    @staticmethod
+    @typechecked
+    def validate_records_many(
+        field: str,
+        values: list[PocketBaseValueOptions],
+        exists: Optional[bool] = None,
+    ) -> dict[PocketBaseValueOptions, TiktokCollectionRecord]:
+        """
+        Validates many records at once, in a handful of requests (see
+        SingletonPocketBase.search_records_by_values).
+
+        Args:
+            field (str): The (unique) field you want to test against.
+            values (list[PocketBaseValueOptions]): The values to test against the field.
+            exists (Optional[bool], optional): Check if every record exists or doesn't
+                exist. Defaults to None (no check).
+
+        Raises:
+            ValueError: A record does not meet the expected exist value.
+
+        Returns:
+            dict[PocketBaseValueOptions, TiktokCollectionRecord]: The record of each value that has one.
+        """
+        logger.info(
+            f"Validating {len(values)} TiktokCollection records. Field: {field}. Exists: {exists}"
+        )
+        records: dict[PocketBaseValueOptions, TiktokCollectionRecord] = (
+            pb.search_records_by_values(
+                TiktokCollectionInfo.CollectionName, field, values
+            )
+        )
+
+        return check_records_exist(records, values, exists)
+
+    @staticmethod
+    @typechecked
+    async def async_validate_records_many(
+        field: str,
+        values: list[PocketBaseValueOptions],
+        exists: Optional[bool] = None,
+    ) -> dict[PocketBaseValueOptions, TiktokCollectionRecord]:
+        """
+        Async variant of validate_records_many.
+
+        Args:
+            field (str): The (unique) field you want to test against.
+            values (list[PocketBaseValueOptions]): The values to test against the field.
+            exists (Optional[bool], optional): Check if every record exists or doesn't
+                exist. Defaults to None (no check).
+
+        Raises:
+            ValueError: A record does not meet the expected exist value.
+
+        Returns:
+            dict[PocketBaseValueOptions, TiktokCollectionRecord]: The record of each value that has one.
+        """
+        logger.info(
+            f"Validating {len(values)} TiktokCollection records. Field: {field}. Exists: {exists}"
+        )
+        records: dict[PocketBaseValueOptions, TiktokCollectionRecord] = (
+            await async_pb.search_records_by_values(
+                TiktokCollectionInfo.CollectionName, field, values
+            )
+        )
+
+        return check_records_exist(records, values, exists)
 
 
 class MetadataCollection(CollectionBaseClass):
@@ -103,10 +619,21 @@ class MetadataCollection(CollectionBaseClass):
     Class representing the metadata collection.
     """
 
+    # The fields which, when changed, make an upsert refresh the metadata (the raw
+    # metadata, "everything", is refreshed along with them but isn't compared)
+    UpsertCompareFields: list[str] = [
+        MetadataCollectionInfo.Fields.Views,
+        MetadataCollectionInfo.Fields.Likes,
+    ]
+
     @staticmethod
     @typechecked
     def create_record(
-        tiktok_url: str, views: int, likes: int, everything: dict
+        tiktok_url: str,
+        views: int,
+        likes: int,
+        everything: dict,
+        tiktok_record: Optional[TiktokCollectionRecord] = None,
     ) -> MetadataCollectionRecord:
         """
         Creates a record.
@@ -116,53 +643,311 @@ class MetadataCollection(CollectionBaseClass):
             views (int):
             likes (int):
             everything (dict): Any extra metadata not in the args.
+            tiktok_record (Optional[TiktokCollectionRecord], optional): The tiktok
+                record, if the caller already has it (saves looking it up). Defaults to None.
 
         Returns:
-            MetadataCollectionRecord: _description_
+            MetadataCollectionRecord
         """
         logger.info(
             f"Attempting to insert metadata for {tiktok_url} into MetadataCollection."
         )
-        tiktok_record: TiktokCollectionRecord = TiktokCollection.validate_record(
-            TiktokCollectionInfo.Fields.URL,
-            tiktok_url,
-            exists=True,
-        )
+        tiktok_record = TiktokCollection.resolve_record(tiktok_url, tiktok_record)
         titkok_record_id: str = getattr(tiktok_record, TiktokCollectionInfo.Fields.Id)
 
-        data: dict = {
-            MetadataCollectionInfo.Fields.TiktokForeignKey: titkok_record_id,
-            MetadataCollectionInfo.Fields.Views: views,
-            MetadataCollectionInfo.Fields.Likes: likes,
-            MetadataCollectionInfo.Fields.Everything: everything,
-        }
-
-        pb.create(MetadataCollectionInfo.CollectionName, data)
-        logger.info(f"Successfully inserted {tiktok_url} into MetadataCollection.")
-
-        return pb.search_single_record(
+        record: MetadataCollectionRecord = pb.create(
             MetadataCollectionInfo.CollectionName,
-            MetadataCollectionInfo.Fields.TiktokForeignKey,
-            titkok_record_id,
+            MetadataCollection.record_data(titkok_record_id, views, likes, everything),
         )
+        logger.info(f"Successfully inserted {tiktok_url} into MetadataCollection.")
+
+        return record
 
     @staticmethod
-    def validate_record(
-        tiktok_record_id: str, exists: bool
-    ) -> Optional[MetadataCollectionRecord]:
+    @typechecked
+    async def async_create_record(
+        tiktok_url: str,
+        views: int,
+        likes: int,
+        everything: dict,
+        tiktok_record: Optional[TiktokCollectionRecord] = None,
+    ) -> MetadataCollectionRecord:
         """
-        Validates if a record does or does not exist. Only uses a Tiktok record's ID to search
-        for a metadata record (as views and likes are not good indicators of unique values).
+        Async variant of create_record.
 
         Args:
-            tiktok_record_id (str): The ID of the tiktok record.
-            exists (bool): Test if the record exists or doesn't exist.
-
-        Raises:
-            ValueError: Does not meet the expected exist value.
+            tiktok_url (str): Tiktok URL.
+            views (int):
+            likes (int):
+            everything (dict): Any extra metadata not in the args.
+            tiktok_record (Optional[TiktokCollectionRecord], optional): The tiktok
+                record, if the caller already has it (saves looking it up). Defaults to None.
 
         Returns:
-            Optional[MetadataCollectionRecord]
+            MetadataCollectionRecord
+        """
+        logger.info(
+            f"Attempting to insert metadata for {tiktok_url} into MetadataCollection."
+        )
+        tiktok_record = await TiktokCollection.async_resolve_record(
+            tiktok_url, tiktok_record
+        )
+        titkok_record_id: str = getattr(tiktok_record, TiktokCollectionInfo.Fields.Id)
+
+        record: MetadataCollectionRecord = await async_pb.create(
+            MetadataCollectionInfo.CollectionName,
+            MetadataCollection.record_data(titkok_record_id, views, likes, everything),
+        )
+        logger.info(f"Successfully inserted {tiktok_url} into MetadataCollection.")
+
+        return record
+
+    @staticmethod
+    @typechecked
+    def create_records(
+        rows: list[dict], concurrency: Optional[int] = None
+    ) -> BulkCreateResult:
+        """
+        Creates many records at once. Each row is the arguments of record_data (so the
+        tiktok record's ID is passed rather than looked up). A failed row doesn't stop
+        the others from being created.
+
+        Args:
+            rows (list[dict]): I.e. [{"tiktok_record_id": ..., "views": ..., "likes": ..., "everything": ...}]
+            concurrency (Optional[int], optional): How many records are created at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+        Returns:
+            BulkCreateResult: The created records and the failed rows (with their error).
+        """
+        logger.info(
+            f"Attempting to insert {len(rows)} records into MetadataCollection."
+        )
+        data, rows_by_data, failed = prepare_bulk_rows(
+            rows, MetadataCollection.record_data
+        )
+        return finish_bulk_create(
+            pb.create_many(MetadataCollectionInfo.CollectionName, data, concurrency),
+            rows_by_data,
+            failed,
+        )
+
+    @staticmethod
+    @typechecked
+    async def async_create_records(
+        rows: list[dict], concurrency: Optional[int] = None
+    ) -> BulkCreateResult:
+        """
+        Async variant of create_records.
+
+        Args:
+            rows (list[dict]): I.e. [{"tiktok_record_id": ..., "views": ..., "likes": ..., "everything": ...}]
+            concurrency (Optional[int], optional): How many records are created at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+        Returns:
+            BulkCreateResult: The created records and the failed rows (with their error).
+        """
+        logger.info(
+            f"Attempting to insert {len(rows)} records into MetadataCollection."
+        )
+        data, rows_by_data, failed = prepare_bulk_rows(
+            rows, MetadataCollection.record_data
+        )
+        return finish_bulk_create(
+            await async_pb.create_many(
+                MetadataCollectionInfo.CollectionName, data, concurrency
+            ),
+            rows_by_data,
+            failed,
+        )
+
+    @staticmethod
+    @typechecked
+    def upsert_record(
+        tiktok_url: str,
+        views: int,
+        likes: int,
+        everything: dict,
+        tiktok_record: Optional[TiktokCollectionRecord] = None,
+    ) -> MetadataCollectionRecord:
+        """
+        Creates the metadata of a tiktok, or refreshes it if its stats (views, likes)
+        changed.
+
+        Args:
+            tiktok_url (str): Tiktok URL.
+            views (int):
+            likes (int):
+            everything (dict): Any extra metadata not in the args.
+            tiktok_record (Optional[TiktokCollectionRecord], optional): The tiktok
+                record, if the caller already has it (saves looking it up). Defaults to None.
+
+        Returns:
+            MetadataCollectionRecord: The unchanged record only has the compared fields.
+        """
+        tiktok_record = TiktokCollection.resolve_record(tiktok_url, tiktok_record)
+        titkok_record_id: str = getattr(tiktok_record, TiktokCollectionInfo.Fields.Id)
+
+        return pb.upsert(
+            MetadataCollectionInfo.CollectionName,
+            MetadataCollectionInfo.Fields.TiktokForeignKey,
+            MetadataCollection.record_data(titkok_record_id, views, likes, everything),
+            MetadataCollection.UpsertCompareFields,
+        )
+
+    @staticmethod
+    @typechecked
+    async def async_upsert_record(
+        tiktok_url: str,
+        views: int,
+        likes: int,
+        everything: dict,
+        tiktok_record: Optional[TiktokCollectionRecord] = None,
+    ) -> MetadataCollectionRecord:
+        """
+        Async variant of upsert_record.
+
+        Args:
+            tiktok_url (str): Tiktok URL.
+            views (int):
+            likes (int):
+            everything (dict): Any extra metadata not in the args.
+            tiktok_record (Optional[TiktokCollectionRecord], optional): The tiktok
+                record, if the caller already has it (saves looking it up). Defaults to None.
+
+        Returns:
+            MetadataCollectionRecord: The unchanged record only has the compared fields.
+        """
+        tiktok_record = await TiktokCollection.async_resolve_record(
+            tiktok_url, tiktok_record
+        )
+        titkok_record_id: str = getattr(tiktok_record, TiktokCollectionInfo.Fields.Id)
+
+        return await async_pb.upsert(
+            MetadataCollectionInfo.CollectionName,
+            MetadataCollectionInfo.Fields.TiktokForeignKey,
+            MetadataCollection.record_data(titkok_record_id, views, likes, everything),
+            MetadataCollection.UpsertCompareFields,
+        )
+
+    @staticmethod
+    @typechecked
+    def upsert_records(
+        rows: list[dict], concurrency: Optional[int] = None
+    ) -> BulkUpsertResult:
+        """
+        Creates the metadata of tiktoks which don't have it, and refreshes the metadata
+        whose stats (views, likes) changed. Each row is the arguments of record_data.
+        The existing metadata is looked up in a few requests, so only new or changed
+        rows cost a write. A failed row doesn't stop the others.
+
+        Args:
+            rows (list[dict]): I.e. [{"tiktok_record_id": ..., "views": ..., "likes": ..., "everything": ...}]
+            concurrency (Optional[int], optional): How many records are written at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+        Returns:
+            BulkUpsertResult: The created, updated and unchanged records (which only
+                have the compared fields), and the failed rows (with their error).
+        """
+        logger.info(
+            f"Attempting to upsert {len(rows)} records into MetadataCollection."
+        )
+        data, rows_by_data, failed = prepare_bulk_rows(
+            rows, MetadataCollection.record_data
+        )
+        return finish_bulk_upsert(
+            pb.upsert_many(
+                MetadataCollectionInfo.CollectionName,
+                MetadataCollectionInfo.Fields.TiktokForeignKey,
+                data,
+                MetadataCollection.UpsertCompareFields,
+                concurrency,
+            ),
+            rows_by_data,
+            failed,
+        )
+
+    @staticmethod
+    @typechecked
+    async def async_upsert_records(
+        rows: list[dict], concurrency: Optional[int] = None
+    ) -> BulkUpsertResult:
+        """
+        Async variant of upsert_records.
+
+        Args:
+            rows (list[dict]): I.e. [{"tiktok_record_id": ..., "views": ..., "likes": ..., "everything": ...}]
+            concurrency (Optional[int], optional): How many records are written at the
+                same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+        Returns:
+            BulkUpsertResult: The created, updated and unchanged records (which only
+                have the compared fields), and the failed rows (with their error).
+        """
+        logger.info(
+            f"Attempting to upsert {len(rows)} records into MetadataCollection."
+        )
+        data, rows_by_data, failed = prepare_bulk_rows(
+            rows, MetadataCollection.record_data
+        )
+        return finish_bulk_upsert(
+            await async_pb.upsert_many(
+                MetadataCollectionInfo.CollectionName,
+                MetadataCollectionInfo.Fields.TiktokForeignKey,
+                data,
+                MetadataCollection.UpsertCompareFields,
+                concurrency,
+            ),
+            rows_by_data,
+            failed,
+        )
+
+    @staticmethod
+    @typechecked
+    def record_data(
+        tiktok_record_id: str, views: int, likes: int, everything: dict
+    ) -> dict:
+        """
+        Builds the data of a record.
+
+        Args:
+            tiktok_record_id (str): The ID of the tiktok record.
+            views (int):
+            likes (int):
+            everything (dict): Any extra metadata not in the args.
+
+        Returns:
+            dict
+        """
+        return {
+            MetadataCollectionInfo.Fields.TiktokForeignKey: tiktok_record_id,
+            MetadataCollectionInfo.Fields.Views: views,
+            MetadataCollectionInfo.Fields.Likes: likes,
+            MetadataCollectionInfo.Fields.Everything: everything,
+        }
+
+    @staticmethod
+    def validate_record(
+        tiktok_record_id: str, exists: bool, fields: Optional[list[str]] = None
+    ) -> Optional[MetadataCollectionRecord]:
+        """
+        Validates if a record does or does not exist. Only uses a Tiktok record's ID to search
+        for a metadata record (as views and likes are not good indicators of unique values).
+
+        Args:
+            tiktok_record_id (str): The ID of the tiktok record.
+            exists (bool): Test if the record exists or doesn't exist.
+            fields (Optional[list[str]], optional): The fields to return. Defaults to
+                None (every field). MetadataCollectionInfo.DefaultFields leaves out
+                everything.
+
+        Raises:
+            ValueError: Does not meet the expected exist value.
+
+        Returns:
+            Optional[MetadataCollectionRecord]
         """
         logger.info(
             f"Validating MetadataCollection record. Tiktok record: {tiktok_record_id}. Exists: {exists}"
@@ -171,16 +956,125 @@ class MetadataCollection(CollectionBaseClass):
             MetadataCollectionInfo.CollectionName,
             MetadataCollectionInfo.Fields.TiktokForeignKey,
             tiktok_record_id,
+            fields,
         )
 
-        record_exists = True if record is not None else False
-        if record_exists != exists:
-            message = f"Did not match expected exist value"
-            logger.error(message)
-            raise ValueError(message)
-        logger.info(f"Record validated! Exists: {exists}")
+        return check_record_exists(record, exists)
 
-        return record
+    @staticmethod
+    async def async_validate_record(
+        tiktok_record_id: str, exists: bool, fields: Optional[list[str]] = None
+    ) -> Optional[MetadataCollectionRecord]:
+        """
+        Async variant of validate_record.
+
+        Args:
+            tiktok_record_id (str): The ID of the tiktok record.
+            exists (bool): Test if the record exists or doesn't exist.
+            fields (Optional[list[str]], optional): The fields to return. Defaults to
+                None (every field). MetadataCollectionInfo.DefaultFields leaves out
+                everything.
+
+        Raises:
+            ValueError: Does not meet the expected exist value.
+
+        Returns:
+            Optional[MetadataCollectionRecord]
+        """
+        logger.info(
+            f"Validating MetadataCollection record. Tiktok record: {tiktok_record_id}. Exists: {exists}"
+        )
+        record: Optional[MetadataCollectionRecord] = (
+            await async_pb.search_single_record(
+                MetadataCollectionInfo.CollectionName,
+                MetadataCollectionInfo.Fields.TiktokForeignKey,
+                tiktok_record_id,
+                fields,
+            )
+        )
+
+        return check_record_exists(record, exists)
+
+    @staticmethod
+    @typechecked
+    def validate_records_many(
+        field: str,
+        values: list[PocketBaseValueOptions],
+        exists: Optional[bool] = None,
+        fields: Optional[list[str]] = None,
+    ) -> dict[PocketBaseValueOptions, MetadataCollectionRecord]:
+        """
+        Validates many records at once, in a handful of requests (see
+        SingletonPocketBase.search_records_by_values).
+
+        Args:
+            field (str): The (unique) field you want to test against.
+            values (list[PocketBaseValueOptions]): The values to test against the field.
+            exists (Optional[bool], optional): Check if every record exists or doesn't
+                exist. Defaults to None (no check).
+            fields (Optional[list[str]], optional): The fields to return. Defaults to
+                None (every field). MetadataCollectionInfo.DefaultFields leaves out
+                everything.
+
+        Raises:
+            ValueError: A record does not meet the expected exist value.
+
+        Returns:
+            dict[PocketBaseValueOptions, MetadataCollectionRecord]: The record of each value that has one.
+        """
+        logger.info(
+            f"Validating {len(values)} MetadataCollection records. Field: {field}. Exists: {exists}"
+        )
+        records: dict[PocketBaseValueOptions, MetadataCollectionRecord] = (
+            pb.search_records_by_values(
+                MetadataCollectionInfo.CollectionName,
+                field,
+                values,
+                fields=fields,
+            )
+        )
+
+        return check_records_exist(records, values, exists)
+
+    @staticmethod
+    @typechecked
+    async def async_validate_records_many(
+        field: str,
+        values: list[PocketBaseValueOptions],
+        exists: Optional[bool] = None,
+        fields: Optional[list[str]] = None,
+    ) -> dict[PocketBaseValueOptions, MetadataCollectionRecord]:
+        """
+        Async variant of validate_records_many.
+
+        Args:
+            field (str): The (unique) field you want to test against.
+            values (list[PocketBaseValueOptions]): The values to test against the field.
+            exists (Optional[bool], optional): Check if every record exists or doesn't
+                exist. Defaults to None (no check).
+            fields (Optional[list[str]], optional): The fields to return. Defaults to
+                None (every field). MetadataCollectionInfo.DefaultFields leaves out
+                everything.
+
+        Raises:
+            ValueError: A record does not meet the expected exist value.
+
+        Returns:
+            dict[PocketBaseValueOptions, MetadataCollectionRecord]: The record of each value that has one.
+        """
+        logger.info(
+            f"Validating {len(values)} MetadataCollection records. Field: {field}. Exists: {exists}"
+        )
+        records: dict[PocketBaseValueOptions, MetadataCollectionRecord] = (
+            await async_pb.search_records_by_values(
+                MetadataCollectionInfo.CollectionName,
+                field,
+                values,
+                fields=fields,
+            )
+        )
+
+        return check_records_exist(records, values, exists)
 
 
 class VideoCollection(CollectionBaseClass):
@@ -190,77 +1084,353 @@ class VideoCollection(CollectionBaseClass):
 
     @staticmethod
     @typechecked
-    def create_record(tiktok_url: str, video: Path) -> VideoCollectionRecord:
+    def create_record(
+        tiktok_url: str,
+        video: Path,
+        tiktok_record: Optional[TiktokCollectionRecord] = None,
+    ) -> VideoCollectionRecord:
+        """
+        Creates a record. Uses the tiktok url for ease of association.
+
+        Args:
+            tiktok_url (str): The tiktok video.
+            video (Path): The download video path.
+            tiktok_record (Optional[TiktokCollectionRecord], optional): The tiktok
+                record, if the caller already has it (saves looking it up). Defaults to None.
+
+        Returns:
+            VideoCollectionRecord
+        """
+        logger.info(f"Attempting to insert {str(video)} into VideoCollection.")
+
+        validate_path_exists(video)
+
+        tiktok_record = TiktokCollection.resolve_record(tiktok_url, tiktok_record)
+        record: VideoCollectionRecord = pb.create(
+            VideosCollectionInfo.CollectionName,
+            VideoCollection.record_data(
+                getattr(tiktok_record, TiktokCollectionInfo.Fields.Id), video
+            ),
+        )
+        logger.info(f"Successfully inserted {str(video)} into VideoCollection.")
+
+        return record
+
+    @staticmethod
+    @typechecked
+    async def async_create_record(
+        tiktok_url: str,
+        video: Path,
+        tiktok_record: Optional[TiktokCollectionRecord] = None,
+    ) -> VideoCollectionRecord:
+        """
+        Async variant of create_record.
+
+        Args:
+            tiktok_url (str): The tiktok video.
+            video (Path): The download video path.
+            tiktok_record (Optional[TiktokCollectionRecord], optional): The tiktok
+                record, if the caller already has it (saves looking it up). Defaults to None.
+
+        Returns:
+            VideoCollectionRecord
+        """
+        logger.info(f"Attempting to insert {str(video)} into VideoCollection.")
+
+        validate_path_exists(video)
+
+        tiktok_record = await TiktokCollection.async_resolve_record(
+            tiktok_url, tiktok_record
+        )
+        record: VideoCollectionRecord = await async_pb.create(
+            VideosCollectionInfo.CollectionName,
+            VideoCollection.record_data(
+                getattr(tiktok_record, TiktokCollectionInfo.Fields.Id), video
+            ),
+        )
+        logger.info(f"Successfully inserted {str(video)} into VideoCollection.")
+
+        return record
+
+    @staticmethod
+    @typechecked
+    def record_data(tiktok_record_id: str, video: Path) -> dict:
+        """
+        Builds the data of a (new) record.
+
+        Args:
+            tiktok_record_id (str): The ID of the tiktok record.
+            video (Path): The download video path.
+
+        Returns:
+            dict
+        """
+        return {
+            VideosCollectionInfo.Fields.TiktokForeignKey: tiktok_record_id,
+            VideosCollectionInfo.Fields.VideoPath: str(video),
+            VideosCollectionInfo.Fields.Deleted: False,
+            VideosCollectionInfo.Fields.UsedInCompilation: False,
+        }
+
+    @staticmethod
+    @typechecked
+    def validate_record(
+        field: str, value: PocketBaseValueOptions, exists: bool
+    ) -> Optional[VideoCollectionRecord]:
+        """
+        Validates if a record does or does not exist.
+
+        Args:
+            field (str): The field you want to test against.
+            value (PocketBaseValueOptions): The value to test against the field.
+            exists (bool): Check if the record exists or doesn't exist.
+
+        Raises:
+            ValueError: Does not meet the expected exist value.
+
+        Returns:
+            Optional[VideoCollectionRecord]
+        """
+        logger.info(
+            f"Validating VideoCollection record. Field {field}; value {value}. Exists: {exists}"
+        )
+        record: Optional[VideoCollectionRecord] = pb.search_single_record(
+            VideosCollectionInfo.CollectionName, field, value
+        )
+
+        return check_record_exists(record, exists)
+
+    @staticmethod
+    @typechecked
+    async def async_validate_record(
+        field: str, value: PocketBaseValueOptions, exists: bool
+    ) -> Optional[VideoCollectionRecord]:
+        """
+        Async variant of validate_record.
+
+        Args:
+            field (str): The field you want to test against.
+            value (PocketBaseValueOptions): The value to test against the field.
+            exists (bool): Check if the record exists or doesn't exist.
+
+        Raises:
+            ValueError: Does not meet the expected exist value.
+
+        Returns:
+            Optional[VideoCollectionRecord]
+        """
+        logger.info(
+            f"Validating VideoCollection record. Field {field}; value {value}. Exists: {exists}"
+        )
+        record: Optional[VideoCollectionRecord] = await async_pb.search_single_record(
+            VideosCollectionInfo.CollectionName, field, value
+        )
+
+        return check_record_exists(record, exists)
+
+    @staticmethod
+    @typechecked
+    def validate_records_many(
+        field: str,
+        values: list[PocketBaseValueOptions],
+        exists: Optional[bool] = None,
+    ) -> dict[PocketBaseValueOptions, VideoCollectionRecord]:
+        """
+        Validates many records at once, in a handful of requests (see
+        SingletonPocketBase.search_records_by_values).
+
+        Args:
+            field (str): The (unique) field you want to test against.
+            values (list[PocketBaseValueOptions]): The values to test against the field.
+            exists (Optional[bool], optional): Check if every record exists or doesn't
+                exist. Defaults to None (no check).
+
+        Raises:
+            ValueError: A record does not meet the expected exist value.
+
+        Returns:
+            dict[PocketBaseValueOptions, VideoCollectionRecord]: The record of each value that has one.
+        """
+        logger.info(
+            f"Validating {len(values)} VideoCollection records. Field: {field}. Exists: {exists}"
+        )
+        records: dict[PocketBaseValueOptions, VideoCollectionRecord] = (
+            pb.search_records_by_values(
+                VideosCollectionInfo.CollectionName, field, values
+            )
+        )
+
+        return check_records_exist(records, values, exists)
+
+    @staticmethod
+    @typechecked
+    async def async_validate_records_many(
+        field: str,
+        values: list[PocketBaseValueOptions],
+        exists: Optional[bool] = None,
+    ) -> dict[PocketBaseValueOptions, VideoCollectionRecord]:
+        """
+        Async variant of validate_records_many.
+
+        Args:
+            field (str): The (unique) field you want to test against.
+            values (list[PocketBaseValueOptions]): The values to test against the field.
+            exists (Optional[bool], optional): Check if every record exists or doesn't
+                exist. Defaults to None (no check).
+
+        Raises:
+            ValueError: A record does not meet the expected exist value.
+
+        Returns:
+            dict[PocketBaseValueOptions, VideoCollectionRecord]: The record of each value that has one.
+        """
+        logger.info(
+            f"Validating {len(values)} VideoCollection records. Field: {field}. Exists: {exists}"
+        )
+        records: dict[PocketBaseValueOptions, VideoCollectionRecord] = (
+            await async_pb.search_records_by_values(
+                VideosCollectionInfo.CollectionName, field, values
+            )
+        )
+
+        return check_records_exist(records, values, exists)
+
+    @staticmethod
+    @typechecked
+    def mark_videos(
+        videos: list[Path],
+        used: Optional[bool] = None,
+        deleted: Optional[bool] = None,
+    ) -> list[VideoCollectionRecord]:
+        """
+        Sets the used and/or deleted state of many videos. The records are looked up
+        together, and only the changed fields of the records which need changing are
+        sent (concurrently).
+
+        Args:
+            videos (list[Path])
+            used (Optional[bool], optional): The new used state. Defaults to None
+                (unchanged).
+            deleted (Optional[bool], optional): The new deleted state. Defaults to None
+                (unchanged).
+
+        Raises:
+            ValueError: If a video doesn't have a record.
+
+        Returns:
+            list[VideoCollectionRecord]: The (updated) record of each video.
+        """
+        logger.info(f"Marking {len(videos)} videos. Used: {used}. Deleted: {deleted}")
+        paths: list[str] = VideoCollection.__validate_video_paths(videos)
+        records: dict[str, VideoCollectionRecord] = (
+            VideoCollection.validate_records_many(
+                VideosCollectionInfo.Fields.VideoPath, paths, exists=True
+            )
+        )
+
+        updates: list[tuple[str, dict]] = VideoCollection.__video_updates(
+            records, used, deleted
+        )
+        for record in pb.update_many(VideosCollectionInfo.CollectionName, updates):
+            records[getattr(record, VideosCollectionInfo.Fields.VideoPath)] = record
+
+        return [records[path] for path in paths]
+
+    @staticmethod
+    @typechecked
+    async def async_mark_videos(
+        videos: list[Path],
+        used: Optional[bool] = None,
+        deleted: Optional[bool] = None,
+    ) -> list[VideoCollectionRecord]:
         """
-        Creates a record. Uses the tiktok url for ease of association.
+        Async variant of mark_videos.
 
         Args:
-            tiktok_url (str): The tiktok video.
-            video (Path): The download video path.
+            videos (list[Path])
+            used (Optional[bool], optional): The new used state. Defaults to None
+                (unchanged).
+            deleted (Optional[bool], optional): The new deleted state. Defaults to None
+                (unchanged).
+
+        Raises:
+            ValueError: If a video doesn't have a record.
 
         Returns:
-            VideoCollectionRecord
+            list[VideoCollectionRecord]: The (updated) record of each video.
         """
-        logger.info(f"Attempting to insert {str(video)} into VideoCollection.")
-
-        validate_path_exists(video)
-
-        tiktok_record: TiktokCollectionRecord = TiktokCollection.validate_record(
-            TiktokCollectionInfo.Fields.URL, tiktok_url, exists=True
-        )
-        pb.create(
-            VideosCollectionInfo.CollectionName,
-            {
-                VideosCollectionInfo.Fields.TiktokForeignKey: getattr(
-                    tiktok_record, TiktokCollectionInfo.Fields.Id
-                ),
-                VideosCollectionInfo.Fields.VideoPath: str(video),
-                VideosCollectionInfo.Fields.Deleted: False,
-                VideosCollectionInfo.Fields.UsedInCompilation: False,
-            },
+        logger.info(f"Marking {len(videos)} videos. Used: {used}. Deleted: {deleted}")
+        paths: list[str] = VideoCollection.__validate_video_paths(videos)
+        records: dict[str, VideoCollectionRecord] = (
+            await VideoCollection.async_validate_records_many(
+                VideosCollectionInfo.Fields.VideoPath, paths, exists=True
+            )
         )
-        logger.info(f"Successfully inserted {str(video)} into VideoCollection.")
 
-        return pb.search_single_record(
-            VideosCollectionInfo.CollectionName,
-            VideosCollectionInfo.Fields.TiktokForeignKey,
-            getattr(tiktok_record, TiktokCollectionInfo.Fields.Id),
+        updates: list[tuple[str, dict]] = VideoCollection.__video_updates(
+            records, used, deleted
         )
+        for record in await async_pb.update_many(
+            VideosCollectionInfo.CollectionName, updates
+        ):
+            records[getattr(record, VideosCollectionInfo.Fields.VideoPath)] = record
+
+        return [records[path] for path in paths]
 
     @staticmethod
     @typechecked
-    def validate_record(
-        field: str, value: PocketBaseValueOptions, exists: bool
-    ) -> Optional[VideoCollectionRecord]:
+    def __validate_video_paths(videos: list[Path]) -> list[str]:
         """
-        Validates if a record does or does not exist.
+        Checks the videos exist.
 
         Args:
-            field (str): The field you want to test against.
-            value (PocketBaseValueOptions): The value to test against the field.
-            exists (bool): Check if the record exists or doesn't exist.
+            videos (list[Path])
 
-        Raises:
-            ValueError: Does not meet the expected exist value.
+        Returns:
+            list[str]: The path of each video, as stored in its record.
+        """
+        for video in videos:
+            validate_path_exists(video)
+        return [str(video) for video in videos]
+
+    @staticmethod
+    @typechecked
+    def __video_updates(
+        records: dict[str, VideoCollectionRecord],
+        used: Optional[bool],
+        deleted: Optional[bool],
+    ) -> list[tuple[str, dict]]:
+        """
+        Builds the (partial) updates of the records which aren't in the wanted state.
+
+        Args:
+            records (dict[str, VideoCollectionRecord]): The record of each path.
+            used (Optional[bool]): The new used state (None if unchanged).
+            deleted (Optional[bool]): The new deleted state (None if unchanged).
 
         Returns:
-            Optional[VideoCollectionRecord]
+            list[tuple[str, dict]]: The id of each record to update and its changes.
         """
-        logger.info(
-            f"Validating VideoCollection record. Field {field}; value {value}. Exists: {exists}"
-        )
-        record: Optional[VideoCollectionRecord] = pb.search_single_record(
-            VideosCollectionInfo.CollectionName, field, value
-        )
+        wanted: dict[str, bool] = {
+            field: value
+            for field, value in [
+                (VideosCollectionInfo.Fields.UsedInCompilation, used),
+                (VideosCollectionInfo.Fields.Deleted, deleted),
+            ]
+            if value is not None
+        }
 
-        record_exists = True if record is not None else False
-        if record_exists != exists:
-            message = f"Did not match expected exist value"
-            logger.error(message)
-            raise ValueError(message)
-        logger.info(f"Record validated! Exists: {exists}")
+        updates: list[tuple[str, dict]] = []
+        for record in records.values():
+            changes: dict[str, bool] = {
+                field: value
+                for field, value in wanted.items()
+                if getattr(record, field, None) != value
+            }
+            if changes:
+                updates.append((getattr(record, VideosCollectionInfo.Fields.Id), changes))
 
-        return record
+        return updates
 
     @typechecked
     @staticmethod
@@ -274,32 +1444,27 @@ class VideoCollection(CollectionBaseClass):
         Returns:
             VideoCollectionRecord
         """
-        validate_path_exists(video)
-
-        args = {
-            "field": VideosCollectionInfo.Fields.VideoPath,
-            "value": str(video),
-            "exists": True,
-        }
+        return VideoCollection.mark_videos([video], deleted=True)[0]
 
-        record: Optional[VideoCollectionRecord] = VideoCollection.validate_record(
-            **args
-        )
+    @typechecked
+    @staticmethod
+    def mark_video_as_used(video: Path) -> VideoCollectionRecord:
+        """
+        Mark's a record as used_in_compilation in PB.
 
-        setattr(record, VideosCollectionInfo.Fields.Deleted, True)
-        pb.update(
-            VideosCollectionInfo.CollectionName,
-            getattr(record, VideosCollectionInfo.Fields.Id),
-            transform_record_to_dict(record, VideosCollectionInfo),
-        )
+        Args:
+            video (Path)
 
-        return VideoCollection.validate_record(**args)
+        Returns:
+            VideoCollectionRecord
+        """
+        return VideoCollection.mark_videos([video], used=True)[0]
 
     @typechecked
     @staticmethod
-    def mark_video_as_used(video: Path) -> VideoCollectionRecord:
+    def mark_video_as_unused(video: Path) -> VideoCollectionRecord:
         """
-        Mark's a record as used_in_compilation in PB.
+        Mark's a record as unused (used = False) in PB.
 
         Args:
             video (Path)
@@ -307,31 +1472,38 @@ class VideoCollection(CollectionBaseClass):
         Returns:
             VideoCollectionRecord
         """
-        validate_path_exists(video)
+        return VideoCollection.mark_videos([video], used=False)[0]
 
-        args = {
-            "field": VideosCollectionInfo.Fields.VideoPath,
-            "value": str(video),
-            "exists": True,
-        }
+    @staticmethod
+    async def async_mark_video_as_deleted(video: Path) -> VideoCollectionRecord:
+        """
+        Async variant of mark_video_as_deleted.
 
-        record: Optional[VideoCollectionRecord] = VideoCollection.validate_record(
-            **args
-        )
+        Args:
+            video (Path)
 
-        setattr(record, VideosCollectionInfo.Fields.UsedInCompilation, True)
-        pb.update(
-            VideosCollectionInfo.CollectionName,
-            getattr(record, VideosCollectionInfo.Fields.Id),
-            transform_record_to_dict(record, VideosCollectionInfo),
-        )
+        Returns:
+            VideoCollectionRecord
+        """
+        return (await VideoCollection.async_mark_videos([video], deleted=True))[0]
+
+    @staticmethod
+    async def async_mark_video_as_used(video: Path) -> VideoCollectionRecord:
+        """
+        Async variant of mark_video_as_used.
+
+        Args:
+            video (Path)
 
-        return VideoCollection.validate_record(**args)
+        Returns:
+            VideoCollectionRecord
+        """
+        return (await VideoCollection.async_mark_videos([video], used=True))[0]
 
     @staticmethod
-    def mark_video_as_unused(video: Path) -> bool:
+    async def async_mark_video_as_unused(video: Path) -> VideoCollectionRecord:
         """
-        Mark's a record as used (True) in PB.
+        Async variant of mark_video_as_unused.
 
         Args:
             video (Path)
@@ -339,34 +1511,35 @@ class VideoCollection(CollectionBaseClass):
         Returns:
             VideoCollectionRecord
         """
-        validate_path_exists(video)
+        return (await VideoCollection.async_mark_videos([video], used=False))[0]
 
-        args = {
-            "field": VideosCollectionInfo.Fields.VideoPath,
-            "value": str(video),
-            "exists": True,
-        }
+    @typechecked
+    @staticmethod
+    def find_unsed_videos_by_query(
+        query: str,
+    ) -> list[VideoCollectionRecord]:
+        """
+        Find all unsued records from a query.
 
-        record: Optional[VideoCollectionRecord] = VideoCollection.validate_record(
-            **args
-        )
+        Args:
+            query (str): The query!
 
-        setattr(record, VideosCollectionInfo.Fields.UsedInCompilation, False)
-        pb.update(
+        Returns:
+            list[VideoCollectionRecord]: The results!
+        """
+        return pb.search(
             VideosCollectionInfo.CollectionName,
-            getattr(record, VideosCollectionInfo.Fields.Id),
-            transform_record_to_dict(record, VideosCollectionInfo),
+            VideoCollection.unused_videos_query(query),
+            concurrency=Config.PocketBase.SearchConcurrency,
         )
 
-        return VideoCollection.validate_record(**args)
-
     @typechecked
     @staticmethod
-    def find_unsed_videos_by_query(
+    async def async_find_unsed_videos_by_query(
         query: str,
     ) -> list[VideoCollectionRecord]:
         """
-        Find all unsued records from a query.
+        Async variant of find_unsed_videos_by_query.
 
         Args:
             query (str): The query!
@@ -374,12 +1547,31 @@ class VideoCollection(CollectionBaseClass):
         Returns:
             list[VideoCollectionRecord]: The results!
         """
-        pb_query: str = (
-            f"{VideosCollectionInfo.Fields.UsedInCompilation} = false && "
-            f"{VideosCollectionInfo.Fields.Deleted} = false && "
-            f"{VideosCollectionInfo.Fields.TiktokForeignKey}.{TiktokCollectionInfo.Fields.Query} = {SingletonPocketBase.serialize_value(query)}"
+        return await async_pb.search(
+            VideosCollectionInfo.CollectionName,
+            VideoCollection.unused_videos_query(query),
+            concurrency=Config.PocketBase.SearchConcurrency,
         )
-        return pb.search(VideosCollectionInfo.CollectionName, {"filter": pb_query})
+
+    @typechecked
+    @staticmethod
+    def unused_videos_query(query: str) -> dict[str, str]:
+        """
+        Builds the search query of the unused (and not deleted) videos of a query.
+
+        Args:
+            query (str): The query the videos were discovered by.
+
+        Returns:
+            dict[str, str]
+        """
+        return {
+            "filter": (
+                f"{VideosCollectionInfo.Fields.UsedInCompilation} = false && "
+                f"{VideosCollectionInfo.Fields.Deleted} = false && "
+                f"{VideosCollectionInfo.Fields.TiktokForeignKey}.{TiktokCollectionInfo.Fields.Query} = {SingletonPocketBase.serialize_value(query)}"
+            )
+        }
 
 
 class Compilation:
@@ -387,56 +1579,171 @@ class Compilation:
     Class representing a Compilation of Tiktok videos.
     """
 
+    # The field the video records of a compilation are found by (their video_id)
+    VideoIdField: str = (
+        f"{VideosCollectionInfo.Fields.TiktokForeignKey}."
+        f"{TiktokCollectionInfo.Fields.VideoId}"
+    )
+
     @typechecked
     @staticmethod
     def create_record(compilation: VideoCompilation) -> CompilationRecord:
-        # TODO: Docstring
+        """
+        Creates a record of a compilation, and marks the videos used in it as used
+        so they aren't included in any other compilation.
+
+        Args:
+            compilation (VideoCompilation)
+
+        Raises:
+            FileNotFoundError: If the compilation's video doesn't exist.
+            ValueError: If a video of the compilation doesn't have a record.
+
+        Returns:
+            CompilationRecord
+        """
         validate_path_exists(compilation.video_path)
 
-        # We need the video record IDs, which can be grabbed using the
-        # tiktok record ids.
-        video_ids: list[TiktokRecordVideoId] = [
-            getattr(
-                VideoCollection.validate_record(
-                    f"{VideosCollectionInfo.Fields.TiktokForeignKey}.{TiktokCollectionInfo.Fields.VideoId}",
-                    str(video_id),
-                    True,
+        with stage("compilation"), pb.session():
+            # We need the video record IDs, which can be grabbed using the
+            # tiktok record ids.
+            tiktok_video_ids: list[str] = Compilation.__tiktok_video_ids(compilation)
+            video_ids: list[TiktokRecordVideoId] = Compilation.__video_ids(
+                VideoCollection.validate_records_many(
+                    Compilation.VideoIdField, tiktok_video_ids, True
                 ),
-                VideosCollectionInfo.Fields.Id,
+                tiktok_video_ids,
             )
-            for video_id in compilation.tiktok_record_ids
-        ]
 
-        pb.create(
-            CompilationsCollectionInfo.CollectionName,
-            {
-                CompilationsCollectionInfo.Fields.Title: compilation.title,
-                CompilationsCollectionInfo.Fields.VideoPath: str(
-                    compilation.video_path
+            record: CompilationRecord = pb.create(
+                CompilationsCollectionInfo.CollectionName,
+                Compilation.record_data(compilation, video_ids),
+            )
+
+            # Now mark the videos used in the compilation as used so we don't include them
+            # in any other compilations.
+            VideoCollection.mark_videos(compilation.videos, used=True)
+
+        return record
+
+    @typechecked
+    @staticmethod
+    async def async_create_record(compilation: VideoCompilation) -> CompilationRecord:
+        """
+        Async variant of create_record.
+
+        Args:
+            compilation (VideoCompilation)
+
+        Returns:
+            CompilationRecord
+        """
+        validate_path_exists(compilation.video_path)
+
+        with stage("compilation"), async_pb.session():
+            tiktok_video_ids: list[str] = Compilation.__tiktok_video_ids(compilation)
+            video_ids: list[TiktokRecordVideoId] = Compilation.__video_ids(
+                await VideoCollection.async_validate_records_many(
+                    Compilation.VideoIdField, tiktok_video_ids, True
                 ),
-                CompilationsCollectionInfo.Fields.UsedVideos: video_ids,
-                CompilationsCollectionInfo.Fields.Metadata: {
-                    video_index: metadata.as_dict()
-                    for (video_index, metadata) in compilation.metadata.items()
-                },
+                tiktok_video_ids,
+            )
+
+            record: CompilationRecord = await async_pb.create(
+                CompilationsCollectionInfo.CollectionName,
+                Compilation.record_data(compilation, video_ids),
+            )
+
+            # Now mark the videos used in the compilation as used so we don't include them
+            # in any other compilations.
+            await VideoCollection.async_mark_videos(compilation.videos, used=True)
+
+        return record
+
+    @staticmethod
+    def __tiktok_video_ids(compilation: VideoCompilation) -> list[str]:
+        """
+        Returns the (tiktok) video_id of each video of a compilation.
+
+        Args:
+            compilation (VideoCompilation)
+
+        Returns:
+            list[str]
+        """
+        return [str(video_id) for video_id in compilation.tiktok_record_ids]
+
+    @staticmethod
+    def __video_ids(
+        video_records: dict[str, VideoCollectionRecord], tiktok_video_ids: list[str]
+    ) -> list[TiktokRecordVideoId]:
+        """
+        Returns the id of the video record of each (tiktok) video_id.
+
+        Args:
+            video_records (dict[str, VideoCollectionRecord]): The record of each
+                video_id, found by VideoIdField.
+            tiktok_video_ids (list[str])
+
+        Returns:
+            list[TiktokRecordVideoId]
+        """
+        return [
+            getattr(video_records[video_id], VideosCollectionInfo.Fields.Id)
+            for video_id in tiktok_video_ids
+        ]
+
+    @typechecked
+    @staticmethod
+    def record_data(compilation: VideoCompilation, video_ids: list[str]) -> dict:
+        """
+        Builds the data of a record.
+
+        Args:
+            compilation (VideoCompilation)
+            video_ids (list[str]): The IDs of the video records used.
+
+        Returns:
+            dict
+        """
+        return {
+            CompilationsCollectionInfo.Fields.Title: compilation.title,
+            CompilationsCollectionInfo.Fields.VideoPath: str(compilation.video_path),
+            CompilationsCollectionInfo.Fields.UsedVideos: video_ids,
+            CompilationsCollectionInfo.Fields.Metadata: {
+                video_index: metadata.as_dict()
+                for (video_index, metadata) in compilation.metadata.items()
             },
-        )
+        }
+
+    @staticmethod
+    def validate_record(title: str, exists: bool) -> Optional[Record]:
+        """
+        Validates if a record does, or doesn't, exist.
+
+        Args:
+            title (str): Title of the compilation.
+            exists (bool): Check if the record exists or doesn't exist.
 
-        # Now mark the videos used in the compilation as used so we don't include them
-        # in any other compilations.
-        for video in compilation.videos:
-            VideoCollection.mark_video_as_used(video)
+        Raises:
+            ValueError: Does not meet the expect exist value.
 
-        return pb.search_single_record(
+        Returns:
+            Optional[Record]
+        """
+        logger.info(f"Validating compilation record. Title: {title}. Exists: {exists}")
+        record: Optional[Record] = pb.search_single_record(
             CompilationsCollectionInfo.CollectionName,
             CompilationsCollectionInfo.Fields.Title,
-            compilation.title,
+            title,
         )
 
+        return check_record_exists(record, exists)
+
     @staticmethod
-    def validate_record(title: str, exists: bool) -> Optional[Record]:
+    async def async_validate_record(title: str, exists: bool) -> Optional[Record]:
         """
-        Validates if a record does, or doesn't, exist.
+        Async variant of validate_record.
 
         Args:
             title (str): Title of the compilation.
@@ -449,27 +1756,132 @@ class Compilation:
             Optional[Record]
         """
         logger.info(f"Validating compilation record. Title: {title}. Exists: {exists}")
-        record: Optional[Record] = pb.search_single_record(
+        record: Optional[Record] = await async_pb.search_single_record(
             CompilationsCollectionInfo.CollectionName,
             CompilationsCollectionInfo.Fields.Title,
             title,
         )
 
-        record_exists = True if record is not None else False
-        if record_exists != exists:
-            message = f"Did not match expected exist value"
+        return check_record_exists(record, exists)
+
+    @staticmethod
+    @typechecked
+    def validate_records_many(
+        field: str, values: list[str], exists: Optional[bool] = None
+    ) -> dict[str, CompilationRecord]:
+        """
+        Validates many records at once, in a handful of requests (see
+        SingletonPocketBase.search_records_by_values).
+
+        Args:
+            field (str): The (unique) field you want to test against. Only the title
+                is unique.
+            values (list[str]): The values to test against the field.
+            exists (Optional[bool], optional): Check if every record exists or doesn't
+                exist. Defaults to None (no check).
+
+        Raises:
+            ValueError: The field isn't unique, or a record does not meet the expected
+                exist value.
+
+        Returns:
+            dict[str, CompilationRecord]: The record of each value that has one.
+        """
+        Compilation.validate_unique_field(field)
+        logger.info(
+            f"Validating {len(values)} compilation records. Field: {field}. Exists: {exists}"
+        )
+        records: dict[str, CompilationRecord] = pb.search_records_by_values(
+            CompilationsCollectionInfo.CollectionName, field, values
+        )
+
+        return check_records_exist(records, values, exists)
+
+    @staticmethod
+    @typechecked
+    async def async_validate_records_many(
+        field: str, values: list[str], exists: Optional[bool] = None
+    ) -> dict[str, CompilationRecord]:
+        """
+        Async variant of validate_records_many.
+
+        Args:
+            field (str): The (unique) field you want to test against. Only the title
+                is unique.
+            values (list[str]): The values to test against the field.
+            exists (Optional[bool], optional): Check if every record exists or doesn't
+                exist. Defaults to None (no check).
+
+        Raises:
+            ValueError: The field isn't unique, or a record does not meet the expected
+                exist value.
+
+        Returns:
+            dict[str, CompilationRecord]: The record of each value that has one.
+        """
+        Compilation.validate_unique_field(field)
+        logger.info(
+            f"Validating {len(values)} compilation records. Field: {field}. Exists: {exists}"
+        )
+        records: dict[str, CompilationRecord] = (
+            await async_pb.search_records_by_values(
+                CompilationsCollectionInfo.CollectionName, field, values
+            )
+        )
+
+        return check_records_exist(records, values, exists)
+
+    @staticmethod
+    def validate_unique_field(field: str) -> None:
+        """
+        Validates that records can be found by a field (the title).
+
+        Args:
+            field (str)
+
+        Raises:
+            ValueError: If the field isn't unique.
+        """
+        if field not in CompilationsCollectionInfo.UniqueFields:
+            message = f"Compilations can't be found by {field}, only by their title!"
             logger.error(message)
             raise ValueError(message)
 
-        logger.info(f"Record validated! Exists: {exists}")
-        return record
-
     # TODO: Add tests
     @staticmethod
     def get_video_in_compilation_by_timestamp(
         title: str, timestamp: float
     ) -> Optional[CompilationMeatadata]:
         record: CompilationRecord = Compilation.validate_record(title, True)
+        return Compilation.find_video_by_timestamp(record, timestamp)
+
+    @staticmethod
+    async def async_get_video_in_compilation_by_timestamp(
+        title: str, timestamp: float
+    ) -> Optional[CompilationMeatadata]:
+        record: CompilationRecord = await Compilation.async_validate_record(
+            title, True
+        )
+        return Compilation.find_video_by_timestamp(record, timestamp)
+
+    @staticmethod
+    def find_video_by_timestamp(
+        record: CompilationRecord, timestamp: float
+    ) -> Optional[CompilationMeatadata]:
+        """
+        Finds the video playing at a timestamp of a compilation.
+
+        Args:
+            record (CompilationRecord)
+            timestamp (float): Seconds into the compilation.
+
+        Raises:
+            ValueError: If the compilation has no metadata.
+
+        Returns:
+            Optional[CompilationMeatadata]
+        """
+        title: str = getattr(record, CompilationsCollectionInfo.Fields.Title)
         metadata = getattr(record, CompilationsCollectionInfo.Fields.Metadata)
 
         if not metadata:
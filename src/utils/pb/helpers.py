@@ -28,6 +28,9 @@ class TiktokCollectionInfo:
         Query: str = "query"
         VideoId: str = "video_id"
 
+    # Fields (other than the id) whose value belongs to a single record
+    UniqueFields: tuple[str, ...] = (Fields.URL, Fields.VideoId)
+
     class OriginOoptions:
         TopVideos: str = "top_videos"
         Channel: str = "channel"
@@ -50,6 +53,20 @@ class MetadataCollectionInfo:
         Likes: str = "likes"
         Everything: str = "everything"
 
+    UniqueFields: tuple[str, ...] = (Fields.TiktokForeignKey,)
+    # Fields read unless asked otherwise. Leaves out everything, the whole (large)
+    # raw Tiktok item.
+    DefaultFields: tuple[str, ...] = (
+        Fields.Id,
+        Fields.TiktokForeignKey,
+        Fields.Views,
+        Fields.Likes,
+    )
+    # Relation fields and the collection they point to
+    Relations: dict[str, str] = {
+        Fields.TiktokForeignKey: TiktokCollectionInfo.CollectionName
+    }
+
 
 class VideosCollectionInfo:
     CollectionName: str = "videos"
@@ -65,6 +82,11 @@ class VideosCollectionInfo:
         Deleted: str = "deleted"
         UsedInCompilation: str = "used"
 
+    UniqueFields: tuple[str, ...] = (Fields.VideoPath, Fields.TiktokForeignKey)
+    Relations: dict[str, str] = {
+        Fields.TiktokForeignKey: TiktokCollectionInfo.CollectionName
+    }
+
 
 class CompilationsCollectionInfo:
     CollectionName: str = "compilations"
@@ -80,6 +102,8 @@ class CompilationsCollectionInfo:
         UsedVideos: str = "used_videos"
         Metadata: str = "metadata"
 
+    UniqueFields: tuple[str, ...] = (Fields.Title,)
+
 
 class CollectionNames:
     """
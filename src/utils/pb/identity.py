@@ -0,0 +1,246 @@
+"""
+Session scoped identity map of PocketBase records.
+
+Within a session every record read (by a unique field), created or updated through
+SingletonPocketBase/AsyncSingletonPocketBase is remembered, so looking the same
+record up again (by its id or any of its unique fields) doesn't cost a request.
+Only whole records are remembered, a record missing any field of its collection
+(i.e. read with a fields projection) isn't. Outside of a session nothing is cached.
+
+The session belongs to the thread (or asyncio task) which opened it, and the tasks
+it creates. Other threads don't see it, unless the work they run was bound to it
+with bind_session (as the worker threads of create_many, update_many, etc. are).
+
+Example:
+    with pb.session():
+        TiktokCollection.validate_record("url", url, True)  # request
+        TiktokCollection.validate_record("video_id", video_id, True)  # cached
+"""
+import threading
+from contextvars import ContextVar
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from typeguard import typechecked
+from pocketbase.models import Record
+
+from .helpers import (
+    TiktokCollectionInfo,
+    MetadataCollectionInfo,
+    VideosCollectionInfo,
+    CompilationsCollectionInfo,
+)
+from .typehints import PocketBaseValueOptions
+from ...logger import SingletonLogger
+
+logger = SingletonLogger()
+
+_COLLECTIONS = [
+    TiktokCollectionInfo,
+    MetadataCollectionInfo,
+    VideosCollectionInfo,
+    CompilationsCollectionInfo,
+]
+
+# The fields, per collection, a record can be found by
+UNIQUE_FIELDS: dict[str, tuple[str, ...]] = {
+    info.CollectionName: info.UniqueFields for info in _COLLECTIONS
+}
+# The fields, per collection, a record has to have to be remembered
+FIELDS: dict[str, tuple[str, ...]] = {
+    info.CollectionName: tuple(
+        value
+        for key, value in vars(info.Fields).items()
+        if not key.startswith("_") and isinstance(value, str)
+    )
+    for info in _COLLECTIONS
+}
+# The relation fields, per collection, and the collection they point to. Lets a
+# lookup such as "tiktok.video_id" on the videos collection be answered.
+RELATIONS: dict[str, dict[str, str]] = {
+    info.CollectionName: getattr(info, "Relations", {}) for info in _COLLECTIONS
+}
+
+ID_FIELD: str = "id"
+
+
+class IdentityMap:
+    """
+    Records indexed by (collection, id) and by (collection, unique field, value).
+    Safe to share between threads.
+    """
+
+    def __init__(self) -> None:
+        self.__records: dict[tuple[str, str], Record] = {}
+        self.__keys: dict[tuple[str, str, str], str] = {}
+        self.__lock = threading.RLock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self.__records)
+
+    @typechecked
+    def add(self, collection: str, record: Record) -> Record:
+        """
+        Adds (or replaces) a record, if it's whole: a record missing any field of
+        its collection (i.e. read with a fields projection) isn't added, as it would
+        be returned by lookups which expect a whole record.
+
+        Args:
+            collection (str): The collection of the record.
+            record (Record)
+
+        Returns:
+            Record: The passed record.
+        """
+        if not all(hasattr(record, field) for field in FIELDS.get(collection, ())):
+            return record
+
+        with self.__lock:
+            self.discard(collection, record.id)
+            self.__records[(collection, record.id)] = record
+            for field in UNIQUE_FIELDS.get(collection, ()):
+                value = getattr(record, field, None)
+                if value not in (None, ""):
+                    self.__keys[(collection, field, str(value))] = record.id
+
+        return record
+
+    @typechecked
+    def get(
+        self, collection: str, field: str, value: PocketBaseValueOptions
+    ) -> Optional[Record]:
+        """
+        Returns the record of a collection whose field has the value, if it's in
+        the map. Only the id, unique fields and unique fields of a relation (i.e.
+        "tiktok.video_id") can be looked up.
+
+        Args:
+            collection (str): The collection of the record.
+            field (str): The field to look up.
+            value (PocketBaseValueOptions): The value of the field.
+
+        Returns:
+            Optional[Record]
+        """
+        with self.__lock:
+            record: Optional[Record] = self.__get(collection, field, str(value))
+            if record is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return record
+
+    def __get(self, collection: str, field: str, value: str) -> Optional[Record]:
+        if "." in field:
+            relation, _, relation_field = field.partition(".")
+            target: Optional[str] = RELATIONS.get(collection, {}).get(relation)
+            if target is None:
+                return None
+            parent: Optional[Record] = self.__get(target, relation_field, value)
+            if parent is None:
+                return None
+            return self.__get(collection, relation, parent.id)
+
+        if field == ID_FIELD:
+            record_id: Optional[str] = value
+        elif field in UNIQUE_FIELDS.get(collection, ()):
+            record_id = self.__keys.get((collection, field, value))
+        else:
+            return None
+
+        return self.__records.get((collection, record_id))
+
+    @typechecked
+    def discard(self, collection: str, record_id: str) -> None:
+        """
+        Removes a record (and its unique field entries), if it's in the map.
+
+        Args:
+            collection (str): The collection of the record.
+            record_id (str): The id of the record.
+        """
+        with self.__lock:
+            record: Optional[Record] = self.__records.pop((collection, record_id), None)
+            if record is None:
+                return
+
+            for field in UNIQUE_FIELDS.get(collection, ()):
+                key = (collection, field, str(getattr(record, field, None)))
+                if self.__keys.get(key) == record_id:
+                    del self.__keys[key]
+
+    def clear(self) -> None:
+        """
+        Removes every record.
+        """
+        with self.__lock:
+            self.__records.clear()
+            self.__keys.clear()
+
+
+_session_map: ContextVar[Optional[IdentityMap]] = ContextVar(
+    "pocketbase_identity_map", default=None
+)
+
+
+@contextmanager
+def session() -> Iterator[IdentityMap]:
+    """
+    Opens an identity map session. Sessions can be nested, the inner session
+    shares the map of the outermost one, which is thrown away when it exits.
+
+    Yields:
+        IdentityMap: The map of the session.
+    """
+    identity_map: Optional[IdentityMap] = _session_map.get()
+    if identity_map is not None:
+        yield identity_map
+        return
+
+    logger.info("Opening an identity map session")
+    identity_map = IdentityMap()
+    token = _session_map.set(identity_map)
+    try:
+        yield identity_map
+    finally:
+        _session_map.reset(token)
+        logger.info(
+            f"Closing the identity map session. Records: {len(identity_map)}. "
+            f"Hits: {identity_map.hits}. Misses: {identity_map.misses}"
+        )
+
+
+def current_identity_map() -> Optional[IdentityMap]:
+    """
+    Returns the map of the open session.
+
+    Returns:
+        Optional[IdentityMap]: None if no session is open.
+    """
+    return _session_map.get()
+
+
+def bind_session(function: Callable) -> Callable:
+    """
+    Binds a function to the current session, so a worker thread running it uses the
+    identity map of the thread which submitted it.
+
+    Args:
+        function (Callable)
+
+    Returns:
+        Callable
+    """
+    identity_map: Optional[IdentityMap] = current_identity_map()
+
+    def bound(*args, **kwargs) -> Any:
+        token = _session_map.set(identity_map)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _session_map.reset(token)
+
+    return bound
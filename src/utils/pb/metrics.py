@@ -0,0 +1,338 @@
+"""
+Accounting of the requests sent to PocketBase.
+
+Every request of SingletonPocketBase/AsyncSingletonPocketBase is counted, with its
+latency and size, per pipeline stage, collection and operation. The stage is set
+by the caller (the pipelines set theirs), requests sent outside of one are
+attributed to UNATTRIBUTED_STAGE.
+
+Example:
+    with stage("download"):
+        download_tiktok_videos_from_same_channel_and_update_pb(...)
+
+    print(request_metrics.snapshot())
+    request_metrics.dump(Path("pb_metrics.json"))
+
+The metrics are dumped (as JSON) when the process exits if
+Config.PocketBase.MetricsFile is set.
+"""
+import json
+import time
+import atexit
+import bisect
+import threading
+from pathlib import Path
+from contextvars import ContextVar
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from typeguard import typechecked
+
+from ...config import Config
+from ...logger import SingletonLogger
+
+logger = SingletonLogger()
+
+UNATTRIBUTED_STAGE: str = "unattributed"
+
+# The upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    float("inf"),
+)
+
+_stage: ContextVar[str] = ContextVar("pocketbase_stage", default=UNATTRIBUTED_STAGE)
+
+_RECORDS_PATH: str = "/api/collections/"
+_OPERATIONS: dict[tuple[str, bool], str] = {
+    ("GET", False): "list",
+    ("GET", True): "view",
+    ("POST", False): "create",
+    ("PATCH", True): "update",
+    ("DELETE", True): "delete",
+}
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Attributes the requests sent within it (including by the worker threads of
+    SingletonPocketBase) to a pipeline stage. The innermost stage wins.
+
+    Args:
+        name (str): The name of the stage (i.e. "download").
+    """
+    token = _stage.set(name)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+def current_stage() -> str:
+    """
+    Returns:
+        str: The stage requests are currently attributed to.
+    """
+    return _stage.get()
+
+
+def bind_stage(function: Callable) -> Callable:
+    """
+    Binds a function to the current stage, so a worker thread running it attributes
+    its requests to the stage of the thread which submitted it.
+
+    Args:
+        function (Callable)
+
+    Returns:
+        Callable
+    """
+    name: str = current_stage()
+
+    def bound(*args, **kwargs) -> Any:
+        with stage(name):
+            return function(*args, **kwargs)
+
+    return bound
+
+
+@typechecked
+def classify_request(method: str, path: str) -> tuple[str, str]:
+    """
+    Returns the collection and operation of a request.
+
+    Args:
+        method (str): The HTTP method.
+        path (str): The API path (i.e. /api/collections/tiktok/records).
+
+    Returns:
+        tuple[str, str]: I.e. ("tiktok", "list"). Requests which aren't for records
+            are put under "_admins", "_realtime" or "_other".
+    """
+    path = path.split("?", 1)[0].rstrip("/")
+    if path.startswith(_RECORDS_PATH):
+        parts: list[str] = path[len(_RECORDS_PATH) :].split("/")
+        if len(parts) >= 2 and parts[1] == "records":
+            operation: Optional[str] = _OPERATIONS.get((method, len(parts) > 2))
+            return parts[0], operation or method.lower()
+        return parts[0], f"collection_{method.lower()}"
+    if path.startswith("/api/admins"):
+        return "_admins", path.rsplit("/", 1)[-1]
+    if path.startswith("/api/realtime"):
+        return "_realtime", method.lower()
+    return "_other", f"{method.lower()} {path}"
+
+
+class _Aggregate:
+    """
+    The measurements of one (stage, collection, operation).
+    """
+
+    __slots__ = (
+        "requests",
+        "errors",
+        "bytes_sent",
+        "bytes_received",
+        "seconds",
+        "max_seconds",
+        "buckets",
+    )
+
+    def __init__(self) -> None:
+        self.requests: int = 0
+        self.errors: int = 0
+        self.bytes_sent: int = 0
+        self.bytes_received: int = 0
+        self.seconds: float = 0.0
+        self.max_seconds: float = 0.0
+        self.buckets: list[int] = [0] * len(LATENCY_BUCKETS)
+
+    def quantile(self, quantile: float) -> float:
+        """
+        Estimates a latency quantile, as the upper bound of its bucket.
+        """
+        rank: float = quantile * self.requests
+        seen: int = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "total_seconds": self.seconds,
+            "mean_seconds": self.seconds / self.requests if self.requests else 0.0,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "max_seconds": self.max_seconds,
+            "histogram": {
+                f"le_{bound}": count
+                for bound, count in zip(LATENCY_BUCKETS, self.buckets)
+            },
+        }
+
+
+class RequestMetrics:
+    """
+    Request counts, sizes and latency histograms per (stage, collection,
+    operation). Safe to share between threads.
+    """
+
+    def __init__(self) -> None:
+        self.__aggregates: dict[tuple[str, str, str], _Aggregate] = {}
+        self.__lock = threading.Lock()
+
+    def record(
+        self,
+        method: str,
+        path: str,
+        seconds: float,
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+        error: bool = False,
+    ) -> None:
+        """
+        Records a request, under the current stage.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The API path.
+            seconds (float): How long the request took.
+            bytes_sent (int, optional): The size of the request body. Defaults to 0.
+            bytes_received (int, optional): The size of the response body. Defaults
+                to 0.
+            error (bool, optional): Whether the request failed. Defaults to False.
+        """
+        key: tuple[str, str, str] = (current_stage(), *classify_request(method, path))
+        with self.__lock:
+            aggregate: Optional[_Aggregate] = self.__aggregates.get(key)
+            if aggregate is None:
+                aggregate = self.__aggregates[key] = _Aggregate()
+
+            aggregate.requests += 1
+            aggregate.errors += error
+            aggregate.bytes_sent += bytes_sent
+            aggregate.bytes_received += bytes_received
+            aggregate.seconds += seconds
+            aggregate.max_seconds = max(aggregate.max_seconds, seconds)
+            aggregate.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    @contextmanager
+    def measure(self, method: str, path: str, bytes_sent: int = 0) -> Iterator[dict]:
+        """
+        Measures a request sent within it. A raised exception counts as an error.
+        Set "bytes_received" (and "error", for an error response which isn't
+        raised within it) of the yielded dict once the response has been read.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The API path.
+            bytes_sent (int, optional): The size of the request body. Defaults to 0.
+
+        Yields:
+            dict: The response's measurements.
+        """
+        response: dict = {"bytes_received": 0, "error": False}
+        start: float = time.perf_counter()
+        error: bool = False
+        try:
+            yield response
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(
+                method,
+                path,
+                time.perf_counter() - start,
+                bytes_sent,
+                response["bytes_received"],
+                error or response["error"],
+            )
+
+    def requests(self, stage: Optional[str] = None) -> int:
+        """
+        Returns how many requests were sent (in a stage).
+
+        Args:
+            stage (Optional[str], optional): Defaults to None (every stage).
+
+        Returns:
+            int
+        """
+        with self.__lock:
+            return sum(
+                aggregate.requests
+                for (name, _, _), aggregate in self.__aggregates.items()
+                if stage is None or name == stage
+            )
+
+    def snapshot(self) -> dict[str, dict[str, dict[str, dict]]]:
+        """
+        Returns the measurements, by stage, collection and operation.
+
+        Returns:
+            dict[str, dict[str, dict[str, dict]]]: I.e.
+                {"download": {"videos": {"create": {"requests": 10, ...}}}}
+        """
+        snapshot: dict[str, dict[str, dict[str, dict]]] = {}
+        with self.__lock:
+            for (name, collection, operation), aggregate in sorted(
+                self.__aggregates.items()
+            ):
+                snapshot.setdefault(name, {}).setdefault(collection, {})[
+                    operation
+                ] = aggregate.as_dict()
+        return snapshot
+
+    def reset(self) -> None:
+        """
+        Forgets every measurement.
+        """
+        with self.__lock:
+            self.__aggregates.clear()
+
+    def dump(self, path: Optional[Path] = None) -> None:
+        """
+        Writes the snapshot as JSON.
+
+        Args:
+            path (Optional[Path], optional): Defaults to Config.PocketBase.MetricsFile.
+        """
+        path = path or Config.PocketBase.MetricsFile
+        if path is None:
+            raise ValueError("There's no file to dump the PocketBase metrics to")
+
+        Path(path).write_text(json.dumps(self.snapshot(), indent=2))
+        logger.info(f"Dumped the PocketBase request metrics to {path}")
+
+
+# The metrics of every PocketBase client of this process
+request_metrics = RequestMetrics()
+
+
+@atexit.register
+def _dump_at_exit() -> None:
+    if Config.PocketBase.MetricsFile is not None and request_metrics.requests():
+        try:
+            request_metrics.dump()
+        except OSError as error:
+            logger.warning(f"Failed to dump the PocketBase request metrics: {error}")
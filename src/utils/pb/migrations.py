@@ -0,0 +1,390 @@
+"""
+Versioned indexes of the PocketBase schema, and a tool applying them to an existing
+PocketBase.
+
+Each migration adds the indexes of a schema version. A migration is applied when
+its indexes are present (under any name), so they can be checked against, and
+applied to, a PocketBase whose schema was imported from an older 'pb_schema.json'.
+A unique index replaces a non-unique one on the same fields.
+
+Usage:
+    python -m src.utils.pb.migrations status
+    python -m src.utils.pb.migrations apply [--dry-run]
+
+The indexes are also checked (see check_indexes) when SingletonPocketBase first
+authenticates, unless Config.PocketBase.CheckIndexes is False.
+"""
+import re
+import argparse
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import quote
+
+from typeguard import typechecked
+from pocketbase import PocketBase
+from pocketbase.utils import ClientResponseError
+
+from .helpers import (
+    TiktokCollectionInfo,
+    MetadataCollectionInfo,
+    VideosCollectionInfo,
+    CompilationsCollectionInfo,
+)
+from ...logger import SingletonLogger
+
+logger = SingletonLogger()
+
+_INDEX_PATTERN = re.compile(
+    r"CREATE\s+(UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?\s+ON\s+`?(\w+)`?"
+    r"\s*\(([^)]*)\)",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class Index:
+    """
+    An index of a collection.
+    """
+
+    collection: str
+    fields: tuple[str, ...]
+    unique: bool = False
+
+    @property
+    def name(self) -> str:
+        prefix: str = "uidx" if self.unique else "idx"
+        return f"{prefix}_{self.collection}_{'_'.join(self.fields)}"
+
+    @property
+    def sql(self) -> str:
+        """
+        The index, as PocketBase stores it in a collection's "indexes".
+        """
+        return "CREATE {unique}INDEX `{name}` ON `{collection}` ({fields})".format(
+            unique="UNIQUE " if self.unique else "",
+            name=self.name,
+            collection=self.collection,
+            fields=", ".join(f"`{field}`" for field in self.fields),
+        )
+
+    def is_satisfied_by(self, index: "Index") -> bool:
+        """
+        Whether an existing index does the job of this one.
+        """
+        return (
+            index.collection == self.collection
+            and index.fields == self.fields
+            and (index.unique or not self.unique)
+        )
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    The indexes added by a schema version.
+    """
+
+    version: int
+    description: str
+    indexes: tuple[Index, ...]
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "The unique indexes of the original schema",
+        (
+            Index(
+                TiktokCollectionInfo.CollectionName,
+                (TiktokCollectionInfo.Fields.URL,),
+                unique=True,
+            ),
+            Index(
+                MetadataCollectionInfo.CollectionName,
+                (MetadataCollectionInfo.Fields.TiktokForeignKey,),
+                unique=True,
+            ),
+            Index(
+                VideosCollectionInfo.CollectionName,
+                (VideosCollectionInfo.Fields.VideoPath,),
+                unique=True,
+            ),
+            Index(
+                VideosCollectionInfo.CollectionName,
+                (VideosCollectionInfo.Fields.TiktokForeignKey,),
+                unique=True,
+            ),
+            Index(
+                CompilationsCollectionInfo.CollectionName,
+                (CompilationsCollectionInfo.Fields.Title,),
+            ),
+        ),
+    ),
+    Migration(
+        2,
+        "Indexes of the rest of the fields lookups filter on",
+        (
+            Index(
+                TiktokCollectionInfo.CollectionName,
+                (TiktokCollectionInfo.Fields.VideoId,),
+                unique=True,
+            ),
+            Index(
+                TiktokCollectionInfo.CollectionName,
+                (TiktokCollectionInfo.Fields.Query,),
+            ),
+            Index(
+                CompilationsCollectionInfo.CollectionName,
+                (CompilationsCollectionInfo.Fields.Title,),
+                unique=True,
+            ),
+        ),
+    ),
+)
+
+# The version of the schema this code expects
+SCHEMA_VERSION: int = MIGRATIONS[-1].version
+
+
+@typechecked
+def parse_index(sql: str) -> Optional[Index]:
+    """
+    Parses an index of a collection's "indexes".
+
+    Args:
+        sql (str): I.e. "CREATE UNIQUE INDEX `idx_tG6q90M` ON `tiktok` (`url`)".
+
+    Returns:
+        Optional[Index]: None if it can't be parsed.
+    """
+    match = _INDEX_PATTERN.search(sql)
+    if match is None:
+        return None
+    return Index(
+        match.group(3),
+        tuple(field.strip(" `") for field in match.group(4).split(",")),
+        unique=bool(match.group(1)),
+    )
+
+
+def _collection_path(collection: str) -> str:
+    return f"/api/collections/{quote(collection)}"
+
+
+@typechecked
+def collection_indexes(client: PocketBase, collection: str) -> list[str]:
+    """
+    Returns the indexes of a collection.
+
+    Args:
+        client (PocketBase): An admin authenticated client.
+        collection (str)
+
+    Returns:
+        list[str]: As PocketBase stores them.
+    """
+    response: dict = client.send(_collection_path(collection), {"method": "GET"})
+    return list(response.get("indexes") or [])
+
+
+def _existing_indexes(
+    client: PocketBase, migrations: tuple[Migration, ...]
+) -> dict[str, list[str]]:
+    collections: set[str] = {
+        index.collection for migration in migrations for index in migration.indexes
+    }
+    return {
+        collection: collection_indexes(client, collection)
+        for collection in sorted(collections)
+    }
+
+
+def _is_present(index: Index, existing: dict[str, list[str]]) -> bool:
+    return any(
+        parsed is not None and index.is_satisfied_by(parsed)
+        for parsed in map(parse_index, existing.get(index.collection, []))
+    )
+
+
+@typechecked
+def missing_indexes(
+    client: PocketBase, migrations: tuple[Migration, ...] = MIGRATIONS
+) -> list[Index]:
+    """
+    Returns the indexes of the migrations which aren't present.
+
+    Args:
+        client (PocketBase): An admin authenticated client.
+        migrations (tuple[Migration, ...], optional): Defaults to MIGRATIONS.
+
+    Returns:
+        list[Index]
+    """
+    existing: dict[str, list[str]] = _existing_indexes(client, migrations)
+    return [
+        index
+        for migration in migrations
+        for index in migration.indexes
+        if not _is_present(index, existing)
+    ]
+
+
+@typechecked
+def schema_version(
+    client: PocketBase, migrations: tuple[Migration, ...] = MIGRATIONS
+) -> int:
+    """
+    Returns the version of the PocketBase's schema: the last migration which (with
+    every migration before it) is applied.
+
+    Args:
+        client (PocketBase): An admin authenticated client.
+        migrations (tuple[Migration, ...], optional): Defaults to MIGRATIONS.
+
+    Returns:
+        int: 0 if not even the first migration is applied.
+    """
+    existing: dict[str, list[str]] = _existing_indexes(client, migrations)
+    version: int = 0
+    for migration in migrations:
+        if not all(_is_present(index, existing) for index in migration.indexes):
+            break
+        version = migration.version
+    return version
+
+
+@typechecked
+def migrate(
+    client: PocketBase,
+    migrations: tuple[Migration, ...] = MIGRATIONS,
+    dry_run: bool = False,
+) -> list[Index]:
+    """
+    Adds the missing indexes of the migrations, a collection at a time.
+
+    Args:
+        client (PocketBase): An admin authenticated client.
+        migrations (tuple[Migration, ...], optional): Defaults to MIGRATIONS.
+        dry_run (bool, optional): Only return what would be added. Defaults to False.
+
+    Raises:
+        ClientResponseError: If PocketBase rejected the indexes of a collection, i.e.
+            its records have duplicate values for a unique index. The indexes of the
+            collections before it were added.
+
+    Returns:
+        list[Index]: The added indexes.
+    """
+    missing: list[Index] = list(dict.fromkeys(missing_indexes(client, migrations)))
+    added: list[Index] = [
+        index
+        for index in missing
+        # Unless a (unique) index on the same fields, being added too, does its job
+        if not any(other != index and index.is_satisfied_by(other) for other in missing)
+    ]
+    if dry_run:
+        return added
+
+    for collection in dict.fromkeys(index.collection for index in added):
+        collection_added: list[Index] = [
+            index for index in added if index.collection == collection
+        ]
+        indexes: list[str] = []
+        for sql in collection_indexes(client, collection):
+            parsed: Optional[Index] = parse_index(sql)
+            # Replaced by a unique index on the same fields
+            if parsed is not None and any(
+                index.unique and not parsed.unique and index.fields == parsed.fields
+                for index in collection_added
+            ):
+                continue
+            indexes.append(sql)
+
+        logger.info(
+            f"Adding the indexes {[index.name for index in collection_added]} to "
+            f"{collection}"
+        )
+        try:
+            client.send(
+                _collection_path(collection),
+                {
+                    "method": "PATCH",
+                    "body": {
+                        "indexes": indexes + [index.sql for index in collection_added]
+                    },
+                },
+            )
+        except ClientResponseError as error:
+            logger.error(
+                f"Failed to add the indexes of {collection} (does it have duplicate "
+                f"values for a unique index?). Error: {error} {error.data}"
+            )
+            raise
+
+    return added
+
+
+_checked: set[str] = set()
+
+
+@typechecked
+def check_indexes(client: PocketBase) -> bool:
+    """
+    Checks (once per PocketBase URL) that the PocketBase has the indexes of every
+    migration, warning if it doesn't. Failing to check is only logged.
+
+    Args:
+        client (PocketBase): An admin authenticated client.
+
+    Returns:
+        bool: False if indexes are missing.
+    """
+    if client.base_url in _checked:
+        return True
+    _checked.add(client.base_url)
+
+    try:
+        missing: list[Index] = missing_indexes(client)
+    except ClientResponseError as error:
+        logger.warning(f"Failed to check the PocketBase indexes: {error}")
+        return True
+
+    if missing:
+        logger.warning(
+            f"PocketBase is missing the indexes {[index.name for index in missing]} "
+            f"(schema version {schema_version(client)} of {SCHEMA_VERSION}), so "
+            "lookups will be slow. Add them with: "
+            "python -m src.utils.pb.migrations apply"
+        )
+        return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrates the PocketBase indexes")
+    parser.add_argument("command", choices=["status", "apply"])
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only list the indexes to add"
+    )
+    args = parser.parse_args()
+
+    # Imported here, as SingletonPocketBase checks the indexes with this module
+    from .classes import SingletonPocketBase
+
+    client: PocketBase = SingletonPocketBase().instance
+    if args.command == "status":
+        print(f"Schema version: {schema_version(client)} of {SCHEMA_VERSION}")
+        for index in missing_indexes(client):
+            print(f"Missing: {index.sql}")
+        return
+
+    added: list[Index] = migrate(client, dry_run=args.dry_run)
+    for index in added:
+        print(f"{'Would add' if args.dry_run else 'Added'}: {index.sql}")
+    if not added:
+        print("Nothing to migrate")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+"""
+Local, indexed SQLite mirror of the tiktok, metadata, videos and compilations
+collections.
+
+Analytics, ranking and planning queries read the mirror rather than paging through
+PocketBase: SQLite answers them (with indexes on the fields they filter and sort by)
+in milliseconds, however many records there are. The mirror is only as fresh as its
+last sync.
+
+Syncs are incremental. Each collection is walked by (updated, id) from where the
+last sync stopped, so only the records created or updated since are fetched. A page
+of records and the new position are written in one transaction, so an interrupted
+sync carries on where it stopped. Deleted records aren't seen by an incremental
+sync, prune() removes them (it fetches every id).
+
+The query helpers return the compact rows of rows.py.
+
+Example:
+    with Mirror() as mirror:
+        mirror.sync()
+        top = mirror.most_viewed_tiktoks_from_channel("mrbeast", 5)
+"""
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from typeguard import typechecked
+
+from .classes import SingletonPocketBase, project_query
+from .metrics import stage
+from .rows import (
+    Row,
+    TiktokRow,
+    MetadataRow,
+    VideoRow,
+    CompilationRow,
+    encode_lazy_value,
+)
+from .helpers import (
+    TiktokCollectionInfo,
+    MetadataCollectionInfo,
+    VideosCollectionInfo,
+    CompilationsCollectionInfo,
+)
+from ...config import Config
+from ...logger import SingletonLogger
+from ...utils.codec import dumps, loads
+
+pb = SingletonPocketBase()
+logger = SingletonLogger()
+
+# The field syncs walk the collections by
+SYNC_FIELD: str = "updated"
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    collection TEXT PRIMARY KEY,
+    updated TEXT,
+    id TEXT,
+    synced_at REAL
+);
+"""
+
+
+@dataclass(frozen=True)
+class MirroredCollection:
+    """
+    How a collection is mirrored: its row class, how its fields are stored and its
+    indexes.
+    """
+
+    row_class: type[Row]
+    # Stored as JSON text
+    json_fields: tuple[str, ...] = ()
+    # Stored as 0 or 1
+    bool_fields: tuple[str, ...] = ()
+    # Each index is of one or more fields
+    indexes: tuple[tuple[str, ...], ...] = ()
+
+    @property
+    def name(self) -> str:
+        return self.row_class.CollectionName
+
+    @property
+    def columns(self) -> list[str]:
+        return self.row_class.fields()
+
+    def schema(self) -> str:
+        """
+        Returns:
+            str: The statements creating the table (and its indexes).
+        """
+        columns: list[str] = [
+            "id TEXT PRIMARY KEY",
+            *[
+                f"{column} BLOB" if column in self.row_class.LazyFields else column
+                for column in self.columns
+                if column != "id"
+            ],
+        ]
+        statements: list[str] = [
+            f'CREATE TABLE IF NOT EXISTS "{self.name}" ({", ".join(columns)})'
+        ]
+        for fields in (*self.indexes, (SYNC_FIELD, "id")):
+            statements.append(
+                f'CREATE INDEX IF NOT EXISTS "{self.name}_{"_".join(fields)}" '
+                f'ON "{self.name}" ({", ".join(fields)})'
+            )
+        return ";\n".join(statements) + ";"
+
+    def to_columns(self, item: dict) -> tuple:
+        """
+        Turns a raw record into the values of its columns.
+
+        Args:
+            item (dict)
+
+        Returns:
+            tuple
+        """
+        values: list[Any] = []
+        for column in self.columns:
+            value: Any = item.get(column)
+            if column in self.row_class.LazyFields:
+                value = encode_lazy_value(value)
+            elif column in self.json_fields and value is not None:
+                # Text, for SQLite's JSON functions
+                value = dumps(value).decode()
+            elif column in self.bool_fields and value is not None:
+                value = int(value)
+            values.append(value)
+        return tuple(values)
+
+    def to_row(self, values: Iterable[Any]) -> Row:
+        """
+        Turns the values of the columns back into a row.
+
+        Args:
+            values (Iterable[Any])
+
+        Returns:
+            Row
+        """
+        item: dict = dict(zip(self.columns, values))
+        for field in self.json_fields:
+            if item[field] is not None:
+                item[field] = loads(item[field])
+        for field in self.bool_fields:
+            if item[field] is not None:
+                item[field] = bool(item[field])
+        return self.row_class.from_item(item)
+
+
+MIRRORED_COLLECTIONS: tuple[MirroredCollection, ...] = (
+    MirroredCollection(
+        TiktokRow,
+        indexes=(
+            (TiktokCollectionInfo.Fields.Query,),
+            (TiktokCollectionInfo.Fields.VideoId,),
+            (TiktokCollectionInfo.Fields.URL,),
+        ),
+    ),
+    MirroredCollection(
+        MetadataRow,
+        indexes=(
+            (MetadataCollectionInfo.Fields.TiktokForeignKey,),
+            (MetadataCollectionInfo.Fields.Views,),
+        ),
+    ),
+    MirroredCollection(
+        VideoRow,
+        bool_fields=(
+            VideosCollectionInfo.Fields.Deleted,
+            VideosCollectionInfo.Fields.UsedInCompilation,
+        ),
+        indexes=(
+            (
+                VideosCollectionInfo.Fields.TiktokForeignKey,
+                VideosCollectionInfo.Fields.UsedInCompilation,
+                VideosCollectionInfo.Fields.Deleted,
+            ),
+            (VideosCollectionInfo.Fields.VideoPath,),
+        ),
+    ),
+    MirroredCollection(
+        CompilationRow,
+        json_fields=(
+            CompilationsCollectionInfo.Fields.UsedVideos,
+            CompilationsCollectionInfo.Fields.Metadata,
+        ),
+        indexes=((CompilationsCollectionInfo.Fields.Title,),),
+    ),
+)
+
+
+class Mirror:
+    """
+    See the module docstring. Safe to share between threads.
+
+    Args:
+        database (Optional[Path], optional): The SQLite database. Defaults to
+            Config.PocketBase.MirrorDatabase.
+        collections (tuple[MirroredCollection, ...], optional): Defaults to
+            MIRRORED_COLLECTIONS.
+    """
+
+    def __init__(
+        self,
+        database: Optional[Path] = None,
+        collections: tuple[MirroredCollection, ...] = MIRRORED_COLLECTIONS,
+    ) -> None:
+        self.database: Path = Path(database or Config.PocketBase.MirrorDatabase)
+        self.collections: dict[str, MirroredCollection] = {
+            collection.name: collection for collection in collections
+        }
+
+        self.__connection = sqlite3.connect(self.database, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.executescript(
+            _SCHEMA
+            + "\n".join(collection.schema() for collection in collections)
+        )
+        self.__lock = threading.RLock()
+
+    def __enter__(self) -> "Mirror":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes the database.
+        """
+        with self.__lock:
+            self.__connection.close()
+
+    @typechecked
+    def sync(
+        self, collections: Optional[list[str]] = None, per_page: int = 500
+    ) -> dict[str, int]:
+        """
+        Fetches the records created or updated since the last sync.
+
+        Args:
+            collections (Optional[list[str]], optional): Defaults to None (every
+                mirrored collection).
+            per_page (int, optional): How many records are fetched (and written) at
+                a time. Defaults to 500 (max).
+
+        Returns:
+            dict[str, int]: How many records of each collection were fetched.
+        """
+        fetched: dict[str, int] = {}
+        with stage("mirror"):
+            for name in collections or list(self.collections):
+                mirrored: MirroredCollection = self.collections[name]
+                cursor: Optional[tuple[str, str]] = self.cursor(name)
+                fetched[name] = 0
+                for items in pb.iter_keyset_pages(
+                    name,
+                    project_query({}, mirrored.columns),
+                    per_page,
+                    SYNC_FIELD,
+                    cursor,
+                ):
+                    if items:
+                        cursor = items[-1][SYNC_FIELD], items[-1]["id"]
+                        fetched[name] += len(items)
+                    self.apply(name, items, cursor)
+
+        logger.info(f"Synced the PocketBase mirror. Fetched: {fetched}")
+        return fetched
+
+    @typechecked
+    def prune(self, collections: Optional[list[str]] = None) -> dict[str, int]:
+        """
+        Removes the records which were deleted from PocketBase. Fetches every id of
+        the collections.
+
+        Args:
+            collections (Optional[list[str]], optional): Defaults to None (every
+                mirrored collection).
+
+        Returns:
+            dict[str, int]: How many records of each collection were removed.
+        """
+        removed: dict[str, int] = {}
+        with stage("mirror"):
+            for name in collections or list(self.collections):
+                ids: set[str] = {
+                    item["id"]
+                    for items in pb.iter_keyset_pages(name, {"fields": "id"})
+                    for item in items
+                }
+                with self.__lock, self.__connection:
+                    deleted: list[tuple[str]] = [
+                        (record_id,)
+                        for (record_id,) in self.__connection.execute(
+                            f'SELECT id FROM "{name}"'
+                        )
+                        if record_id not in ids
+                    ]
+                    self.__connection.executemany(
+                        f'DELETE FROM "{name}" WHERE id = ?', deleted
+                    )
+                removed[name] = len(deleted)
+
+        logger.info(f"Pruned the PocketBase mirror. Removed: {removed}")
+        return removed
+
+    @typechecked
+    def apply(
+        self,
+        collection: str,
+        items: list[dict],
+        cursor: Optional[tuple[str, str]] = None,
+    ) -> None:
+        """
+        Writes raw records (replacing the ones with the same id), and where the sync
+        of their collection is at, in one transaction.
+
+        Args:
+            collection (str)
+            items (list[dict]): The raw records.
+            cursor (Optional[tuple[str, str]], optional): The (updated, id) the next
+                sync starts after. Defaults to None (left as it is).
+        """
+        mirrored: MirroredCollection = self.collections[collection]
+        columns: list[str] = mirrored.columns
+        with self.__lock, self.__connection:
+            self.__connection.executemany(
+                f'INSERT OR REPLACE INTO "{collection}" ({", ".join(columns)}) '
+                f'VALUES ({", ".join("?" for _ in columns)})',
+                [mirrored.to_columns(item) for item in items],
+            )
+            self.__connection.execute(
+                "INSERT INTO sync_state (collection, updated, id, synced_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (collection) DO UPDATE SET "
+                "updated = coalesce(excluded.updated, updated), "
+                "id = coalesce(excluded.id, id), synced_at = excluded.synced_at",
+                (collection, *(cursor or (None, None)), time.time()),
+            )
+
+    @typechecked
+    def cursor(self, collection: str) -> Optional[tuple[str, str]]:
+        """
+        Returns:
+            Optional[tuple[str, str]]: The (updated, id) the next sync of a
+                collection starts after. None if it was never synced.
+        """
+        with self.__lock:
+            state: Optional[tuple] = self.__connection.execute(
+                "SELECT updated, id FROM sync_state WHERE collection = ?",
+                (collection,),
+            ).fetchone()
+        if state is None or state[0] is None:
+            return None
+        return state[0], state[1]
+
+    @typechecked
+    def last_synced(self, collection: str) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: When (a timestamp) a collection was last synced. None if
+                it was never synced.
+        """
+        with self.__lock:
+            state: Optional[tuple] = self.__connection.execute(
+                "SELECT synced_at FROM sync_state WHERE collection = ?",
+                (collection,),
+            ).fetchone()
+        return None if state is None else state[0]
+
+    @typechecked
+    def count(self, collection: str) -> int:
+        """
+        Returns:
+            int: How many records of a collection are mirrored.
+        """
+        with self.__lock:
+            return self.__connection.execute(
+                f'SELECT count(*) FROM "{collection}"'
+            ).fetchone()[0]
+
+    @typechecked
+    def most_viewed_tiktoks_from_channel(
+        self, channel: str, number_records: int = 10
+    ) -> list[Row]:
+        """
+        Returns the most viewed tiktoks of a channel. See
+        queries.most_viewed_tiktoks_from_channel.
+
+        Args:
+            channel (str): The name of the TikTok channel.
+            number_records (int, optional): Defaults to 10.
+
+        Raises:
+            ValueError: If number_records is less than 1.
+
+        Returns:
+            list[Row]: TiktokRows, most viewed first.
+        """
+        if number_records < 1:
+            message: str = (
+                f"number_records must be at least 1. Passed: {number_records}"
+            )
+            logger.error(message)
+            raise ValueError(message)
+
+        return self.__select(
+            TiktokCollectionInfo.CollectionName,
+            f'JOIN "{MetadataCollectionInfo.CollectionName}" AS m '
+            f"ON m.{MetadataCollectionInfo.Fields.TiktokForeignKey} = r.id "
+            f"WHERE r.{TiktokCollectionInfo.Fields.Query} = ? "
+            f"ORDER BY m.{MetadataCollectionInfo.Fields.Views} DESC LIMIT ?",
+            (channel, number_records),
+        )
+
+    @typechecked
+    def find_unused_videos_by_query(self, query: str) -> list[Row]:
+        """
+        Returns the videos of a query which weren't used (or deleted). See
+        VideoCollection.find_unsed_videos_by_query.
+
+        Args:
+            query (str)
+
+        Returns:
+            list[Row]: VideoRows.
+        """
+        return self.__select(
+            VideosCollectionInfo.CollectionName,
+            f'JOIN "{TiktokCollectionInfo.CollectionName}" AS t '
+            f"ON t.id = r.{VideosCollectionInfo.Fields.TiktokForeignKey} "
+            f"WHERE r.{VideosCollectionInfo.Fields.UsedInCompilation} = 0 "
+            f"AND r.{VideosCollectionInfo.Fields.Deleted} = 0 "
+            f"AND t.{TiktokCollectionInfo.Fields.Query} = ?",
+            (query,),
+        )
+
+    @typechecked
+    def all_records_of_channel(self, channel: str) -> dict[str, list[Row]]:
+        """
+        Returns the records related to a channel. See
+        queries.all_pb_records_of_channel (the compilations are the ones using a
+        video of the channel).
+
+        Args:
+            channel (str)
+
+        Returns:
+            dict[str, list[Row]]: I.e. {"tiktoks": [...], "metadata": [...],
+                "videos": [...], "compilations": [...]}
+        """
+        tiktok: str = TiktokCollectionInfo.CollectionName
+        query: str = TiktokCollectionInfo.Fields.Query
+        return {
+            "tiktoks": self.__select(tiktok, f"WHERE r.{query} = ?", (channel,)),
+            "metadata": self.__select(
+                MetadataCollectionInfo.CollectionName,
+                f'JOIN "{tiktok}" AS t '
+                f"ON t.id = r.{MetadataCollectionInfo.Fields.TiktokForeignKey} "
+                f"WHERE t.{query} = ?",
+                (channel,),
+            ),
+            "videos": self.__select(
+                VideosCollectionInfo.CollectionName,
+                f'JOIN "{tiktok}" AS t '
+                f"ON t.id = r.{VideosCollectionInfo.Fields.TiktokForeignKey} "
+                f"WHERE t.{query} = ?",
+                (channel,),
+            ),
+            "compilations": self.__select(
+                CompilationsCollectionInfo.CollectionName,
+                f"WHERE r.id IN (SELECT c.id "
+                f'FROM "{CompilationsCollectionInfo.CollectionName}" AS c, '
+                f"json_each(c.{CompilationsCollectionInfo.Fields.UsedVideos}) AS used "
+                f'JOIN "{VideosCollectionInfo.CollectionName}" AS v '
+                f"ON v.id = used.value "
+                f'JOIN "{tiktok}" AS t '
+                f"ON t.id = v.{VideosCollectionInfo.Fields.TiktokForeignKey} "
+                f"WHERE t.{query} = ?)",
+                (channel,),
+            ),
+        }
+
+    def __select(self, collection: str, clauses: str, parameters: tuple) -> list[Row]:
+        """
+        Selects rows of a collection (aliased as "r" in the clauses).
+        """
+        mirrored: MirroredCollection = self.collections[collection]
+        columns: str = ", ".join(f"r.{column}" for column in mirrored.columns)
+        with self.__lock:
+            return [
+                mirrored.to_row(values)
+                for values in self.__connection.execute(
+                    f'SELECT {columns} FROM "{collection}" AS r {clauses}', parameters
+                )
+            ]
@@ -1,6 +1,9 @@
 """
 Common queries used in the codebase.
 """
+from itertools import islice
+from typing import Optional
+
 from typeguard import typechecked
 
 from .classes import SingletonPocketBase
@@ -8,12 +11,13 @@ from .collections import (
     MetadataCollectionInfo,
     TiktokCollectionRecord,
     TiktokCollectionInfo,
-    TiktokCollection,
     MetadataCollectionRecord,
     VideoCollectionRecord,
     CompilationRecord,
     VideosCollectionInfo,
+    PocketBaseValueOptions,
 )
+from ...config import Config
 from ...logger import SingletonLogger
 
 
@@ -32,12 +36,98 @@ def number_of_records_of_channel(query: str) -> int:
     Returns:
         int: The number of records associated with the specified query.
     """
-    return len(
-        pb.search_multiple_records(
-            TiktokCollectionInfo.CollectionName,
-            TiktokCollectionInfo.Fields.Query,
-            query,
-        )
+    return pb.count(
+        TiktokCollectionInfo.CollectionName,
+        f"{TiktokCollectionInfo.Fields.Query} = {SingletonPocketBase.serialize_value(query)}",
+    )
+
+
+@typechecked
+def number_of_pb_records_of_channel(channel_name: str) -> dict[str, int]:
+    """
+    Counts the records that are related to a channel (query field in pocketbase). The
+    counting version of all_pb_records_of_channel.
+
+    Args:
+        channel_name (str)
+
+    Returns:
+        dict[str, int]: I.e. {"tiktoks": 10, "metadata": 10, "videos": 4}
+    """
+    logger.info(f"Counting all pocketbase records which involve channel: {channel_name}")
+    channel: PocketBaseValueOptions = SingletonPocketBase.serialize_value(channel_name)
+    return pb.count_many(
+        {
+            "tiktoks": (
+                TiktokCollectionInfo.CollectionName,
+                f"{TiktokCollectionInfo.Fields.Query} = {channel}",
+            ),
+            "metadata": (
+                MetadataCollectionInfo.CollectionName,
+                f"{MetadataCollectionInfo.Fields.TiktokForeignKey}.{TiktokCollectionInfo.Fields.Query} = {channel}",
+            ),
+            "videos": (
+                VideosCollectionInfo.CollectionName,
+                f"{VideosCollectionInfo.Fields.TiktokForeignKey}.{TiktokCollectionInfo.Fields.Query} = {channel}",
+            ),
+        }
+    )
+
+
+@typechecked
+def number_of_records_per_origin() -> dict[str, int]:
+    """
+    Counts the tiktok records of each origin (channel, hashtag, etc).
+
+    Returns:
+        dict[str, int]: I.e. {"top_videos": 0, "channel": 120, "trending": 0, "hashtag": 4}
+    """
+    origins: list[str] = [
+        value
+        for key, value in vars(TiktokCollectionInfo.OriginOoptions).items()
+        if not key.startswith("__") and not key.endswith("__")
+    ]
+    return pb.count_many(
+        {
+            origin: (
+                TiktokCollectionInfo.CollectionName,
+                f"{TiktokCollectionInfo.Fields.Origin} = {SingletonPocketBase.serialize_value(origin)}",
+            )
+            for origin in origins
+        }
+    )
+
+
+@typechecked
+def number_of_videos_of_query(query: str) -> dict[str, int]:
+    """
+    Counts the videos of a query by their state.
+
+    Args:
+        query (str): The query (channel, hashtag, etc) of the videos' tiktoks.
+
+    Returns:
+        dict[str, int]: The "total", "used", "unused" (and not deleted, see
+            VideoCollection.find_unsed_videos_by_query) and "deleted" videos.
+    """
+    of_query: str = f"{VideosCollectionInfo.Fields.TiktokForeignKey}.{TiktokCollectionInfo.Fields.Query} = {SingletonPocketBase.serialize_value(query)}"
+    return pb.count_many(
+        {
+            "total": (VideosCollectionInfo.CollectionName, of_query),
+            "used": (
+                VideosCollectionInfo.CollectionName,
+                f"{VideosCollectionInfo.Fields.UsedInCompilation} = true && {of_query}",
+            ),
+            "unused": (
+                VideosCollectionInfo.CollectionName,
+                f"{VideosCollectionInfo.Fields.UsedInCompilation} = false && "
+                f"{VideosCollectionInfo.Fields.Deleted} = false && {of_query}",
+            ),
+            "deleted": (
+                VideosCollectionInfo.CollectionName,
+                f"{VideosCollectionInfo.Fields.Deleted} = true && {of_query}",
+            ),
+        }
     )
 
 
@@ -50,6 +140,7 @@ def all_pb_records_of_channel(
     """
     # TODO: Write tests
     Fetches all records that are related to a channel (query field in pocketbase).
+    The metadata records only hold their MetadataCollectionInfo.DefaultFields.
 
     Args:
         channel_name (str)
@@ -78,16 +169,20 @@ def all_pb_records_of_channel(
             TiktokCollectionInfo.CollectionName,
             TiktokCollectionInfo.Fields.Query,
             channel_name,
+            concurrency=Config.PocketBase.SearchConcurrency,
         ),
         "metadata": pb.search_multiple_records(
             MetadataCollectionInfo.CollectionName,
             f"{MetadataCollectionInfo.Fields.TiktokForeignKey}.{TiktokCollectionInfo.Fields.Query}",
             channel_name,
+            concurrency=Config.PocketBase.SearchConcurrency,
+            fields=list(MetadataCollectionInfo.DefaultFields),
         ),
         "videos": pb.search_multiple_records(
             VideosCollectionInfo.CollectionName,
             f"{VideosCollectionInfo.Fields.TiktokForeignKey}.{TiktokCollectionInfo.Fields.Query}",
             channel_name,
+            concurrency=Config.PocketBase.SearchConcurrency,
         ),
         "compilations": [],  # TODO: Figure out how we grab this info
     }
@@ -95,64 +190,72 @@ def all_pb_records_of_channel(
 
 @typechecked
 def most_viewed_tiktoks_from_channel(
-    channel: str, number_records: int = 10
+    channel: str, number_records: int = 10, fields: Optional[list[str]] = None
 ) -> list[TiktokCollectionRecord]:
     """
     Retrieve the most viewed TikToks from a specific channel.
 
+    PocketBase sorts the metadata records by views and expands their tiktok records,
+    and only the tiktok records are transferred. So (for up to 500 records) this is a
+    single request, however big the channel is.
+
     Args:
         channel (str): The name of the TikTok channel.
         number_records (int, optional): The number of records to retrieve. (Default is 10).
+        fields (Optional[list[str]], optional): The fields of the tiktok records to
+            return, i.e. ["id", "url"]. Defaults to None (all fields).
 
     Returns:
-        list[MetadataCollectionRecord]: A list of MetadataCollectionRecord objects representing the most viewed TikToks.
+        list[TiktokCollectionRecord]: The most viewed TikToks, most viewed first.
 
     Raises:
-        ValueError: If no results are returned from the search.
+        ValueError: If number_records is less than 1, or no results are returned from
+            the search.
 
     Example:
         To retrieve the top 5 most viewed TikToks from the channel "mrbeast":
         most_viewed_tiktoks = most_viewed_tiktoks_from_channel("mrbeast", 5)
     """
     logger.info(f"Retrieving most viewed TikToks from channel '{channel}'")
+    if number_records < 1:
+        message: str = f"number_records must be at least 1. Passed: {number_records}"
+        logger.error(message)
+        raise ValueError(message)
 
-    # Perform the search
-    pb_results: list[MetadataCollectionRecord] = pb.search_multiple_records(
-        MetadataCollectionInfo.CollectionName,
-        f"{MetadataCollectionInfo.Fields.TiktokForeignKey}.{TiktokCollectionInfo.Fields.Query}",
-        channel,
+    tiktok: str = MetadataCollectionInfo.Fields.TiktokForeignKey
+    query: dict[str, str] = {
+        "filter": f"{tiktok}.{TiktokCollectionInfo.Fields.Query} = {SingletonPocketBase.serialize_value(channel)}",
+        "sort": f"-{MetadataCollectionInfo.Fields.Views}",
+        "expand": tiktok,
+        # Leaves out the metadata records themselves (and their "everything")
+        "fields": ",".join(
+            [f"expand.{tiktok}.{field}" for field in fields]
+            if fields
+            else [f"expand.{tiktok}"]
+        ),
+    }
+    # The search stops once enough records were yielded, so only the pages holding
+    # the top records are requested.
+    top_records: list[MetadataCollectionRecord] = list(
+        islice(
+            pb.iter_search(
+                MetadataCollectionInfo.CollectionName,
+                query,
+                per_page=min(number_records, 500),
+            ),
+            number_records,
+        )
     )
 
     # Check if results are empty
-    if not pb_results:
-        message: str = "No results returned!"
+    if not top_records:
+        message = "No results returned!"
         logger.warning(message)
         raise ValueError(message)
 
-    # Sort and return the top records
-    logger.info("Sorting results by most viewed")
-    top_sorted_records: list[MetadataCollectionRecord] = sorted(
-        pb_results,
-        key=lambda record: getattr(record, MetadataCollectionInfo.Fields.Views),
-        reverse=True,
-    )
-    top_records: list[MetadataCollectionRecord] = top_sorted_records[0:number_records]
-
-    logger.info(
-        f"Searching for tiktok records from the sorted records (0-{len(top_records)})"
-    )
-    tiktok_records: list[TiktokCollectionRecord] = []
-    for metadata_record in top_records:
-        tiktok_records.append(
-            TiktokCollection.validate_record(
-                TiktokCollectionInfo.Fields.Id,
-                getattr(
-                    metadata_record, MetadataCollectionInfo.Fields.TiktokForeignKey
-                ),
-                True,
-            )
-        )
-
-    logger.info(f"Retrieved {len(top_records)} most viewed TikToks")
+    tiktok_records: list[TiktokCollectionRecord] = [
+        record.expand[tiktok] for record in top_records if tiktok in record.expand
+    ]
+    logger.info(f"Retrieved {len(tiktok_records)} most viewed TikToks")
 
     return tiktok_records
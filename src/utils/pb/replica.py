@@ -0,0 +1,433 @@
+"""
+Opt-in, in-process replica of PocketBase collections.
+
+Each replicated collection is loaded once (a paginated search), then kept up to date
+by PocketBase's realtime (server-sent events) subscription. While the replica is
+fresh, SingletonPocketBase/AsyncSingletonPocketBase answer searches by a field (i.e.
+search_single_record, search_multiple_records and search_records_by_values) from
+in-memory indexes, without a request.
+
+The replica is fresh while its realtime connection is up. When the connection drops
+it reconnects (and reloads, as changes could have been missed). In the meantime
+reads are only served from it for Config.PocketBase.ReplicaMaxStaleness seconds,
+after which they go to PocketBase again.
+
+Example:
+    pb.start_replica()
+    TiktokCollection.validate_record("url", url, True)  # no request
+    pb.stop_replica()
+"""
+import time
+import threading
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import httpx
+from typeguard import typechecked
+from pocketbase import PocketBase
+from pocketbase.models import Record
+from pocketbase.utils import ClientResponseError
+
+from .typehints import PocketBaseValueOptions
+from ...config import Config
+from ...logger import SingletonLogger
+from ...utils.codec import loads
+
+logger = SingletonLogger()
+
+# Seconds between attempts to (re)connect the realtime connection
+RECONNECT_DELAY: float = 1.0
+
+# The realtime event sent once a connection is established
+CONNECT_EVENT: str = "PB_CONNECT"
+
+
+class CollectionReplica:
+    """
+    The records of a single collection, indexed by id and (once searched by) field.
+    Not thread safe, Replica guards it with its lock.
+    """
+
+    def __init__(self, name: str, records: Iterable[Record] = ()) -> None:
+        self.name: str = name
+        self.__records: dict[str, Record] = {}
+        # field -> value (as str) -> ids of the records with the value
+        self.__indexes: dict[str, dict[str, set[str]]] = {}
+        # Fields which can't be served, as they hold lists (i.e. multiple relations)
+        self.__unindexable: set[str] = set()
+
+        for record in records:
+            self.__records[record.id] = record
+
+    def __len__(self) -> int:
+        return len(self.__records)
+
+    def apply(self, action: str, record: Record) -> None:
+        """
+        Applies a change to a record. Changes older than the replicated record (by its
+        updated time) are ignored, as they can arrive after a newer load.
+
+        Args:
+            action (str): "create", "update" or "delete".
+            record (Record): The changed record (only its id is used by deletes).
+        """
+        existing: Optional[Record] = self.__records.get(record.id)
+        if action == "delete":
+            if existing is not None:
+                self.__unindex(existing)
+                del self.__records[record.id]
+            return
+
+        if existing is not None:
+            if _is_older(record, existing):
+                return
+            self.__unindex(existing)
+        self.__records[record.id] = record
+        self.__index(record)
+
+    def find(self, field: str, value: PocketBaseValueOptions) -> Optional[list[Record]]:
+        """
+        Returns the records whose field has the value.
+
+        Args:
+            field (str): The field, a field of a relation (i.e. "tiktok.video_id")
+                can't be served.
+            value (PocketBaseValueOptions)
+
+        Returns:
+            Optional[list[Record]]: None if the field can't be served.
+        """
+        if field == "id":
+            record: Optional[Record] = self.__records.get(str(value))
+            return [] if record is None else [record]
+        if "." in field or field in self.__unindexable:
+            return None
+
+        index: Optional[dict[str, set[str]]] = self.__indexes.get(field)
+        if index is None:
+            index = self.__build_index(field)
+            if index is None:
+                return None
+
+        return [self.__records[record_id] for record_id in index.get(str(value), ())]
+
+    def __build_index(self, field: str) -> Optional[dict[str, set[str]]]:
+        index: dict[str, set[str]] = {}
+        for record in self.__records.values():
+            value: Any = getattr(record, field, None)
+            if isinstance(value, (list, dict)):
+                self.__unindexable.add(field)
+                return None
+            index.setdefault(str(value), set()).add(record.id)
+
+        self.__indexes[field] = index
+        return index
+
+    def __index(self, record: Record) -> None:
+        for field, index in list(self.__indexes.items()):
+            value: Any = getattr(record, field, None)
+            if isinstance(value, (list, dict)):
+                del self.__indexes[field]
+                self.__unindexable.add(field)
+                continue
+            index.setdefault(str(value), set()).add(record.id)
+
+    def __unindex(self, record: Record) -> None:
+        for field, index in self.__indexes.items():
+            key: str = str(getattr(record, field, None))
+            ids: Optional[set[str]] = index.get(key)
+            if ids is not None:
+                ids.discard(record.id)
+                if not ids:
+                    del index[key]
+
+
+class Replica:
+    """
+    Replicates collections, see the module docstring.
+
+    Args:
+        client (PocketBase): An (admin) authenticated client, used to subscribe.
+        load (Callable[[str], Iterable[Record]]): Returns every record of a collection.
+        collections (Optional[Iterable[str]], optional): The collections to replicate.
+            Defaults to Config.PocketBase.ReplicaCollections.
+        max_staleness (Optional[float], optional): Seconds reads are still served
+            after losing the realtime connection. Defaults to
+            Config.PocketBase.ReplicaMaxStaleness.
+    """
+
+    def __init__(
+        self,
+        client: PocketBase,
+        load: Callable[[str], Iterable[Record]],
+        collections: Optional[Iterable[str]] = None,
+        max_staleness: Optional[float] = None,
+    ) -> None:
+        self.client: PocketBase = client
+        self.load: Callable[[str], Iterable[Record]] = load
+        self.collections: tuple[str, ...] = tuple(
+            collections or Config.PocketBase.ReplicaCollections
+        )
+        self.max_staleness: float = (
+            Config.PocketBase.ReplicaMaxStaleness
+            if max_staleness is None
+            else max_staleness
+        )
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self.__replicas: dict[str, CollectionReplica] = {}
+        self.__lock = threading.RLock()
+        self.__connected: bool = False
+        self.__loaded = threading.Event()
+        # When the connection was lost (time.monotonic), None while connected
+        self.__disconnected_at: Optional[float] = None
+        self.__stopping = threading.Event()
+        self.__http: Optional[httpx.Client] = None
+        self.__thread: Optional[threading.Thread] = None
+        self.__error: Optional[Exception] = None
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return sum(len(replica) for replica in self.__replicas.values())
+
+    def start(self, timeout: Optional[float] = None) -> "Replica":
+        """
+        Connects, and waits for the collections to be loaded.
+
+        Args:
+            timeout (Optional[float], optional): Seconds to wait for the load.
+                Defaults to Config.PocketBase.ReplicaStartTimeout.
+
+        Raises:
+            TimeoutError: If the collections weren't loaded in time.
+
+        Returns:
+            Replica: Itself.
+        """
+        logger.info(f"Starting the replica of {', '.join(self.collections)}")
+        self.__stopping.clear()
+        self.__thread = threading.Thread(
+            target=self.__run, name="pocketbase-replica", daemon=True
+        )
+        self.__thread.start()
+
+        if not self.__loaded.wait(timeout or Config.PocketBase.ReplicaStartTimeout):
+            self.stop()
+            message: str = f"The replica wasn't loaded in time. Error: {self.__error}"
+            logger.error(message)
+            raise TimeoutError(message)
+
+        return self
+
+    def stop(self) -> None:
+        """
+        Disconnects. The replica is no longer fresh.
+        """
+        logger.info("Stopping the replica")
+        self.__stopping.set()
+        with self.__lock:
+            self.__connected = False
+            self.__disconnected_at = float("-inf")
+            if self.__http is not None:
+                self.__http.close()
+        thread: Optional[threading.Thread] = self.__thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1)
+
+    def is_fresh(self) -> bool:
+        """
+        Returns:
+            bool: If reads can be served. The replica is loaded and either connected,
+                or disconnected for at most max_staleness seconds.
+        """
+        with self.__lock:
+            if not self.__loaded.is_set():
+                return False
+            if self.__connected:
+                return True
+            if self.__disconnected_at is None:
+                return False
+            return time.monotonic() - self.__disconnected_at <= self.max_staleness
+
+    @typechecked
+    def find(
+        self, collection: str, field: str, value: PocketBaseValueOptions
+    ) -> Optional[list[Record]]:
+        """
+        Returns the records of a collection whose field has the value.
+
+        Args:
+            collection (str): The collection.
+            field (str): The field.
+            value (PocketBaseValueOptions): The value of the field.
+
+        Returns:
+            Optional[list[Record]]: None if the search can't be served (the replica
+                isn't fresh, or doesn't replicate the collection or field).
+        """
+        with self.__lock:
+            replica: Optional[CollectionReplica] = self.__replicas.get(collection)
+            records: Optional[list[Record]] = (
+                replica.find(field, value)
+                if replica is not None and self.is_fresh()
+                else None
+            )
+            if records is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return records
+
+    @typechecked
+    def apply(self, collection: str, action: str, record: Record) -> None:
+        """
+        Applies a change to a replicated record. Used for the realtime changes, and
+        for our own writes (so they can be read straight away).
+
+        Args:
+            collection (str): The collection of the record.
+            action (str): "create", "update" or "delete".
+            record (Record): The changed record.
+        """
+        with self.__lock:
+            replica: Optional[CollectionReplica] = self.__replicas.get(collection)
+            if replica is not None:
+                replica.apply(action, record)
+
+    def __run(self) -> None:
+        """
+        Keeps the realtime connection up (until stopped).
+        """
+        while not self.__stopping.is_set():
+            try:
+                self.__listen()
+            except (httpx.HTTPError, ClientResponseError, ValueError) as error:
+                if not self.__stopping.is_set():
+                    logger.warning(f"Replica connection error: {error}")
+                self.__error = error
+
+            with self.__lock:
+                if self.__connected:
+                    self.__disconnected_at = time.monotonic()
+                self.__connected = False
+            self.__stopping.wait(RECONNECT_DELAY)
+
+    def __listen(self) -> None:
+        """
+        Opens a realtime connection, subscribes to the collections, (re)loads them and
+        applies the changes until the connection is lost.
+        """
+        with self.__lock:
+            if self.__stopping.is_set():
+                return
+            self.__http = httpx.Client(timeout=httpx.Timeout(10, read=None))
+
+        with self.__http.stream(
+            "GET", self.client.build_url("/api/realtime")
+        ) as response:
+            response.raise_for_status()
+            for event, data in _events(response.iter_lines()):
+                if self.__stopping.is_set():
+                    return
+                if event == CONNECT_EVENT:
+                    self.__subscribe(loads(data)["clientId"])
+                elif event in self.collections:
+                    message: dict = loads(data)
+                    self.apply(event, message["action"], Record(message["record"]))
+
+    def __subscribe(self, client_id: str) -> None:
+        """
+        Subscribes to the collections, then loads them. Changes made during the load
+        are applied once it's done.
+
+        Args:
+            client_id (str): The id of the realtime connection.
+        """
+        self.client.send(
+            "/api/realtime",
+            {
+                "method": "POST",
+                "body": {
+                    "clientId": client_id,
+                    "subscriptions": list(self.collections),
+                },
+            },
+        )
+
+        replicas: dict[str, CollectionReplica] = {}
+        for collection in self.collections:
+            started: float = time.perf_counter()
+            replicas[collection] = CollectionReplica(collection, self.load(collection))
+            logger.info(
+                f"Replicated {len(replicas[collection])} records of {collection} in "
+                f"{time.perf_counter() - started:.2f}s"
+            )
+
+        with self.__lock:
+            self.__replicas = replicas
+            self.__connected = True
+            self.__disconnected_at = None
+        self.__loaded.set()
+
+
+def _is_older(record: Record, existing: Record) -> bool:
+    updated, existing_updated = record.updated, existing.updated
+    if not updated or not existing_updated:
+        return False
+    return updated < existing_updated
+
+
+def _events(lines: Iterator[str]) -> Iterator[tuple[str, str]]:
+    """
+    Parses a server-sent events stream.
+
+    Args:
+        lines (Iterator[str]): The lines of the stream.
+
+    Yields:
+        tuple[str, str]: The name and data of each event.
+    """
+    event: str = "message"
+    data: list[str] = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+            continue
+        if line.startswith(":"):
+            continue
+
+        name, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if name == "event":
+            event = value
+        elif name == "data":
+            data.append(value)
+
+
+_replica: Optional[Replica] = None
+
+
+def current_replica() -> Optional[Replica]:
+    """
+    Returns the started replica.
+
+    Returns:
+        Optional[Replica]: None if no replica was started.
+    """
+    return _replica
+
+
+def set_current_replica(replica: Optional[Replica]) -> None:
+    """
+    Sets (or with None, unsets) the replica reads are served from.
+
+    Args:
+        replica (Optional[Replica])
+    """
+    global _replica
+    _replica = replica
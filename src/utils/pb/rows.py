@@ -0,0 +1,190 @@
+"""
+Compact, typed rows of the collections, for reads of many records.
+
+A pocketbase Record keeps its fields in an instance dict (plus the collection's id
+and name, an expand dict, and created/updated parsed into datetimes). A row only has
+a slot per field of the collection (see the *CollectionInfo.Fields), with created and
+updated left as the strings PocketBase sent. JSON fields holding whole raw items
+(metadata's everything) which a row is built with encoded, as the mirror stores
+them, are only decoded when accessed. PocketBase responses are decoded whole, so
+the rows of a search keep the values as they were decoded (encoding them again would
+only cost time).
+
+Rows are read like records (row.url, getattr(row, TiktokCollectionInfo.Fields.URL)).
+
+Example:
+    for row in SingletonPocketBase().iter_rows(MetadataRow, {"filter": "views > 10"}):
+        print(row.tiktok, row.views)
+"""
+from typing import Any, Iterable
+
+from typeguard import typechecked
+
+from .helpers import (
+    TiktokCollectionInfo,
+    MetadataCollectionInfo,
+    VideosCollectionInfo,
+    CompilationsCollectionInfo,
+)
+from ...utils.codec import dumps, loads
+
+# The system fields every row has (besides the id)
+SYSTEM_FIELDS: tuple[str, ...] = ("created", "updated")
+
+
+class Row:
+    """
+    The base of the row classes. See make_row_class.
+    """
+
+    __slots__ = ()
+
+    CollectionName: str = ""
+    # Decoded when the row is built
+    EagerFields: tuple[str, ...] = ()
+    # If they're encoded (bytes) when the row is built, kept so until accessed
+    LazyFields: tuple[str, ...] = ()
+
+    @classmethod
+    def fields(cls) -> list[str]:
+        """
+        Returns:
+            list[str]: Every field of the row (the fields a search has to return).
+        """
+        return [*cls.EagerFields, *cls.LazyFields]
+
+    @classmethod
+    def from_item(cls, item: dict) -> "Row":
+        """
+        Builds a row from a record of a (decoded) PocketBase response, or of the
+        mirror (whose lazy fields are still encoded). Fields which aren't in it (i.e.
+        left out by a projection) are None.
+
+        Args:
+            item (dict)
+
+        Returns:
+            Row
+        """
+        row: Row = cls.__new__(cls)
+        for field in cls.EagerFields:
+            setattr(row, field, item.get(field))
+        for field in cls.LazyFields:
+            setattr(row, f"_{field}", item.get(field))
+        return row
+
+    @classmethod
+    def from_items(cls, items: Iterable[dict]) -> list["Row"]:
+        """
+        Builds the rows of many records, see from_item.
+
+        Args:
+            items (Iterable[dict])
+
+        Returns:
+            list[Row]
+        """
+        from_item = cls.from_item
+        return [from_item(item) for item in items]
+
+    def as_dict(self) -> dict:
+        """
+        Returns:
+            dict: The fields of the row (with the lazy fields decoded).
+        """
+        return {field: getattr(self, field) for field in self.fields()}
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={getattr(self, 'id', None)!r})"
+
+
+def encode_lazy_value(value: Any) -> Any:
+    """
+    Encodes the value of a lazy field, as compact JSON (i.e. to be stored by the
+    mirror).
+
+    Args:
+        value (Any): The decoded value, or the (bytes) JSON of it.
+
+    Returns:
+        Any: The encoded value (bytes). None stays None.
+    """
+    if value is None or isinstance(value, bytes):
+        return value
+    return dumps(value)
+
+
+def _lazy_field(field: str) -> property:
+    slot: str = f"_{field}"
+
+    def get(row: Row) -> Any:
+        value: Any = getattr(row, slot)
+        if isinstance(value, bytes):
+            value = loads(value)
+            setattr(row, slot, value)
+        return value
+
+    def set_value(row: Row, value: Any) -> None:
+        setattr(row, slot, value)
+
+    return property(
+        get, set_value, doc=f"The {field} field, decoded when accessed (if encoded)."
+    )
+
+
+@typechecked
+def make_row_class(
+    name: str, collection_info: type, lazy_fields: tuple[str, ...] = ()
+) -> type[Row]:
+    """
+    Builds the row class of a collection, with a slot per field of its
+    *CollectionInfo.Fields (plus created and updated).
+
+    Args:
+        name (str): The name of the class, i.e. "TiktokRow".
+        collection_info (type): I.e. TiktokCollectionInfo.
+        lazy_fields (tuple[str, ...], optional): The JSON fields which, if encoded,
+            are kept so until they're accessed. Defaults to ().
+
+    Returns:
+        type[Row]
+    """
+    fields: list[str] = [
+        value
+        for key, value in vars(collection_info.Fields).items()
+        if not key.startswith("_") and isinstance(value, str)
+    ]
+    eager_fields: tuple[str, ...] = tuple(
+        dict.fromkeys(
+            [*[field for field in fields if field not in lazy_fields], *SYSTEM_FIELDS]
+        )
+    )
+    return type(
+        name,
+        (Row,),
+        {
+            "__slots__": eager_fields + tuple(f"_{field}" for field in lazy_fields),
+            "__doc__": f"A row of the {collection_info.CollectionName} collection.",
+            "CollectionName": collection_info.CollectionName,
+            "EagerFields": eager_fields,
+            "LazyFields": lazy_fields,
+            **{field: _lazy_field(field) for field in lazy_fields},
+        },
+    )
+
+
+TiktokRow: type[Row] = make_row_class("TiktokRow", TiktokCollectionInfo)
+MetadataRow: type[Row] = make_row_class(
+    "MetadataRow",
+    MetadataCollectionInfo,
+    lazy_fields=(MetadataCollectionInfo.Fields.Everything,),
+)
+VideoRow: type[Row] = make_row_class("VideoRow", VideosCollectionInfo)
+CompilationRow: type[Row] = make_row_class(
+    "CompilationRow", CompilationsCollectionInfo
+)
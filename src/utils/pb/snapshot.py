@@ -0,0 +1,301 @@
+"""
+Snapshots of the tiktok, metadata, videos and compilations collections, to warm
+start a new worker or test environment without re-crawling TikTok or paging
+through PocketBase record by record.
+
+A snapshot is a gzip compressed file of JSON lines, written and read as a stream:
+a header, the raw records of each collection (relations before the records
+pointing to them, so relation ids resolve on import) and a footer with where the
+export of each collection stopped.
+
+Exports walk each collection by (updated, id). An incremental snapshot starts where
+an earlier snapshot stopped, so it only has the records created or updated since.
+Deleted records aren't in it, nor are created and updated, which PocketBase sets
+itself on import.
+
+Imports upsert the records by id (see SingletonPocketBase.upsert_many), with a
+bounded number of concurrent writes, so snapshots can be imported on top of each
+other, or into a PocketBase which already has some of the records.
+
+Usage:
+    python -m src.utils.pb.snapshot export snapshot.jsonl.gz [--since older.jsonl.gz]
+    python -m src.utils.pb.snapshot import snapshot.jsonl.gz
+"""
+import gzip
+import time
+import argparse
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from typeguard import typechecked
+
+from .classes import SingletonPocketBase
+from .metrics import stage
+from .typehints import FailedRow
+from .helpers import (
+    TiktokCollectionInfo,
+    MetadataCollectionInfo,
+    VideosCollectionInfo,
+    CompilationsCollectionInfo,
+)
+from ...logger import SingletonLogger
+from ...utils.codec import dumps, loads
+
+pb = SingletonPocketBase()
+logger = SingletonLogger()
+
+SNAPSHOT_VERSION: int = 1
+
+# The field exports walk the collections by
+SNAPSHOT_FIELD: str = "updated"
+
+# Relations come before the records pointing to them
+SNAPSHOT_COLLECTIONS: tuple[str, ...] = (
+    TiktokCollectionInfo.CollectionName,
+    MetadataCollectionInfo.CollectionName,
+    VideosCollectionInfo.CollectionName,
+    CompilationsCollectionInfo.CollectionName,
+)
+
+# Fields of the raw records which PocketBase sets itself
+_UNIMPORTED_FIELDS: tuple[str, ...] = (
+    "collectionId",
+    "collectionName",
+    "created",
+    "updated",
+    "expand",
+)
+
+
+@dataclass
+class SnapshotReport:
+    """
+    What an export or import did.
+    """
+
+    records: dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+    # The records which failed to import (with their error)
+    failed: list[FailedRow] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return sum(self.records.values()) / self.seconds if self.seconds else 0.0
+
+
+def _dump(item: dict) -> bytes:
+    return dumps(item) + b"\n"
+
+
+@typechecked
+def read_snapshot(path: Path) -> Iterator[dict]:
+    """
+    Yields the lines of a snapshot.
+
+    Args:
+        path (Path)
+
+    Raises:
+        ValueError: If the file isn't a snapshot (of a supported version).
+
+    Yields:
+        dict: The header, {"collection": ..., "record": ...} lines and the footer.
+    """
+    with gzip.open(path, "rb") as file:
+        for number, line in enumerate(file):
+            item: dict = loads(line)
+            if number == 0 and item.get("snapshot") != SNAPSHOT_VERSION:
+                raise ValueError(
+                    f"{path} isn't a snapshot of version {SNAPSHOT_VERSION}: {item}"
+                )
+            yield item
+
+
+@typechecked
+def snapshot_cursors(path: Path) -> dict[str, tuple[str, str]]:
+    """
+    Returns where the export of each collection in a snapshot stopped, for an
+    incremental snapshot to start after.
+
+    Args:
+        path (Path)
+
+    Raises:
+        ValueError: If the snapshot has no footer (its export didn't finish).
+
+    Returns:
+        dict[str, tuple[str, str]]: The (updated, id) of each collection's last
+            record.
+    """
+    last: dict = {}
+    for last in read_snapshot(path):
+        pass
+    if "cursors" not in last:
+        raise ValueError(f"The snapshot {path} is incomplete")
+    return {name: tuple(cursor) for name, cursor in last["cursors"].items()}
+
+
+@typechecked
+def export_snapshot(
+    path: Path,
+    since: Optional[Path] = None,
+    collections: tuple[str, ...] = SNAPSHOT_COLLECTIONS,
+    per_page: int = 500,
+) -> SnapshotReport:
+    """
+    Writes the records of the collections to a snapshot. The file only appears once
+    the export finished.
+
+    Args:
+        path (Path): The snapshot to write, i.e. "snapshot.jsonl.gz".
+        since (Optional[Path], optional): An earlier snapshot. Only the records
+            created or updated after it are exported. Defaults to None (every
+            record).
+        collections (tuple[str, ...], optional): Defaults to SNAPSHOT_COLLECTIONS.
+        per_page (int, optional): How many records are fetched at a time. Defaults
+            to 500 (max).
+
+    Returns:
+        SnapshotReport: How many records of each collection were exported.
+    """
+    cursors: dict[str, tuple[str, str]] = snapshot_cursors(since) if since else {}
+    logger.info(f"Exporting a snapshot of {collections} to {path}. Since: {cursors}")
+
+    report = SnapshotReport()
+    start: float = time.perf_counter()
+    partial: Path = path.with_name(f"{path.name}.part")
+    with stage("snapshot"), gzip.open(partial, "wb") as file:
+        file.write(
+            _dump(
+                {
+                    "snapshot": SNAPSHOT_VERSION,
+                    "collections": list(collections),
+                    "since": cursors,
+                    "exported_at": time.time(),
+                }
+            )
+        )
+        for name in collections:
+            report.records[name] = 0
+            for items in pb.iter_keyset_pages(
+                name, {}, per_page, SNAPSHOT_FIELD, cursors.get(name)
+            ):
+                file.writelines(
+                    _dump({"collection": name, "record": item}) for item in items
+                )
+                report.records[name] += len(items)
+                if items:
+                    cursors[name] = (items[-1][SNAPSHOT_FIELD], items[-1]["id"])
+        file.write(_dump({"cursors": cursors, "records": report.records}))
+    partial.replace(path)
+
+    report.seconds = time.perf_counter() - start
+    logger.info(
+        f"Exported a snapshot to {path}. Records: {report.records}. "
+        f"{report.rows_per_second:.0f} rows/s"
+    )
+    return report
+
+
+@typechecked
+def import_snapshot(
+    path: Path, batch_size: int = 500, concurrency: Optional[int] = None
+) -> SnapshotReport:
+    """
+    Upserts the records of a snapshot by id, a batch at a time. A failed record
+    doesn't stop the others (nor the records pointing to it, which then fail too).
+
+    Args:
+        path (Path): The snapshot.
+        batch_size (int, optional): How many records are upserted at a time.
+            Defaults to 500.
+        concurrency (Optional[int], optional): How many writes can happen at the
+            same time. Defaults to Config.PocketBase.BulkConcurrency.
+
+    Returns:
+        SnapshotReport: How many records of each collection were imported, and the
+            ones which failed.
+    """
+    logger.info(f"Importing the snapshot {path}")
+    report = SnapshotReport()
+    start: float = time.perf_counter()
+
+    def flush(collection: Optional[str], rows: list[dict]) -> None:
+        if not rows:
+            return
+        created, updated, unchanged, failed = pb.upsert_many(
+            collection, "id", rows, concurrency=concurrency
+        )
+        report.records[collection] = (
+            report.records.get(collection, 0)
+            + len(created)
+            + len(updated)
+            + len(unchanged)
+        )
+        report.failed.extend(failed)
+
+    complete: bool = False
+    collection: Optional[str] = None
+    rows: list[dict] = []
+    with stage("snapshot"):
+        for item in read_snapshot(path):
+            if "cursors" in item:
+                complete = True
+            if "record" not in item:
+                continue
+            if item["collection"] != collection or len(rows) >= batch_size:
+                flush(collection, rows)
+                collection, rows = item["collection"], []
+            rows.append(
+                {
+                    key: value
+                    for key, value in item["record"].items()
+                    if key not in _UNIMPORTED_FIELDS
+                }
+            )
+        flush(collection, rows)
+
+    report.seconds = time.perf_counter() - start
+    if not complete:
+        logger.warning(f"The snapshot {path} is incomplete, imported what it has")
+    logger.info(
+        f"Imported the snapshot {path}. Records: {report.records}. "
+        f"Failed: {len(report.failed)}. {report.rows_per_second:.0f} rows/s"
+    )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Exports or imports a snapshot of the PocketBase collections"
+    )
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", type=Path, help="I.e. snapshot.jsonl.gz")
+    parser.add_argument(
+        "--since",
+        type=Path,
+        help="Only export the records changed after this earlier snapshot",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, help="How many records are imported at a time"
+    )
+    args = parser.parse_args()
+
+    if args.command == "export":
+        report: SnapshotReport = export_snapshot(args.path, args.since)
+    else:
+        report = import_snapshot(args.path, concurrency=args.concurrency)
+
+    for name, count in report.records.items():
+        print(f"{name}: {count}")
+    print(
+        f"{sum(report.records.values())} records in {report.seconds:.2f}s "
+        f"({report.rows_per_second:.0f} rows/s)"
+    )
+    for row, error in report.failed:
+        print(f"Failed: {row.get('id')}: {error}")
+
+
+if __name__ == "__main__":
+    main()
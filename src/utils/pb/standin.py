@@ -0,0 +1,852 @@
+"""
+An in-memory stand-in for the subset of the PocketBase REST API this project uses.
+
+It exists so the data layer can be tested and benchmarked without a live PocketBase
+(and without importing 'pb_schema.json' into one). Supported:
+
+- Admin auth (auth-with-password, auth-refresh).
+- Record list (filter, sort, page, perPage, expand, fields, skipTotal), view, create,
+  update and delete.
+- Collection view/update (used for the schema indexes).
+- Realtime (server-sent events) for record changes.
+
+Example:
+    with PocketBaseStandIn(latency=0.005) as server:
+        Config.PocketBase.URL = server.url
+        ...
+        print(server.request_count)
+"""
+import json
+import re
+import time
+import base64
+import secrets
+import string
+import threading
+from pathlib import Path
+from queue import Queue, Empty
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse, parse_qs, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from ...config import BASE_PATH
+from ...logger import SingletonLogger
+
+logger = SingletonLogger()
+
+DEFAULT_SCHEMA: Path = BASE_PATH.parent.joinpath("pb_schema.json")
+
+_ID_ALPHABET: str = string.ascii_lowercase + string.digits
+_UNAUTHORIZED: str = "The request requires admin authorization token to be set."
+# Fields set by PocketBase, which updates can't change
+_SYSTEM_FIELDS: tuple[str, ...] = (
+    "id",
+    "created",
+    "updated",
+    "collectionId",
+    "collectionName",
+)
+_UNIQUE_INDEX_PATTERN = re.compile(
+    r"CREATE\s+UNIQUE\s+INDEX\s+`?\w+`?\s+ON\s+`?(\w+)`?\s*\(([^)]*)\)", re.IGNORECASE
+)
+
+
+class StandInError(Exception):
+    """
+    An error the stand-in returns as a PocketBase style JSON response.
+    """
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def generate_record_id() -> str:
+    """
+    Generates a PocketBase style (15 character, lowercase alphanumeric) record id.
+
+    Returns:
+        str
+    """
+    return "".join(secrets.choice(_ID_ALPHABET) for _ in range(15))
+
+
+def _timestamp() -> str:
+    now = datetime.now(timezone.utc)
+    return now.strftime("%Y-%m-%d %H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
+
+
+#
+# Filters
+#
+_TOKEN_PATTERN = re.compile(
+    r"\s*(?:"
+    r"(?P<string>'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")"
+    r"|(?P<number>-?\d+(?:\.\d+)?)"
+    r"|(?P<operator>&&|\|\||!=|>=|<=|!~|\?=|=|>|<|~)"
+    r"|(?P<paren>[()])"
+    r"|(?P<identifier>[A-Za-z_@][\w.@]*)"
+    r")"
+)
+
+
+def _tokenize(expression: str) -> list[tuple[str, Any]]:
+    tokens: list[tuple[str, Any]] = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = _TOKEN_PATTERN.match(expression, position)
+        if not match or match.end() == position:
+            raise StandInError(400, f"Invalid filter near: {expression[position:]}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            value = value[1:-1].replace("\\'", "'").replace('\\"', '"')
+        elif kind == "number":
+            value = float(value) if "." in value else int(value)
+        elif kind == "identifier" and value in ("true", "false", "null"):
+            kind, value = "literal", {"true": True, "false": False, "null": None}[value]
+        tokens.append((kind, value))
+    return tokens
+
+
+class _FilterParser:
+    """
+    Recursive descent parser turning a PocketBase filter into a predicate.
+    """
+
+    def __init__(self, tokens: list[tuple[str, Any]], resolve: Callable) -> None:
+        self.tokens = tokens
+        self.position = 0
+        self.resolve = resolve
+
+    def parse(self) -> Callable[[dict], bool]:
+        predicate = self._or()
+        if self.position != len(self.tokens):
+            raise StandInError(400, "Invalid filter: unexpected trailing tokens")
+        return predicate
+
+    def _peek(self) -> Optional[tuple[str, Any]]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self) -> tuple[str, Any]:
+        token = self._peek()
+        if token is None:
+            raise StandInError(400, "Invalid filter: unexpected end")
+        self.position += 1
+        return token
+
+    def _or(self) -> Callable[[dict], bool]:
+        predicates = [self._and()]
+        while self._peek() == ("operator", "||"):
+            self._next()
+            predicates.append(self._and())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda record: any(predicate(record) for predicate in predicates)
+
+    def _and(self) -> Callable[[dict], bool]:
+        predicates = [self._term()]
+        while self._peek() == ("operator", "&&"):
+            self._next()
+            predicates.append(self._term())
+        if len(predicates) == 1:
+            return predicates[0]
+        return lambda record: all(predicate(record) for predicate in predicates)
+
+    def _term(self) -> Callable[[dict], bool]:
+        if self._peek() == ("paren", "("):
+            self._next()
+            predicate = self._or()
+            if self._next() != ("paren", ")"):
+                raise StandInError(400, "Invalid filter: missing ')'")
+            return predicate
+
+        left = self._operand()
+        kind, operator = self._next()
+        if kind != "operator" or operator in ("&&", "||"):
+            raise StandInError(
+                400, f"Invalid filter: expected operator, got {operator}"
+            )
+        right = self._operand()
+        return lambda record: _compare(left(record), operator, right(record))
+
+    def _operand(self) -> Callable[[dict], Any]:
+        kind, value = self._next()
+        if kind == "identifier":
+            return lambda record: self.resolve(record, value)
+        if kind in ("string", "number", "literal"):
+            return lambda record: value
+        raise StandInError(400, f"Invalid filter operand {value}")
+
+
+def _compare(left: Any, operator: str, right: Any) -> bool:
+    # Multiple relations/selects match if any of their values match
+    if isinstance(left, list):
+        return any(_compare(value, operator.lstrip("?"), right) for value in left)
+    operator = operator.lstrip("?")
+
+    if isinstance(left, bool) or isinstance(right, bool):
+        left, right = bool(left), bool(right)
+    elif isinstance(right, (int, float)) and isinstance(left, str):
+        try:
+            left = float(left)
+        except ValueError:
+            return False
+    elif isinstance(left, (int, float)) and isinstance(right, str):
+        try:
+            right = float(right)
+        except ValueError:
+            return False
+    if left is None:
+        left = ""
+    if right is None:
+        right = ""
+
+    try:
+        if operator == "=":
+            return left == right
+        if operator == "!=":
+            return left != right
+        if operator == ">":
+            return left > right
+        if operator == ">=":
+            return left >= right
+        if operator == "<":
+            return left < right
+        if operator == "<=":
+            return left <= right
+        if operator == "~":
+            return str(right).lower() in str(left).lower()
+        if operator == "!~":
+            return str(right).lower() not in str(left).lower()
+    except TypeError:
+        return False
+    raise StandInError(400, f"Unsupported filter operator {operator}")
+
+
+#
+# The in-memory database
+#
+class _Database:
+    """
+    The collections, their records and the realtime subscribers.
+    """
+
+    def __init__(self, schema: list[dict]) -> None:
+        self.lock = threading.RLock()
+        self.collections: dict[str, dict] = {}
+        self.records: dict[str, dict[str, dict]] = {}
+        self.relations: dict[str, dict[str, str]] = {}
+        self.subscribers: dict[str, "_Subscriber"] = {}
+
+        names_by_id: dict[str, str] = {
+            collection["id"]: collection["name"] for collection in schema
+        }
+        for collection in schema:
+            name: str = collection["name"]
+            self.collections[name] = json.loads(json.dumps(collection))
+            self.records[name] = {}
+            self.relations[name] = {
+                field["name"]: names_by_id.get(field["options"]["collectionId"], "")
+                for field in collection.get("schema", [])
+                if field["type"] == "relation"
+            }
+
+    def collection(self, name: str) -> dict:
+        for collection in self.collections.values():
+            if name in (collection["name"], collection["id"]):
+                return collection
+        raise StandInError(404, f"Missing collection {name}")
+
+    def unique_fields(self, name: str) -> list[list[str]]:
+        return _unique_columns(self.collections[name].get("indexes", []))
+
+    def resolve(self, collection: str, record: dict, field: str) -> Any:
+        """
+        Resolves a (potentially dotted, relation crossing) field on a record.
+        """
+        head, _, rest = field.partition(".")
+        value = record.get(head)
+        if not rest:
+            return value
+
+        related_collection = self.relations[collection].get(head)
+        if not related_collection:
+            return None
+
+        related_ids = value if isinstance(value, list) else [value]
+        values = [
+            self.resolve(
+                related_collection, self.records[related_collection][related_id], rest
+            )
+            for related_id in related_ids
+            if related_id in self.records[related_collection]
+        ]
+        if isinstance(value, list):
+            return values
+        return values[0] if values else None
+
+    def expand(self, collection: str, record: dict, expand: str) -> dict:
+        expanded: dict = {}
+        for field in [field.strip() for field in expand.split(",") if field.strip()]:
+            related_collection = self.relations[collection].get(field)
+            if not related_collection:
+                continue
+            value = record.get(field)
+            if isinstance(value, list):
+                expanded[field] = [
+                    dict(self.records[related_collection][related_id])
+                    for related_id in value
+                    if related_id in self.records[related_collection]
+                ]
+            elif value in self.records[related_collection]:
+                expanded[field] = dict(self.records[related_collection][value])
+        return expanded
+
+    def publish(self, collection: str, action: str, record: dict) -> None:
+        message: str = json.dumps({"action": action, "record": record})
+        for subscriber in list(self.subscribers.values()):
+            if collection in subscriber.subscriptions or (
+                f"{collection}/*" in subscriber.subscriptions
+            ):
+                subscriber.queue.put((collection, message))
+
+
+class _Subscriber:
+    """
+    A realtime (SSE) client.
+    """
+
+    def __init__(self) -> None:
+        self.client_id: str = generate_record_id() + generate_record_id()
+        self.subscriptions: set[str] = set()
+        self.queue: Queue = Queue()
+
+
+def _project(record: dict, fields: Optional[str]) -> dict:
+    if not fields:
+        return record
+    paths = [field.strip().split(".") for field in fields.split(",") if field.strip()]
+    return _project_paths(record, paths)
+
+
+def _project_paths(value: Any, paths: list[list[str]]) -> Any:
+    if isinstance(value, list):
+        return [_project_paths(item, paths) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    projected: dict = dict(value) if ["*"] in paths else {}
+    nested: dict[str, list[list[str]]] = {}
+    for path in paths:
+        head = path[0]
+        if head == "*" or head not in value:
+            continue
+        if len(path) == 1:
+            projected[head] = value[head]
+            nested[head] = []
+        elif nested.get(head) != []:
+            nested.setdefault(head, []).append(path[1:])
+    for head, sub_paths in nested.items():
+        if sub_paths:
+            projected[head] = _project_paths(value[head], sub_paths)
+    return projected
+
+
+def _issue_token(admin_id: str, lifetime: int) -> str:
+    def encode(payload: dict) -> str:
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    header = encode({"alg": "HS256", "typ": "JWT"})
+    body = encode(
+        {"id": admin_id, "type": "admin", "exp": int(time.time()) + lifetime}
+    )
+    return f"{header}.{body}.{secrets.token_urlsafe(16)}"
+
+
+class PocketBaseStandIn:
+    """
+    A local HTTP server which behaves like (the parts we use of) PocketBase.
+
+    Args:
+        schema (Path, optional): The exported PocketBase schema. Defaults to
+            pb_schema.json.
+        latency (float, optional): Seconds of latency injected per request.
+            Defaults to 0.
+        admin_email (str, optional): Defaults to "admin@example.com".
+        admin_password (str, optional): Defaults to "password".
+        token_lifetime (int, optional): Seconds an admin token lives for. Defaults
+            to 3600.
+        host (str, optional): Defaults to "127.0.0.1".
+        port (int, optional): Defaults to 0 (a free port).
+    """
+
+    def __init__(
+        self,
+        schema: Path = DEFAULT_SCHEMA,
+        latency: float = 0.0,
+        admin_email: str = "admin@example.com",
+        admin_password: str = "password",
+        token_lifetime: int = 3600,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.latency: float = latency
+        self.admin_email: str = admin_email
+        self.admin_password: str = admin_password
+        self.token_lifetime: int = token_lifetime
+        self.admin_id: str = generate_record_id()
+        self.tokens: set[str] = set()
+        self.database = _Database(json.loads(Path(schema).read_text()))
+
+        self.request_count: int = 0
+        self.requests: list[tuple[str, str]] = []
+        self.connections: int = 0
+
+        self.__server = ThreadingHTTPServer((host, port), self.__make_handler())
+        self.__server.daemon_threads = True
+        self.__thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "PocketBaseStandIn":
+        """
+        Starts serving in a background thread.
+        """
+        logger.info("Starting the PocketBase stand-in")
+        self.__thread = threading.Thread(
+            target=self.__server.serve_forever, name="pocketbase-stand-in", daemon=True
+        )
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the server.
+        """
+        logger.info("Stopping the PocketBase stand-in")
+        for subscriber in list(self.database.subscribers.values()):
+            subscriber.queue.put(None)
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self) -> "PocketBaseStandIn":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def reset_counters(self) -> None:
+        """
+        Resets the request counters (i.e between benchmark stages).
+        """
+        with self.database.lock:
+            self.request_count = 0
+            self.requests = []
+
+    def records(self, collection: str) -> list[dict]:
+        """
+        Returns a copy of all the records in a collection.
+        """
+        with self.database.lock:
+            return [
+                dict(record) for record in self.database.records[collection].values()
+            ]
+
+    def seed(self, collection: str, bodies: list[dict]) -> list[dict]:
+        """
+        Inserts records straight into a collection, without requests, unique checks
+        or realtime events (i.e. to benchmark against a large collection).
+
+        Args:
+            collection (str)
+            bodies (list[dict]): The data of the records (as they'd be created).
+
+        Returns:
+            list[dict]: A copy of the inserted records.
+        """
+        records: list[dict] = [self._new_record(collection, body) for body in bodies]
+        with self.database.lock:
+            for record in records:
+                self.database.records[collection][record["id"]] = record
+        return [dict(record) for record in records]
+
+    #
+    # Request handling
+    #
+    def _handle(
+        self, method: str, path: str, params: dict, body: Any, token: str
+    ) -> tuple[int, Any]:
+        with self.database.lock:
+            self.request_count += 1
+            self.requests.append((method, path))
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        parts: list[str] = [unquote(part) for part in path.strip("/").split("/")]
+
+        if parts[:2] == ["api", "admins"] and len(parts) == 3:
+            return self.__admin_auth(parts[2], body, token)
+
+        if token not in self.tokens:
+            raise StandInError(401, _UNAUTHORIZED)
+
+        if parts[:2] == ["api", "realtime"] and method == "POST":
+            return self.__set_subscriptions(body)
+
+        if parts[:2] != ["api", "collections"] or len(parts) < 3:
+            raise StandInError(404, "The requested resource wasn't found.")
+
+        collection: dict = self.database.collection(parts[2])
+        name: str = collection["name"]
+        if len(parts) == 3:
+            if method == "GET":
+                return 200, collection
+            if method == "PATCH":
+                with self.database.lock:
+                    self.__validate_indexes(name, (body or {}).get("indexes"))
+                    collection.update(body or {})
+                return 200, collection
+        elif parts[3] == "records" and len(parts) == 4:
+            if method == "GET":
+                return 200, self.__list(name, params)
+            if method == "POST":
+                return 200, self.__create(name, body or {}, params)
+        elif parts[3] == "records" and len(parts) == 5:
+            if method == "GET":
+                return 200, self.__view(name, parts[4], params)
+            if method == "PATCH":
+                return 200, self.__update(name, parts[4], body or {}, params)
+            if method == "DELETE":
+                self.__delete(name, parts[4])
+                return 204, None
+
+        raise StandInError(404, "The requested resource wasn't found.")
+
+    def __admin_auth(self, action: str, body: Any, token: str) -> tuple[int, dict]:
+        if action == "auth-with-password":
+            body = body or {}
+            if (body.get("identity"), body.get("password")) != (
+                self.admin_email,
+                self.admin_password,
+            ):
+                raise StandInError(400, "Failed to authenticate.")
+        elif action == "auth-refresh":
+            if token not in self.tokens:
+                raise StandInError(401, _UNAUTHORIZED)
+        else:
+            raise StandInError(404, "The requested resource wasn't found.")
+
+        new_token = _issue_token(self.admin_id, self.token_lifetime)
+        with self.database.lock:
+            self.tokens.add(new_token)
+        return 200, {
+            "token": new_token,
+            "admin": {
+                "id": self.admin_id,
+                "email": self.admin_email,
+                "created": _timestamp(),
+                "updated": _timestamp(),
+                "avatar": 0,
+            },
+        }
+
+    def __set_subscriptions(self, body: Any) -> tuple[int, None]:
+        body = body or {}
+        subscriber = self.database.subscribers.get(body.get("clientId", ""))
+        if subscriber is None:
+            raise StandInError(404, "Missing or invalid client id.")
+        subscriber.subscriptions = set(body.get("subscriptions") or [])
+        return 204, None
+
+    def __render(self, name: str, record: dict, params: dict) -> dict:
+        rendered = dict(record)
+        if params.get("expand"):
+            expanded = self.database.expand(name, record, params["expand"])
+            if expanded:
+                rendered["expand"] = expanded
+        return _project(rendered, params.get("fields"))
+
+    def __list(self, name: str, params: dict) -> dict:
+        page: int = max(int(params.get("page", 1)), 1)
+        per_page: int = min(max(int(params.get("perPage", 30)), 1), 500)
+
+        with self.database.lock:
+            records: list[dict] = list(self.database.records[name].values())
+            if params.get("filter"):
+                predicate = _FilterParser(
+                    _tokenize(params["filter"]),
+                    lambda record, field: self.database.resolve(name, record, field),
+                ).parse()
+                records = [record for record in records if predicate(record)]
+
+            sort: list[str] = [
+                field.strip()
+                for field in params.get("sort", "").split(",")
+                if field.strip()
+            ]
+            for field in reversed(sort):
+                descending: bool = field.startswith("-")
+                field = field.lstrip("+-")
+                records.sort(
+                    key=lambda record: _sort_key(
+                        self.database.resolve(name, record, field)
+                    ),
+                    reverse=descending,
+                )
+
+            items = [
+                self.__render(name, record, params)
+                for record in records[(page - 1) * per_page : page * per_page]
+            ]
+
+        skip_total: bool = str(params.get("skipTotal", "")).lower() in ("1", "true")
+        return {
+            "page": page,
+            "perPage": per_page,
+            "totalItems": -1 if skip_total else len(records),
+            "totalPages": -1 if skip_total else -(-len(records) // per_page),
+            "items": items,
+        }
+
+    def __view(self, name: str, record_id: str, params: dict) -> dict:
+        with self.database.lock:
+            record = self.database.records[name].get(record_id)
+            if record is None:
+                raise StandInError(404, "The requested resource wasn't found.")
+            return self.__render(name, record, params)
+
+    def __validate_indexes(self, name: str, indexes: Optional[list[str]]) -> None:
+        # Like SQLite, a unique index can't be created over duplicate values
+        for columns in _unique_columns(indexes or []):
+            seen: set[str] = set()
+            for record in self.database.records[name].values():
+                key: str = json.dumps([record.get(column) for column in columns])
+                if key in seen:
+                    raise StandInError(
+                        400,
+                        "Failed to update collection. "
+                        f"Duplicate values for the unique index on {columns}",
+                    )
+                seen.add(key)
+
+    def __validate_unique(self, name: str, record: dict) -> None:
+        for columns in self.database.unique_fields(name):
+            values = [record.get(column) for column in columns]
+            for existing in self.database.records[name].values():
+                if existing["id"] != record["id"] and [
+                    existing.get(column) for column in columns
+                ] == values:
+                    raise StandInError(
+                        400, f"Failed to create record. Value must be unique: {columns}"
+                    )
+
+    def _new_record(self, name: str, body: dict) -> dict:
+        """
+        Builds a record of a collection from the body of its create request.
+        """
+        collection = self.database.collections[name]
+        record_id: str = body.get("id") or generate_record_id()
+        if not re.fullmatch(r"[a-z0-9]{15}", record_id):
+            raise StandInError(400, "Failed to create record. Invalid id.")
+
+        record: dict = {
+            "collectionId": collection["id"],
+            "collectionName": name,
+        }
+        for field in collection.get("schema", []):
+            record[field["name"]] = _default_value(field)
+        record.update({key: value for key, value in body.items() if key != "id"})
+        now: str = _timestamp()
+        record.update({"id": record_id, "created": now, "updated": now})
+        return record
+
+    def __create(self, name: str, body: dict, params: dict) -> dict:
+        record: dict = self._new_record(name, body)
+        record_id: str = record["id"]
+        with self.database.lock:
+            if record_id in self.database.records[name]:
+                raise StandInError(400, "Failed to create record. Id already exists.")
+            self.__validate_unique(name, record)
+            self.database.records[name][record_id] = record
+            self.database.publish(name, "create", dict(record))
+            return self.__render(name, record, params)
+
+    def __update(self, name: str, record_id: str, body: dict, params: dict) -> dict:
+        with self.database.lock:
+            existing = self.database.records[name].get(record_id)
+            if existing is None:
+                raise StandInError(404, "The requested resource wasn't found.")
+            record = dict(existing)
+            record.update(
+                {
+                    key: value
+                    for key, value in body.items()
+                    if key not in _SYSTEM_FIELDS
+                }
+            )
+            record["updated"] = _timestamp()
+            self.__validate_unique(name, record)
+            self.database.records[name][record_id] = record
+            self.database.publish(name, "update", dict(record))
+            return self.__render(name, record, params)
+
+    def __delete(self, name: str, record_id: str) -> None:
+        with self.database.lock:
+            record = self.database.records[name].pop(record_id, None)
+            if record is None:
+                raise StandInError(404, "The requested resource wasn't found.")
+            self.database.publish(name, "delete", record)
+
+    def _stream(self, handler: BaseHTTPRequestHandler) -> None:
+        """
+        Serves a realtime connection until the client (or server) goes away.
+        """
+        subscriber = _Subscriber()
+        with self.database.lock:
+            self.database.subscribers[subscriber.client_id] = subscriber
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-store")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+
+        def write(event: str, data: str) -> None:
+            handler.wfile.write(
+                f"id:{subscriber.client_id}\nevent:{event}\ndata:{data}\n\n".encode()
+            )
+            handler.wfile.flush()
+
+        try:
+            write("PB_CONNECT", json.dumps({"clientId": subscriber.client_id}))
+            while True:
+                try:
+                    message = subscriber.queue.get(timeout=1)
+                except Empty:
+                    # Comments keep the connection (and client staleness checks) alive
+                    handler.wfile.write(b": ping\n\n")
+                    handler.wfile.flush()
+                    continue
+                if message is None:
+                    break
+                write(*message)
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            with self.database.lock:
+                self.database.subscribers.pop(subscriber.client_id, None)
+
+    def __make_handler(self) -> type:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # The headers and body are separate writes, which (with Nagle's
+            # algorithm) wait on the client's delayed ACK on kept alive connections
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                with stand_in.database.lock:
+                    stand_in.connections += 1
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def __dispatch(self, method: str) -> None:
+                url = urlparse(self.path)
+                params: dict = {
+                    key: values[-1] for key, values in parse_qs(url.query).items()
+                }
+
+                if method == "GET" and url.path.rstrip("/") == "/api/realtime":
+                    stand_in._stream(self)
+                    return
+
+                length = int(self.headers.get("Content-Length") or 0)
+                raw_body: bytes = self.rfile.read(length) if length else b""
+                token: str = (self.headers.get("Authorization") or "").replace(
+                    "Bearer ", ""
+                )
+
+                try:
+                    body = json.loads(raw_body) if raw_body else None
+                    status, payload = stand_in._handle(
+                        method, url.path, params, body, token
+                    )
+                except StandInError as error:
+                    status, payload = error.status, {
+                        "code": error.status,
+                        "message": error.message,
+                        "data": {},
+                    }
+                except (ValueError, KeyError) as error:
+                    status, payload = 400, {
+                        "code": 400,
+                        "message": f"Invalid request: {error}",
+                        "data": {},
+                    }
+
+                content: bytes = (
+                    b"" if payload is None else json.dumps(payload).encode()
+                )
+                self.send_response(status)
+                if payload is not None:
+                    self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def do_GET(self) -> None:
+                self.__dispatch("GET")
+
+            def do_POST(self) -> None:
+                self.__dispatch("POST")
+
+            def do_PATCH(self) -> None:
+                self.__dispatch("PATCH")
+
+            def do_DELETE(self) -> None:
+                self.__dispatch("DELETE")
+
+        return Handler
+
+
+def _unique_columns(indexes: list[str]) -> list[list[str]]:
+    unique: list[list[str]] = []
+    for index in indexes:
+        match = _UNIQUE_INDEX_PATTERN.search(index)
+        if match:
+            unique.append([column.strip(" `") for column in match.group(2).split(",")])
+    return unique
+
+
+def _sort_key(value: Any) -> tuple:
+    if value is None:
+        return (0, "")
+    if isinstance(value, (bool, int, float)):
+        return (1, value)
+    return (2, str(value))
+
+
+def _default_value(field: dict) -> Any:
+    if field["type"] == "bool":
+        return False
+    if field["type"] == "number":
+        return 0
+    if field["type"] == "json":
+        return None
+    if field["type"] == "relation":
+        return [] if field["options"].get("maxSelect") != 1 else ""
+    return ""
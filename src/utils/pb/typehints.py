@@ -1,4 +1,4 @@
-from typing import TypeAlias, Union
+from typing import TypeAlias, Optional, Union
 
 from pocketbase.models import Record
 
@@ -14,3 +14,18 @@ VideoCollectionRecord: TypeAlias = Record
 # Tiktok collection fields
 TiktokRecordId: TypeAlias = str
 TiktokRecordVideoId: TypeAlias = str
+
+# Bulk operations
+FailedRow: TypeAlias = tuple[dict, str]
+BulkCreateResult: TypeAlias = tuple[list[Record], list[FailedRow]]
+# (created, updated, unchanged, failed)
+BulkUpsertResult: TypeAlias = tuple[
+    list[Record], list[Record], list[Record], list[FailedRow]
+]
+
+# Counts: (collection, filter)
+CountQuery: TypeAlias = tuple[str, Optional[str]]
+
+# Write-behind queue: (collection, action, record id, data)
+QueuedWrite: TypeAlias = tuple[str, str, str, dict]
+FailedWrite: TypeAlias = tuple[QueuedWrite, str]
@@ -0,0 +1,563 @@
+"""
+Durable write-behind queue of PocketBase writes.
+
+Creates, updates and upserts are written to a local SQLite journal and return
+straight away. A background thread flushes them to PocketBase in batches, so callers
+(such as the discovery of a channel's videos) don't wait on PocketBase, and writes
+made while PocketBase is slow or restarting aren't lost. Writes left in the journal (i.e. the
+process was stopped) are flushed by the next queue using the journal.
+
+Records are created with an id generated here, so a queued record can be related
+to (or updated) before it's in PocketBase. Upserts are queued with such an id too,
+but if the record already exists it keeps its own id: the queued id is then an
+alias of it, and the writes flushed after the upsert which use the queued id (as the
+record updated, or in their data, i.e. as a relation) are given the record's id.
+Aliases are kept until the journal is empty.
+
+Ordering: writes are flushed in the order they were queued, a batch at a time.
+Consecutive writes to the same collection are flushed at the same time, but the
+writes of a single record are flushed one after the other. A write which failed
+because PocketBase is unavailable (connection errors, 429 and 5xx responses) stops
+the flush, it's retried (with everything after it) later. Any other failure is
+permanent, the write is kept in the journal as failed (see failed()).
+
+Example:
+    with WriteBehindQueue() as queue:
+        tiktok_id = queue.create("tiktok", {"url": url, ...})
+        queue.create("metadata", {"tiktok": tiktok_id, ...})
+"""
+import sqlite3
+import secrets
+import string
+import threading
+from pathlib import Path
+from itertools import groupby
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from typeguard import typechecked
+from pocketbase.models import Record
+from pocketbase.utils import ClientResponseError
+
+from .classes import SingletonPocketBase
+from .identity import bind_session
+from .metrics import bind_stage
+from .typehints import QueuedWrite, FailedWrite
+from ...config import Config
+from ...logger import SingletonLogger
+from ...utils.codec import dumps, loads
+
+pb = SingletonPocketBase()
+logger = SingletonLogger()
+
+_ID_ALPHABET: str = string.ascii_lowercase + string.digits
+_ID_LENGTH: int = 15
+
+# The longest wait between flushes while PocketBase is unavailable (in seconds)
+MAX_RETRY_DELAY: float = 30.0
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS writes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    collection TEXT NOT NULL,
+    action TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS writes_pending ON writes (failed, seq);
+CREATE TABLE IF NOT EXISTS aliases (
+    queued_id TEXT PRIMARY KEY,
+    record_id TEXT NOT NULL
+);
+"""
+
+# Outcomes of flushing a write
+_DONE: str = "done"
+_FAILED: str = "failed"
+_RETRY: str = "retry"
+
+
+def generate_record_id() -> str:
+    """
+    Generates a PocketBase record id (15 lowercase alphanumeric characters).
+
+    Returns:
+        str
+    """
+    return "".join(secrets.choice(_ID_ALPHABET) for _ in range(_ID_LENGTH))
+
+
+def is_unavailable_error(error: ClientResponseError) -> bool:
+    """
+    Returns:
+        bool: If a request failed because PocketBase is unavailable (so it can be
+            retried), rather than because of the request itself.
+    """
+    return error.status == 0 or error.status == 429 or error.status >= 500
+
+
+class WriteBehindQueue:
+    """
+    See the module docstring.
+
+    Args:
+        journal (Optional[Path], optional): The SQLite journal. Defaults to
+            Config.PocketBase.WriteBehindJournal.
+        batch_size (Optional[int], optional): How many writes are flushed at a time.
+            Defaults to Config.PocketBase.WriteBehindBatchSize.
+        flush_interval (Optional[float], optional): Seconds between flushes. A flush
+            also starts once batch_size writes are queued. Defaults to
+            Config.PocketBase.WriteBehindFlushInterval.
+        concurrency (Optional[int], optional): How many writes happen at the same
+            time. Defaults to Config.PocketBase.BulkConcurrency.
+    """
+
+    def __init__(
+        self,
+        journal: Optional[Path] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        concurrency: Optional[int] = None,
+    ) -> None:
+        self.journal: Path = Path(journal or Config.PocketBase.WriteBehindJournal)
+        self.batch_size: int = batch_size or Config.PocketBase.WriteBehindBatchSize
+        self.flush_interval: float = (
+            flush_interval or Config.PocketBase.WriteBehindFlushInterval
+        )
+        self.concurrency: int = concurrency or Config.PocketBase.BulkConcurrency
+
+        self.__connection = sqlite3.connect(self.journal, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.executescript(_SCHEMA)
+        self.__lock = threading.RLock()
+        # Only one flush runs at a time
+        self.__flush_lock = threading.Lock()
+
+        self.__queued: int = 0
+        self.__wake = threading.Event()
+        self.__stopping = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+        logger.info(
+            f"Opened the write-behind journal {self.journal}. Pending: {self.pending()}"
+        )
+
+    def __enter__(self) -> "WriteBehindQueue":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @typechecked
+    def create(self, collection: str, data: dict) -> str:
+        """
+        Queues the creation of a record.
+
+        Args:
+            collection (str): The target collection.
+            data (dict): The record to insert. An id is generated, unless it has one.
+
+        Returns:
+            str: The id of the record.
+        """
+        return self.create_many(collection, [data])[0]
+
+    @typechecked
+    def create_many(self, collection: str, rows: list[dict]) -> list[str]:
+        """
+        Queues the creation of many records (in a single journal transaction).
+
+        Args:
+            collection (str): The target collection.
+            rows (list[dict]): The records to insert. An id is generated for each
+                record without one.
+
+        Returns:
+            list[str]: The id of each record.
+        """
+        writes: list[QueuedWrite] = []
+        for data in rows:
+            record_id: str = data.get("id") or generate_record_id()
+            writes.append((collection, "create", record_id, {**data, "id": record_id}))
+
+        self.__queue(writes)
+        return [record_id for _, _, record_id, _ in writes]
+
+    @typechecked
+    def update(self, collection: str, record_id: str, data: dict) -> None:
+        """
+        Queues the update of a record.
+
+        Args:
+            collection (str): The target collection.
+            record_id (str): The id of the record (which can still be queued).
+            data (dict): The fields to change.
+        """
+        self.__queue([(collection, "update", record_id, data)])
+
+    @typechecked
+    def upsert(
+        self,
+        collection: str,
+        key_field: str,
+        data: dict,
+        compare_fields: Optional[list[str]] = None,
+        update_fields: Optional[list[str]] = None,
+    ) -> str:
+        """
+        Queues the upsert of a record. See upsert_many.
+
+        Args:
+            collection (str): The target collection.
+            key_field (str): The (unique) field the record is found by, i.e. "url".
+            data (dict): The record data (with the key field).
+            compare_fields (Optional[list[str]], optional): The fields which, when
+                changed, update the record. Defaults to None (every field of data).
+            update_fields (Optional[list[str]], optional): The fields an update
+                writes. Defaults to None (every field of data).
+
+        Returns:
+            str: The queued id of the record.
+        """
+        return self.upsert_many(
+            collection, key_field, [data], compare_fields, update_fields
+        )[0]
+
+    @typechecked
+    def upsert_many(
+        self,
+        collection: str,
+        key_field: str,
+        rows: list[dict],
+        compare_fields: Optional[list[str]] = None,
+        update_fields: Optional[list[str]] = None,
+    ) -> list[str]:
+        """
+        Queues the upsert of many records (in a single journal transaction). Once
+        flushed, each row creates a record, or updates the record with the same key
+        if it changed (see SingletonPocketBase.upsert).
+
+        Args:
+            collection (str): The target collection.
+            key_field (str): The (unique) field rows are matched to records by.
+            rows (list[dict]): The record data (with the key field). An id is
+                generated for each row without one, which a created record gets.
+            compare_fields (Optional[list[str]], optional): The fields which, when
+                changed, update a record. Defaults to None (every field of the row).
+            update_fields (Optional[list[str]], optional): The fields an update
+                writes. Defaults to None (every field of the row).
+
+        Returns:
+            list[str]: The queued id of each record. If a record already exists, its
+                queued id is an alias of its id (see the module docstring).
+        """
+        writes: list[QueuedWrite] = []
+        for data in rows:
+            record_id: str = data.get("id") or generate_record_id()
+            # The id is only written by a create, so it's never compared or updated
+            fields: list[str] = [field for field in data if field != "id"]
+            writes.append(
+                (
+                    collection,
+                    "upsert",
+                    record_id,
+                    {
+                        "key_field": key_field,
+                        "compare_fields": compare_fields or fields,
+                        "update_fields": update_fields or fields,
+                        "data": {**data, "id": record_id},
+                    },
+                )
+            )
+
+        self.__queue(writes)
+        return [record_id for _, _, record_id, _ in writes]
+
+    def __queue(self, writes: list[QueuedWrite]) -> None:
+        with self.__lock, self.__connection:
+            self.__connection.executemany(
+                "INSERT INTO writes (collection, action, record_id, data) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (collection, action, record_id, dumps(data).decode())
+                    for collection, action, record_id, data in writes
+                ],
+            )
+            self.__queued += len(writes)
+            if self.__queued >= self.batch_size:
+                self.__wake.set()
+
+        logger.info(f"Queued {len(writes)} writes")
+
+    def pending(self) -> int:
+        """
+        Returns:
+            int: How many writes are waiting to be flushed.
+        """
+        with self.__lock:
+            return self.__connection.execute(
+                "SELECT COUNT(*) FROM writes WHERE failed = 0"
+            ).fetchone()[0]
+
+    def failed(self) -> list[FailedWrite]:
+        """
+        Returns:
+            list[FailedWrite]: The writes which failed permanently (with their error),
+                in the order they were queued.
+        """
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT collection, action, record_id, data, error FROM writes "
+                "WHERE failed = 1 ORDER BY seq"
+            ).fetchall()
+
+        return [
+            ((collection, action, record_id, loads(data)), error)
+            for collection, action, record_id, data, error in rows
+        ]
+
+    def clear_failed(self) -> None:
+        """
+        Removes the failed writes from the journal.
+        """
+        with self.__lock, self.__connection:
+            self.__connection.execute("DELETE FROM writes WHERE failed = 1")
+
+    def flush(self) -> bool:
+        """
+        Flushes the queued writes, until there are none left or PocketBase is
+        unavailable.
+
+        Returns:
+            bool: If every write was flushed (False if PocketBase is unavailable).
+        """
+        with self.__flush_lock:
+            while True:
+                with self.__lock:
+                    self.__queued = 0
+                    self.__wake.clear()
+                    rows: list[tuple] = self.__connection.execute(
+                        "SELECT seq, collection, action, record_id, data FROM writes "
+                        "WHERE failed = 0 ORDER BY seq LIMIT ?",
+                        (self.batch_size,),
+                    ).fetchall()
+                if not rows:
+                    self.__clear_aliases()
+                    return True
+                if not self.__flush_batch(rows):
+                    return False
+
+    def __flush_batch(self, rows: list[tuple]) -> bool:
+        """
+        Flushes a batch of writes. Each run of consecutive writes to a collection is
+        flushed at the same time (one record's writes in order).
+
+        Args:
+            rows (list[tuple]): The journal rows, in order.
+
+        Returns:
+            bool: False if PocketBase was unavailable.
+        """
+        logger.info(f"Flushing {len(rows)} writes to PocketBase")
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for _, run in groupby(rows, key=lambda row: row[1]):
+                writes_by_record: dict[str, list[tuple]] = {}
+                for row in run:
+                    writes_by_record.setdefault(row[3], []).append(row)
+
+                outcomes: list[tuple[int, str, Optional[str]]] = [
+                    outcome
+                    for outcomes in executor.map(
+                        bind_session(bind_stage(self.__flush_record)),
+                        writes_by_record.values(),
+                    )
+                    for outcome in outcomes
+                ]
+                self.__record_outcomes(outcomes)
+
+                if any(outcome == _RETRY for _, outcome, _ in outcomes):
+                    logger.warning(
+                        "PocketBase is unavailable, the remaining writes are retried "
+                        "later"
+                    )
+                    return False
+
+        return True
+
+    def __flush_record(self, rows: list[tuple]) -> list[tuple[int, str, Optional[str]]]:
+        """
+        Flushes the writes of a single record, in order. Stops at a write that has to
+        be retried.
+
+        Args:
+            rows (list[tuple]): The journal rows of the record.
+
+        Returns:
+            list[tuple[int, str, Optional[str]]]: The seq, outcome and error of each
+                attempted write.
+        """
+        outcomes: list[tuple[int, str, Optional[str]]] = []
+        for seq, collection, action, record_id, data in rows:
+            outcome, error = self.__write(
+                collection, action, record_id, loads(data)
+            )
+            outcomes.append((seq, outcome, error))
+            if outcome == _RETRY:
+                break
+
+        return outcomes
+
+    def __write(
+        self, collection: str, action: str, record_id: str, data: dict
+    ) -> tuple[str, Optional[str]]:
+        try:
+            if action == "create":
+                pb.create(collection, self.__resolve_aliases(data))
+            elif action == "upsert":
+                record: Record = pb.upsert(
+                    collection,
+                    data["key_field"],
+                    self.__resolve_aliases(data["data"]),
+                    data["compare_fields"],
+                    data["update_fields"],
+                )
+                if record.id != record_id:
+                    self.__add_alias(record_id, record.id)
+            else:
+                record_id = self.__resolve_aliases({"id": record_id})["id"]
+                pb.update(collection, record_id, self.__resolve_aliases(data))
+        except ClientResponseError as error:
+            if is_unavailable_error(error):
+                return _RETRY, str(error)
+            # A retried create which had made it to PocketBase (i.e. its response was
+            # lost) fails as the id is taken
+            if action == "create":
+                try:
+                    if pb.search_single_record(collection, "id", record_id):
+                        return _DONE, None
+                except ClientResponseError as search_error:
+                    return _RETRY, str(search_error)
+            logger.warning(
+                f"Failed to {action} record {record_id} of {collection}: "
+                f"{error} {error.data}"
+            )
+            return _FAILED, f"{error} {error.data}"
+
+        return _DONE, None
+
+    def __resolve_aliases(self, data: dict) -> dict:
+        """
+        Returns:
+            dict: The data with every queued id which is an alias replaced by the id
+                of its record.
+        """
+        ids: list[str] = [value for value in data.values() if isinstance(value, str)]
+        if not ids:
+            return data
+
+        with self.__lock:
+            aliases: dict[str, str] = dict(
+                self.__connection.execute(
+                    "SELECT queued_id, record_id FROM aliases WHERE queued_id IN "
+                    f"({', '.join('?' * len(ids))})",
+                    ids,
+                ).fetchall()
+            )
+        return {
+            field: aliases.get(value, value) if isinstance(value, str) else value
+            for field, value in data.items()
+        }
+
+    def __add_alias(self, queued_id: str, record_id: str) -> None:
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO aliases (queued_id, record_id) VALUES (?, ?)",
+                (queued_id, record_id),
+            )
+
+    def __clear_aliases(self) -> None:
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "DELETE FROM aliases WHERE NOT EXISTS (SELECT 1 FROM writes)"
+            )
+
+    def __record_outcomes(self, outcomes: list[tuple[int, str, Optional[str]]]) -> None:
+        with self.__lock, self.__connection:
+            self.__connection.executemany(
+                "DELETE FROM writes WHERE seq = ?",
+                [(seq,) for seq, outcome, _ in outcomes if outcome == _DONE],
+            )
+            self.__connection.executemany(
+                "UPDATE writes SET failed = 1, attempts = attempts + 1, error = ? "
+                "WHERE seq = ?",
+                [
+                    (error, seq)
+                    for seq, outcome, error in outcomes
+                    if outcome == _FAILED
+                ],
+            )
+            self.__connection.executemany(
+                "UPDATE writes SET attempts = attempts + 1, error = ? WHERE seq = ?",
+                [(error, seq) for seq, outcome, error in outcomes if outcome == _RETRY],
+            )
+
+    def start(self) -> "WriteBehindQueue":
+        """
+        Starts flushing in a background thread.
+
+        Returns:
+            WriteBehindQueue: Itself.
+        """
+        logger.info("Starting the write-behind queue")
+        self.__stopping.clear()
+        self.__thread = threading.Thread(
+            # Its flushes are attributed to the stage which started it
+            target=bind_stage(self.__run),
+            name="pocketbase-write-behind",
+            daemon=True,
+        )
+        self.__thread.start()
+        return self
+
+    def stop(self, flush: bool = True) -> None:
+        """
+        Stops flushing in the background, and closes the journal.
+
+        Args:
+            flush (bool, optional): Flush the queued writes first. Writes which can't
+                be flushed stay in the journal. Defaults to True.
+        """
+        logger.info("Stopping the write-behind queue")
+        self.__stopping.set()
+        self.__wake.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+        if flush:
+            self.flush()
+        logger.info(f"Closing the write-behind journal. Pending: {self.pending()}")
+        with self.__lock:
+            self.__connection.close()
+
+    def __run(self) -> None:
+        delay: float = self.flush_interval
+        while not self.__stopping.is_set():
+            self.__wake.wait(delay)
+            if self.__stopping.is_set():
+                return
+
+            try:
+                flushed: bool = self.flush()
+            except Exception as error:
+                logger.error(f"Failed to flush the write-behind queue: {error}")
+                flushed = False
+
+            # Back off while PocketBase is unavailable
+            delay = (
+                self.flush_interval if flushed else min(delay * 2, MAX_RETRY_DELAY)
+            )
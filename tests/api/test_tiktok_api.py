@@ -1,11 +1,15 @@
 """`
 Tests for the Tiktok API. 
 """
+import asyncio
+import threading
 import unittest
+import warnings
 
 
 from src.apis.tiktok.api import TiktokAPI, ChannelDetailsAPI
-from src.config import TestConfig
+from src.apis.tiktok.standin import CHANNEL, SEC_UID, TiktokStandIn
+from src.config import Config, TestConfig
 
 
 class TestUserDetailsApi(unittest.TestCase):
@@ -31,22 +35,23 @@ class TestTiktokApi(unittest.IsolatedAsyncioTestCase):
 
     async def test_get_video_info_method(self):
         video_id: str = "7270973626050972974"
-        result = await TiktokAPI().get_video_info(
-            f"https://www.tiktok.com/@therock/video/{video_id}?lang=en"
-        )
+        async with TiktokAPI() as api:
+            result = await api.get_video_info(
+                f"https://www.tiktok.com/@therock/video/{video_id}?lang=en"
+            )
 
         self.assertTrue(video_id in result.keys())
 
     async def test_get_all_video_ids_from_channel(self):
-        api = TiktokAPI()
-        result = [
-            item
-            async for item in api.get_all_video_from_channel(
-                ChannelDetailsAPI(
-                    "kingoftiktokcompilations", TestConfig.Apis.Tiktok.Cookie
+        async with TiktokAPI() as api:
+            result = [
+                item
+                async for item in api.get_all_video_from_channel(
+                    ChannelDetailsAPI(
+                        "kingoftiktokcompilations", TestConfig.Apis.Tiktok.Cookie
+                    )
                 )
-            )
-        ]
+            ]
         # NOTE: For these tests to work we rely on this user existing. If this account is later deleted,
         # then change the account name. The reason this account is used is because is has few videos
         # which makes testing faster.
@@ -69,7 +74,8 @@ class TestTiktokApi(unittest.IsolatedAsyncioTestCase):
         url = (
             "https://www.tiktok.com/@kingoftiktokcompilations/video/7257173046899903771"
         )
-        result = await TiktokAPI().fetch_video_metadata_stats(url)
+        async with TiktokAPI() as api:
+            result = await api.fetch_video_metadata_stats(url)
         # We test the len as we expect the following keys:
         # collectCount, commentCount, diggCount, playCount, and shareCount
         self.assertEqual(len(result), 5)
@@ -80,13 +86,13 @@ class TestTiktokApi(unittest.IsolatedAsyncioTestCase):
         """
 
         url = "https://www.tiktok.com/@kingoftiktokcompilations/video/00000000000"
-        result = await TiktokAPI().fetch_video_metadata_stats(url)
+        async with TiktokAPI() as api:
+            result = await api.fetch_video_metadata_stats(url)
         # We test the len as we expect the following keys:
         # collectCount, commentCount, diggCount, playCount, and shareCount
         self.assertEqual(result, None)
 
     async def test_fetch_multiple_video_metadata_stats(self):
-        api = TiktokAPI()
         urls = [
             "https://www.tiktok.com/@kingoftiktokcompilations/video/7257173046899903771",
             "https://www.tiktok.com/@kingoftiktokcompilations/video/7257526806092188954",
@@ -94,10 +100,111 @@ class TestTiktokApi(unittest.IsolatedAsyncioTestCase):
             "https://www.tiktok.com/@kingoftiktokcompilations/video/7249116225958202651",
         ]
         data = {}
-        async for url, metadata in api.fetch_multiple_video_metadata_stats(urls):
-            data[url] = metadata
+        async with TiktokAPI() as api:
+            async for url, metadata in api.fetch_multiple_video_metadata_stats(urls):
+                data[url] = metadata
         self.assertEqual(len(data), len(urls))
 
 
+class TestTiktokApiSession(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests the requests of a TiktokAPI share its session, against a local stand-in.
+    """
+
+    def setUp(self) -> None:
+        self.server = TiktokStandIn(videos=40, page_size=15).start()
+        self.url = Config.Apis.Tiktok.URL
+        Config.Apis.Tiktok.URL = self.server.url
+
+    def tearDown(self) -> None:
+        Config.Apis.Tiktok.URL = self.url
+        self.server.stop()
+
+    async def test_requests_share_connections(self):
+        details = ChannelDetailsAPI(CHANNEL, "")
+        details.response = {"userInfo": {"user": {"secUid": SEC_UID}}}
+
+        async with TiktokAPI() as api:
+            items = [item async for item in api.get_all_video_from_channel(details)]
+            self.assertEqual(
+                [item["id"] for item in items],
+                [item["id"] for item in self.server.items],
+            )
+
+            for item in self.server.items[:5]:
+                stats = await api.fetch_video_metadata_stats(
+                    self.server.video_url(item)
+                )
+                self.assertEqual(stats, item["stats"])
+            self.assertIsNone(
+                await api.get_video_info(f"{self.server.url}/@{CHANNEL}/video/0")
+            )
+
+            session = api.http_session
+            self.assertFalse(session.closed)
+
+        # 3 item_list pages and 6 video pages over a single connection
+        self.assertEqual(self.server.request_count, 9)
+        self.assertEqual(self.server.connections, 1)
+        self.assertTrue(session.closed)
+        self.assertIsNone(api.http_session)
+
+    async def test_reopens_after_close(self):
+        api = TiktokAPI()
+        url = self.server.video_url(self.server.items[0])
+        self.assertIsNotNone(await api.get_video_info(url))
+        await api.close()
+        # A closed API can be used again, with a new session
+        self.assertIsNotNone(await api.get_video_info(url))
+        await api.close()
+        self.assertEqual(self.server.connections, 2)
+
+
+class TestTiktokApiLoops(unittest.TestCase):
+    """
+    Tests a TiktokAPI used across event loops.
+    """
+
+    def setUp(self) -> None:
+        self.server = TiktokStandIn(videos=1).start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_new_event_loop(self):
+        api = TiktokAPI()
+        url = self.server.video_url(self.server.items[0])
+
+        async def fetch(close: bool = False):
+            self.assertIsNotNone(await api.get_video_info(url))
+            session = api.http_session
+            if close:
+                await api.close()
+            return session
+
+        # The first loop keeps running, in a thread of its own
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+        with warnings.catch_warnings(record=True) as caught, self.assertNoLogs(
+            "asyncio"
+        ):
+            warnings.simplefilter("always")
+            try:
+                first = asyncio.run_coroutine_threadsafe(fetch(), loop).result()
+                # The session of the first loop is closed there
+                second = asyncio.run(fetch(close=True))
+                self.assertIsNot(second, first)
+                self.assertTrue(first.closed)
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.close()
+
+        self.assertFalse(
+            [warning for warning in caught if "nclosed" in str(warning.message)]
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
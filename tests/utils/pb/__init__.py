@@ -1,9 +1,33 @@
+import os
+import atexit
+import tempfile
 from typeguard import typechecked
 from typing import Optional
 from random import randint
 from pathlib import Path
 from typeguard import typechecked
 
+from src.config import Config
+from src.utils.pb.standin import PocketBaseStandIn
+
+# Set POCKETBASE_STAND_IN to run the tests against the in-memory stand-in (and
+# POCKETBASE_STAND_IN_LATENCY to inject latency), rather than a live PocketBase.
+# Its tokens are cached in a temporary file, not the developer's token cache.
+stand_in: Optional[PocketBaseStandIn] = None
+if os.getenv("POCKETBASE_STAND_IN"):
+    token_cache_directory = tempfile.TemporaryDirectory()
+    atexit.register(token_cache_directory.cleanup)
+    Config.PocketBase.TokenCache = Path(token_cache_directory.name).joinpath(
+        ".pb_admin_token.json"
+    )
+    stand_in = PocketBaseStandIn(
+        latency=float(os.getenv("POCKETBASE_STAND_IN_LATENCY", "0")),
+        admin_email=Config.PocketBase.AdminUsername or "admin@example.com",
+        admin_password=Config.PocketBase.AdminPassword or "password",
+    ).start()
+    Config.PocketBase.URL = stand_in.url
+    Config.PocketBase.AdminUsername = stand_in.admin_email
+    Config.PocketBase.AdminPassword = stand_in.admin_password
 
 from src.utils.pb.collections import (
     TiktokCollection,
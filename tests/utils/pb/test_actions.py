@@ -2,10 +2,17 @@
 Tests for the actions.py module.
 """
 import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
 
 
 from src.apis.tiktok.api import ChannelDetailsAPI
-from src.utils.pb.actions import fetch_and_insert_videos_from_tiktok_channel
+from src.apis.tiktok.standin import CHANNEL, fake_video_item
+from src.utils.pb.actions import (
+    fetch_and_insert_videos_from_tiktok_channel,
+    queue_tiktok_channel_videos,
+)
+from src.utils.pb.writebehind import WriteBehindQueue
 from src.utils.pb.collections import TiktokCollectionInfo, MetadataCollectionInfo
 from src.utils.pb.classes import SingletonPocketBase
 from src.config import TestConfig
@@ -13,6 +20,31 @@ from src.config import TestConfig
 pb: SingletonPocketBase = SingletonPocketBase()
 
 
+def delete_channel_records(channel: str) -> None:
+    # We have to delete the metadata first
+    records = pb.search_multiple_records(
+        MetadataCollectionInfo.CollectionName,
+        f"{MetadataCollectionInfo.Fields.TiktokForeignKey}.{TiktokCollectionInfo.Fields.Query}",
+        channel,
+    )
+    for record in records:
+        pb.delete(
+            MetadataCollectionInfo.CollectionName,
+            getattr(record, MetadataCollectionInfo.Fields.Id),
+        )
+
+    records = pb.search_multiple_records(
+        TiktokCollectionInfo.CollectionName,
+        TiktokCollectionInfo.Fields.Query,
+        channel,
+    )
+    for record in records:
+        pb.delete(
+            TiktokCollectionInfo.CollectionName,
+            getattr(record, TiktokCollectionInfo.Fields.Id),
+        )
+
+
 class TestTiktokApi(unittest.IsolatedAsyncioTestCase):
     """
     Tests for the classes file.
@@ -22,28 +54,7 @@ class TestTiktokApi(unittest.IsolatedAsyncioTestCase):
         self.channel = "kingoftiktokcompilations"
 
     def tearDown(self) -> None:
-        # We have to delete the metadata first
-        records = pb.search_multiple_records(
-            MetadataCollectionInfo.CollectionName,
-            f"{MetadataCollectionInfo.Fields.TiktokForeignKey}.{TiktokCollectionInfo.Fields.Query}",
-            self.channel,
-        )
-        for record in records:
-            pb.delete(
-                MetadataCollectionInfo.CollectionName,
-                getattr(record, MetadataCollectionInfo.Fields.Id),
-            )
-
-        records = pb.search_multiple_records(
-            TiktokCollectionInfo.CollectionName,
-            TiktokCollectionInfo.Fields.Query,
-            self.channel,
-        )
-        for record in records:
-            pb.delete(
-                TiktokCollectionInfo.CollectionName,
-                getattr(record, TiktokCollectionInfo.Fields.Id),
-            )
+        delete_channel_records(self.channel)
 
     async def test_fetch_and_insert_videos_from_tiktok_channel(self):
         channel_details = ChannelDetailsAPI(self.channel, TestConfig.Apis.Tiktok.Cookie)
@@ -75,5 +86,62 @@ class TestTiktokApi(unittest.IsolatedAsyncioTestCase):
         self.assertTrue(len(records) > 0)
 
 
+class TestQueueTiktokChannelVideos(unittest.TestCase):
+    """
+    Tests queueing discovered videos (with the TikTok stand-in's video items).
+    """
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.queue = WriteBehindQueue(
+            Path(self.directory.name).joinpath("journal.sqlite3")
+        )
+
+    def tearDown(self) -> None:
+        self.queue.stop(flush=False)
+        self.directory.cleanup()
+        delete_channel_records(CHANNEL)
+
+    def test_rediscovered_videos(self):
+        items: list[dict] = [fake_video_item(index, 1_700_000_000) for index in (1, 2)]
+        queue_tiktok_channel_videos(CHANNEL, items, self.queue)
+        self.assertTrue(self.queue.flush())
+
+        # Discovering the videos again updates their metadata (once flushed)
+        items[0]["stats"]["playCount"] = 1_000
+        queue_tiktok_channel_videos(CHANNEL, items, self.queue)
+        self.assertTrue(self.queue.flush())
+        self.assertEqual(self.queue.failed(), [])
+
+        tiktok_records = pb.search_multiple_records(
+            TiktokCollectionInfo.CollectionName,
+            TiktokCollectionInfo.Fields.Query,
+            CHANNEL,
+        )
+        self.assertEqual(len(tiktok_records), 2)
+        metadata_records = pb.search_multiple_records(
+            MetadataCollectionInfo.CollectionName,
+            f"{MetadataCollectionInfo.Fields.TiktokForeignKey}.{TiktokCollectionInfo.Fields.Query}",
+            CHANNEL,
+        )
+        self.assertEqual(
+            sorted(
+                getattr(record, MetadataCollectionInfo.Fields.Views)
+                for record in metadata_records
+            ),
+            [20, 1_000],
+        )
+        self.assertEqual(
+            {
+                getattr(record, MetadataCollectionInfo.Fields.TiktokForeignKey)
+                for record in metadata_records
+            },
+            {
+                getattr(record, TiktokCollectionInfo.Fields.Id)
+                for record in tiktok_records
+            },
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
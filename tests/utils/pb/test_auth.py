@@ -0,0 +1,167 @@
+"""
+Tests for the admin authentication of the PocketBase clients.
+"""
+import json
+import time
+import base64
+import unittest
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+
+from . import test_collection_name
+
+from src.config import Config
+from src.utils.pb.auth import (
+    AdminPocketBase,
+    cache_token,
+    read_cached_token,
+    token_expiry,
+)
+from src.utils.pb.metrics import request_metrics, stage
+
+
+def make_token(expiry: float) -> str:
+    """
+    Makes a JWT, which PocketBase won't accept (it isn't signed).
+    """
+    payload: str = base64.urlsafe_b64encode(
+        json.dumps({"id": "admin", "type": "admin", "exp": int(expiry)}).encode()
+    ).decode()
+    return f"header.{payload.rstrip('=')}.signature"
+
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.token_cache: Path = Path(self.directory.name).joinpath("token.json")
+        self.url: str = "http://127.0.0.1:8090"
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_token_expiry(self):
+        expiry: int = int(time.time()) + 60
+        self.assertEqual(token_expiry(make_token(expiry)), expiry)
+        self.assertIsNone(token_expiry("not a token"))
+
+    def test_cache(self):
+        token: str = make_token(time.time() + 60)
+        cache_token(self.url, "admin@example.com", token, self.token_cache)
+
+        self.assertEqual(
+            read_cached_token(self.url, "admin@example.com", 0, self.token_cache),
+            token,
+        )
+        # Other admins (or PocketBases) don't share the token
+        self.assertIsNone(
+            read_cached_token(self.url, "other@example.com", 0, self.token_cache)
+        )
+        # Tokens which expire within the margin aren't returned
+        self.assertIsNone(
+            read_cached_token(self.url, "admin@example.com", 120, self.token_cache)
+        )
+        self.assertEqual(self.token_cache.stat().st_mode & 0o777, 0o600)
+
+        cache_token(self.url, "admin@example.com", None, self.token_cache)
+        self.assertIsNone(
+            read_cached_token(self.url, "admin@example.com", 0, self.token_cache)
+        )
+
+    def test_expired_token(self):
+        cache_token(
+            self.url, "admin@example.com", make_token(time.time() - 1), self.token_cache
+        )
+        self.assertIsNone(
+            read_cached_token(self.url, "admin@example.com", 0, self.token_cache)
+        )
+
+
+class TestAdminPocketBase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.token_cache: Path = Path(self.directory.name).joinpath("token.json")
+        self.clients: list[AdminPocketBase] = []
+
+    def tearDown(self) -> None:
+        for client in self.clients:
+            client.close()
+        self.directory.cleanup()
+
+    def client(self) -> AdminPocketBase:
+        client = AdminPocketBase(
+            Config.PocketBase.URL,
+            Config.PocketBase.AdminUsername,
+            Config.PocketBase.AdminPassword,
+            self.token_cache,
+        )
+        self.clients.append(client)
+        return client
+
+    def cached_token(self):
+        return read_cached_token(
+            Config.PocketBase.URL,
+            Config.PocketBase.AdminUsername,
+            0,
+            self.token_cache,
+        )
+
+    def test_lazy_authentication(self):
+        client = self.client()
+        self.assertFalse(client.auth_store.token)
+        self.assertIsNone(self.cached_token())
+
+        client.collection(test_collection_name).get_list(1, 1)
+        self.assertTrue(client.auth_store.token)
+        self.assertEqual(self.cached_token(), client.auth_store.token)
+
+    def test_cached_token(self):
+        client = self.client()
+        client.collection(test_collection_name).get_list(1, 1)
+
+        # The next client uses the cached token, rather than logging in
+        other = self.client()
+        other.collection(test_collection_name).get_list(1, 1)
+        self.assertEqual(other.auth_store.token, client.auth_store.token)
+
+    def test_rejected_token(self):
+        rejected: str = make_token(time.time() + 3600)
+        cache_token(
+            Config.PocketBase.URL,
+            Config.PocketBase.AdminUsername,
+            rejected,
+            self.token_cache,
+        )
+
+        client = self.client()
+        client.collection(test_collection_name).get_list(1, 1)
+        self.assertNotEqual(client.auth_store.token, rejected)
+        self.assertEqual(self.cached_token(), client.auth_store.token)
+
+    def test_threads(self):
+        client = self.client()
+        request_metrics.reset()
+
+        def get_list(_: int) -> int:
+            with stage("threads"):
+                return client.collection(test_collection_name).get_list(1, 1).page
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            pages: list[int] = list(executor.map(get_list, range(64)))
+        self.assertEqual(pages, [1] * 64)
+
+        # The threads shared a single login
+        admins: dict = request_metrics.snapshot()["threads"]["_admins"]
+        self.assertEqual(admins["auth-with-password"]["requests"], 1)
+        request_metrics.reset()
+
+    def test_close(self):
+        client = self.client()
+        client.collection(test_collection_name).get_list(1, 1)
+        client.close()
+        # The connection pool is opened again
+        self.assertEqual(client.collection(test_collection_name).get_list(1, 1).page, 1)
+
+
+if __name__ == "__main__":
+    unittest.main(failfast=True)
@@ -6,13 +6,21 @@ such as update, delete, create, but we don't test this. We simply
 have these methods to exist as they class uses authentication, so
 it's pointless testing as you'll be testing the module, not our implmentation.
 """
+import gc
+import asyncio
 import unittest
+import warnings
+from urllib.parse import quote
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
 
 from . import test_collection_name
 
 from src.config import Config
-from src.utils.pb.classes import SingletonPocketBase
+from src.utils.pb.classes import SingletonPocketBase, AsyncSingletonPocketBase
+from src.utils.pb.metrics import request_metrics, stage
 
+import aiohttp
 from pocketbase import PocketBase
 
 
@@ -48,6 +56,18 @@ class TestSingletonPocketBase(unittest.TestCase):
 
         self.assertEqual(instance_1, instance_2)
 
+    def test_singleton_threads(self):
+        # A fresh singleton, created by many threads at once
+        with mock.patch.object(SingletonPocketBase, "_instance", None):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                instances = list(
+                    executor.map(lambda _: SingletonPocketBase(), range(32))
+                )
+            self.assertEqual(len({id(instance) for instance in instances}), 1)
+            self.assertEqual(
+                len({id(instance.instance) for instance in instances}), 1
+            )
+
     def test_search_single_record(self):
         pb = SingletonPocketBase()
 
@@ -58,6 +78,68 @@ class TestSingletonPocketBase(unittest.TestCase):
 
         self.assertEqual(len(results), len(self.records))
 
+    def test_iter_search(self):
+        pb = SingletonPocketBase()
+
+        query = {"filter": "second_name = 'Goob'"}
+
+        # By using per_page=1 we ensure each record comes from its own page
+        for prefetch in [False, True]:
+            results = list(
+                pb.iter_search(test_collection_name, query, per_page=1, prefetch=prefetch)
+            )
+            self.assertEqual(
+                sorted(record.id for record in results),
+                sorted(record.id for record in self.records),
+            )
+
+    def test_search_concurrency(self):
+        pb = SingletonPocketBase()
+
+        query = {"filter": "second_name = 'Goob'", "sort": "first_name"}
+
+        # The pages are fetched at the same time, but must come back in order
+        results = pb.search(test_collection_name, query, per_page=1, concurrency=4)
+        self.assertEqual(
+            [record.first_name for record in results],
+            sorted(record["first_name"] for record in [self.record_one, self.record_two]),
+        )
+
+        with self.assertRaises(ValueError):
+            pb.search(test_collection_name, query, concurrency=0)
+
+    def test_keyset_search(self):
+        pb = SingletonPocketBase()
+
+        query = {"filter": "second_name = 'Goob'"}
+
+        # A record inserted during the search is neither skipped nor repeated
+        results = []
+        for record in pb.iter_search(test_collection_name, query, per_page=1, keyset=True):
+            if not results:
+                self.records.append(
+                    self.pb.collection(test_collection_name).create(
+                        {"first_name": "John", "second_name": "Goob"}
+                    )
+                )
+            results.append(record)
+        self.assertEqual(
+            sorted(record.id for record in results),
+            sorted(record.id for record in self.records),
+        )
+        self.assertEqual(results[-1].first_name, "John")
+
+        projected = pb.search(
+            test_collection_name, query, fields=["first_name"], keyset=True
+        )
+        self.assertEqual(len(projected), 3)
+        self.assertFalse(hasattr(projected[0], "second_name"))
+
+        with self.assertRaises(ValueError):
+            pb.search(test_collection_name, {"sort": "first_name"}, keyset=True)
+        with self.assertRaises(ValueError):
+            pb.search(test_collection_name, query, concurrency=2, keyset=True)
+
     def test_search_single_record(self):
         pb = SingletonPocketBase()
 
@@ -76,6 +158,49 @@ class TestSingletonPocketBase(unittest.TestCase):
         with self.assertRaises(ValueError):
             pb.search_single_record(test_collection_name, "second_name", "Goob")
 
+    def test_session(self):
+        pb = SingletonPocketBase()
+
+        with pb.session() as identity_map:
+            record = pb.search_single_record(
+                test_collection_name, "id", self.records[0].id
+            )
+            self.assertIs(
+                pb.search_single_record(test_collection_name, "id", record.id), record
+            )
+
+            # Updates replace the cached record
+            updated = pb.update(test_collection_name, record.id, {"first_name": "Dan"})
+            self.assertIs(
+                pb.search_single_record(test_collection_name, "id", record.id), updated
+            )
+            self.assertEqual(updated.first_name, "Dan")
+            self.assertIs(
+                identity_map.get(test_collection_name, "id", record.id), updated
+            )
+
+        # Outside of the session nothing is cached
+        self.assertIsNot(
+            pb.search_single_record(test_collection_name, "id", record.id), updated
+        )
+
+    def test_search_fields(self):
+        pb = SingletonPocketBase()
+
+        results = pb.search_multiple_records(
+            test_collection_name, "second_name", "Goob", fields=["id", "first_name"]
+        )
+        self.assertEqual(len(results), len(self.records))
+        for record in results:
+            self.assertTrue(hasattr(record, "first_name"))
+            self.assertFalse(hasattr(record, "second_name"))
+
+        record = pb.search_single_record(
+            test_collection_name, "first_name", "Danny", fields=["second_name"]
+        )
+        self.assertEqual(record.second_name, "Goob")
+        self.assertFalse(hasattr(record, "first_name"))
+
     def test_search_multiple_records(self):
         pb = SingletonPocketBase()
 
@@ -85,6 +210,74 @@ class TestSingletonPocketBase(unittest.TestCase):
 
         self.assertEqual(len(results), len(self.records))
 
+    def test_count(self):
+        pb = SingletonPocketBase()
+
+        self.assertEqual(pb.count(test_collection_name, "second_name = 'Goob'"), 2)
+        self.assertEqual(pb.count(test_collection_name, "first_name = 'Danny'"), 1)
+        self.assertEqual(
+            pb.count_many(
+                {
+                    "goobs": (test_collection_name, "second_name = 'Goob'"),
+                    "johns": (test_collection_name, "first_name = 'John'"),
+                }
+            ),
+            {"goobs": 2, "johns": 0},
+        )
+
+    def test_search_records_by_values(self):
+        pb = SingletonPocketBase()
+
+        results = pb.search_records_by_values(
+            test_collection_name, "first_name", ["Danny", "Becky", "John"]
+        )
+        self.assertEqual(
+            {name: record.id for name, record in results.items()},
+            {"Danny": self.records[0].id, "Becky": self.records[1].id},
+        )
+
+        with self.assertRaises(ValueError):
+            pb.search_records_by_values(test_collection_name, "second_name", ["Goob"])
+
+    def test_upsert(self):
+        pb = SingletonPocketBase()
+
+        # Unchanged, so only looked up
+        pb.count(test_collection_name)
+        request_metrics.reset()
+        with stage("upsert"):
+            record = pb.upsert(test_collection_name, "first_name", self.record_one)
+        self.assertEqual(record.id, self.records[0].id)
+        self.assertEqual(request_metrics.requests("upsert"), 1)
+        request_metrics.reset()
+
+        record = pb.upsert(
+            test_collection_name,
+            "first_name",
+            {"first_name": "Danny", "second_name": "Boog"},
+        )
+        self.assertEqual((record.id, record.second_name), (self.records[0].id, "Boog"))
+
+        record = pb.upsert(
+            test_collection_name,
+            "first_name",
+            {"first_name": "John", "second_name": "Boog"},
+            compare_fields=["second_name"],
+        )
+        self.records.append(record)
+        self.assertNotIn(record.id, [record.id for record in self.records[:2]])
+
+    def test_chunk_filters(self):
+        values = [f"name_{index}" for index in range(100)]
+        filters = SingletonPocketBase.chunk_filters("first_name", values, 500)
+
+        self.assertGreater(len(filters), 1)
+        self.assertTrue(all(len(quote(filter)) <= 500 for filter in filters))
+        self.assertEqual(
+            " || ".join(filters),
+            " || ".join(f"first_name = '{value}'" for value in values),
+        )
+
     def test_serialize_value(self):
         # Ints and floats should remain untouched
         self.assertEqual(1, SingletonPocketBase.serialize_value(1))
@@ -100,5 +293,158 @@ class TestSingletonPocketBase(unittest.TestCase):
         )
 
 
+class TestAsyncSingletonPocketBase(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests for the async Pocketbase class.
+    """
+
+    async def asyncSetUp(self) -> None:
+        self.pb = AsyncSingletonPocketBase()
+        self.records = [
+            await self.pb.create(test_collection_name, record)
+            for record in [
+                {"first_name": "Danny", "second_name": "Goob"},
+                {"first_name": "Becky", "second_name": "Goob"},
+            ]
+        ]
+
+    async def asyncTearDown(self) -> None:
+        for record in self.records:
+            await self.pb.delete(test_collection_name, record.id)
+        await self.pb.close()
+
+    def test_singleton_instance(self):
+        self.assertEqual(AsyncSingletonPocketBase(), AsyncSingletonPocketBase())
+
+    async def test_search(self):
+        query = {"filter": "second_name = 'Goob'"}
+
+        for concurrency in [None, 2]:
+            results = await self.pb.search(
+                test_collection_name, query, per_page=1, concurrency=concurrency
+            )
+            self.assertEqual(len(results), len(self.records))
+
+        results = await self.pb.search(
+            test_collection_name, query, per_page=1, keyset=True
+        )
+        self.assertEqual(
+            sorted(record.id for record in results),
+            sorted(record.id for record in self.records),
+        )
+
+    async def test_search_single_record(self):
+        empty_result = await self.pb.search_single_record(
+            test_collection_name, "first_name", "john"
+        )
+        self.assertEqual(empty_result, None)
+
+        valid_result = await self.pb.search_single_record(
+            test_collection_name, "first_name", "Danny"
+        )
+        self.assertEqual(valid_result.first_name, "Danny")
+
+        with self.assertRaises(ValueError):
+            await self.pb.search_single_record(
+                test_collection_name, "second_name", "Goob"
+            )
+
+    async def test_search_fields(self):
+        results = await self.pb.search_multiple_records(
+            test_collection_name, "second_name", "Goob", fields=["first_name"]
+        )
+        self.assertEqual(
+            sorted(record.first_name for record in results), ["Becky", "Danny"]
+        )
+        self.assertFalse(hasattr(results[0], "second_name"))
+
+    async def test_count(self):
+        self.assertEqual(
+            await self.pb.count(test_collection_name, "second_name = 'Goob'"), 2
+        )
+        self.assertEqual(
+            await self.pb.count_many(
+                {
+                    "goobs": (test_collection_name, "second_name = 'Goob'"),
+                    "johns": (test_collection_name, "first_name = 'John'"),
+                }
+            ),
+            {"goobs": 2, "johns": 0},
+        )
+
+    async def test_update(self):
+        record = await self.pb.update(
+            test_collection_name, self.records[0].id, {"first_name": "Daniel"}
+        )
+        self.assertEqual(record.first_name, "Daniel")
+
+    async def test_upsert_many(self):
+        created, updated, unchanged, failed = await self.pb.upsert_many(
+            test_collection_name,
+            "first_name",
+            [
+                {"first_name": "Danny", "second_name": "Boog"},
+                {"first_name": "Becky", "second_name": "Goob"},
+                {"first_name": "John", "second_name": "Goob"},
+            ],
+        )
+        self.records.extend(created)
+        self.assertEqual(failed, [])
+        self.assertEqual([record.first_name for record in created], ["John"])
+        self.assertEqual([record.id for record in updated], [self.records[0].id])
+        self.assertEqual([record.id for record in unchanged], [self.records[1].id])
+
+
+class TestAsyncSingletonPocketBaseLoops(unittest.TestCase):
+    """
+    Tests the async Pocketbase class across event loops.
+    """
+
+    def setUp(self) -> None:
+        self.pb = AsyncSingletonPocketBase()
+
+    async def count(self, close: bool = False) -> aiohttp.ClientSession:
+        await self.pb.count(test_collection_name)
+        session: aiohttp.ClientSession = self.pb.http_session
+        if close:
+            await self.pb.close()
+        return session
+
+    def test_new_event_loop(self):
+        loop = asyncio.new_event_loop()
+        with warnings.catch_warnings(record=True) as caught, self.assertNoLogs(
+            "asyncio"
+        ):
+            warnings.simplefilter("always")
+            try:
+                first = loop.run_until_complete(self.count())
+                # The first loop isn't running, it's run to close its session
+                second = asyncio.run(self.count(close=True))
+                self.assertIsNot(second, first)
+                self.assertTrue(first.closed)
+            finally:
+                loop.close()
+            del first, second
+            gc.collect()
+
+        self.assertFalse(
+            [warning for warning in caught if "nclosed" in str(warning.message)]
+        )
+
+    def test_closed_event_loop(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", ResourceWarning)
+            first = asyncio.run(self.count())
+            # A session can't be closed once its loop is, it's only replaced
+            with self.assertLogs("src.logger", "WARNING") as logs:
+                second = asyncio.run(self.count(close=True))
+            self.assertIsNot(second, first)
+            self.assertIn("closed event loop", logs.output[0])
+            # Which aiohttp reports once it's collected
+            with self.assertLogs("asyncio", "ERROR"):
+                del first
+                gc.collect()
+
+
 if __name__ == "__main__":
     unittest.main(failfast=True)
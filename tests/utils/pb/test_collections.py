@@ -16,7 +16,12 @@ from src.utils.pb.collections import (
     Compilation,
 )
 from src.utils.pb.typehints import *
-from src.utils.pb.helpers import TiktokCollectionInfo, VideosCollectionInfo
+from src.utils.pb.helpers import (
+    TiktokCollectionInfo,
+    MetadataCollectionInfo,
+    VideosCollectionInfo,
+    CompilationsCollectionInfo,
+)
 from src.utils.pb.classes import SingletonPocketBase
 from src.compilation.models import VideoCompilation
 
@@ -66,6 +71,141 @@ class TestTiktokCollection(unittest.TestCase):
         self.assertEqual(record.url, url)
         delete_tiktok_record(record)
 
+    def test_03_create_records(self):
+        """
+        Testing the TiktokCollection.create_records method.
+        """
+        url: str = (
+            f"https://www.tiktok.com/@test/video/{randint(1_000_000, 10_000_000)}"
+        )
+        rows: list[dict] = [
+            {"url": url, "origin": "channel", "query": "testing"},
+            # Invalid origin
+            {"url": f"{url}1", "origin": "nowhere", "query": "testing"},
+            # Duplicate URL
+            {"url": url, "origin": "channel", "query": "testing"},
+        ]
+
+        created, failed = TiktokCollection.create_records(rows)
+        try:
+            self.assertEqual([record.url for record in created], [url])
+            self.assertEqual([row for row, _ in failed], rows[1:])
+        finally:
+            for record in created:
+                delete_tiktok_record(record)
+
+    def test_05_upsert_records(self):
+        """
+        Testing the TiktokCollection.upsert_records method.
+        """
+        unchanged_record: TiktokCollectionRecord = create_tiktok_record()
+        rediscovered_record: TiktokCollectionRecord = create_tiktok_record()
+        changed_record: TiktokCollectionRecord = create_tiktok_record()
+        renamed_url: str = changed_record.url.replace("@test", "@renamed")
+        url: str = (
+            f"https://www.tiktok.com/@test/video/{randint(10_000_000, 20_000_000)}"
+        )
+        rows: list[dict] = [
+            {
+                "url": unchanged_record.url,
+                "origin": "channel",
+                "query": unchanged_record.query,
+            },
+            # Found again by another query, it stays the first query's video
+            {
+                "url": rediscovered_record.url,
+                "origin": "hashtag",
+                "query": "rediscovered",
+            },
+            # The same video, under a new URL
+            {"url": renamed_url, "origin": "hashtag", "query": "renamed"},
+            {"url": url, "origin": "channel", "query": "testing"},
+            # Invalid origin
+            {"url": f"{url}1", "origin": "nowhere", "query": "testing"},
+        ]
+
+        created, updated, unchanged, failed = TiktokCollection.upsert_records(rows)
+        try:
+            self.assertEqual([record.url for record in created], [url])
+            self.assertEqual([record.id for record in updated], [changed_record.id])
+            self.assertEqual(updated[0].url, renamed_url)
+            self.assertEqual(updated[0].query, changed_record.query)
+            self.assertEqual(updated[0].origin, changed_record.origin)
+            self.assertEqual(
+                [record.id for record in unchanged],
+                [unchanged_record.id, rediscovered_record.id],
+            )
+            rediscovered = TiktokCollection.validate_record(
+                "id", rediscovered_record.id, exists=True
+            )
+            self.assertEqual(rediscovered.query, rediscovered_record.query)
+            self.assertEqual(rediscovered.origin, rediscovered_record.origin)
+            self.assertEqual([row for row, _ in failed], rows[4:])
+
+            # Upserting again changes nothing
+            created_again, updated_again, unchanged, _ = (
+                TiktokCollection.upsert_records(rows[:4])
+            )
+            self.assertEqual((created_again, updated_again), ([], []))
+            self.assertEqual(len(unchanged), 4)
+        finally:
+            for record in [
+                unchanged_record,
+                rediscovered_record,
+                changed_record,
+                *created,
+            ]:
+                delete_tiktok_record(record)
+
+    def test_04_validate_records_many(self):
+        """
+        Testing the TiktokCollection.validate_records_many method.
+        """
+        records: list[TiktokCollectionRecord] = [
+            create_tiktok_record(),
+            create_tiktok_record(),
+        ]
+        video_ids: list[str] = [record.video_id for record in records]
+        try:
+            results = TiktokCollection.validate_records_many(
+                "video_id", video_ids + ["missing"]
+            )
+            self.assertEqual(
+                {value: record.id for value, record in results.items()},
+                {record.video_id: record.id for record in records},
+            )
+
+            TiktokCollection.validate_records_many("video_id", video_ids, exists=True)
+            with self.assertRaises(ValueError):
+                TiktokCollection.validate_records_many(
+                    "video_id", video_ids + ["missing"], exists=True
+                )
+        finally:
+            for record in records:
+                delete_tiktok_record(record)
+
+
+class TestAsyncTiktokCollection(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests the async variants of the TiktokCollection model.
+    """
+
+    async def test_01_async_create_and_validate_record(self):
+        url: str = (
+            f"https://www.tiktok.com/@test/video/{randint(1_000_000, 10_000_000)}"
+        )
+
+        record: TiktokCollectionRecord = await TiktokCollection.async_create_record(
+            url, "channel", "testing"
+        )
+        try:
+            self.assertEqual(record.url, url)
+            await TiktokCollection.async_validate_record("url", url, exists=True)
+            with self.assertRaises(ValueError):
+                await TiktokCollection.async_validate_record("url", url, exists=False)
+        finally:
+            delete_tiktok_record(record)
+
 
 class MetadataCollectionCollectionModel(unittest.TestCase):
     """
@@ -101,6 +241,31 @@ class MetadataCollectionCollectionModel(unittest.TestCase):
         delete_tiktok_record(tiktok_record)
         MetadataCollection.validate_record(tiktok_record.id, exists=False)
 
+    def test_04_validate_record_fields(self):
+        """
+        MetadataCollection.validate_record returns every field, unless asked for
+        fewer.
+        """
+        tiktok_record: TiktokCollectionRecord = create_tiktok_record()
+        metadata_record: MetadataCollectionRecord = create_metadata_record(
+            tiktok_record
+        )
+
+        try:
+            record = MetadataCollection.validate_record(tiktok_record.id, True)
+            self.assertEqual(record.everything, {})
+
+            record = MetadataCollection.validate_record(
+                tiktok_record.id,
+                True,
+                fields=list(MetadataCollectionInfo.DefaultFields),
+            )
+            self.assertEqual(record.views, metadata_record.views)
+            self.assertFalse(hasattr(record, "everything"))
+        finally:
+            delete_metadata_record(metadata_record)
+            delete_tiktok_record(tiktok_record)
+
     @typechecked
     def test_02_create_record(self):
         """
@@ -119,9 +284,114 @@ class MetadataCollectionCollectionModel(unittest.TestCase):
         self.assertEqual(metadata_record.likes, 1)
         self.assertEqual(metadata_record.views, 1)
 
+        delete_metadata_record(metadata_record)
+
+        # Passing the tiktok record means it doesn't need to be looked up
+        metadata_record = MetadataCollection.create_record(
+            tiktok_record.url, 2, 2, {}, tiktok_record=tiktok_record
+        )
+        self.assertEqual(metadata_record.tiktok, tiktok_record.id)
+        self.assertEqual(metadata_record.views, 2)
+
         delete_metadata_record(metadata_record)
         delete_tiktok_record(tiktok_record)
 
+    def test_03_create_records(self):
+        """
+        Testing the Metadata.create_records method
+        """
+        tiktok_records = [create_tiktok_record(), create_tiktok_record()]
+        rows: list[dict] = [
+            {
+                "tiktok_record_id": record.id,
+                "views": 1,
+                "likes": 2,
+                "everything": {},
+            }
+            for record in tiktok_records
+        ]
+
+        created, failed = MetadataCollection.create_records(rows)
+        try:
+            self.assertEqual(failed, [])
+            self.assertEqual(
+                [record.tiktok for record in created],
+                [record.id for record in tiktok_records],
+            )
+        finally:
+            for record in created:
+                delete_metadata_record(record)
+            for record in tiktok_records:
+                delete_tiktok_record(record)
+
+    def test_06_create_record_resolves_tiktok(self):
+        """
+        Within a session the created tiktok record is reused, and a deleted one is
+        never used.
+        """
+        url: str = (
+            f"https://www.tiktok.com/@test/video/{randint(1_000_000, 10_000_000)}"
+        )
+        with pb.session() as identity_map:
+            tiktok_record = TiktokCollection.create_record(url, "channel", "test")
+            hits: int = identity_map.hits
+            metadata_record = MetadataCollection.create_record(url, 1, 1, {})
+            self.assertEqual(metadata_record.tiktok, tiktok_record.id)
+            self.assertEqual(identity_map.hits, hits + 1)
+            delete_metadata_record(metadata_record)
+
+            delete_tiktok_record(tiktok_record)
+            with self.assertRaises(ValueError):
+                MetadataCollection.create_record(url, 1, 1, {})
+
+        with self.assertRaises(ValueError):
+            MetadataCollection.create_record(url, 1, 1, {})
+
+    def test_05_upsert_records(self):
+        """
+        Testing the Metadata.upsert_records method
+        """
+        tiktok_records = [create_tiktok_record(), create_tiktok_record()]
+        metadata_record: MetadataCollectionRecord = create_metadata_record(
+            tiktok_records[0]
+        )
+        rows: list[dict] = [
+            {
+                "tiktok_record_id": tiktok_records[0].id,
+                "views": metadata_record.views + 1,
+                "likes": metadata_record.likes,
+                "everything": {"refreshed": True},
+            },
+            {
+                "tiktok_record_id": tiktok_records[1].id,
+                "views": 1,
+                "likes": 2,
+                "everything": {},
+            },
+        ]
+
+        created, updated, unchanged, failed = MetadataCollection.upsert_records(rows)
+        try:
+            self.assertEqual(failed, [])
+            self.assertEqual(unchanged, [])
+            self.assertEqual([record.tiktok for record in created], [tiktok_records[1].id])
+            self.assertEqual([record.id for record in updated], [metadata_record.id])
+            self.assertEqual(updated[0].views, metadata_record.views + 1)
+            self.assertEqual(updated[0].everything, {"refreshed": True})
+
+            # Only the stats are compared
+            rows[1]["everything"] = {"refreshed": True}
+            created_again, updated_again, unchanged, _ = (
+                MetadataCollection.upsert_records(rows)
+            )
+            self.assertEqual((created_again, updated_again), ([], []))
+            self.assertEqual(len(unchanged), 2)
+        finally:
+            for record in [metadata_record, *created]:
+                delete_metadata_record(record)
+            for record in tiktok_records:
+                delete_tiktok_record(record)
+
 
 class VideoCollectionCollectionModel(unittest.TestCase):
     """
@@ -180,6 +450,25 @@ class VideoCollectionCollectionModel(unittest.TestCase):
         delete_video_record(video_record)
         delete_tiktok_record(tiktok_record)
 
+    def test_07_validate_records_many(self):
+        """
+        Testing VideoCollection.validate_records_many against a field of a relation.
+        """
+        video: Path = create_mock_video()
+        tiktok_record: TiktokCollectionRecord = create_tiktok_record()
+        video_record: VideoCollectionRecord = create_video_record(tiktok_record, video)
+
+        try:
+            results = VideoCollection.validate_records_many(
+                "tiktok.video_id", [int(tiktok_record.video_id), 1], exists=None
+            )
+            self.assertEqual(list(results.keys()), [int(tiktok_record.video_id)])
+            self.assertEqual(results[int(tiktok_record.video_id)].id, video_record.id)
+        finally:
+            delete_mock_video(video)
+            delete_video_record(video_record)
+            delete_tiktok_record(tiktok_record)
+
     def test_03_mark_video_as_deleted(self) -> None:
         """
         Testing the VideoaCollection.mark_video_as_deleted staticmethod
@@ -240,6 +529,49 @@ class VideoCollectionCollectionModel(unittest.TestCase):
         delete_video_record(video_record)
         delete_tiktok_record(tiktok_record)
 
+    def test_08_mark_videos(self) -> None:
+        """
+        Testing the VideoCollection.mark_videos staticmethod
+        """
+        tiktok_records: list[TiktokCollectionRecord] = [
+            create_tiktok_record(),
+            create_tiktok_record(),
+        ]
+        mock_videos: list[Path] = [
+            create_mock_video(getattr(record, TiktokCollectionInfo.Fields.VideoId))
+            for record in tiktok_records
+        ]
+        video_records: list[VideoCollectionRecord] = [
+            create_video_record(record, video)
+            for record, video in zip(tiktok_records, mock_videos)
+        ]
+
+        try:
+            results = VideoCollection.mark_videos(mock_videos, used=True, deleted=True)
+            self.assertEqual(
+                [result.id for result in results],
+                [record.id for record in video_records],
+            )
+            for result in results:
+                self.assertTrue(
+                    getattr(result, VideosCollectionInfo.Fields.UsedInCompilation)
+                )
+                self.assertTrue(getattr(result, VideosCollectionInfo.Fields.Deleted))
+
+            # Only the used state changes
+            results = VideoCollection.mark_videos(mock_videos[:1], used=False)
+            self.assertFalse(
+                getattr(results[0], VideosCollectionInfo.Fields.UsedInCompilation)
+            )
+            self.assertTrue(getattr(results[0], VideosCollectionInfo.Fields.Deleted))
+        finally:
+            for video, video_record, tiktok_record in zip(
+                mock_videos, video_records, tiktok_records
+            ):
+                delete_mock_video(video)
+                delete_video_record(video_record)
+                delete_tiktok_record(tiktok_record)
+
     def test_06_find_unsed_videos_by_query(self) -> None:
         """
         Testing the VideoaCollection.video_already_downloaded staticmethod
@@ -336,6 +668,38 @@ class CompilationCollectionModel(unittest.TestCase):
 
         Compilation.validate_record("Doesn't exist", exists=False)
 
+    def test_01_validate_records_many(self):
+        """
+        Test the Compilation.validate_records_many method.
+        """
+        mock_video: Path = create_mock_video()
+        compilation_video: Path = create_mock_video()
+        tiktok_record: TiktokCollectionRecord = create_tiktok_record()
+        video_record: VideoCollectionRecord = create_video_record(
+            tiktok_record, mock_video
+        )
+        compilation_record: CompilationRecord = create_compilation_record(
+            compilation_video, [video_record]
+        )
+
+        try:
+            records = Compilation.validate_records_many(
+                CompilationsCollectionInfo.Fields.Title,
+                [compilation_record.title, "Doesn't exist"],
+            )
+            self.assertEqual(list(records), [compilation_record.title])
+            with self.assertRaises(ValueError):
+                Compilation.validate_records_many(
+                    CompilationsCollectionInfo.Fields.VideoPath,
+                    [compilation_record.video_path],
+                )
+        finally:
+            delete_mock_video(mock_video)
+            delete_mock_video(compilation_video)
+            delete_video_record(video_record)
+            delete_tiktok_record(tiktok_record)
+            delete_compilation_record(compilation_record)
+
     def test_02_create_record(self):
         """
         Tests the Compilation.create_record static method.
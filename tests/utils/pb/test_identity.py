@@ -0,0 +1,154 @@
+"""
+Tests for the identity map.
+"""
+import asyncio
+import unittest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pocketbase.models import Record
+
+from src.utils.pb.identity import (
+    IdentityMap,
+    bind_session,
+    session,
+    current_identity_map,
+)
+
+
+class TestIdentityMap(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tiktok = Record(
+            {
+                "id": "tiktok_id",
+                "url": "https://www.tiktok.com/@test/video/123",
+                "origin": "channel",
+                "query": "test",
+                "video_id": "123",
+            }
+        )
+        self.video = self.video_record("a.mp4")
+
+        self.identity_map = IdentityMap()
+        self.identity_map.add("tiktok", self.tiktok)
+        self.identity_map.add("videos", self.video)
+
+    @staticmethod
+    def video_record(path: str) -> Record:
+        return Record(
+            {
+                "id": "video_id",
+                "tiktok": "tiktok_id",
+                "path": path,
+                "deleted": False,
+                "used": False,
+            }
+        )
+
+    def test_get(self):
+        for field, value in [
+            ("id", "tiktok_id"),
+            ("url", "https://www.tiktok.com/@test/video/123"),
+            ("video_id", "123"),
+            # Values are compared as str
+            ("video_id", 123),
+        ]:
+            self.assertIs(self.identity_map.get("tiktok", field, value), self.tiktok)
+
+        # Not a unique field
+        self.assertIsNone(self.identity_map.get("tiktok", "origin", "channel"))
+        self.assertIsNone(self.identity_map.get("tiktok", "video_id", "456"))
+
+    def test_get_by_relation(self):
+        self.assertIs(
+            self.identity_map.get("videos", "tiktok.video_id", "123"), self.video
+        )
+        self.assertIsNone(self.identity_map.get("videos", "tiktok.video_id", "456"))
+
+    def test_discard(self):
+        self.identity_map.discard("tiktok", "tiktok_id")
+
+        self.assertIsNone(self.identity_map.get("tiktok", "id", "tiktok_id"))
+        self.assertIsNone(self.identity_map.get("tiktok", "video_id", "123"))
+        self.assertEqual(len(self.identity_map), 1)
+
+    def test_add_replaces_record(self):
+        updated = self.video_record("b.mp4")
+        self.identity_map.add("videos", updated)
+
+        self.assertIsNone(self.identity_map.get("videos", "path", "a.mp4"))
+        self.assertIs(self.identity_map.get("videos", "path", "b.mp4"), updated)
+
+    def test_add_skips_projected_record(self):
+        identity_map = IdentityMap()
+        identity_map.add("tiktok", Record({"id": "tiktok_id", "url": self.tiktok.url}))
+
+        self.assertEqual(len(identity_map), 0)
+        self.assertIsNone(identity_map.get("tiktok", "url", self.tiktok.url))
+
+    def test_session(self):
+        self.assertIsNone(current_identity_map())
+
+        with session() as outer:
+            with session() as inner:
+                self.assertIs(inner, outer)
+            self.assertIs(current_identity_map(), outer)
+
+        self.assertIsNone(current_identity_map())
+
+    def test_session_is_not_shared_with_other_threads(self):
+        opened = threading.Event()
+        checked = threading.Event()
+        seen: list = []
+
+        def other_job() -> None:
+            opened.wait()
+            # Another thread, without a session of its own
+            seen.append(current_identity_map())
+            with session() as identity_map:
+                seen.append(identity_map)
+            checked.set()
+
+        thread = threading.Thread(target=other_job)
+        thread.start()
+        with session() as identity_map:
+            identity_map.add("tiktok", self.tiktok)
+            opened.set()
+            checked.wait()
+            # The other thread's session didn't replace (or close) this one
+            self.assertIs(current_identity_map(), identity_map)
+        thread.join()
+
+        self.assertIsNone(seen[0])
+        self.assertIsNot(seen[1], identity_map)
+        self.assertEqual(len(seen[1]), 0)
+
+    def test_bind_session(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with session() as identity_map:
+                self.assertIs(
+                    executor.submit(bind_session(current_identity_map)).result(),
+                    identity_map,
+                )
+                self.assertIsNone(executor.submit(current_identity_map).result())
+            # Bound after the session closed
+            self.assertIsNone(
+                executor.submit(bind_session(current_identity_map)).result()
+            )
+
+    def test_session_is_inherited_by_tasks(self):
+        async def job() -> tuple:
+            with session() as identity_map:
+                inherited = await asyncio.create_task(self.current())
+            return identity_map, inherited
+
+        identity_map, inherited = asyncio.run(job())
+        self.assertIs(inherited, identity_map)
+
+    @staticmethod
+    async def current():
+        return current_identity_map()
+
+
+if __name__ == "__main__":
+    unittest.main(failfast=True)
@@ -0,0 +1,129 @@
+"""
+Tests for the request metrics.
+"""
+import json
+import asyncio
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pocketbase.utils import ClientResponseError
+
+from . import test_collection_name
+
+from src.utils.pb.classes import SingletonPocketBase, AsyncSingletonPocketBase
+from src.utils.pb.metrics import (
+    UNATTRIBUTED_STAGE,
+    classify_request,
+    current_stage,
+    request_metrics,
+    stage,
+)
+
+pb = SingletonPocketBase()
+async_pb = AsyncSingletonPocketBase()
+
+
+class TestClassifyRequest(unittest.TestCase):
+    def test_records(self):
+        path: str = "/api/collections/tiktok/records"
+        self.assertEqual(classify_request("GET", path), ("tiktok", "list"))
+        self.assertEqual(classify_request("POST", path), ("tiktok", "create"))
+        self.assertEqual(classify_request("GET", f"{path}/abc"), ("tiktok", "view"))
+        self.assertEqual(classify_request("PATCH", f"{path}/abc"), ("tiktok", "update"))
+        self.assertEqual(classify_request("DELETE", f"{path}/abc"), ("tiktok", "delete"))
+
+    def test_other(self):
+        self.assertEqual(
+            classify_request("POST", "/api/admins/auth-with-password"),
+            ("_admins", "auth-with-password"),
+        )
+        self.assertEqual(classify_request("POST", "/api/realtime"), ("_realtime", "post"))
+        self.assertEqual(
+            classify_request("PATCH", "/api/collections/tiktok"),
+            ("tiktok", "collection_patch"),
+        )
+
+
+class TestRequestMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        # Authenticated, so the login isn't measured by the tests
+        pb.count(test_collection_name)
+        request_metrics.reset()
+
+    def tearDown(self) -> None:
+        for record in pb.search(test_collection_name, {}):
+            pb.delete(test_collection_name, record.id)
+        request_metrics.reset()
+
+    def test_stage(self):
+        self.assertEqual(current_stage(), UNATTRIBUTED_STAGE)
+        with stage("download"):
+            with stage("compilation"):
+                self.assertEqual(current_stage(), "compilation")
+            self.assertEqual(current_stage(), "download")
+        self.assertEqual(current_stage(), UNATTRIBUTED_STAGE)
+
+    def test_requests(self):
+        with stage("test"):
+            record = pb.create(test_collection_name, {"first_name": "Danny"})
+            pb.update(test_collection_name, record.id, {"first_name": "Dan"})
+            pb.search(test_collection_name, {})
+        pb.delete(test_collection_name, record.id)
+
+        snapshot: dict = request_metrics.snapshot()
+        operations: dict = snapshot["test"][test_collection_name]
+        self.assertEqual(
+            {name: measured["requests"] for name, measured in operations.items()},
+            {"create": 1, "update": 1, "list": 1},
+        )
+        self.assertGreater(operations["create"]["bytes_sent"], 0)
+        self.assertGreater(operations["list"]["bytes_received"], 0)
+        self.assertEqual(sum(operations["list"]["histogram"].values()), 1)
+        self.assertEqual(
+            snapshot[UNATTRIBUTED_STAGE][test_collection_name]["delete"]["requests"], 1
+        )
+        self.assertEqual(request_metrics.requests("test"), 3)
+        self.assertEqual(request_metrics.requests(), 4)
+
+    def test_worker_threads(self):
+        # The inserts happen on worker threads
+        with stage("bulk"):
+            pb.create_many(
+                test_collection_name,
+                [{"first_name": "Danny"}, {"first_name": "Becky"}],
+            )
+        self.assertEqual(request_metrics.requests("bulk"), 2)
+
+    def test_async(self):
+        async def create() -> None:
+            with stage("async"):
+                await async_pb.create(test_collection_name, {"first_name": "Danny"})
+                with self.assertRaises(ClientResponseError):
+                    await async_pb.update(
+                        test_collection_name, "missingrecordid", {"first_name": "Dan"}
+                    )
+            await async_pb.close()
+
+        asyncio.run(create())
+        operations: dict = request_metrics.snapshot()["async"][test_collection_name]
+        self.assertEqual(operations["create"]["requests"], 1)
+        self.assertEqual(operations["update"]["errors"], 1)
+
+    def test_dump(self):
+        with stage("test"):
+            pb.count(test_collection_name)
+
+        with TemporaryDirectory() as directory:
+            path: Path = Path(directory).joinpath("metrics.json")
+            request_metrics.dump(path)
+            self.assertEqual(
+                json.loads(path.read_text())["test"][test_collection_name]["list"][
+                    "requests"
+                ],
+                1,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main(failfast=True)
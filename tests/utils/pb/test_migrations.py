@@ -0,0 +1,115 @@
+"""
+Tests for the schema migrations. They run against a stand-in PocketBase whose schema
+has the original indexes, so the test PocketBase isn't migrated.
+"""
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pocketbase.utils import ClientResponseError
+
+from src.utils.pb.auth import AdminPocketBase
+from src.utils.pb.standin import DEFAULT_SCHEMA, PocketBaseStandIn
+from src.utils.pb.migrations import (
+    SCHEMA_VERSION,
+    Index,
+    check_indexes,
+    collection_indexes,
+    migrate,
+    missing_indexes,
+    parse_index,
+    schema_version,
+)
+
+# The indexes pb_schema.json was first exported with
+ORIGINAL_INDEXES: dict[str, list[str]] = {
+    "tiktok": ["CREATE UNIQUE INDEX `idx_tG6q90M` ON `tiktok` (`url`)"],
+    "compilations": ["CREATE INDEX `idx_ics3Jeb` ON `compilations` (`title`)"],
+}
+
+
+class TestIndex(unittest.TestCase):
+    def test_parse_index(self):
+        self.assertEqual(
+            parse_index("CREATE UNIQUE INDEX `idx_tG6q90M` ON `tiktok` (`url`)"),
+            Index("tiktok", ("url",), unique=True),
+        )
+        self.assertEqual(
+            parse_index("create index idx_a on videos (used, deleted)"),
+            Index("videos", ("used", "deleted")),
+        )
+        self.assertIsNone(parse_index("not an index"))
+
+        index = Index("tiktok", ("query",))
+        self.assertEqual(parse_index(index.sql), index)
+
+    def test_is_satisfied_by(self):
+        index = Index("tiktok", ("query",))
+        self.assertTrue(index.is_satisfied_by(Index("tiktok", ("query",), True)))
+        self.assertFalse(
+            Index("tiktok", ("query",), True).is_satisfied_by(index)
+        )
+        self.assertFalse(index.is_satisfied_by(Index("tiktok", ("url",))))
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        schema: list[dict] = json.loads(DEFAULT_SCHEMA.read_text())
+        for collection in schema:
+            if collection["name"] in ORIGINAL_INDEXES:
+                collection["indexes"] = ORIGINAL_INDEXES[collection["name"]]
+        schema_path: Path = Path(self.directory.name).joinpath("schema.json")
+        schema_path.write_text(json.dumps(schema))
+
+        self.server = PocketBaseStandIn(schema_path).start()
+        self.client = AdminPocketBase(
+            self.server.url,
+            self.server.admin_email,
+            self.server.admin_password,
+            Path(self.directory.name).joinpath("token.json"),
+        )
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.stop()
+        self.directory.cleanup()
+
+    def test_migrate(self):
+        self.assertEqual(schema_version(self.client), 1)
+        self.assertEqual(len(missing_indexes(self.client)), 3)
+        self.assertFalse(check_indexes(self.client))
+
+        # A dry run doesn't change anything
+        self.assertEqual(len(migrate(self.client, dry_run=True)), 3)
+        self.assertEqual(schema_version(self.client), 1)
+
+        self.assertEqual(len(migrate(self.client)), 3)
+        self.assertEqual(schema_version(self.client), SCHEMA_VERSION)
+        self.assertEqual(missing_indexes(self.client), [])
+        self.assertEqual(migrate(self.client), [])
+
+        # The unique index replaced the non-unique one
+        self.assertEqual(
+            collection_indexes(self.client, "compilations"),
+            [Index("compilations", ("title",), True).sql],
+        )
+        self.assertIn(
+            ORIGINAL_INDEXES["tiktok"][0], collection_indexes(self.client, "tiktok")
+        )
+
+    def test_duplicates(self):
+        for _ in range(2):
+            self.client.collection("compilations").create({"title": "Duplicate"})
+
+        with self.assertRaises(ClientResponseError):
+            migrate(self.client)
+        self.assertEqual(
+            collection_indexes(self.client, "compilations"),
+            ORIGINAL_INDEXES["compilations"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(failfast=True)
@@ -0,0 +1,111 @@
+"""
+Tests for the local SQLite mirror.
+"""
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from . import (
+    create_compilation_record,
+    create_metadata_record,
+    create_mock_video,
+    create_tiktok_record,
+    create_video_record,
+    delete_compilation_record,
+    delete_metadata_record,
+    delete_mock_video,
+    delete_tiktok_record,
+    delete_video_record,
+)
+
+from src.utils.pb.classes import SingletonPocketBase
+from src.utils.pb.mirror import Mirror
+from src.utils.pb.rows import MetadataRow
+
+pb = SingletonPocketBase()
+
+
+class TestMirror(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.mirror = Mirror(Path(self.directory.name).joinpath("mirror.sqlite3"))
+
+        self.tiktoks = [create_tiktok_record(), create_tiktok_record()]
+        self.channel: str = self.tiktoks[0].query
+        self.tiktoks[1] = pb.update(
+            "tiktok", self.tiktoks[1].id, {"query": self.channel}
+        )
+        self.metadata = [create_metadata_record(record) for record in self.tiktoks]
+        self.paths = [create_mock_video(), create_mock_video()]
+        self.videos = [
+            create_video_record(record, path)
+            for record, path in zip(self.tiktoks, self.paths)
+        ]
+        self.videos[1] = pb.update("videos", self.videos[1].id, {"used": True})
+        self.compilation = create_compilation_record(
+            self.paths[1], [self.videos[1]], {"duration": 10}
+        )
+
+    def tearDown(self) -> None:
+        self.mirror.close()
+        self.directory.cleanup()
+
+        delete_compilation_record(self.compilation)
+        for video in self.videos:
+            delete_video_record(video)
+        for path in self.paths:
+            delete_mock_video(path)
+        for record in self.metadata:
+            delete_metadata_record(record)
+        for record in self.tiktoks:
+            delete_tiktok_record(record)
+
+    def test_sync(self):
+        fetched: dict[str, int] = self.mirror.sync(per_page=2)
+        self.assertEqual(set(fetched), {"tiktok", "metadata", "videos", "compilations"})
+        self.assertGreaterEqual(fetched["tiktok"], 2)
+        self.assertEqual(self.mirror.count("tiktok"), pb.count("tiktok"))
+        self.assertIsNotNone(self.mirror.last_synced("tiktok"))
+
+        # Nothing changed since
+        self.assertEqual(set(self.mirror.sync().values()), {0})
+
+        # Only the updated record is fetched
+        record = pb.update("metadata", self.metadata[0].id, {"views": 1})
+        self.assertEqual(self.mirror.sync(["metadata"]), {"metadata": 1})
+        self.assertEqual(self.mirror.cursor("metadata")[1], record.id)
+
+        # Deleted records are pruned
+        delete_video_record(self.videos.pop())
+        self.assertEqual(self.mirror.prune(["videos"]), {"videos": 1})
+
+    def test_queries(self):
+        self.mirror.sync()
+        most_viewed = self.mirror.most_viewed_tiktoks_from_channel(self.channel, 2)
+        expected = sorted(
+            zip(self.metadata, self.tiktoks), key=lambda pair: -pair[0].views
+        )
+        self.assertEqual(
+            [row.id for row in most_viewed], [tiktok.id for _, tiktok in expected]
+        )
+        with self.assertRaises(ValueError):
+            self.mirror.most_viewed_tiktoks_from_channel(self.channel, 0)
+
+        unused = self.mirror.find_unused_videos_by_query(self.channel)
+        self.assertEqual([row.id for row in unused], [self.videos[0].id])
+        self.assertIs(unused[0].used, False)
+
+        records = self.mirror.all_records_of_channel(self.channel)
+        self.assertEqual(
+            {name: len(rows) for name, rows in records.items()},
+            {"tiktoks": 2, "metadata": 2, "videos": 2, "compilations": 1},
+        )
+        compilation = records["compilations"][0]
+        self.assertEqual(compilation.used_videos, [self.videos[1].id])
+        self.assertEqual(compilation.metadata, {"duration": 10})
+        self.assertIsInstance(records["metadata"][0], MetadataRow)
+        self.assertEqual(records["metadata"][0].everything, {})
+
+
+if __name__ == "__main__":
+    unittest.main(failfast=True)
@@ -5,6 +5,9 @@ from uuid import uuid4
 from src.utils.pb.queries import (
     most_viewed_tiktoks_from_channel,
     all_pb_records_of_channel,
+    number_of_records_of_channel,
+    number_of_pb_records_of_channel,
+    number_of_videos_of_query,
 )
 from src.utils.pb.classes import SingletonPocketBase
 from src.utils.pb.collections import CollectionNames
@@ -73,6 +76,14 @@ class TestPocketbaseQueries(unittest.TestCase):
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0].id, self.tiktok_record_two.id)
 
+        result = most_viewed_tiktoks_from_channel(self.channel_name, 2, ["id", "url"])
+        self.assertEqual(
+            [record.id for record in result],
+            [self.tiktok_record_two.id, self.tiktok_record_one.id],
+        )
+        self.assertEqual(result[1].url, self.tiktok_record_one.url)
+        self.assertFalse(hasattr(result[0], "query"))
+
     def test_all_pb_records_of_channel(self):
         result = all_pb_records_of_channel(self.channel_name)
         self.assertEqual(len(result["tiktoks"]), 2)
@@ -80,6 +91,19 @@ class TestPocketbaseQueries(unittest.TestCase):
         self.assertEqual(len(result["videos"]), 0)
         self.assertEqual(len(result["compilations"]), 0)
 
+    def test_number_of_records_of_channel(self):
+        self.assertEqual(number_of_records_of_channel(self.channel_name), 2)
+        self.assertEqual(
+            number_of_pb_records_of_channel(self.channel_name),
+            {"tiktoks": 2, "metadata": 2, "videos": 0},
+        )
+
+    def test_number_of_videos_of_query(self):
+        self.assertEqual(
+            number_of_videos_of_query(self.channel_name),
+            {"total": 0, "used": 0, "unused": 0, "deleted": 0},
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
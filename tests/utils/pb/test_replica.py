@@ -0,0 +1,152 @@
+"""
+Tests for the realtime replica.
+"""
+import time
+import unittest
+
+from pocketbase.models import Record
+
+from . import test_collection_name
+
+from src.utils.pb.classes import SingletonPocketBase
+from src.utils.pb.replica import CollectionReplica, current_replica
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    """
+    Waits for a (realtime) change to arrive.
+    """
+    deadline: float = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+
+class TestCollectionReplica(unittest.TestCase):
+    def setUp(self) -> None:
+        self.replica = CollectionReplica(
+            "tiktok",
+            [
+                Record({"id": "one", "origin": "channel", "updated": "2023-01-02"}),
+                Record({"id": "two", "origin": "channel", "updated": "2023-01-02"}),
+            ],
+        )
+
+    def test_find(self):
+        self.assertEqual(len(self.replica.find("origin", "channel")), 2)
+        self.assertEqual(self.replica.find("origin", "hashtag"), [])
+        self.assertEqual(self.replica.find("id", "one")[0].id, "one")
+
+        # Fields of a relation can't be served
+        self.assertIsNone(self.replica.find("tiktok.video_id", "123"))
+
+    def test_apply(self):
+        self.replica.find("origin", "channel")
+
+        self.replica.apply(
+            "update", Record({"id": "one", "origin": "hashtag", "updated": "2023-01-03"})
+        )
+        self.assertEqual([record.id for record in self.replica.find("origin", "hashtag")], ["one"])
+
+        # Older changes are ignored
+        self.replica.apply(
+            "update", Record({"id": "one", "origin": "trending", "updated": "2023-01-01"})
+        )
+        self.assertEqual(self.replica.find("origin", "trending"), [])
+
+        self.replica.apply("delete", Record({"id": "two"}))
+        self.assertEqual(self.replica.find("origin", "channel"), [])
+        self.assertEqual(len(self.replica), 1)
+
+
+class TestReplica(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pb = SingletonPocketBase()
+        self.record = self.pb.create(
+            test_collection_name, {"first_name": "Danny", "second_name": "Goob"}
+        )
+        self.replica = self.pb.start_replica([test_collection_name])
+
+    def tearDown(self) -> None:
+        self.pb.stop_replica()
+        for record in self.pb.search(test_collection_name, {}):
+            self.pb.delete(test_collection_name, record.id)
+
+    def test_reads(self):
+        self.assertIs(current_replica(), self.replica)
+
+        record = self.pb.search_single_record(test_collection_name, "first_name", "Danny")
+        self.assertEqual(record.id, self.record.id)
+        self.assertEqual(self.replica.hits, 1)
+
+        projected = self.pb.search_multiple_records(
+            test_collection_name, "second_name", "Goob", fields=["first_name"]
+        )
+        self.assertEqual(projected[0].first_name, "Danny")
+        self.assertFalse(hasattr(projected[0], "second_name"))
+
+        self.assertEqual(
+            list(
+                self.pb.search_records_by_values(
+                    test_collection_name, "first_name", ["Danny", "John"]
+                )
+            ),
+            ["Danny"],
+        )
+        self.assertEqual(self.replica.hits, 4)
+
+    def test_own_writes(self):
+        record = self.pb.create(
+            test_collection_name, {"first_name": "Becky", "second_name": "Goob"}
+        )
+        self.assertEqual(
+            self.pb.search_single_record(test_collection_name, "id", record.id).id,
+            record.id,
+        )
+
+        self.pb.delete(test_collection_name, record.id)
+        self.assertIsNone(
+            self.pb.search_single_record(test_collection_name, "first_name", "Becky")
+        )
+
+    def test_realtime_changes(self):
+        # Written with another client, so only the realtime change updates the replica
+        other = self.pb.instance.collection(test_collection_name)
+
+        created = other.create({"first_name": "Becky", "second_name": "Goob"})
+        self.assertTrue(
+            wait_for(lambda: self.replica.find(test_collection_name, "id", created.id))
+        )
+
+        other.update(self.record.id, {"first_name": "Dan"})
+        self.assertTrue(
+            wait_for(
+                lambda: self.replica.find(test_collection_name, "first_name", "Dan")
+            )
+        )
+
+        other.delete(created.id)
+        self.assertTrue(
+            wait_for(
+                lambda: self.replica.find(test_collection_name, "id", created.id) == []
+            )
+        )
+
+    def test_staleness(self):
+        self.assertTrue(self.replica.is_fresh())
+
+        self.pb.stop_replica()
+        self.assertFalse(self.replica.is_fresh())
+        self.assertIsNone(self.replica.find(test_collection_name, "first_name", "Danny"))
+
+        # Reads go to PocketBase again
+        self.assertEqual(
+            self.pb.search_single_record(test_collection_name, "first_name", "Danny").id,
+            self.record.id,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(failfast=True)
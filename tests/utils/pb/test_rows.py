@@ -0,0 +1,105 @@
+"""
+Tests for the compact rows.
+"""
+import asyncio
+import unittest
+
+from . import (
+    create_metadata_record,
+    create_tiktok_record,
+    delete_metadata_record,
+    delete_tiktok_record,
+)
+
+from src.utils.pb.classes import SingletonPocketBase, AsyncSingletonPocketBase
+from src.utils.pb.helpers import TiktokCollectionInfo
+from src.utils.pb.rows import MetadataRow, TiktokRow, VideoRow
+
+pb = SingletonPocketBase()
+
+
+class TestRow(unittest.TestCase):
+    def test_fields(self):
+        self.assertEqual(
+            TiktokRow.fields(),
+            ["id", "url", "origin", "query", "video_id", "created", "updated"],
+        )
+        self.assertEqual(MetadataRow.LazyFields, ("everything",))
+        self.assertIn("everything", MetadataRow.fields())
+        self.assertEqual(VideoRow.CollectionName, "videos")
+
+    def test_from_item(self):
+        row = MetadataRow.from_item(
+            {
+                "id": "abc",
+                "tiktok": "def",
+                "views": 10,
+                "likes": 2,
+                "everything": {"stats": {"playCount": 10}},
+                "collectionName": "metadata",
+            }
+        )
+        self.assertFalse(hasattr(row, "__dict__"))
+        self.assertEqual(
+            (row.id, row.tiktok, row.views, row.created), ("abc", "def", 10, None)
+        )
+        # A decoded value isn't encoded again
+        self.assertEqual(row._everything, {"stats": {"playCount": 10}})
+        self.assertEqual(row.everything, {"stats": {"playCount": 10}})
+        # An encoded one (i.e. from the mirror) is kept encoded until it's accessed
+        row = MetadataRow.from_item({"id": "abc", "everything": b'{"stats":{}}'})
+        self.assertIsInstance(row._everything, bytes)
+        self.assertEqual(row.everything, {"stats": {}})
+        self.assertEqual(row.as_dict()["everything"], {"stats": {}})
+        self.assertIsNone(MetadataRow.from_item({"id": "abc"}).everything)
+
+        with self.assertRaises(AttributeError):
+            row.title = "Not a field"
+
+
+class TestSearchRows(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tiktok_records = [create_tiktok_record(), create_tiktok_record()]
+        self.metadata_record = create_metadata_record(self.tiktok_records[0])
+
+    def tearDown(self) -> None:
+        delete_metadata_record(self.metadata_record)
+        for record in self.tiktok_records:
+            delete_tiktok_record(record)
+
+    def test_search_rows(self):
+        ids: list[str] = [record.id for record in self.tiktok_records]
+        query = {"filter": " || ".join(f"id = '{id}'" for id in ids)}
+
+        rows = pb.search_rows(TiktokRow, query, per_page=1)
+        self.assertEqual(sorted(row.id for row in rows), sorted(ids))
+        urls = {record.id: record.url for record in self.tiktok_records}
+        for row in rows:
+            self.assertEqual(
+                getattr(row, TiktokCollectionInfo.Fields.URL), urls[row.id]
+            )
+            self.assertIsInstance(row.created, str)
+
+        rows = pb.search_rows(TiktokRow, query, fields=["id", "url"])
+        self.assertEqual(rows[0].video_id, None)
+
+        metadata = pb.search_rows(MetadataRow, {"filter": f"tiktok = '{ids[0]}'"})
+        self.assertEqual([row.tiktok for row in metadata], [ids[0]])
+        self.assertEqual(metadata[0].everything, {})
+
+    def test_async_search_rows(self):
+        async def search() -> list:
+            async_pb = AsyncSingletonPocketBase()
+            try:
+                return await async_pb.search_rows(
+                    TiktokRow, {"filter": f"id = '{self.tiktok_records[0].id}'"}
+                )
+            finally:
+                await async_pb.close()
+
+        rows = asyncio.run(search())
+        self.assertEqual([row.url for row in rows], [self.tiktok_records[0].url])
+
+
+if __name__ == "__main__":
+    unittest.main(failfast=True)
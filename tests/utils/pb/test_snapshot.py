@@ -0,0 +1,100 @@
+"""
+Tests for the snapshot export and import.
+"""
+import gzip
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from . import (
+    create_metadata_record,
+    create_tiktok_record,
+    delete_metadata_record,
+    delete_tiktok_record,
+)
+
+from src.utils.pb.classes import SingletonPocketBase
+from src.utils.pb.snapshot import (
+    export_snapshot,
+    import_snapshot,
+    read_snapshot,
+    snapshot_cursors,
+)
+
+pb = SingletonPocketBase()
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.path = Path(self.directory.name).joinpath("snapshot.jsonl.gz")
+
+        self.tiktok = create_tiktok_record()
+        self.metadata = create_metadata_record(self.tiktok)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        # The imports restore the records with their ids
+        delete_metadata_record(self.metadata)
+        delete_tiktok_record(self.tiktok)
+
+    def test_export_import(self):
+        report = export_snapshot(self.path, per_page=1)
+        self.assertEqual(report.records["tiktok"], pb.count("tiktok"))
+        self.assertEqual(
+            set(report.records), {"tiktok", "metadata", "videos", "compilations"}
+        )
+        self.assertGreater(report.rows_per_second, 0)
+
+        lines = list(read_snapshot(self.path))
+        records = {line["record"]["id"]: line for line in lines if "record" in line}
+        self.assertEqual(records[self.metadata.id]["record"]["tiktok"], self.tiktok.id)
+        self.assertIn("cursors", lines[-1])
+
+        # Restored with their ids, relations before the records pointing to them
+        delete_metadata_record(self.metadata)
+        delete_tiktok_record(self.tiktok)
+        report = import_snapshot(self.path, batch_size=1)
+        self.assertEqual(report.failed, [])
+        self.assertEqual(pb.count("tiktok", f"id = '{self.tiktok.id}'"), 1)
+        metadata = pb.search_single_record("metadata", "id", self.metadata.id)
+        self.assertEqual(metadata.tiktok, self.tiktok.id)
+        self.assertEqual(metadata.everything, self.metadata.everything)
+
+    def test_incremental(self):
+        export_snapshot(self.path)
+        since = self.path.with_name("since.jsonl.gz")
+        self.assertEqual(
+            set(export_snapshot(since, since=self.path).records.values()), {0}
+        )
+
+        record = pb.update("metadata", self.metadata.id, {"views": 1})
+        incremental = self.path.with_name("incremental.jsonl.gz")
+        report = export_snapshot(incremental, since=self.path)
+        self.assertEqual(report.records["metadata"], 1)
+        self.assertEqual(report.records["tiktok"], 0)
+        self.assertEqual(snapshot_cursors(incremental)["metadata"][1], record.id)
+        # Collections without changes keep the cursor of the earlier snapshot
+        self.assertEqual(
+            snapshot_cursors(incremental)["tiktok"],
+            snapshot_cursors(self.path)["tiktok"],
+        )
+
+        # The record is already up to date
+        self.assertEqual(import_snapshot(incremental).records, {"metadata": 1})
+        self.assertEqual(pb.search_single_record("metadata", "id", record.id).views, 1)
+
+    def test_incomplete(self):
+        with gzip.open(self.path, "wt") as file:
+            file.write('{"snapshot": 1}\n')
+        with self.assertRaises(ValueError):
+            snapshot_cursors(self.path)
+
+        with gzip.open(self.path, "wt") as file:
+            file.write('{"version": 0}\n')
+        with self.assertRaises(ValueError):
+            import_snapshot(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main(failfast=True)
@@ -0,0 +1,124 @@
+"""
+Tests for the in-memory PocketBase stand-in.
+"""
+import time
+import unittest
+
+from pocketbase import PocketBase
+from pocketbase.utils import ClientResponseError
+
+from src.utils.pb.standin import PocketBaseStandIn
+
+
+class TestPocketBaseStandIn(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = PocketBaseStandIn().start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.stop()
+
+    def setUp(self) -> None:
+        self.client = PocketBase(self.server.url)
+        self.client.admins.auth_with_password(
+            self.server.admin_email, self.server.admin_password
+        )
+        self.tiktok = self.client.collection("tiktok")
+        self.records = [
+            self.tiktok.create(
+                {
+                    "url": f"https://www.tiktok.com/@test/video/{video_id}",
+                    "origin": "channel",
+                    "query": "test",
+                    "video_id": str(video_id),
+                }
+            )
+            for video_id in (3, 1, 2)
+        ]
+
+    def tearDown(self) -> None:
+        for record in self.tiktok.get_full_list():
+            self.tiktok.delete(record.id)
+        self.server.latency = 0
+
+    def test_authorization(self):
+        with self.assertRaises(ClientResponseError) as error:
+            PocketBase(self.server.url).collection("tiktok").get_list(1, 1)
+        self.assertEqual(error.exception.status, 401)
+
+        with self.assertRaises(ClientResponseError) as error:
+            PocketBase(self.server.url).admins.auth_with_password(
+                self.server.admin_email, "wrong"
+            )
+        self.assertEqual(error.exception.status, 400)
+
+    def test_filter(self):
+        result = self.tiktok.get_list(
+            1, 10, {"filter": "video_id = '1' || (video_id > '2' && origin = 'channel')"}
+        )
+        self.assertEqual(sorted(record.video_id for record in result.items), ["1", "3"])
+
+        result = self.tiktok.get_list(1, 10, {"filter": "url ~ 'video/2'"})
+        self.assertEqual([record.video_id for record in result.items], ["2"])
+
+    def test_sort_and_page(self):
+        result = self.tiktok.get_list(1, 2, {"sort": "-video_id"})
+        self.assertEqual([record.video_id for record in result.items], ["3", "2"])
+        self.assertEqual((result.total_items, result.total_pages), (3, 2))
+
+        result = self.tiktok.get_list(2, 2, {"sort": "-video_id"})
+        self.assertEqual([record.video_id for record in result.items], ["1"])
+
+    def test_expand(self):
+        metadata = self.client.collection("metadata").create(
+            {"tiktok": self.records[0].id, "views": 1, "likes": 2, "everything": {}}
+        )
+        try:
+            record = self.client.collection("metadata").get_one(
+                metadata.id, {"expand": "tiktok"}
+            )
+            self.assertEqual(record.expand["tiktok"].video_id, "3")
+
+            # Filters can follow relations too
+            result = self.client.collection("metadata").get_list(
+                1, 10, {"filter": "tiktok.video_id = '3'"}
+            )
+            self.assertEqual([record.id for record in result.items], [metadata.id])
+        finally:
+            self.client.collection("metadata").delete(metadata.id)
+
+    def test_update_and_delete(self):
+        record = self.tiktok.update(self.records[0].id, {"origin": "hashtag"})
+        self.assertEqual(record.origin, "hashtag")
+        self.assertGreaterEqual(record.updated, self.records[0].updated)
+
+        self.tiktok.delete(record.id)
+        with self.assertRaises(ClientResponseError) as error:
+            self.tiktok.get_one(record.id)
+        self.assertEqual(error.exception.status, 404)
+
+    def test_unique(self):
+        with self.assertRaises(ClientResponseError) as error:
+            self.tiktok.create(
+                {
+                    "url": self.records[0].url,
+                    "origin": "channel",
+                    "query": "test",
+                    "video_id": "4",
+                }
+            )
+        self.assertEqual(error.exception.status, 400)
+
+    def test_latency(self):
+        self.server.latency = 0.05
+        self.server.reset_counters()
+
+        start: float = time.perf_counter()
+        self.tiktok.get_list(1, 1)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+        self.assertEqual(self.server.request_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main(failfast=True)
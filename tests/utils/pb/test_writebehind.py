@@ -0,0 +1,146 @@
+"""
+Tests for the write-behind queue.
+"""
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from . import test_collection_name
+
+from src.utils.pb.classes import SingletonPocketBase
+from src.utils.pb.writebehind import WriteBehindQueue, generate_record_id
+
+pb = SingletonPocketBase()
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.journal: Path = Path(self.directory.name).joinpath("journal.sqlite3")
+        self.record_ids: list[str] = []
+
+    def tearDown(self) -> None:
+        for record_id in self.record_ids:
+            if pb.search_single_record(test_collection_name, "id", record_id):
+                pb.delete(test_collection_name, record_id)
+        self.directory.cleanup()
+
+    def test_generate_record_id(self):
+        record_id = generate_record_id()
+        self.assertEqual(len(record_id), 15)
+        self.assertTrue(record_id.isalnum() and record_id.lower() == record_id)
+
+    def test_flush(self):
+        queue = WriteBehindQueue(self.journal)
+
+        record_id = queue.create(
+            test_collection_name, {"first_name": "Danny", "second_name": "Goob"}
+        )
+        self.record_ids.append(record_id)
+        # The writes of a record are flushed in order
+        queue.update(test_collection_name, record_id, {"first_name": "Dan"})
+        queue.update(test_collection_name, record_id, {"first_name": "Daniel"})
+        self.assertEqual(queue.pending(), 3)
+        self.assertIsNone(pb.search_single_record(test_collection_name, "id", record_id))
+
+        self.assertTrue(queue.flush())
+        self.assertEqual(queue.pending(), 0)
+        self.assertEqual(
+            pb.search_single_record(test_collection_name, "id", record_id).first_name,
+            "Daniel",
+        )
+        queue.stop()
+
+    def test_upsert(self):
+        record_id: str = pb.create(
+            test_collection_name, {"first_name": "Danny", "second_name": "Goob"}
+        ).id
+        self.record_ids.append(record_id)
+
+        queue = WriteBehindQueue(self.journal)
+        queued_ids: list[str] = queue.upsert_many(
+            test_collection_name,
+            "first_name",
+            [{"first_name": "Danny", "second_name": "Dean"}, {"first_name": "Becky"}],
+        )
+        self.record_ids.append(queued_ids[1])
+        # The existing record keeps its id, later writes of its queued id are its
+        queue.update(test_collection_name, queued_ids[0], {"second_name": "Doe"})
+        self.assertTrue(queue.flush())
+        self.assertEqual(queue.failed(), [])
+
+        records = pb.search_multiple_records(
+            test_collection_name, "first_name", "Danny"
+        )
+        self.assertEqual(
+            [(record.id, record.second_name) for record in records],
+            [(record_id, "Doe")],
+        )
+        self.assertIsNotNone(
+            pb.search_single_record(test_collection_name, "id", queued_ids[1])
+        )
+        queue.stop()
+
+    def test_restart(self):
+        queue = WriteBehindQueue(self.journal)
+        self.record_ids = queue.create_many(
+            test_collection_name,
+            [{"first_name": "Danny"}, {"first_name": "Becky"}],
+        )
+        queue.stop(flush=False)
+
+        # The writes survive in the journal, for the next queue
+        with WriteBehindQueue(self.journal, flush_interval=0.05) as queue:
+            self.assertEqual(queue.pending(), 2)
+
+        for record_id in self.record_ids:
+            self.assertIsNotNone(
+                pb.search_single_record(test_collection_name, "id", record_id)
+            )
+
+    def test_unavailable(self):
+        queue = WriteBehindQueue(self.journal)
+        self.record_ids.append(
+            queue.create(test_collection_name, {"first_name": "Danny"})
+        )
+
+        url: str = pb.instance.base_url
+        pb.instance.base_url = "http://127.0.0.1:9"
+        try:
+            self.assertFalse(queue.flush())
+        finally:
+            pb.instance.base_url = url
+
+        # The write is kept, and retried
+        self.assertEqual(queue.pending(), 1)
+        self.assertEqual(queue.failed(), [])
+        self.assertTrue(queue.flush())
+        self.assertIsNotNone(
+            pb.search_single_record(test_collection_name, "id", self.record_ids[0])
+        )
+        queue.stop()
+
+    def test_failed(self):
+        queue = WriteBehindQueue(self.journal)
+        queue.update(test_collection_name, generate_record_id(), {"first_name": "John"})
+        self.record_ids.append(
+            queue.create(test_collection_name, {"first_name": "Danny"})
+        )
+
+        # A failed write doesn't stop the others
+        self.assertTrue(queue.flush())
+        self.assertEqual(queue.pending(), 0)
+        self.assertEqual(len(queue.failed()), 1)
+        (collection, action, _, data), _ = queue.failed()[0]
+        self.assertEqual(
+            (collection, action, data),
+            (test_collection_name, "update", {"first_name": "John"}),
+        )
+
+        queue.clear_failed()
+        self.assertEqual(queue.failed(), [])
+        queue.stop()
+
+
+if __name__ == "__main__":
+    unittest.main(failfast=True)
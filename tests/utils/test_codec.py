@@ -0,0 +1,131 @@
+import unittest
+from importlib.util import find_spec
+
+from src.apis.tiktok.typehints import ItemListPage, VideoStatsState
+from src.utils import codec
+
+PAGE: bytes = (
+    b'{"itemList":[{"id":"7257173046899903771","createTime":1689000000,'
+    b'"stats":{"playCount":10,"diggCount":2},"author":{"uniqueId":"channel"}}],'
+    b'"hasMorePrevious":false,"extra":{"now":1689000000},"log_pb":{"id":"abc"}}'
+)
+
+STATE: str = (
+    '{"AppContext":{"appContext":{"language":"en"}},"ItemModule":'
+    '{"7257173046899903771":{"id":"7257173046899903771","desc":"A video é",'
+    '"stats":{"collectCount":1,"commentCount":2,"diggCount":3,"playCount":4,'
+    '"shareCount":5}}},"UserModule":{"users":{}}}'
+)
+
+# Payloads on which the codecs differ if they're not careful
+EDGE_CASES: list[bytes] = [
+    # A null stat
+    b'{"ItemModule":{"1":{"stats":{"playCount":null,"diggCount":3}}}}',
+    # Integers which don't fit in 64 bits
+    b'{"a":123456789012345678901234567890,"b":-9223372036854775809,"c":[1,2]}',
+    b"[18446744073709551616]",
+    b"18446744073709551616",
+    # A string which looks like one
+    b'{"id":"1234567890123456789012","desc":"a,12345678901234567890"}',
+    b'{"itemList":null,"hasMorePrevious":null}',
+]
+
+
+class TestCodec(unittest.TestCase):
+    def setUp(self) -> None:
+        self.codecs = [
+            codec.use_codec(name) for name in codec.CODECS if find_spec(name)
+        ]
+
+    def tearDown(self) -> None:
+        codec.use_codec()
+
+    def test_loads_dumps(self):
+        value = {"a": [1, 2.5, None, True], "b": {"c": "é"}, "d": ""}
+        for json_codec in self.codecs:
+            encoded: bytes = json_codec.dumps(value)
+            self.assertIsInstance(encoded, bytes)
+            self.assertNotIn(b" ", encoded)
+            self.assertEqual(json_codec.loads(encoded), value)
+            self.assertEqual(json_codec.loads(encoded.decode()), value)
+
+            with self.assertRaises(codec.DecodeError):
+                json_codec.loads(b'{"a": ')
+            # Can be caught like json's errors
+            self.assertTrue(issubclass(codec.DecodeError, ValueError))
+
+            encoded = json_codec.dumps({"a": object()}, default=str)
+            self.assertTrue(json_codec.loads(encoded)["a"].startswith("<object "))
+
+    def test_decode(self):
+        for json_codec in self.codecs:
+            page: dict = json_codec.decode(PAGE, ItemListPage)
+            self.assertEqual(set(page), {"itemList", "hasMorePrevious"})
+            # Items stored whole are kept whole
+            self.assertEqual(page["itemList"][0]["author"], {"uniqueId": "channel"})
+
+            state: dict = json_codec.decode(STATE, VideoStatsState)
+            self.assertEqual(
+                state,
+                {
+                    "ItemModule": {
+                        "7257173046899903771": {
+                            "stats": {
+                                "collectCount": 1,
+                                "commentCount": 2,
+                                "diggCount": 3,
+                                "playCount": 4,
+                                "shareCount": 5,
+                            }
+                        }
+                    }
+                },
+            )
+
+    def test_codecs_agree(self):
+        json_codec = codec.JSONCodec()
+        for data in EDGE_CASES:
+            expected = json_codec.loads(data)
+            for other in self.codecs:
+                self.assertEqual(other.loads(data), expected, (other.name, data))
+                self.assertEqual(other.loads(data.decode()), expected)
+                self.assertEqual(other.loads(other.dumps(expected)), expected)
+
+        for data, target in [
+            (EDGE_CASES[0], VideoStatsState),
+            (EDGE_CASES[-1], ItemListPage),
+            (PAGE, ItemListPage),
+        ]:
+            expected = json_codec.decode(data, target)
+            for other in self.codecs:
+                self.assertEqual(other.decode(data, target), expected, other.name)
+
+        self.assertIsInstance(
+            json_codec.loads(EDGE_CASES[1])["a"], int
+        )
+
+    def test_rejected_by_fast_codecs(self):
+        # Accepted by json only (see the module docstring)
+        for data in [b"[NaN]", b'["\\ud800"]']:
+            for json_codec in self.codecs:
+                if json_codec.name == "json":
+                    json_codec.loads(data)
+                    continue
+                with self.assertRaises(codec.DecodeError):
+                    json_codec.loads(data)
+
+    def test_use_codec(self):
+        self.assertEqual(codec.use_codec("json").name, "json")
+        self.assertEqual(codec.current_codec().name, "json")
+        self.assertEqual(codec.loads("[1]"), [1])
+
+        with self.assertRaises(ValueError):
+            codec.use_codec("yaml")
+
+        # The fastest installed one
+        installed = [name for name in codec.CODECS if find_spec(name)]
+        self.assertEqual(codec.use_codec().name, installed[0])
+
+
+if __name__ == "__main__":
+    unittest.main()